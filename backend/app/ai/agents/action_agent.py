@@ -30,7 +30,7 @@ class ActionAgent(BaseAgent):
     
     async def execute(self, context: AgentContext) -> AgentResult:
         """Execute requested action"""
-        trace = self.create_trace(f"Processing action for request: {context.current_request}")
+        trace = self.create_trace(f"Processing action for request: {context.current_request}", user_id=context.user_id)
         
         try:
             # We determine the specific action from the intent or context
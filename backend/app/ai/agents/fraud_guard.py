@@ -6,6 +6,7 @@ Uses pattern analysis and behavioral AI
 from typing import Dict, Any, List
 from app.ai.engine import BaseAgent, AgentContext, AgentResult, ReasoningTrace, ThoughtType
 from app.services.groq import groq_service
+from app.services.supabase import supabase_service
 import logging
 from datetime import datetime, timedelta
 
@@ -41,7 +42,7 @@ class FraudGuardAgent(BaseAgent):
     
     async def execute(self, context: AgentContext) -> AgentResult:
         """Perform comprehensive fraud analysis"""
-        trace = self.create_trace(f"Fraud check for user {context.user_id[:8]}...")
+        trace = self.create_trace(f"Fraud check for user {context.user_id[:8]}...", user_id=context.user_id)
         
         try:
             # Initialize fraud signals
@@ -175,6 +176,18 @@ class FraudGuardAgent(BaseAgent):
                     "risk_weight": 0.4,
                 }
         
+        # Vouch rings: backers this user vouches for in return (O(degree) via the vouch graph)
+        graph = await supabase_service.get_vouch_graph()
+        vouchers = graph.vouchers(context.user_id)
+        reciprocal = graph.reciprocal(context.user_id)
+        if len(vouchers) >= 2 and len(reciprocal) / len(vouchers) > self.thresholds['suspicious_vouch_ratio']:
+            return {
+                "type": "collusion",
+                "suspicious": True,
+                "reason": f"{len(reciprocal)} of {len(vouchers)} vouchers are vouched for back",
+                "risk_weight": 0.4,
+            }
+        
         return {"type": "collusion", "suspicious": False, "risk_weight": 0}
     
     async def _check_behavioral_anomalies(self, context: AgentContext) -> Dict:
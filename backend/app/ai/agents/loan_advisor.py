@@ -32,7 +32,7 @@ class LoanAdvisorAgent(BaseAgent):
     
     async def execute(self, context: AgentContext) -> AgentResult:
         """Analyze user situation and provide loan advice"""
-        trace = self.create_trace(f"Loan advice for user {context.user_id[:8]}...")
+        trace = self.create_trace(f"Loan advice for user {context.user_id[:8]}...", user_id=context.user_id)
         
         try:
             # Step 1: Analyze income from financial diary
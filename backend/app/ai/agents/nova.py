@@ -6,6 +6,7 @@ Primary user-facing agent with multilingual support
 from typing import Dict, Any, List
 from app.ai.engine import BaseAgent, AgentContext, AgentResult, ReasoningTrace, ThoughtType
 from app.services.groq import groq_service
+from app.ai.intent_classifier import KeywordIntentClassifier
 from app.config import get_settings
 import json
 import logging
@@ -32,6 +33,9 @@ class NovaAgent(BaseAgent):
             description="Friendly AI financial buddy who speaks your language"
         )
         self.personality_prompts = self._load_personality_prompts()
+        self.intent_classifier = KeywordIntentClassifier(
+            threshold=settings.intent_fast_path_threshold
+        )
     
     def _load_personality_prompts(self) -> Dict[str, str]:
         """Load language-specific personality prompts"""
@@ -90,7 +94,7 @@ NEVER:
     
     async def execute(self, context: AgentContext) -> AgentResult:
         """Process user message and generate response"""
-        trace = self.create_trace(f"Respond to: {context.current_request[:50]}...")
+        trace = self.create_trace(f"Respond to: {context.current_request[:50]}...", user_id=context.user_id)
         
         try:
             # Step 1: Understand context
@@ -169,7 +173,12 @@ NEVER:
             )
     
     async def _detect_intent(self, message: str, language: str) -> Dict[str, Any]:
-        """Detect user intent using Groq LLM"""
+        """Detect user intent (local fast path first, then cached Groq LLM)"""
+        if settings.intent_fast_path_enabled:
+            fast = self.intent_classifier.classify(message)
+            if fast:
+                return fast
+        
         prompt = f"""Analyze this message and return JSON with intent and entities:
 Message: "{message}"
 
@@ -186,7 +195,7 @@ Possible intents:
 Return ONLY valid JSON: {{"intent": "...", "confidence": 0.0-1.0, "entities": {{}}}}
 """
         
-        response = await groq_service.chat(prompt)
+        response = await groq_service.chat(prompt, cache=True)
         try:
             # Parse JSON from response
             json_str = response.strip()
@@ -44,7 +44,7 @@ class RiskOracleAgent(BaseAgent):
     
     async def execute(self, context: AgentContext) -> AgentResult:
         """Perform comprehensive risk assessment"""
-        trace = self.create_trace(f"Risk assessment for user {context.user_id[:8]}...")
+        trace = self.create_trace(f"Risk assessment for user {context.user_id[:8]}...", user_id=context.user_id)
         
         try:
             # Step 1: Gather all data
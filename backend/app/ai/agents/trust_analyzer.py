@@ -5,6 +5,7 @@ Analyzes the social trust graph
 
 from typing import Dict, Any, List
 from app.ai.engine import BaseAgent, AgentContext, AgentResult, ReasoningTrace, ThoughtType
+from app.services.supabase import supabase_service
 import logging
 
 logger = logging.getLogger(__name__)
@@ -30,7 +31,7 @@ class TrustAnalyzerAgent(BaseAgent):
     
     async def execute(self, context: AgentContext) -> AgentResult:
         """Analyze user's trust network"""
-        trace = self.create_trace(f"Trust analysis for user {context.user_id[:8]}...")
+        trace = self.create_trace(f"Trust analysis for user {context.user_id[:8]}...", user_id=context.user_id)
         
         try:
             # Step 1: Analyze current trust components
@@ -60,6 +61,15 @@ class TrustAnalyzerAgent(BaseAgent):
                 confidence=0.85
             )
             
+            # Step 3b: Map the user's position in the vouch graph
+            network = await self._analyze_network(context)
+            trace.analyze(
+                f"Network: vouched for {network['vouching_for']} users, "
+                f"backed by {network['backed_by']}, "
+                f"{network['mutual']} mutual",
+                confidence=0.85
+            )
+            
             # Step 4: Predict future trust score
             prediction = self._predict_trust_trajectory(context)
             trace.hypothesize(
@@ -92,6 +102,7 @@ class TrustAnalyzerAgent(BaseAgent):
                     "trust_score": context.trust_score,
                     "components": components,
                     "vouch_quality": vouch_quality,
+                    "network": network,
                     "prediction": prediction,
                     "tips": tips,
                     "bharosa_visual": bharosa_visual,
@@ -160,6 +171,18 @@ class TrustAnalyzerAgent(BaseAgent):
             "total_staked": total_staked,
         }
     
+    async def _analyze_network(self, context: AgentContext) -> Dict[str, Any]:
+        """Active vouch edges around the user, read from the vouch graph index"""
+        graph = await supabase_service.get_vouch_graph()
+        vouching_for = graph.vouchees(context.user_id)
+        backed_by = graph.vouchers(context.user_id)
+        
+        return {
+            "vouching_for": len(vouching_for),
+            "backed_by": len(backed_by),
+            "mutual": len(vouching_for & backed_by),
+        }
+    
     def _predict_trust_trajectory(self, context: AgentContext) -> Dict[str, Any]:
         """Predict trust score in 30 days"""
         current = context.trust_score
@@ -0,0 +1,94 @@
+"""
+Agent Context Cache
+Bounded TTL/LRU cache of per-user AgentContext snapshots
+"""
+
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+import logging
+import time
+
+from app.ai.engine import AgentContext
+
+logger = logging.getLogger(__name__)
+
+
+class ContextCache:
+    """
+    Keeps the most recently built AgentContext per user
+
+    Entries expire after `ttl` seconds and the least recently used entry is
+    evicted once `max_entries` is reached. Writes that touch a user (vouches,
+    loans, diary, trust score, balance) invalidate that user's entry through
+    SupabaseService write listeners.
+    """
+
+    def __init__(self, max_entries: int = 1000, ttl: float = 30.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, AgentContext]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, user_id: str) -> Optional[AgentContext]:
+        """Fresh per-request copy of the cached context, or None"""
+        entry = self._entries.get(user_id)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        stored_at, context = entry
+        if time.monotonic() - stored_at > self.ttl:
+            del self._entries[user_id]
+            self.evictions += 1
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(user_id)
+        self.hits += 1
+        return self._fresh(context)
+
+    def put(self, user_id: str, context: AgentContext) -> AgentContext:
+        """Cache a snapshot and return a copy safe for the caller to use"""
+        if self.max_entries <= 0:
+            return context
+        self._entries[user_id] = (time.monotonic(), context)
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+        return self._fresh(context)
+
+    @staticmethod
+    def _fresh(context: AgentContext) -> AgentContext:
+        # Agents only write the per-request fields, so a shallow copy with
+        # those reset keeps the cached snapshot untouched
+        return context.model_copy(update={
+            "current_request": None,
+            "agent_results": {},
+            "reasoning_traces": [],
+        })
+
+    def invalidate(self, user_id: str, operation: str = ""):
+        """Drop a user's snapshot (signature matches SupabaseService write listeners)"""
+        if self._entries.pop(str(user_id), None) is not None:
+            self.invalidations += 1
+            logger.debug(f"Context cache invalidated for {user_id} by {operation or 'manual'}")
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
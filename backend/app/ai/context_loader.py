@@ -0,0 +1,102 @@
+"""
+Concurrent Context Loader
+Fans out the per-user reads behind AgentContext and times each one
+"""
+
+from typing import Any, Awaitable, Callable, Dict, Optional
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class ContextSource:
+    """One dependency of the agent context (a single storage read)"""
+
+    def __init__(
+        self,
+        name: str,
+        fetch: Callable[[str], Awaitable[Any]],
+        default: Callable[[], Any] = lambda: None,
+        timeout: Optional[float] = None,
+    ):
+        self.name = name
+        self.fetch = fetch
+        self.default = default  # Factory, so list defaults are never shared
+        self.timeout = timeout
+
+
+class ContextLoadReport:
+    """Per-source outcome of a context load"""
+
+    def __init__(self):
+        self.latency_ms: Dict[str, int] = {}
+        self.status: Dict[str, str] = {}  # "ok" | "timeout" | "error"
+        self.total_ms: int = 0
+
+    @property
+    def missing(self) -> list:
+        """Sources that fell back to their default value"""
+        return [name for name, status in self.status.items() if status != "ok"]
+
+    @property
+    def slowest(self) -> Optional[str]:
+        if not self.latency_ms:
+            return None
+        return max(self.latency_ms, key=self.latency_ms.get)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "latency_ms": dict(self.latency_ms),
+            "status": dict(self.status),
+            "total_ms": self.total_ms,
+            "slowest": self.slowest,
+        }
+
+
+class ContextLoader:
+    """
+    Loads all context sources concurrently with partial-result semantics
+
+    Each source gets its own timeout. A source that times out or fails is
+    replaced by its default so one slow table never blocks the others.
+    """
+
+    def __init__(self, sources: list, default_timeout: float = 2.0):
+        self.sources: Dict[str, ContextSource] = {s.name: s for s in sources}
+        self.default_timeout = default_timeout
+
+    async def _load_one(self, source: ContextSource, user_id: str, report: ContextLoadReport) -> Any:
+        timeout = source.timeout if source.timeout is not None else self.default_timeout
+        start = time.perf_counter()
+        try:
+            value = await asyncio.wait_for(source.fetch(user_id), timeout=timeout)
+            report.status[source.name] = "ok"
+        except asyncio.TimeoutError:
+            logger.warning(f"Context source {source.name} timed out after {timeout}s for {user_id}")
+            value = source.default()
+            report.status[source.name] = "timeout"
+        except Exception as e:
+            logger.warning(f"Context source {source.name} failed for {user_id}: {e}")
+            value = source.default()
+            report.status[source.name] = "error"
+        report.latency_ms[source.name] = int((time.perf_counter() - start) * 1000)
+        return value
+
+    async def load(self, user_id: str) -> tuple:
+        """Returns ({source name: value}, ContextLoadReport)"""
+        report = ContextLoadReport()
+        start = time.perf_counter()
+
+        values = await asyncio.gather(*[
+            self._load_one(source, user_id, report) for source in self.sources.values()
+        ])
+
+        report.total_ms = int((time.perf_counter() - start) * 1000)
+        logger.info(
+            f"Context loaded for {user_id} in {report.total_ms}ms "
+            f"(slowest: {report.slowest}, missing: {report.missing or 'none'})",
+            extra={"context_latency_ms": report.latency_ms},
+        )
+        return dict(zip(self.sources.keys(), values)), report
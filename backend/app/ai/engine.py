@@ -7,13 +7,18 @@ for hackathon judges to see the reasoning.
 """
 
 from typing import Optional, List, Dict, Any, Literal
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr, field_serializer
 from datetime import datetime
 from enum import Enum
 import json
 import logging
+import os
+import time
 from abc import ABC, abstractmethod
 
+from app.ai.trace_store import TraceStore
+from app.config import get_settings
+
 logger = logging.getLogger(__name__)
 
 
@@ -32,27 +37,94 @@ class ThoughtType(str, Enum):
     CONCLUSION = "conclusion"        # Final decision
 
 
-class ReasoningStep(BaseModel):
-    """Single step in AI reasoning chain - visible to judges"""
-    step_number: int
-    thought_type: ThoughtType
-    content: str
-    confidence: float = Field(ge=0, le=1)
-    timestamp: datetime = Field(default_factory=datetime.utcnow)
-    metadata: Dict[str, Any] = {}
+THOUGHT_ICONS = {
+    ThoughtType.OBSERVATION: "👁️",
+    ThoughtType.ANALYSIS: "🔍",
+    ThoughtType.HYPOTHESIS: "💭",
+    ThoughtType.ACTION: "⚡",
+    ThoughtType.REFLECTION: "🔄",
+    ThoughtType.CONCLUSION: "✅",
+}
+
+
+class ReasoningStep:
+    """
+    Single step in AI reasoning chain - visible to judges
+
+    Plain __slots__ object rather than a pydantic model: agents emit many of
+    these per request, so construction only stores fields. The timestamp is
+    kept as epoch seconds and only turned into a datetime when serialized.
+    """
+
+    __slots__ = ("step_number", "thought_type", "content", "confidence", "metadata", "_ts")
+
+    def __init__(
+        self,
+        step_number: int,
+        thought_type: ThoughtType,
+        content: str,
+        confidence: float,
+        metadata: Optional[Dict[str, Any]] = None,
+        timestamp: Optional[float] = None,
+    ):
+        if not 0 <= confidence <= 1:
+            raise ValueError(f"confidence must be between 0 and 1, got {confidence}")
+        self.step_number = step_number
+        self.thought_type = thought_type if type(thought_type) is ThoughtType else ThoughtType(thought_type)
+        self.content = content
+        self.confidence = confidence
+        self.metadata = metadata
+        self._ts = time.time() if timestamp is None else timestamp
+
+    @property
+    def timestamp(self) -> datetime:
+        return datetime.utcfromtimestamp(self._ts)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialized form (same shape as the old pydantic model_dump)"""
+        return {
+            "step_number": self.step_number,
+            "thought_type": self.thought_type,
+            "content": self.content,
+            "confidence": self.confidence,
+            "timestamp": self.timestamp,
+            "metadata": dict(self.metadata) if self.metadata else {},
+        }
+
+    model_dump = to_dict
+
+    def display_line(self) -> str:
+        icon = THOUGHT_ICONS.get(self.thought_type, "•")
+        return f"{icon} **Step {self.step_number}**: {self.content} ({self.confidence:.0%})"
+
+    def __repr__(self) -> str:
+        return f"ReasoningStep({self.step_number}, {self.thought_type.value!r}, {self.content[:40]!r})"
 
 
 class ReasoningTrace(BaseModel):
     """Complete reasoning trace for an AI decision"""
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
     trace_id: str
     agent_name: str
     task: str
+    user_id: Optional[str] = None
     steps: List[ReasoningStep] = []
     final_decision: Optional[str] = None
     total_confidence: float = 0.0
     duration_ms: int = 0
     created_at: datetime = Field(default_factory=datetime.utcnow)
-    
+
+    # Memoized to_display() output per language, tagged with _memo_key()
+    _rendered: Dict[str, Any] = PrivateAttr(default_factory=dict)
+
+    @field_serializer("steps")
+    def _serialize_steps(self, steps: List[ReasoningStep]) -> List[Dict[str, Any]]:
+        return [s.to_dict() for s in steps]
+
+    def _memo_key(self) -> tuple:
+        return (len(self.steps), self.final_decision, self.total_confidence)
+
     def add_thought(
         self,
         thought_type: ThoughtType,
@@ -61,14 +133,7 @@ class ReasoningTrace(BaseModel):
         metadata: Dict = None,
     ):
         """Add a reasoning step to the trace"""
-        step = ReasoningStep(
-            step_number=len(self.steps) + 1,
-            thought_type=thought_type,
-            content=content,
-            confidence=confidence,
-            metadata=metadata or {},
-        )
-        self.steps.append(step)
+        self.steps.append(ReasoningStep(len(self.steps) + 1, thought_type, content, confidence, metadata))
         return self
     
     def observe(self, content: str, confidence: float = 0.9):
@@ -99,28 +164,37 @@ class ReasoningTrace(BaseModel):
         return self
     
     def to_display(self, language: str = "en") -> str:
-        """Format trace for display to users/judges"""
+        """Format trace for display to users/judges (memoized until the trace changes)"""
+        key = self._memo_key()
+        rendered = self.__pydantic_private__["_rendered"]
+        cached = rendered.get(language)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+
         lines = [f"🧠 **{self.agent_name}** reasoning for: {self.task}\n"]
-        
-        icons = {
-            ThoughtType.OBSERVATION: "👁️",
-            ThoughtType.ANALYSIS: "🔍",
-            ThoughtType.HYPOTHESIS: "💭",
-            ThoughtType.ACTION: "⚡",
-            ThoughtType.REFLECTION: "🔄",
-            ThoughtType.CONCLUSION: "✅",
-        }
-        
-        for step in self.steps:
-            icon = icons.get(step.thought_type, "•")
-            conf = f"({step.confidence:.0%})"
-            lines.append(f"{icon} **Step {step.step_number}**: {step.content} {conf}")
+        lines.extend(step.display_line() for step in self.steps)
         
         if self.final_decision:
             lines.append(f"\n🎯 **Decision**: {self.final_decision}")
             lines.append(f"📊 **Confidence**: {self.total_confidence:.0%}")
         
-        return "\n".join(lines)
+        text = "\n".join(lines)
+        rendered[language] = (key, text)
+        return text
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Same output as model_dump(), built directly instead of via the pydantic serializer"""
+        return {
+            "trace_id": self.trace_id,
+            "agent_name": self.agent_name,
+            "task": self.task,
+            "user_id": self.user_id,
+            "steps": [s.to_dict() for s in self.steps],
+            "final_decision": self.final_decision,
+            "total_confidence": self.total_confidence,
+            "duration_ms": self.duration_ms,
+            "created_at": self.created_at,
+        }
 
 
 # ============================================
@@ -133,14 +207,23 @@ class BaseAgent(ABC):
     def __init__(self, name: str, description: str):
         self.name = name
         self.description = description
-        self.traces: List[ReasoningTrace] = []
+        self.traces = self._create_trace_store()
+    
+    def _create_trace_store(self) -> TraceStore:
+        """Bounded per-agent trace buffer (agents live for the whole process)"""
+        settings = get_settings()
+        spill_path = None
+        if settings.trace_spill_dir:
+            spill_path = os.path.join(settings.trace_spill_dir, f"{self.name}.traces.jsonl")
+        return TraceStore(capacity=settings.trace_buffer_size, spill_path=spill_path)
     
-    def create_trace(self, task: str) -> ReasoningTrace:
+    def create_trace(self, task: str, user_id: Optional[str] = None) -> ReasoningTrace:
         """Create a new reasoning trace"""
         trace = ReasoningTrace(
             trace_id=f"{self.name}_{datetime.utcnow().timestamp()}",
             agent_name=self.name,
             task=task,
+            user_id=str(user_id) if user_id else None,
         )
         self.traces.append(trace)
         return trace
@@ -152,7 +235,7 @@ class BaseAgent(ABC):
     
     def get_latest_trace(self) -> Optional[ReasoningTrace]:
         """Get the most recent reasoning trace"""
-        return self.traces[-1] if self.traces else None
+        return self.traces.latest()
 
 
 # ============================================
@@ -173,6 +256,8 @@ class AgentContext(BaseModel):
     current_request: Optional[str] = None
     agent_results: Dict[str, Any] = {}  # Results from other agents
     reasoning_traces: List[ReasoningTrace] = []
+    context_latency_ms: Dict[str, int] = {}  # Per-source load time
+    missing_sources: List[str] = []  # Sources that timed out or failed
     
     def add_trace(self, trace: ReasoningTrace):
         self.reasoning_traces.append(trace)
@@ -0,0 +1,95 @@
+"""
+Local Intent Classifier - Nova's fast path
+Answers trivially classifiable messages without an LLM round trip
+"""
+
+from typing import Any, Dict, Optional
+import unicodedata
+
+
+# Words that carry no intent on their own ("what is my balance?" -> "balance")
+FILLER_WORDS = {
+    "please", "pls", "plz", "my", "me", "show", "check", "what", "whats", "is",
+    "the", "tell", "how", "much", "current", "ji", "kya", "hai", "mera", "meri",
+    "mujhe", "batao", "dikhao", "मेरा", "मेरी", "क्या", "है", "बताओ", "दिखाओ",
+    "എന്റെ", "എത്ര",
+}
+
+# Whole-message phrases (after filler removal) that map to a single intent
+INTENT_PHRASES = {
+    "greeting": [
+        "hi", "hello", "hey", "hii", "namaste", "namaskar", "good morning",
+        "good evening", "good afternoon", "नमस्ते", "नमस्कार", "हेलो",
+        "നമസ്കാരം", "ഹലോ",
+    ],
+    "balance_check": [
+        "balance", "saathi balance", "saathi tokens", "saathi", "tokens",
+        "wallet", "wallet balance", "बैलेंस", "साथी बैलेंस", "ബാലൻസ്",
+    ],
+    "trust_score": [
+        "score", "trust score", "bharosa", "bharosa score", "trust level",
+        "trust", "भरोसा", "भरोसा स्कोर", "ट्रस्ट स्कोर", "വിശ്വാസ സ്കോർ",
+    ],
+    "payment_reminder": [
+        "emi due", "next emi", "emi date", "when emi due", "when next emi",
+        "किस्त कब", "अगली किस्त",
+    ],
+}
+
+
+def _normalize(message: str) -> str:
+    # Drop punctuation/symbols only - Indic vowel signs are combining marks, not \w
+    text = "".join(
+        " " if unicodedata.category(ch)[0] in "PS" else ch
+        for ch in (message or "").lower()
+    )
+    words = text.split()
+    return " ".join(w for w in words if w not in FILLER_WORDS)
+
+
+class KeywordIntentClassifier:
+    """
+    Exact-phrase classifier for short, unambiguous messages
+
+    A message is classified only when, once filler words and punctuation are
+    stripped, it is exactly one known phrase. Anything else ("hi, I need a
+    loan") falls through to the LLM.
+    """
+
+    EXACT_CONFIDENCE = 0.95
+
+    def __init__(self, threshold: float = 0.9):
+        self.threshold = threshold
+        self._phrases: Dict[str, str] = {
+            _normalize(phrase): intent
+            for intent, phrases in INTENT_PHRASES.items()
+            for phrase in phrases
+        }
+        self.lookups = 0
+        self.hits = 0
+        self.by_intent: Dict[str, int] = {}
+
+    def classify(self, message: str) -> Optional[Dict[str, Any]]:
+        """Return an intent dict for high-confidence matches, else None"""
+        self.lookups += 1
+        normalized = _normalize(message)
+        intent = self._phrases.get(normalized) if normalized else None
+        if intent is None or self.EXACT_CONFIDENCE < self.threshold:
+            return None
+
+        self.hits += 1
+        self.by_intent[intent] = self.by_intent.get(intent, 0) + 1
+        return {
+            "intent": intent,
+            "confidence": self.EXACT_CONFIDENCE,
+            "entities": {},
+            "source": "fast_path",
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "hit_rate": round(self.hits / self.lookups, 4) if self.lookups else 0.0,
+            "by_intent": dict(self.by_intent),
+        }
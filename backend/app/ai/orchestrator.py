@@ -11,8 +11,12 @@ from app.ai.agents.fraud_guard import FraudGuardAgent
 from app.ai.agents.loan_advisor import LoanAdvisorAgent
 from app.ai.agents.trust_analyzer import TrustAnalyzerAgent
 from app.ai.agents.action_agent import ActionAgent
+from app.ai.context_loader import ContextLoader, ContextSource
+from app.ai.context_cache import ContextCache
+from app.ai.workflow import WorkflowExecutor, WorkflowGraph
 from app.services.supabase import supabase_service
 from app.services.mastra import mastra_service
+from app.services.groq import groq_service
 import asyncio
 import logging
 from datetime import datetime
@@ -45,33 +49,83 @@ class AgentOrchestrator:
             "ActionAgent": ActionAgent(),
         }
         
-        # Define agent workflows for complex tasks
-        self.workflows = {
-            "loan_request": ["FraudGuard", "RiskOracle", "LoanAdvisor", "ActionAgent"],
-            "trust_inquiry": ["TrustAnalyzer", "ActionAgent"],
-            "vouch_request": ["FraudGuard", "TrustAnalyzer"],
-            "emergency_request": ["FraudGuard", "RiskOracle", "ActionAgent"],
+        # Define agent workflows for complex tasks as dependency graphs:
+        # agent -> agents whose results it reads (or must clear it) first.
+        # Independent agents only read the shared context and run concurrently.
+        self.workflows: Dict[str, WorkflowGraph] = {
+            "loan_request": {
+                "FraudGuard": [],
+                "RiskOracle": [],
+                "LoanAdvisor": [],
+                "ActionAgent": ["FraudGuard", "RiskOracle"],
+            },
+            "trust_inquiry": {
+                "TrustAnalyzer": [],
+                "ActionAgent": [],
+            },
+            "vouch_request": {
+                "FraudGuard": [],
+                "TrustAnalyzer": [],
+            },
+            "emergency_request": {
+                "FraudGuard": [],
+                "RiskOracle": [],
+                "ActionAgent": ["FraudGuard", "RiskOracle"],
+            },
+            "loan_decision": {
+                "FraudGuard": [],
+                "RiskOracle": [],
+                "LoanAdvisor": [],
+            },
         }
+        self.executor = WorkflowExecutor(self.agents)
+        
+        # Context sources are fetched concurrently, each with its own timeout
+        self.context_loader = ContextLoader(
+            [
+                ContextSource("profile", supabase_service.get_profile),
+                ContextSource("vouches", supabase_service.get_vouches_received, list),
+                ContextSource("loans", supabase_service.get_user_loans, list),
+                ContextSource("circles", supabase_service.get_user_circles, list),
+                ContextSource("diary", lambda uid: supabase_service.get_diary_entries(uid, 50), list),
+            ],
+            default_timeout=settings.context_source_timeout,
+        )
+        
+        # Recent contexts are reused until a write touches that user
+        self.context_cache = ContextCache(
+            max_entries=settings.context_cache_size,
+            ttl=settings.context_cache_ttl,
+        )
+        supabase_service.add_write_listener(self.context_cache.invalidate)
     
     async def build_context(self, user_id: str) -> AgentContext:
-        """Build complete agent context from database"""
-        profile = await supabase_service.get_profile(user_id)
-        vouches = await supabase_service.get_vouches_received(user_id)
-        loans = await supabase_service.get_user_loans(user_id)
-        circles = await supabase_service.get_user_circles(user_id)
-        diary = await supabase_service.get_diary_entries(user_id, 50)
+        """Build complete agent context from database (or the context cache)"""
+        cached = self.context_cache.get(user_id)
+        if cached is not None:
+            return cached
+        
+        sources, report = await self.context_loader.load(user_id)
+        profile = sources["profile"]
         
-        return AgentContext(
+        context = AgentContext(
             user_id=user_id,
             user_profile=profile or {},
             trust_score=profile.get("trust_score", 0) if profile else 0,
             saathi_balance=float(profile.get("saathi_balance", 0)) if profile else 0,
             language=profile.get("language", "en") if profile else "en",
-            circles=circles,
-            loans=loans,
-            vouches=vouches,
-            financial_diary=diary,
+            circles=sources["circles"],
+            loans=sources["loans"],
+            vouches=sources["vouches"],
+            financial_diary=sources["diary"],
+            context_latency_ms=report.latency_ms,
+            missing_sources=report.missing,
         )
+        
+        # Partial loads are not cached, so a timed-out source is retried next time
+        if not report.missing:
+            return self.context_cache.put(user_id, context)
+        return context
     
     async def process_message(
         self,
@@ -93,7 +147,7 @@ class AgentOrchestrator:
         all_traces = []
         
         # Try Mastra first for enhanced reasoning
-        if settings.mastra_service_url:
+        if settings.mastra_service_url and mastra_service.available:
             mastra_result = await mastra_service.chat(
                 user_id=user_id,
                 message=message,
@@ -124,10 +178,11 @@ class AgentOrchestrator:
                     "response": mastra_result["response"],
                     "audio_url": None,
                     "reasoning_traces": [t.to_display(language) for t in all_traces],
-                    "reasoning_traces_raw": [t.model_dump() for t in all_traces],
+                    "reasoning_traces_raw": [t.to_dict() for t in all_traces],
                     "agents_used": ["Mastra-Nova"],
                     "intent": mastra_result.get("intent", "chat"),
                     "duration_ms": duration_ms,
+                    "context_latency_ms": context.context_latency_ms,
                 }
 
         # Fallback to local agents
@@ -142,15 +197,11 @@ class AgentOrchestrator:
             
             # Determine full workflow
             intent = nova_result.result.get("intent", "")
-            workflow = self.workflows.get(intent, [next_agent_name])
+            workflow = self.workflows.get(intent) or {next_agent_name: []}
             
             # Execute workflow agents
-            for agent_name in workflow:
-                if agent_name in self.agents:
-                    agent = self.agents[agent_name]
-                    result = await agent.execute(context)
-                    context.agent_results[agent_name] = result.result
-                    all_traces.append(result.reasoning_trace)
+            run = await self.executor.run(workflow, context, stop_when=self._is_blocked)
+            all_traces.extend(r.reasoning_trace for r in run.ordered(workflow))
         
         # Calculate total time
         duration_ms = int((datetime.utcnow() - start_time).total_seconds() * 1000)
@@ -168,10 +219,11 @@ class AgentOrchestrator:
             "data": final_response.get("data"),
             "audio_url": None,  # Would integrate ElevenLabs
             "reasoning_traces": [t.to_display(language) for t in all_traces],
-            "reasoning_traces_raw": [t.model_dump() for t in all_traces],
+            "reasoning_traces_raw": [t.to_dict() for t in all_traces],
             "agents_used": [t.agent_name for t in all_traces],
             "intent": nova_result.result.get("intent"),
             "duration_ms": duration_ms,
+            "context_latency_ms": context.context_latency_ms,
         }
     
     async def process_loan_request(
@@ -183,7 +235,7 @@ class AgentOrchestrator:
     ) -> Dict[str, Any]:
         """
         Full AI pipeline for loan requests
-        Runs: FraudGuard → RiskOracle → LoanAdvisor
+        Runs: FraudGuard, RiskOracle and LoanAdvisor concurrently
         """
         context = await self.build_context(user_id)
         context.current_request = f"Loan request: ₹{amount} for {purpose}"
@@ -192,7 +244,7 @@ class AgentOrchestrator:
         all_traces = []
         
         # Try Mastra workflow first
-        if settings.mastra_service_url:
+        if settings.mastra_service_url and mastra_service.available:
             mastra_result = await mastra_service.run_loan_workflow(
                 user_id=user_id,
                 loan_amount=amount,
@@ -218,30 +270,27 @@ class AgentOrchestrator:
                     "reasoning_traces": [f"Mastra Workflow: {s['step']}" for s in mastra_result.get("steps", [])],
                 }
 
-        # Step 1: Fraud Check
-        logger.info(f"Running FraudGuard for loan request")
-        fraud_result = await self.agents["FraudGuard"].execute(context)
+        # Fraud check, risk assessment and loan advice run concurrently;
+        # a FraudGuard BLOCK cancels whatever is still running
+        logger.info(f"Running loan decision workflow for loan request")
+        run = await self.executor.run(
+            self.workflows["loan_decision"], context, stop_when=self._is_blocked
+        )
+        fraud_result = run.results["FraudGuard"]
         results["fraud_check"] = fraud_result.result
-        all_traces.append(fraud_result.reasoning_trace)
         
-        if fraud_result.result.get("verdict") == "BLOCK":
+        if run.stopped_by == "FraudGuard":
             return {
                 "approved": False,
                 "reason": "Security check failed",
-                "reasoning_traces": [t.to_display() for t in all_traces],
+                "reasoning_traces": [fraud_result.reasoning_trace.to_display()],
             }
         
-        # Step 2: Risk Assessment
-        logger.info(f"Running RiskOracle for loan request")
-        risk_result = await self.agents["RiskOracle"].execute(context)
+        risk_result = run.results["RiskOracle"]
+        advisor_result = run.results["LoanAdvisor"]
         results["risk_assessment"] = risk_result.result
-        all_traces.append(risk_result.reasoning_trace)
-        
-        # Step 3: Loan Advice
-        logger.info(f"Running LoanAdvisor for loan request")
-        advisor_result = await self.agents["LoanAdvisor"].execute(context)
         results["loan_advice"] = advisor_result.result
-        all_traces.append(advisor_result.reasoning_trace)
+        all_traces = [fraud_result.reasoning_trace, risk_result.reasoning_trace, advisor_result.reasoning_trace]
         
         # Synthesize final decision
         recommendation = advisor_result.result.get("recommendation", {})
@@ -261,7 +310,8 @@ class AgentOrchestrator:
                 "risk_category": risk_result.result.get("risk_category"),
                 "recommendation": recommendation,
                 "reasoning_traces": [t.to_display() for t in all_traces],
-                "reasoning_traces_raw": [t.model_dump() for t in all_traces],
+                "reasoning_traces_raw": [t.to_dict() for t in all_traces],
+                "context_latency_ms": context.context_latency_ms,
             }
         else:
             return {
@@ -271,6 +321,7 @@ class AgentOrchestrator:
                 "advice": recommendation.get("advice"),
                 "suggested_action": recommendation.get("suggested_action"),
                 "reasoning_traces": [t.to_display() for t in all_traces],
+                "context_latency_ms": context.context_latency_ms,
             }
     
     async def process_vouch_request(
@@ -287,22 +338,21 @@ class AgentOrchestrator:
         context = await self.build_context(vouchee_id)
         context.current_request = f"Vouch request: {vouch_level} level"
         
-        all_traces = []
-        
-        # Fraud check on the vouchee
-        fraud_result = await self.agents["FraudGuard"].execute(context)
-        all_traces.append(fraud_result.reasoning_trace)
+        # Fraud check on the vouchee alongside trust analysis
+        run = await self.executor.run(
+            self.workflows["vouch_request"], context, stop_when=self._is_blocked
+        )
+        fraud_result = run.results["FraudGuard"]
         
-        if fraud_result.result.get("verdict") == "BLOCK":
+        if run.stopped_by == "FraudGuard":
             return {
                 "recommended": False,
                 "reason": "Security concerns with this user",
-                "reasoning_traces": [t.to_display() for t in all_traces],
+                "reasoning_traces": [fraud_result.reasoning_trace.to_display()],
             }
         
-        # Trust analysis
-        trust_result = await self.agents["TrustAnalyzer"].execute(context)
-        all_traces.append(trust_result.reasoning_trace)
+        trust_result = run.results["TrustAnalyzer"]
+        all_traces = [fraud_result.reasoning_trace, trust_result.reasoning_trace]
         
         vouch_quality = trust_result.result.get("vouch_quality", {})
         
@@ -313,6 +363,11 @@ class AgentOrchestrator:
             "reasoning_traces": [t.to_display() for t in all_traces],
         }
     
+    @staticmethod
+    def _is_blocked(agent_name: str, result: AgentResult) -> bool:
+        """Stop condition: a FraudGuard BLOCK verdict ends the workflow"""
+        return agent_name == "FraudGuard" and (result.result or {}).get("verdict") == "BLOCK"
+    
     async def _synthesize_response(
         self,
         context: AgentContext,
@@ -353,12 +408,40 @@ class AgentOrchestrator:
 
         return response_payload
     
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Hit/miss/eviction counters for the orchestrator caches"""
+        return {
+            "context": self.context_cache.stats(),
+            "llm_response": groq_service.response_cache.stats(),
+            "intent_fast_path": self.agents["Nova"].intent_classifier.stats(),
+            "traces": {name: agent.traces.stats() for name, agent in self.agents.items()},
+        }
+    
     def get_all_traces(self) -> List[ReasoningTrace]:
-        """Get all reasoning traces from all agents"""
+        """Get all in-memory reasoning traces from all agents"""
         all_traces = []
         for agent in self.agents.values():
             all_traces.extend(agent.traces)
         return all_traces
+    
+    def get_trace(self, trace_id: str) -> Optional[Any]:
+        """Find a trace by id (in memory first, then the agent's spill file)"""
+        agent = self.agents.get(trace_id.rsplit("_", 1)[0])
+        if agent is not None:
+            return agent.traces.get(trace_id)
+        for agent in self.agents.values():
+            trace = agent.traces.get(trace_id)
+            if trace is not None:
+                return trace
+        return None
+    
+    def get_user_traces(self, user_id: str, limit: int = 20) -> List[ReasoningTrace]:
+        """Newest in-memory traces for a user across all agents"""
+        traces = []
+        for agent in self.agents.values():
+            traces.extend(agent.traces.for_user(user_id, limit))
+        traces.sort(key=lambda t: t.created_at, reverse=True)
+        return traces[:limit]
 
 
 # Singleton instance
@@ -0,0 +1,186 @@
+"""
+Reasoning Trace Store
+Fixed-capacity ring buffer of agent traces with optional JSONL spill-to-disk
+"""
+
+from collections import deque
+from typing import Any, Deque, Dict, Iterator, List, Optional
+import json
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class TraceStore:
+    """
+    Keeps the newest `capacity` traces of one agent in memory
+
+    Older traces are evicted in FIFO order. When `spill_path` is set they
+    are appended to it as compact JSONL first, so the audit trail survives
+    without unbounded memory. The spill file is rotated once it passes
+    `spill_max_bytes` (one previous generation is kept as `<path>.1`).
+
+    Eviction only serializes the trace; a writer thread appends everything
+    pending in one write, so the event loop never waits on the file.
+    Lookups also see traces that are still pending.
+    """
+
+    def __init__(
+        self,
+        capacity: int = 200,
+        spill_path: Optional[str] = None,
+        spill_max_bytes: int = 50 * 1024 * 1024,
+    ):
+        self.capacity = capacity
+        self.spill_path = spill_path
+        self.spill_max_bytes = spill_max_bytes
+        self._ring: Deque[Any] = deque()
+        self._by_id: Dict[str, Any] = {}
+        self._by_user: Dict[str, Deque[str]] = {}
+        self.evicted = 0
+        self.spilled = 0
+        self.spill_batches = 0
+        self._pending: Deque[str] = deque()  # Serialized traces not yet on disk
+        self._cond = threading.Condition()
+        self._writer: Optional[threading.Thread] = None
+        self._closed = False
+        if spill_path:
+            os.makedirs(os.path.dirname(spill_path) or ".", exist_ok=True)
+
+    # --- Ring buffer ---
+    def append(self, trace):
+        if len(self._ring) >= self.capacity:
+            self._evict()
+        self._ring.append(trace)
+        self._by_id[trace.trace_id] = trace
+        if trace.user_id:
+            self._by_user.setdefault(trace.user_id, deque()).append(trace.trace_id)
+
+    def _evict(self):
+        trace = self._ring.popleft()
+        self.evicted += 1
+        if self._by_id.get(trace.trace_id) is trace:
+            del self._by_id[trace.trace_id]
+        if trace.user_id in self._by_user:
+            ids = self._by_user[trace.user_id]
+            if ids and ids[0] == trace.trace_id:
+                ids.popleft()
+            else:
+                try:
+                    ids.remove(trace.trace_id)
+                except ValueError:
+                    pass
+            if not ids:
+                del self._by_user[trace.user_id]
+        if self.spill_path:
+            self._spill(trace)
+
+    def _spill(self, trace):
+        try:
+            line = trace.model_dump_json()
+        except Exception as e:
+            logger.error(f"Trace spill failed for {trace.trace_id}: {e}")
+            return
+        with self._cond:
+            self._pending.append(line)
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_pending, name="trace-spill", daemon=True)
+                self._writer.start()
+            self._cond.notify_all()
+
+    def _write_pending(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if not self._pending:
+                    return
+                batch = list(self._pending)  # Stay visible to lookups until written
+            try:
+                if os.path.exists(self.spill_path) and os.path.getsize(self.spill_path) >= self.spill_max_bytes:
+                    os.replace(self.spill_path, f"{self.spill_path}.1")
+                with open(self.spill_path, "a") as f:
+                    f.write("\n".join(batch) + "\n")
+            except Exception as e:
+                logger.error(f"Trace spill failed for {len(batch)} trace(s): {e}")
+            with self._cond:
+                for _ in batch:
+                    self._pending.popleft()
+                self.spilled += len(batch)
+                self.spill_batches += 1
+                self._cond.notify_all()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every evicted trace is on disk; False on timeout"""
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._pending, timeout)
+
+    def close(self, timeout: float = 5.0):
+        """Write what is pending and stop the writer thread"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+            writer = self._writer
+        if writer is not None:
+            writer.join(timeout)
+
+    def _spilled_records(self) -> Iterator[Dict[str, Any]]:
+        """Spilled traces as dicts, oldest first (a trace being written may appear twice)"""
+        if not self.spill_path:
+            return
+        with self._cond:
+            pending = list(self._pending)
+        for path in (f"{self.spill_path}.1", self.spill_path):
+            if not os.path.exists(path):
+                continue
+            with open(path, "r") as f:
+                for line in f:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        continue
+        for line in pending:
+            yield json.loads(line)
+
+    # --- Lookups ---
+    def get(self, trace_id: str, include_spilled: bool = True) -> Optional[Any]:
+        """In-memory trace object, or the spilled record dict, or None"""
+        trace = self._by_id.get(trace_id)
+        if trace is not None or not include_spilled:
+            return trace
+        for record in self._spilled_records():
+            if record.get("trace_id") == trace_id:
+                return record
+        return None
+
+    def for_user(self, user_id: str, limit: int = 20) -> List[Any]:
+        """Newest in-memory traces for a user, newest first"""
+        ids = self._by_user.get(str(user_id), ())
+        return [self._by_id[tid] for tid in reversed(ids) if tid in self._by_id][:limit]
+
+    def spilled_for_user(self, user_id: str, limit: int = 100) -> List[Dict[str, Any]]:
+        """Newest spilled trace records for a user (scans the spill file)"""
+        matches = {r.get("trace_id"): r for r in self._spilled_records() if r.get("user_id") == str(user_id)}
+        return list(reversed(matches.values()))[:limit]
+
+    def latest(self) -> Optional[Any]:
+        return self._ring[-1] if self._ring else None
+
+    def __iter__(self):
+        return iter(list(self._ring))
+
+    def __len__(self) -> int:
+        return len(self._ring)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": len(self._ring),
+            "capacity": self.capacity,
+            "evicted": self.evicted,
+            "spilled": self.spilled,
+            "spill_pending": len(self._pending),
+            "spill_batches": self.spill_batches,
+            "users": len(self._by_user),
+        }
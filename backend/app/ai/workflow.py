@@ -0,0 +1,122 @@
+"""
+Workflow Executor - Concurrent Agent Pipelines
+Runs agent workflows declared as dependency graphs
+"""
+
+from typing import Callable, Dict, List, Optional
+from app.ai.engine import BaseAgent, AgentContext, AgentResult
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+# A workflow maps each agent to the agents whose results it reads from
+# `context.agent_results`. Agents without dependencies start immediately.
+WorkflowGraph = Dict[str, List[str]]
+
+# Called as each agent finishes; returning True cancels everything still running
+StopCondition = Callable[[str, AgentResult], bool]
+
+
+class WorkflowRun:
+    """Outcome of one workflow execution"""
+
+    def __init__(self):
+        self.results: Dict[str, AgentResult] = {}
+        self.cancelled: List[str] = []
+        self.stopped_by: Optional[str] = None
+        self.timings_ms: Dict[str, int] = {}
+
+    def ordered(self, graph: WorkflowGraph) -> List[AgentResult]:
+        """Completed results in declaration order (stable trace ordering)"""
+        return [self.results[name] for name in graph if name in self.results]
+
+
+def validate_workflow(graph: WorkflowGraph) -> List[str]:
+    """Return a topological order of the graph, raising ValueError on bad graphs"""
+    order: List[str] = []
+    state: Dict[str, str] = {}
+
+    def visit(name: str, path: List[str]):
+        if state.get(name) == "done":
+            return
+        if state.get(name) == "visiting":
+            raise ValueError(f"Workflow cycle: {' -> '.join(path + [name])}")
+        if name not in graph:
+            raise ValueError(f"Workflow dependency {name} is not a step")
+        state[name] = "visiting"
+        for dep in graph[name]:
+            visit(dep, path + [name])
+        state[name] = "done"
+        order.append(name)
+
+    for name in graph:
+        visit(name, [])
+    return order
+
+
+class WorkflowExecutor:
+    """
+    Executes a workflow graph with asyncio
+
+    Each agent starts as soon as its dependencies have finished, writes its
+    result into `context.agent_results` and may stop the run early through
+    the stop condition (e.g. a FraudGuard BLOCK verdict).
+    """
+
+    def __init__(self, agents: Dict[str, BaseAgent]):
+        self.agents = agents
+
+    async def run(
+        self,
+        graph: WorkflowGraph,
+        context: AgentContext,
+        stop_when: Optional[StopCondition] = None,
+    ) -> WorkflowRun:
+        run = WorkflowRun()
+        tasks: Dict[str, asyncio.Task] = {}
+
+        async def run_step(name: str) -> AgentResult:
+            deps = [tasks[dep] for dep in graph[name] if dep in tasks]
+            if deps:
+                await asyncio.gather(*deps)
+            start = time.perf_counter()
+            result = await self.agents[name].execute(context)
+            run.timings_ms[name] = int((time.perf_counter() - start) * 1000)
+            context.agent_results[name] = result.result
+            return result
+
+        for name in validate_workflow(graph):
+            if name not in self.agents:
+                logger.warning(f"Workflow step {name} has no registered agent, skipping")
+                continue
+            tasks[name] = asyncio.create_task(run_step(name), name=f"agent-{name}")
+
+        task_names = {task: name for name, task in tasks.items()}
+        pending = set(tasks.values())
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    name = task_names[task]
+                    result = task.result()  # Agent exceptions propagate as before
+                    run.results[name] = result
+                    if run.stopped_by is None and stop_when and stop_when(name, result):
+                        run.stopped_by = name
+                if run.stopped_by and pending:
+                    for task in pending:
+                        task.cancel()
+                        run.cancelled.append(task_names[task])
+                    await asyncio.gather(*pending, return_exceptions=True)
+                    logger.info(f"Workflow stopped by {run.stopped_by}, cancelled {run.cancelled}")
+                    pending = set()
+        finally:
+            leftover = [task for task in tasks.values() if not task.done()]
+            for task in leftover:
+                task.cancel()
+            if leftover:
+                await asyncio.gather(*leftover, return_exceptions=True)
+
+        return run
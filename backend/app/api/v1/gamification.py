@@ -3,24 +3,29 @@ Gamification API Endpoints
 Exposes Circle Wars leaderboard and user gamification data
 """
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from typing import Dict, Any, List
+from app.config import get_settings
 from app.services.gamification import gamification_service
 from app.api.v1.auth import get_current_user
 import logging
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
+settings = get_settings()
 
 
 @router.get("/leaderboard")
-async def get_circle_leaderboard() -> List[Dict[str, Any]]:
+async def get_circle_leaderboard(
+    offset: int = Query(0, ge=0),
+    limit: int = Query(settings.leaderboard_page_size, ge=1, le=100),
+) -> List[Dict[str, Any]]:
     """
     Get Circle Wars leaderboard
-    Returns ranked list of circles by Trust Velocity
+    Returns one page of circles ranked by Trust Velocity
     """
     try:
-        leaderboard = await gamification_service.calculate_circle_leaderboard()
+        leaderboard = await gamification_service.calculate_circle_leaderboard(offset, limit)
         return leaderboard
     except Exception as e:
         logger.error(f"Failed to calculate leaderboard: {e}")
@@ -29,7 +34,25 @@ async def get_circle_leaderboard() -> List[Dict[str, Any]]:
             {"circle_id": "1", "name": "Mahila Bachat Gat", "score": 950, "rank": 1},
             {"circle_id": "2", "name": "Kisan Sahayata", "score": 820, "rank": 2},
             {"circle_id": "3", "name": "Youth Finance Club", "score": 780, "rank": 3},
-        ]
+        ][offset:offset + limit]
+
+
+@router.get("/leaderboard/circles/{circle_id}")
+async def get_circle_rank(circle_id: str) -> Dict[str, Any]:
+    """Rank and score components of one circle"""
+    entry = await gamification_service.get_circle_rank(circle_id)
+    if not entry:
+        raise HTTPException(status_code=404, detail="Circle not on the leaderboard")
+    return entry
+
+
+@router.get("/metrics")
+async def get_gamification_metrics(current_user: dict = Depends(get_current_user)) -> Dict[str, Any]:
+    """Event queue depth, lag and throughput counters"""
+    return {
+        "queue": gamification_service.queue.stats(),
+        "leaderboard_circles": len(gamification_service.leaderboard),
+    }
 
 
 @router.get("/stats/{user_id}")
@@ -12,7 +12,7 @@ from app.models.schemas import (
     LoanCreate, LoanVote, LoanResponse, LoanVoteResponse, BaseResponse
 )
 from app.services.supabase import supabase_service
-from app.services import get_advanced_blockchain_service
+from app.services import get_advanced_blockchain_service, get_chain_write_queue
 from app.services.dodo import dodo_service
 from app.services.twilio import twilio_service
 from app.ai.orchestrator import orchestrator
@@ -77,20 +77,21 @@ async def create_loan(
         
         loan = await supabase_service.create_loan(loan_data)
         
-        # Step 5: Record on blockchain
+        # Step 5: Queue the on-chain record (tx hash is written back to the loan once sent)
         blockchain = get_advanced_blockchain_service()
         profile = await supabase_service.get_profile(user["id"])
         if profile and profile.get("wallet_address") and blockchain and blockchain.is_configured:
-            tx_hash = await blockchain.create_loan_record(
-                loan["id"],
-                profile["wallet_address"],
-                int(approved_amount),
-                request.tenure_days,
+            await get_chain_write_queue().enqueue(
+                "create_loan_record",
+                {
+                    "loan_id": loan["id"],
+                    "borrower_address": profile["wallet_address"],
+                    "amount": int(approved_amount),
+                    "tenure_days": request.tenure_days,
+                },
+                order_key=loan["id"],
+                reference={"table": "loans", "id": loan["id"]},
             )
-            if tx_hash:
-                loan = await supabase_service.update_loan(
-                    loan["id"], {"blockchain_tx_hash": tx_hash}
-                )
         
         return {
             "success": True,
@@ -124,6 +125,11 @@ async def get_pending_votes(user: dict = Depends(get_current_user)):
     loans = await supabase_service.get_pending_loans(user["id"])
     return [LoanResponse(**l) for l in loans]
 
+@router.get("/chain-writes/metrics", response_model=dict)
+async def get_chain_write_metrics(user: dict = Depends(get_current_user)):
+    """On-chain write queue depth, flush latency and batching counters"""
+    return get_chain_write_queue().stats()
+
 
 @router.get("/{loan_id}", response_model=dict)
 async def get_loan(
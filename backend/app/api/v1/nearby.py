@@ -7,17 +7,45 @@ from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
 from typing import List, Dict, Any, Optional
 from datetime import datetime
-import math
+import asyncio
 import logging
+import os
 
 from app.api.v1.auth import get_current_user
-from app.services.supabase import supabase_service
+from app.config import get_settings
+from app.services.geo_index import haversine_distance
+from app.services.location_store import LocationStore, LocationStoreFullError
+from app.services.supabase import LOCAL_STORE_DIR, supabase_service
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
+settings = get_settings()
 
-# In-memory location cache (production: use Redis or database)
-user_locations: Dict[str, Dict] = {}
+# Shared locations: one mmap'd file for all workers, indexed per process
+_location_store: Optional[LocationStore] = None
+
+
+def get_location_store() -> LocationStore:
+    """Lazy load the location store (opening it creates / sizes the shared file)"""
+    global _location_store
+    if _location_store is None:
+        _location_store = LocationStore(
+            settings.location_store_path or os.path.join(LOCAL_STORE_DIR, "locations.bin"),
+            slots=settings.location_store_slots,
+            ttl=settings.nearby_location_ttl,
+            min_interval=settings.location_min_interval,
+            refresh_interval=settings.location_refresh_interval,
+            cell_deg=settings.nearby_cell_deg,
+        )
+    return _location_store
+
+
+def close_location_store():
+    """Unmap the location store, if it was ever opened"""
+    global _location_store
+    if _location_store is not None:
+        _location_store.close()
+        _location_store = None
 
 
 class LocationUpdate(BaseModel):
@@ -37,21 +65,6 @@ class NearbyUserResponse(BaseModel):
     badges: List[str]
 
 
-def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
-    """Calculate distance between two points in km using Haversine formula"""
-    R = 6371  # Earth radius in km
-    
-    lat1_rad = math.radians(lat1)
-    lat2_rad = math.radians(lat2)
-    delta_lat = math.radians(lat2 - lat1)
-    delta_lon = math.radians(lon2 - lon1)
-    
-    a = math.sin(delta_lat/2)**2 + math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(delta_lon/2)**2
-    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
-    
-    return R * c
-
-
 @router.post("/location")
 async def update_location(
     location: LocationUpdate,
@@ -67,27 +80,31 @@ async def update_location(
     rounded_lat = round(location.latitude, 3)
     rounded_lon = round(location.longitude, 3)
     
-    user_locations[user_id] = {
-        "latitude": rounded_lat,
-        "longitude": rounded_lon,
-        "updated_at": datetime.utcnow().isoformat()
-    }
-    
-    # Also update in Supabase profile (for persistence)
+    location_store = get_location_store()
+    previous = location_store.get(user_id)
     try:
-        await supabase_service.update_profile(user_id, {
-            "metadata": {
-                "location": {
-                    "lat": rounded_lat,
-                    "lng": rounded_lon,
-                    "updated": datetime.utcnow().isoformat()
-                }
-            }
-        })
-    except Exception as e:
-        logger.warning(f"Failed to persist location: {e}")
+        stored = location_store.update(user_id, rounded_lat, rounded_lon)
+    except LocationStoreFullError as e:
+        # Not discoverable until a slot expires; the profile still keeps the location
+        logger.warning(f"Location store full: {e}")
+        stored = True
+    moved = previous is None or (previous["latitude"], previous["longitude"]) != (rounded_lat, rounded_lon)
     
-    logger.info(f"Location updated for user {user_id}")
+    # Also update in Supabase profile (fallback for the requester's own location) - only when it moved
+    if stored and moved:
+        try:
+            # Merge into the existing metadata: it also holds XP, badges and streaks
+            profile = await supabase_service.get_profile(user_id) or {}
+            metadata = dict(profile.get("metadata") or {})
+            metadata["location"] = {
+                "lat": rounded_lat,
+                "lng": rounded_lon,
+                "updated": datetime.utcnow().isoformat()
+            }
+            await supabase_service.update_profile(user_id, {"metadata": metadata})
+        except Exception as e:
+            logger.warning(f"Failed to persist location: {e}")
+        logger.info(f"Location updated for user {user_id}")
     
     return {
         "success": True,
@@ -110,7 +127,8 @@ async def get_nearby_users(
     user_id = current_user["id"]
     
     # Get current user's location
-    user_location = user_locations.get(user_id)
+    location_store = get_location_store()
+    user_location = location_store.get(user_id)
     if not user_location:
         # Try to get from profile
         profile = await supabase_service.get_profile(user_id)
@@ -130,68 +148,62 @@ async def get_nearby_users(
     my_lat = user_location["latitude"]
     my_lon = user_location["longitude"]
     
-    nearby_users = []
+    # Only users in grid cells overlapping the radius are examined (nearest first)
+    candidates = location_store.within(my_lat, my_lon, radius_km, exclude=user_id)
+    if not candidates:
+        return []
     
-    # Check all users with locations
-    for other_user_id, other_location in user_locations.items():
-        if other_user_id == user_id:
-            continue
+    # Filter on trust score (one bulk profile read) and cut to `limit` before hydrating
+    profiles = await supabase_service.get_profiles_by_ids([uid for uid, _ in candidates])
+    selected = [
+        (uid, distance, profiles[uid])
+        for uid, distance in candidates
+        if uid in profiles and profiles[uid].get("trust_score", 50) >= min_trust_score
+    ][:limit]
+    if not selected:
+        return []
+    
+    # Hydrate the survivors with one batched query per stat, run concurrently;
+    # a failed query leaves its stat at zero instead of failing the request
+    ids = [uid for uid, _, _ in selected]
+    stats = await asyncio.gather(
+        supabase_service.count_vouches_received_bulk(ids),
+        supabase_service.get_completed_loan_counts_bulk(ids),
+        supabase_service.get_circle_names_bulk(ids, per_user=3),
+        return_exceptions=True,
+    )
+    for name, result in zip(("vouch counts", "loan counts", "circle names"), stats):
+        if isinstance(result, Exception):
+            logger.warning(f"Nearby {name} query failed: {result}")
+    vouch_counts, loan_counts, circle_names = [{} if isinstance(result, Exception) else result for result in stats]
+    
+    nearby_users = []
+    for other_user_id, distance, profile in selected:
+        trust_score = profile.get("trust_score", 50)
+        loans_completed = loan_counts.get(other_user_id, 0)
         
-        # Calculate distance
-        distance = haversine_distance(
-            my_lat, my_lon,
-            other_location["latitude"], 
-            other_location["longitude"]
-        )
+        # Get badges from metadata
+        metadata = profile.get("metadata") or {}
+        badges = list(metadata.get("badges", []))
+        if trust_score >= 80:
+            badges.append("Trusted Elder")
+        if loans_completed >= 5:
+            badges.append("Reliable Borrower")
         
-        if distance <= radius_km:
-            # Get user profile
-            profile = await supabase_service.get_profile(other_user_id)
-            if not profile:
-                continue
-            
-            trust_score = profile.get("trust_score", 50)
-            if trust_score < min_trust_score:
-                continue
-            
-            # Get additional stats
-            vouches = await supabase_service.get_vouches_received(other_user_id)
-            loans = await supabase_service.get_user_loans(other_user_id)
-            completed_loans = [l for l in loans if l.get("status") == "completed"]
-            
-            # Get circles
-            circles = await supabase_service.get_user_circles(other_user_id)
-            circle_names = [c.get("circles", {}).get("name", "Unknown") for c in circles[:3]]
-            
-            # Calculate member duration
-            created_at = profile.get("created_at", "")
-            member_since = _calculate_member_duration(created_at)
-            
-            # Get badges from metadata
-            metadata = profile.get("metadata", {})
-            badges = metadata.get("badges", [])
-            if trust_score >= 80:
-                badges.append("Trusted Elder")
-            if len(completed_loans) >= 5:
-                badges.append("Reliable Borrower")
-            
-            nearby_users.append(NearbyUserResponse(
-                id=other_user_id,
-                name=profile.get("full_name", "Anonymous"),
-                trust_score=trust_score,
-                distance_km=round(distance, 1),
-                loans_completed=len(completed_loans),
-                vouches_received=len(vouches),
-                member_since=member_since,
-                circles=circle_names[:3],
-                badges=badges[:3]
-            ))
-    
-    # Sort by distance and limit
-    nearby_users.sort(key=lambda u: u.distance_km)
+        nearby_users.append(NearbyUserResponse(
+            id=other_user_id,
+            name=profile.get("full_name", "Anonymous"),
+            trust_score=trust_score,
+            distance_km=round(distance, 1),
+            loans_completed=loans_completed,
+            vouches_received=vouch_counts.get(other_user_id, 0),
+            member_since=_calculate_member_duration(profile.get("created_at", "")),
+            circles=circle_names.get(other_user_id, [])[:3],
+            badges=badges[:3]
+        ))
     
     # NO DEMO DATA - Only return real users found
-    return nearby_users[:limit]
+    return nearby_users
 
 
 def _calculate_member_duration(created_at: str) -> str:
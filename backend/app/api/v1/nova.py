@@ -3,23 +3,97 @@ Nova AI Chat API endpoints
 Production-ready with multi-agent orchestration
 """
 
-from fastapi import APIRouter, HTTPException, Depends, Query
-from typing import Optional
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
+from fastapi.responses import FileResponse, Response, StreamingResponse
+from typing import Optional, Tuple
+import base64
+import hashlib
+import hmac
+import json
 import logging
+import time
+import zlib
 
 from app.api.v1.auth import get_current_user
+from app.config import get_settings
 from app.ai.orchestrator import orchestrator
 from app.services.elevenlabs import elevenlabs_service
+from app.services.groq import groq_service
+from app.services.mastra import mastra_service
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+def _clip_signature(clip_id: str, payload: str) -> str:
+    message = f"{clip_id}:{payload}".encode()
+    return hmac.new(settings.secret_key.encode(), message, hashlib.sha256).hexdigest()
+
+
+def sign_clip(clip_id: str, user_id: str, text: str, voice: str, ttl: Optional[int] = None) -> str:
+    """
+    Short-lived token for one clip, issued to one user
+
+    Clip ids are content hashes shared by every user, so a voice_url
+    carries this token instead of relying on a Bearer header, which an
+    <audio src> element cannot send. The token also carries the clip's
+    text and voice (compressed and signed, not encrypted), so whichever
+    worker receives the request can synthesize the clip.
+    """
+    expires = int(time.time()) + (settings.tts_clip_url_ttl if ttl is None else ttl)
+    claims = json.dumps({"u": str(user_id), "e": expires, "t": text, "v": voice}, separators=(",", ":"))
+    payload = base64.urlsafe_b64encode(zlib.compress(claims.encode())).decode().rstrip("=")
+    return f"{payload}.{_clip_signature(clip_id, payload)}"
+
+
+def verify_clip_token(clip_id: str, token: str) -> Optional[Tuple[str, str]]:
+    """(text, voice) the clip was signed for, or None for a forged or expired token"""
+    try:
+        payload, signature = token.rsplit(".", 1)
+    except ValueError:
+        return None
+    if not hmac.compare_digest(signature, _clip_signature(clip_id, payload)):
+        return None
+    claims = json.loads(zlib.decompress(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4))))
+    if claims["e"] < time.time():
+        return None
+    return claims["t"], claims["v"]
+
+
+async def _voice_response(clip_id: str) -> Response:
+    """Cached clip from memory or as a file; otherwise audio chunks proxied as they arrive"""
+    data, path = elevenlabs_service.cached_clip(clip_id)
+    if data is not None:
+        return Response(content=data, media_type="audio/mpeg")
+    if path is not None:
+        return FileResponse(path, media_type="audio/mpeg")
+    
+    chunks = elevenlabs_service.stream(clip_id)
+    try:
+        # Fail with a status code (not a cut-off body) if synthesis cannot start
+        first = await chunks.__anext__()
+    except StopAsyncIteration:
+        first = b""
+    except Exception as e:
+        logger.error(f"TTS stream failed: {e}")
+        raise HTTPException(status_code=502, detail="Voice generation failed")
+    
+    async def body():
+        yield first
+        async for chunk in chunks:
+            yield chunk
+    
+    return StreamingResponse(body(), media_type="audio/mpeg")
 
 
 @router.post("/chat")
 async def chat_with_nova(
+    request: Request,
     message: str = Query(..., description="User message"),
     language: str = Query("en", description="Language code"),
     include_voice: bool = Query(False, description="Include voice response"),
+    voice_stream: bool = Query(False, description="Return a streamable voice_url instead of inline audio"),
     user: dict = Depends(get_current_user),
 ):
     """
@@ -35,7 +109,14 @@ async def chat_with_nova(
         
         # Add voice if requested
         voice_audio = None
-        if include_voice and result.get("response"):
+        voice_url = None
+        if include_voice and voice_stream and result.get("response"):
+            voice = elevenlabs_service.voice_for(language)
+            clip_id = elevenlabs_service.prepare_clip(result["response"], voice_id=voice)
+            voice_url = str(request.url_for("get_voice_clip", clip_id=clip_id).include_query_params(
+                token=sign_clip(clip_id, str(user["id"]), result["response"], voice)
+            ))
+        elif include_voice and result.get("response"):
             try:
                 voice_audio = await elevenlabs_service.generate_data_url(
                     result["response"],
@@ -48,6 +129,7 @@ async def chat_with_nova(
             "response": result.get("response") or result.get("message"),
             "message": result.get("response") or result.get("message"),
             "voice_audio": voice_audio,
+            "voice_url": voice_url,
             "reasoning_traces": result.get("reasoning_traces", []),
             "reasoning_traces_raw": result.get("reasoning_traces_raw", []),
             "agents_used": result.get("agents_used", []),
@@ -58,6 +140,7 @@ async def chat_with_nova(
             "data": result.get("data"),
             "guide_steps": result.get("guide_steps"),
             "duration_ms": result.get("duration_ms"),
+            "context_latency_ms": result.get("context_latency_ms"),
         }
         
     except Exception as e:
@@ -65,6 +148,30 @@ async def chat_with_nova(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/chat/stream")
+async def stream_chat_with_nova(
+    message: str = Query(..., description="User message"),
+    language: str = Query("en", description="Language code"),
+    user: dict = Depends(get_current_user),
+):
+    """
+    Nova's reply as server-sent events, one event per token
+    Plain conversation only: no agent orchestration or reasoning traces
+    """
+    async def events():
+        try:
+            async for token in groq_service.chat_stream(message, language=language):
+                yield f"data: {json.dumps({'token': token})}\n\n"
+        except Exception as e:
+            # Headers are already sent, so report the failure in-band
+            logger.error(f"Nova chat stream failed: {e}")
+            yield f"event: error\ndata: {json.dumps({'detail': 'Nova is unavailable'})}\n\n"
+            return
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
 @router.post("/speak")
 async def text_to_speech(
     text: str,
@@ -83,3 +190,55 @@ async def text_to_speech(
     except Exception as e:
         logger.error(f"TTS failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/speak/stream")
+async def stream_speech(
+    text: str,
+    language: str = "en",
+    user: dict = Depends(get_current_user),
+):
+    """Text to speech as an audio/mpeg body that starts playing before synthesis finishes"""
+    return await _voice_response(elevenlabs_service.prepare_clip(text, language))
+
+
+@router.get("/voice/{clip_id}", name="get_voice_clip")
+async def get_voice_clip(clip_id: str, token: str = Query(..., description="Signed token from the voice_url")):
+    """
+    Audio for a voice_url returned by /chat?voice_stream=true
+    Authorized by the URL's token (usable as an <audio src>), not a Bearer header
+    """
+    source = verify_clip_token(clip_id, token)
+    if source is None:
+        raise HTTPException(status_code=403, detail="Invalid or expired voice link")
+    # The clip may have been prepared by another worker: register it here from the token
+    text, voice = source
+    if elevenlabs_service.prepare_clip(text, voice_id=voice) != clip_id:
+        raise HTTPException(status_code=404, detail="Unknown voice clip")
+    return await _voice_response(clip_id)
+
+
+@router.get("/traces")
+async def get_my_traces(
+    limit: int = Query(20, ge=1, le=100),
+    user: dict = Depends(get_current_user),
+):
+    """Recent AI reasoning traces for the current user (decision audit trail)"""
+    traces = orchestrator.get_user_traces(str(user["id"]), limit)
+    return {
+        "success": True,
+        "traces": [t.to_dict() for t in traces],
+    }
+
+
+@router.get("/metrics")
+async def get_ai_metrics(user: dict = Depends(get_current_user)):
+    """Cache, LLM client and Mastra health counters for the AI pipeline"""
+    return {
+        "success": True,
+        "caches": orchestrator.get_cache_stats(),
+        "tts_cache": elevenlabs_service.cache.stats(),
+        "tts_stream": elevenlabs_service.stream_stats(),
+        "llm_client": groq_service.llm.stats(),
+        "mastra": mastra_service.stats(),
+    }
@@ -167,8 +167,8 @@ async def process_payment_completed(payment_data: dict, request_id: str):
             # TRIGGER GAMIFICATION
             if user_id:
                 try:
-                    await gamification_service.process_event(user_id, 'repayment', {"amount": float(amount)})
-                    logger.info(f"Gamification event triggered for user {user_id}")
+                    await gamification_service.submit_event(user_id, 'repayment', {"amount": float(amount)})
+                    logger.info(f"Gamification event queued for user {user_id}")
                 except Exception as g_err:
                     logger.error(f"Gamification trigger failed: {g_err}")
             
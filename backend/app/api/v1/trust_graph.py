@@ -5,11 +5,26 @@ Trust Graph API - Real network visualization data
 from fastapi import APIRouter, Depends, HTTPException
 from typing import List, Dict, Any
 from app.api.v1.auth import get_current_user
+from app.config import get_settings
+from app.services.graph_layout import LayoutCache, compute_layout
 from app.services.supabase import supabase_service
+from app.services.trust_network import build_trust_network, to_graph_payload
 import logging
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
+settings = get_settings()
+
+layout_cache = LayoutCache(
+    max_entries=settings.trust_graph_cache_size,
+    ttl=settings.trust_graph_cache_ttl,
+)
+
+
+def _layout_options() -> Dict[str, Any]:
+    if settings.trust_graph_layout == "force":
+        return {"iterations": settings.trust_graph_layout_iterations}
+    return {}
 
 
 @router.get("/network/{user_id}")
@@ -23,67 +38,25 @@ async def get_trust_network(
     Returns nodes (users) and edges (vouches)
     """
     try:
-        nodes = []
-        edges = []
-        visited = set()
-        
-        async def build_network(uid: str, current_depth: int, x: float, y: float):
-            if current_depth > depth or uid in visited:
-                return
-            visited.add(uid)
-            
-            # Get user profile
-            profile = await supabase_service.get_profile(uid)
-            if not profile:
-                return
-            
-            # Add node
-            nodes.append({
-                "id": uid,
-                "name": profile.get("full_name", "User")[:10],
-                "trustScore": profile.get("trust_score", 50),
-                "x": x,
-                "y": y,
-                "isCenter": current_depth == 0
-            })
-            
-            # Get vouches given
-            vouches_given = await supabase_service.get_vouches_given(uid)
-            for i, vouch in enumerate(vouches_given[:5]):  # Limit connections
-                if vouch["status"] == "active":
-                    edges.append({
-                        "from": uid,
-                        "to": vouch["vouchee_id"],
-                        "strength": vouch.get("saathi_staked", 10)
-                    })
-                    
-                    # Position child nodes in a circle
-                    import math
-                    angle = (i / 5) * 2 * math.pi
-                    child_x = x + 120 * math.cos(angle)
-                    child_y = y + 120 * math.sin(angle)
-                    
-                    await build_network(vouch["vouchee_id"], current_depth + 1, child_x, child_y)
-            
-            # Get vouches received
-            vouches_received = await supabase_service.get_vouches_received(uid)
-            for i, vouch in enumerate(vouches_received[:5]):
-                if vouch["status"] == "active" and vouch["voucher_id"] not in visited:
-                    edges.append({
-                        "from": vouch["voucher_id"],
-                        "to": uid,
-                        "strength": vouch.get("saathi_staked", 10)
-                    })
+        depth = max(0, min(depth, settings.trust_graph_max_depth))
+        key = (user_id, depth)
+        graph = await supabase_service.get_vouch_graph()
+        cached = layout_cache.get(key, graph)
+        if cached is not None:
+            return cached
         
-        # Start building from the requested user
-        await build_network(user_id, 0, 200, 150)
-        
-        return {
-            "nodes": nodes,
-            "edges": edges,
-            "center_user": user_id,
-            "total_connections": len(edges)
-        }
+        # Version read before building, so a vouch written mid-build invalidates the entry
+        version = graph.version
+        network = await build_trust_network(
+            user_id,
+            depth,
+            max_nodes=settings.trust_graph_max_nodes,
+            fanout=settings.trust_graph_fanout,
+        )
+        positions = compute_layout(network, settings.trust_graph_layout, **_layout_options())
+        payload = to_graph_payload(network, positions)
+        layout_cache.put(key, version, [user_id, *network.nodes], payload)
+        return payload
         
     except Exception as e:
         logger.error(f"Trust graph failed: {e}")
@@ -111,11 +84,10 @@ async def get_trust_stats(
 ) -> Dict[str, Any]:
     """Get trust network statistics"""
     profile = await supabase_service.get_profile(user_id)
-    vouches_given = await supabase_service.get_vouches_given(user_id)
-    vouches_received = await supabase_service.get_vouches_received(user_id)
+    graph = await supabase_service.get_vouch_graph()
     
-    active_given = [v for v in vouches_given if v["status"] == "active"]
-    active_received = [v for v in vouches_received if v["status"] == "active"]
+    active_given = graph.given(user_id, status="active")
+    active_received = graph.received(user_id, status="active")
     
     total_staked = sum(v.get("saathi_staked", 0) for v in active_given)
     total_backing = sum(v.get("saathi_staked", 0) for v in active_received)
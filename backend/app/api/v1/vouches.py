@@ -9,6 +9,7 @@ import logging
 
 from app.models.schemas import VouchCreate, VouchResponse, BaseResponse
 from app.domain.services import vouching_service
+from app.services.gamification import gamification_service
 from app.services.supabase import supabase_service
 from app.api.v1.auth import get_current_user
 from app.api.v1 import vouch_request
@@ -77,11 +78,10 @@ async def revoke_vouch(
     Revoke a vouch (only if vouchee has no active loans)
     Returns staked SAATHI to voucher
     """
-    # Get vouch
-    vouches = await supabase_service.get_vouches_given(user["id"])
-    vouch = next((v for v in vouches if v["id"] == vouch_id), None)
+    # Get vouch (must be one I gave)
+    vouch = await supabase_service.get_vouch(vouch_id)
     
-    if not vouch:
+    if not vouch or str(vouch.get("voucher_id")) != str(user["id"]):
         raise HTTPException(status_code=404, detail="Vouch not found")
     
     if vouch["status"] != "active":
@@ -104,6 +104,7 @@ async def revoke_vouch(
     
     # Update vouch status
     await supabase_service.update_vouch_status(vouch_id, "returned")
+    gamification_service.record_circle_event(vouch.get("circle_id"), "vouch_released")
     
     # Record transaction
     await supabase_service.create_saathi_transaction({
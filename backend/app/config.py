@@ -38,10 +38,25 @@ class Settings(BaseSettings):
     
     # Groq AI
     groq_api_key: str
+    groq_base_url: str = "https://api.groq.com/openai/v1"
+    llm_max_concurrency: int = 8  # Concurrent LLM calls per worker
+    llm_max_queue: int = 100  # Waiting calls before new ones are rejected
+    llm_queue_timeout: float = 10.0  # Seconds a call may wait for a slot
+    llm_request_timeout: float = 30.0
+    llm_max_connections: int = 20
+    llm_cache_size: int = 1024  # Cached completions (0 disables the cache)
+    llm_cache_ttl: float = 600.0
+    intent_fast_path_enabled: bool = True  # Classify trivial messages locally
+    intent_fast_path_threshold: float = 0.9
     
     # ElevenLabs
     elevenlabs_api_key: str
     elevenlabs_voice_id: str = "21m00Tcm4TlvDq8ikWAM"  # Default voice
+    tts_cache_dir: str = "/tmp/kredefy_tts_cache"
+    tts_memory_cache_bytes: int = 16 * 1024 * 1024  # Hot clips kept in memory
+    tts_disk_cache_bytes: int = 512 * 1024 * 1024  # Total size of cached clips on disk (all workers together)
+    tts_max_pending_clips: int = 1000  # Prepared-but-unfetched streaming clips remembered
+    tts_clip_url_ttl: int = 300  # Seconds a signed voice_url stays playable
     
     # Polygon Blockchain
     polygon_rpc_url: str = "https://rpc-amoy.polygon.technology"
@@ -52,17 +67,84 @@ class Settings(BaseSettings):
     loan_registry_address: str = ""
     circle_dao_address: str = ""
     emergency_fund_address: str = ""
+    blockchain_rpc_timeout: float = 10.0  # Seconds per JSON-RPC request
+    blockchain_max_connections: int = 20  # Pooled keep-alive connections to the RPC node
+    blockchain_keepalive_expiry: float = 30.0
+    blockchain_poll_interval: float = 2.0  # Seconds between block polls while transactions are pending
+    blockchain_confirmations: int = 2  # Blocks on top before a sent transaction counts as confirmed
+    blockchain_confirmation_timeout: float = 300.0  # Seconds a sent transaction is tracked
+    blockchain_gas_price_ttl: float = 5.0  # Seconds one gas price quote is reused across sends
+    blockchain_head_ttl: float = 2.0  # Seconds one block number is trusted as the head (~1 Polygon block)
+    blockchain_read_cache_ttl: float = 10.0  # Max age of a cached view call, even if no new block arrived
+    blockchain_read_cache_size: int = 10000
+    chain_write_window: float = 2.0  # Seconds queued on-chain writes accumulate before a flush
+    chain_write_max_batch: int = 25  # Operations per flush (and per multicall transaction)
+    chain_write_max_attempts: int = 3  # Flushes an operation may fail before it is marked failed
+    chain_write_multicall: bool = False  # Contracts are deployed with Multicall (LoanRegistry, TrustScore)
     
     # Mastra AI Service
     mastra_service_url: str = "http://localhost:4000"
     mastra_port: int = 4000
+    mastra_timeout: float = 60.0  # Agentic workflows can be slow
+    mastra_connect_timeout: float = 2.0  # Fail fast when the sidecar is down
+    mastra_max_connections: int = 20
+    mastra_max_keepalive: int = 10
+    mastra_keepalive_expiry: float = 30.0
+    mastra_http2: bool = True  # Used only when the h2 package is installed
+    mastra_failure_threshold: int = 3  # Consecutive failures before Mastra is skipped
+    mastra_recovery_timeout: int = 30  # Seconds before Mastra is probed again
     openai_api_key: str = ""
     
+    # Agent context assembly
+    context_source_timeout: float = 2.0  # Seconds per source before partial results
+    context_cache_ttl: float = 30.0  # Seconds a cached AgentContext stays fresh
+    context_cache_size: int = 1000  # Max cached users (0 disables the cache)
+    trace_buffer_size: int = 200  # Reasoning traces kept in memory per agent
+    trace_spill_dir: str = ""  # Evicted traces are appended here as JSONL (empty = drop)
+    
+    # Nearby user discovery
+    nearby_cell_deg: float = 0.05  # Spatial index grid cell size (~5.5km at the equator)
+    nearby_location_ttl: int = 86400  # Seconds a shared location stays discoverable
+    location_store_path: str = ""  # Shared mmap file (defaults to <local_store_dir>/locations.bin)
+    location_store_slots: int = 262144  # Fixed record capacity (96 bytes each)
+    location_min_interval: float = 30  # Pings closer together than this are dropped
+    location_refresh_interval: float = 300  # Unchanged positions are rewritten at most this often
+    
+    # Trust network visualization
+    trust_graph_max_depth: int = 3  # Deepest network the API will build
+    trust_graph_max_nodes: int = 150  # Node budget per network
+    trust_graph_fanout: int = 5  # Vouch edges followed per node and direction
+    trust_graph_layout: str = "force"  # "force" (spring, seeded radially) or "radial"
+    trust_graph_layout_iterations: int = 60  # Force layout steps
+    trust_graph_cache_size: int = 512  # Cached network layouts (0 disables the cache)
+    trust_graph_cache_ttl: float = 300  # Seconds before a cached layout picks up profile changes
+    vouch_graph_refresh_seconds: float = 60.0  # Full reload of the in-process vouch index (0 = never)
+    
+    # Gamification
+    leaderboard_rebuild_seconds: float = 600  # Full reconciliation of the Circle Wars leaderboard (0 = never)
+    leaderboard_page_size: int = 20  # Default circles per leaderboard page (max 100)
+    gamification_workers: int = 4  # Event queue workers
+    gamification_coalesce_window: float = 0.5  # Seconds a user's events are gathered into one batch
+    gamification_max_pending: int = 10000  # Queued events before submitters wait (back-pressure)
+    gamification_submit_timeout: float = 5.0  # Seconds a submitter waits for room before dropping
+    gamification_drain_timeout: float = 5.0  # Seconds shutdown waits for queued events
+    
+    # Local fallback store (used when Supabase is unreachable)
+    local_store_engine: str = "wal"  # "wal" (durable, shared by all workers) or "memory" (per worker)
+    local_store_dir: str = ""  # Defaults to backend/local_store
+    local_store_compact_every: int = 1000  # WAL ops before a background compaction
+    
     # CORS
     cors_origins: str = "http://localhost:3000"
     
     # Rate Limiting
-    rate_limit_per_minute: int = 60
+    rate_limit_per_minute: int = 60  # Bucket size; refills at this rate per minute
+    rate_limit_backend: str = "memory"  # "memory" (per worker) or "shared" (all workers on the host)
+    rate_limit_shared_path: str = ""  # Shared bucket file (defaults to /dev/shm/kredefy-ratelimit)
+    rate_limit_route_costs: str = (
+        "POST /api/v1/nova/chat=5,POST /api/v1/nova/speak=3,POST /api/v1/nova/speak/stream=3,"
+        "POST /api/v1/diary/voice=3,POST /api/v1/loans=3"
+    )  # Tokens per request for expensive routes (others cost 1)
     
     @property
     def cors_origins_list(self) -> List[str]:
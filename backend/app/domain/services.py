@@ -10,11 +10,12 @@ from datetime import datetime
 import logging
 
 from app.services.supabase import supabase_service
-from app.services import get_advanced_blockchain_service
+from app.services import get_advanced_blockchain_service, get_chain_write_queue
 from app.services.dodo import dodo_service
+from app.services.gamification import gamification_service
 from app.services.twilio import twilio_service
 from app.ai.orchestrator import orchestrator
-from app.utils import retry_with_backoff, dodo_circuit, blockchain_circuit
+from app.utils import dodo_circuit
 
 logger = logging.getLogger(__name__)
 
@@ -116,15 +117,12 @@ class VouchingDomainService:
                 "description": f"Staked for {vouch_level} vouch",
             })
             
-            # 5. Blockchain (async, non-blocking)
-            tx_hash = await self._record_on_blockchain(
-                voucher_id, vouchee_id, saathi_amount
+            # 5. Blockchain (queued; tx hash and status are written back to the vouch)
+            await self._record_on_blockchain(
+                voucher_id, vouchee_id, saathi_amount, vouch["id"]
             )
             
-            if tx_hash:
-                vouch = await supabase_service.update_vouch_status(
-                    vouch["id"], "active", tx_hash
-                )
+            gamification_service.record_circle_event(circle_id, "vouch")
             
             logger.info(
                 f"Vouch created: {voucher_id} → {vouchee_id}, "
@@ -144,14 +142,14 @@ class VouchingDomainService:
                 logger.error(f"Rollback failed: {rollback_error}")
             raise
     
-    @retry_with_backoff(max_retries=2, base_delay=1.0)
     async def _record_on_blockchain(
         self,
         voucher_id: UUID,
         vouchee_id: UUID,
         amount: Decimal,
+        vouch_id: str,
     ) -> Optional[str]:
-        """Record vouch on blockchain with retry"""
+        """Queue the on-chain stake for a vouch; returns the queued write's id"""
         voucher_profile = await supabase_service.get_profile(voucher_id)
         vouchee_profile = await supabase_service.get_profile(vouchee_id)
         
@@ -164,13 +162,16 @@ class VouchingDomainService:
         if not voucher_wallet or not vouchee_wallet:
             return None
         
-        async with blockchain_circuit:
-            blockchain = get_advanced_blockchain_service()
-            if blockchain and blockchain.is_configured:
-                return await blockchain.stake_for_vouch(
-                    voucher_wallet, vouchee_wallet, int(amount)
-                )
+        blockchain = get_advanced_blockchain_service()
+        if not blockchain or not blockchain.is_configured:
             return None
+        write = await get_chain_write_queue().enqueue(
+            "stake_for_vouch",
+            {"voucher_address": voucher_wallet, "vouchee_address": vouchee_wallet, "amount": int(amount)},
+            order_key=voucher_wallet,
+            reference={"table": "vouches", "id": str(vouch_id)},
+        )
+        return write["id"]
     
     async def slash_vouch(
         self,
@@ -183,8 +184,7 @@ class VouchingDomainService:
         Burns staked SAATHI tokens
         """
         # Get vouch details
-        vouches = await supabase_service.get_vouches_given(UUID("00000000-0000-0000-0000-000000000000"))
-        vouch = next((v for v in vouches if v["id"] == str(vouch_id)), None)
+        vouch = await supabase_service.get_vouch(str(vouch_id))
         
         if not vouch:
             raise ValueError("Vouch not found")
@@ -197,6 +197,7 @@ class VouchingDomainService:
         
         # Update vouch status
         await supabase_service.update_vouch_status(vouch_id, "slashed")
+        gamification_service.record_circle_event(vouch.get("circle_id"), "vouch_released")
         
         # Record slash transaction
         await supabase_service.create_saathi_transaction({
@@ -344,6 +345,43 @@ class LoanDomainService:
             "loan": loan,
             "payment": payment,
         }
+    
+    async def mark_defaulted(
+        self,
+        loan_id: UUID,
+        slash_percentage: int = 50,
+    ) -> Dict[str, Any]:
+        """
+        Default an outstanding loan
+        Slashes the borrower's active vouches and scores the circle down
+        """
+        loan = await supabase_service.get_loan(loan_id)
+        if not loan:
+            raise ValueError("Loan not found")
+        
+        if loan["status"] not in ("disbursed", "repaying"):
+            raise ValueError(f"Loan cannot be defaulted, status: {loan['status']}")
+        
+        loan = await supabase_service.update_loan(loan_id, {"status": "defaulted"})
+        gamification_service.record_circle_event(loan.get("circle_id"), "default")
+        
+        # Vouchers stood behind the borrower: their stakes are slashed
+        slashed = []
+        for vouch in await supabase_service.get_vouches_received(loan["borrower_id"]):
+            if vouch.get("status") == "active":
+                slashed.append(await vouching_service.slash_vouch(vouch["id"], loan_id, slash_percentage))
+        
+        blockchain = get_advanced_blockchain_service()
+        if blockchain and blockchain.is_configured:
+            # Same order key: lands after this loan's repayment records
+            await get_chain_write_queue().enqueue("mark_loan_defaulted", {"loan_id": str(loan_id)}, order_key=str(loan_id))
+        
+        logger.warning(f"Loan defaulted: {loan_id}, {len(slashed)} vouches slashed")
+        
+        return {
+            "loan": loan,
+            "slashed": slashed,
+        }
 
 
 class PaymentDomainService:
@@ -373,14 +411,16 @@ class PaymentDomainService:
             "status": "completed",
         })
         
-        # 2. Record on blockchain
+        # 2. Queue the on-chain record (batched with other writes; the
+        #    tx hash and status are written back to the repayment)
         blockchain = get_advanced_blockchain_service()
-        tx_hash = None
-        if blockchain and blockchain.is_configured:
-            tx_hash = await blockchain.record_repayment(str(loan_id), int(amount))
-        if tx_hash:
-            await supabase_service.update_repayment(
-                repayment["id"], {"blockchain_tx_hash": tx_hash}
+        chain_writes = get_chain_write_queue() if blockchain and blockchain.is_configured else None
+        if chain_writes:
+            await chain_writes.enqueue(
+                "record_repayment",
+                {"loan_id": str(loan_id), "amount": int(amount)},
+                order_key=str(loan_id),
+                reference={"table": "repayments", "id": repayment["id"]},
             )
         
         # 3. Update trust score
@@ -388,7 +428,6 @@ class PaymentDomainService:
             loan["borrower_id"],
             5,  # +5 for on-time repayment
             "On-time repayment",
-            tx_hash,
         )
         
         # 4. Check if loan is fully repaid
@@ -397,8 +436,10 @@ class PaymentDomainService:
         
         if total_repaid >= float(loan["amount"]) * 1.1:  # Principal + 10% interest
             await supabase_service.update_loan(loan_id, {"status": "completed"})
-            if blockchain and blockchain.is_configured:
-                await blockchain.mark_loan_completed(str(loan_id))
+            gamification_service.record_circle_event(loan.get("circle_id"), "loan_repaid")
+            if chain_writes:
+                # Same order key: lands after this loan's repayment records
+                await chain_writes.enqueue("mark_loan_completed", {"loan_id": str(loan_id)}, order_key=str(loan_id))
             
             # Release vouches
             # TODO: Implement vouch release logic
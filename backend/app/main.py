@@ -18,6 +18,7 @@ from app.middleware import (
     SecurityHeadersMiddleware,
     get_request_id,
 )
+from app.rate_limit import create_rate_limit_backend, parse_route_costs
 from app.utils import task_manager
 from app.api.v1 import (
     auth,
@@ -30,6 +31,7 @@ from app.api.v1 import (
     nova,
     trust_score,
     saathi,
+    gamification,
 )
 
 # Configure structured logging
@@ -52,15 +54,44 @@ async def lifespan(app: FastAPI):
     logger.info(f"Debug mode: {settings.debug}")
     
     # Initialize services (connections are lazy)
+    from app.services.mastra import mastra_service
+    mastra_service.start()
+    from app.services.gamification import gamification_service
+    gamification_service.start()
+    if settings.blockchain_private_key:
+        # One worker (elected by file lock) sends; it resumes writes a previous owner left behind
+        from app.services import get_chain_write_queue
+        get_chain_write_queue().start()
     
     yield
     
     # Shutdown
     logger.info("Shutting down Kredefy API...")
     
-    # Cancel background tasks
+    # Apply queued gamification events, then cancel background tasks
+    await gamification_service.aclose()
     await task_manager.shutdown()
     
+    # Close pooled HTTP clients
+    from app.services.groq import groq_service
+    await groq_service.aclose()
+    from app.services.elevenlabs import elevenlabs_service
+    await elevenlabs_service.aclose()
+    await mastra_service.aclose()
+    from app.services import close_advanced_blockchain_service
+    await close_advanced_blockchain_service()
+    
+    # Write out evicted reasoning traces still queued for the spill file
+    from app.ai.orchestrator import orchestrator
+    for agent in orchestrator.agents.values():
+        agent.traces.close()
+    
+    # Persist the local fallback store
+    from app.services.supabase import supabase_service
+    supabase_service.close_local_store()
+    from app.api.v1.nearby import close_location_store
+    close_location_store()
+    
     logger.info("Shutdown complete")
 
 
@@ -85,6 +116,8 @@ app.add_middleware(SecurityHeadersMiddleware)
 app.add_middleware(
     RateLimitMiddleware,
     requests_per_minute=settings.rate_limit_per_minute,
+    route_costs=parse_route_costs(settings.rate_limit_route_costs),
+    backend=create_rate_limit_backend(settings.rate_limit_backend, settings.rate_limit_shared_path),
 )
 
 # 3. Structured logging
@@ -214,6 +247,7 @@ app.include_router(diary.router, prefix="/api/v1/diary", tags=["Financial Diary"
 app.include_router(nova.router, prefix="/api/v1/nova", tags=["Nova AI"])
 app.include_router(trust_score.router, prefix="/api/v1/trust-score", tags=["Trust Score"])
 app.include_router(saathi.router, prefix="/api/v1/saathi", tags=["Saathi Token"])
+app.include_router(gamification.router, prefix="/api/v1/gamification", tags=["Gamification"])
 
 # Import and register nearby users router
 from app.api.v1 import nearby
@@ -3,15 +3,16 @@ Production Middleware Stack
 Request tracing, rate limiting, structured logging
 """
 
+import math
 import time
 import uuid
 import logging
-from typing import Callable
+from typing import Callable, Dict, Optional
 from fastapi import Request, Response
 from starlette.middleware.base import BaseHTTPMiddleware
 from contextvars import ContextVar
-from collections import defaultdict
-import asyncio
+
+from app.rate_limit import TokenBucketLimiter, client_key
 
 # Context variable for request ID (available in all async contexts)
 request_id_ctx: ContextVar[str] = ContextVar("request_id", default="")
@@ -108,57 +109,49 @@ class StructuredLoggingMiddleware(BaseHTTPMiddleware):
 
 class RateLimitMiddleware(BaseHTTPMiddleware):
     """
-    In-memory rate limiting per IP and per user
-    Production: Use Redis for distributed rate limiting
+    Token-bucket rate limiting per user (credential digest) or per IP
+
+    Constant memory per client; idle clients expire on their own. Routes can
+    cost more than one token (see app.rate_limit.parse_route_costs), and the
+    bucket storage is pluggable so several workers can share one limit.
     """
     
-    def __init__(self, app, requests_per_minute: int = 60):
+    def __init__(
+        self,
+        app,
+        requests_per_minute: int = 60,
+        route_costs: Optional[Dict[str, float]] = None,
+        backend=None,
+    ):
         super().__init__(app)
         self.requests_per_minute = requests_per_minute
-        self.request_counts: defaultdict = defaultdict(list)
-        self._cleanup_task = None
+        self.limiter = TokenBucketLimiter(requests_per_minute, route_costs, backend)
     
     async def dispatch(self, request: Request, call_next: Callable) -> Response:
         # Skip rate limit for health checks
         if request.url.path in ["/health", "/", "/docs", "/openapi.json"]:
             return await call_next(request)
         
-        # Get client identifier (IP or user ID)
-        client_ip = request.client.host if request.client else "unknown"
-        client_key = f"ip:{client_ip}"
-        
-        # Check if user is authenticated
-        auth_header = request.headers.get("authorization", "")
-        if auth_header:
-            # Use token hash as key for authenticated users
-            client_key = f"auth:{hash(auth_header) % 10000}"
-        
-        current_time = time.time()
-        window_start = current_time - 60  # 1 minute window
-        
-        # Clean old requests
-        self.request_counts[client_key] = [
-            t for t in self.request_counts[client_key] 
-            if t > window_start
-        ]
+        key = client_key(
+            request.headers.get("authorization", ""),
+            request.client.host if request.client else "unknown",
+        )
+        cost = self.limiter.cost(request.method, request.url.path)
+        allowed, remaining, retry_after = self.limiter.acquire(key, cost)
         
-        # Check rate limit
-        if len(self.request_counts[client_key]) >= self.requests_per_minute:
+        if not allowed:
+            retry = max(1, math.ceil(retry_after)) if math.isfinite(retry_after) else 60
             return Response(
-                content='{"error": "Rate limit exceeded", "retry_after": 60}',
+                content=f'{{"error": "Rate limit exceeded", "retry_after": {retry}}}',
                 status_code=429,
                 media_type="application/json",
-                headers={"Retry-After": "60"},
+                headers={"Retry-After": str(retry)},
             )
         
-        # Record request
-        self.request_counts[client_key].append(current_time)
-        
         # Add rate limit headers
         response = await call_next(request)
-        remaining = self.requests_per_minute - len(self.request_counts[client_key])
         response.headers["X-RateLimit-Limit"] = str(self.requests_per_minute)
-        response.headers["X-RateLimit-Remaining"] = str(max(0, remaining))
+        response.headers["X-RateLimit-Remaining"] = str(max(0, int(remaining)))
         
         return response
 
@@ -0,0 +1,226 @@
+"""
+Rate Limiting
+Token buckets with constant memory per client and pluggable storage backends
+"""
+
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+import hashlib
+import logging
+import math
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows - the shared backend is unavailable
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+def client_key(auth_header: str = "", client_ip: str = "") -> str:
+    """
+    Stable limiter key for a request
+
+    Authenticated callers are keyed on a digest of the full credential so
+    distinct tokens never share a bucket; everyone else is keyed by IP.
+    """
+    if auth_header:
+        return "auth:" + hashlib.blake2b(auth_header.encode(), digest_size=16).hexdigest()
+    return f"ip:{client_ip or 'unknown'}"
+
+
+def parse_route_costs(spec: str) -> Dict[str, float]:
+    """
+    Parse "POST /api/v1/nova/chat=5,/api/v1/trust-score=1" into a cost map
+
+    Keys are either "METHOD /path" or a bare "/path" (any method).
+    """
+    costs: Dict[str, float] = {}
+    for item in (spec or "").split(","):
+        if "=" not in item:
+            continue
+        route, cost = item.rsplit("=", 1)
+        route = " ".join(route.split())
+        if " " in route:
+            method, path = route.split(" ", 1)
+            route = f"{method.upper()} {path}"
+        try:
+            costs[route] = float(cost)
+        except ValueError:
+            logger.warning(f"Ignoring invalid rate limit cost for {route}: {cost}")
+    return costs
+
+
+def _refill(tokens: float, updated: float, now: float, capacity: float, rate: float) -> float:
+    return min(capacity, tokens + max(0.0, now - updated) * rate)
+
+
+def _take(tokens: float, cost: float, rate: float) -> Tuple[bool, float, float]:
+    """Apply a request of `cost` to a refilled bucket -> (allowed, tokens_left, retry_after)"""
+    if tokens >= cost:
+        return True, tokens - cost, 0.0
+    return False, tokens, (cost - tokens) / rate if rate > 0 else math.inf
+
+
+# ============================================
+# BACKENDS
+# ============================================
+
+class MemoryBackend:
+    """
+    Per-process buckets: key -> (tokens, last_update)
+
+    Buckets are kept in last-touched order; a bucket idle long enough to have
+    refilled completely is indistinguishable from a new one, so it is dropped.
+    """
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.expired = 0
+
+    def acquire(self, key: str, cost: float, capacity: float, rate: float, now: float) -> Tuple[bool, float, float]:
+        with self._lock:
+            self._expire(now, capacity / rate if rate > 0 else math.inf)
+            tokens, updated = self._buckets.get(key, (capacity, now))
+            allowed, tokens, retry_after = _take(_refill(tokens, updated, now, capacity, rate), cost, rate)
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+                self.expired += 1
+            return allowed, tokens, retry_after
+
+    def _expire(self, now: float, idle_ttl: float):
+        while self._buckets:
+            key, (_, updated) = next(iter(self._buckets.items()))
+            if now - updated < idle_ttl:
+                break
+            del self._buckets[key]
+            self.expired += 1
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+class SharedMemoryBackend:
+    """
+    Buckets in a fixed-size mmap'd hash table shared by every worker process
+
+    Each slot is 32 bytes: a 16-byte key digest, tokens and last update.
+    Access is serialized with an exclusive flock on the backing file (a
+    tmpfs path such as /dev/shm keeps it entirely in memory). Collisions use
+    bounded linear probing; a probe reuses empty or fully refilled slots.
+    When every slot in the window holds a live bucket the request is
+    rejected (and counted in `collisions`) rather than evicting one, which
+    would hand another client a fresh bucket.
+    """
+
+    SLOT = struct.Struct("16sdd")
+    PROBES = 16
+
+    def __init__(self, path: str, slots: int = 65536):
+        if fcntl is None:
+            raise RuntimeError("SharedMemoryBackend requires fcntl (POSIX)")
+        self.path = path
+        self.slots = slots
+        size = slots * self.SLOT.size
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            if os.fstat(self._fd).st_size != size:
+                os.ftruncate(self._fd, size)
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        self._map = mmap.mmap(self._fd, size)
+        self._lock = threading.Lock()
+        self.collisions = 0
+
+    def _digest(self, key: str) -> bytes:
+        return hashlib.blake2b(key.encode(), digest_size=16).digest()
+
+    def acquire(self, key: str, cost: float, capacity: float, rate: float, now: float) -> Tuple[bool, float, float]:
+        digest = self._digest(key)
+        start = int.from_bytes(digest[:8], "little") % self.slots
+
+        with self._lock:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                target, tokens, updated = None, capacity, now
+                free, refilled_at = None, math.inf
+                for i in range(self.PROBES):
+                    slot = (start + i) % self.slots
+                    slot_key, slot_tokens, slot_updated = self.SLOT.unpack_from(self._map, slot * self.SLOT.size)
+                    if slot_key == digest:
+                        target, tokens, updated = slot, slot_tokens, slot_updated
+                        break
+                    # A bucket that has refilled completely is as good as empty
+                    full_at = slot_updated + ((capacity - slot_tokens) / rate if rate > 0 else math.inf)
+                    if free is None and (slot_updated == 0 or now >= full_at):
+                        free = slot
+                    refilled_at = min(refilled_at, full_at)
+                if target is None:
+                    if free is None:
+                        # Window full of live buckets: retry once one of them has refilled
+                        self.collisions += 1
+                        return False, 0.0, max(0.0, refilled_at - now)
+                    target = free
+
+                allowed, tokens, retry_after = _take(_refill(tokens, updated, now, capacity, rate), cost, rate)
+                self.SLOT.pack_into(self._map, target * self.SLOT.size, digest, tokens, now)
+                return allowed, tokens, retry_after
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def close(self):
+        self._map.close()
+        os.close(self._fd)
+
+
+def create_rate_limit_backend(backend: str = "memory", path: str = ""):
+    """Factory: "memory" (per process) or "shared" (all workers on this host)"""
+    if backend == "shared":
+        if fcntl is None:
+            logger.warning("Shared rate limit backend needs fcntl; falling back to memory")
+            return MemoryBackend()
+        shm_dir = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+        return SharedMemoryBackend(path or os.path.join(shm_dir, "kredefy-ratelimit"))
+    if backend != "memory":
+        logger.warning(f"Unknown rate limit backend '{backend}', using memory")
+    return MemoryBackend()
+
+
+# ============================================
+# LIMITER
+# ============================================
+
+class TokenBucketLimiter:
+    """
+    Token bucket per client: `requests_per_minute` tokens of burst, refilled
+    continuously. Each request spends its route's cost (default 1).
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: int = 60,
+        route_costs: Optional[Dict[str, float]] = None,
+        backend=None,
+    ):
+        self.capacity = float(requests_per_minute)
+        self.rate = requests_per_minute / 60.0
+        self.route_costs = route_costs or {}
+        self.backend = backend if backend is not None else MemoryBackend()
+
+    def cost(self, method: str, path: str) -> float:
+        return self.route_costs.get(f"{method} {path}", self.route_costs.get(path, 1.0))
+
+    def acquire(self, key: str, cost: float = 1.0, now: Optional[float] = None) -> Tuple[bool, float, float]:
+        """-> (allowed, remaining tokens, seconds until the request would fit)"""
+        return self.backend.acquire(key, cost, self.capacity, self.rate, time.time() if now is None else now)
@@ -2,10 +2,12 @@
 Services Package - Lazy Loading for Heavy Initializations
 """
 
+import os
 from typing import Optional
 
 # Lazy loaded services
 _advanced_blockchain_service = None
+_chain_write_queue = None
 
 
 def get_advanced_blockchain_service():
@@ -14,4 +16,38 @@ def get_advanced_blockchain_service():
     if _advanced_blockchain_service is None:
         from app.services.advanced_blockchain import AdvancedBlockchainService
         _advanced_blockchain_service = AdvancedBlockchainService()
-    return _advanced_blockchain_service
\ No newline at end of file
+    return _advanced_blockchain_service
+
+def get_chain_write_queue():
+    """Lazy load the durable on-chain write queue (flushes through the blockchain service)"""
+    global _chain_write_queue
+    if _chain_write_queue is None:
+        from app.config import get_settings
+        from app.services.chain_queue import ChainWriteQueue
+        from app.services.supabase import LOCAL_STORE_DIR, supabase_service
+        settings = get_settings()
+        
+        async def report_status(reference, tx_hash, status):
+            await supabase_service.update_chain_status(reference["table"], reference["id"], tx_hash, status)
+        
+        _chain_write_queue = ChainWriteQueue(
+            get_advanced_blockchain_service(),
+            supabase_service.store.table("chain_writes", indexes=("status",)),
+            window=settings.chain_write_window,
+            max_batch=settings.chain_write_max_batch,
+            max_attempts=settings.chain_write_max_attempts,
+            multicall=settings.chain_write_multicall,
+            confirmations=settings.blockchain_confirmations,
+            confirmation_timeout=settings.blockchain_confirmation_timeout,
+            on_status=report_status,
+            # Workers share the WAL table, so one of them sends for all; memory tables are per worker
+            owner_lock=os.path.join(LOCAL_STORE_DIR, "chain_writes.owner") if settings.local_store_engine == "wal" else None,
+        )
+    return _chain_write_queue
+
+async def close_advanced_blockchain_service():
+    """Stop the write queue, then close the RPC session and confirmation tracker, if they were ever used"""
+    if _chain_write_queue is not None:
+        await _chain_write_queue.aclose()
+    if _advanced_blockchain_service is not None:
+        await _advanced_blockchain_service.aclose()
@@ -4,14 +4,18 @@ Full ABI encoding, contract deployment, and transaction management
 """
 
 import asyncio
-from web3 import Web3
+import aiohttp
+from web3 import AsyncWeb3, Web3
 from eth_account import Account
 import json
 import logging
-from typing import Optional, Dict, Any, List, Tuple
+from typing import Optional, Dict, Any, Iterable, List, Tuple
 from decimal import Decimal
 
 from app.config import get_settings
+from app.services.chain_reads import BlockReadCache
+from app.services.nonce_manager import NonceManager, is_nonce_error
+from app.services.tx_tracker import ConfirmationTracker
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
@@ -31,6 +35,7 @@ TRUST_SCORE_ABI = [
     {"inputs": [{"name": "user", "type": "address"}, {"name": "initialScore", "type": "uint256"}], "name": "mint", "outputs": [], "stateMutability": "nonpayable", "type": "function"},
     {"inputs": [{"name": "user", "type": "address"}, {"name": "newScore", "type": "uint256"}, {"name": "reason", "type": "string"}], "name": "updateScore", "outputs": [], "stateMutability": "nonpayable", "type": "function"},
     {"inputs": [{"name": "user", "type": "address"}], "name": "getScore", "outputs": [{"name": "", "type": "uint256"}], "stateMutability": "view", "type": "function"},
+    {"inputs": [{"name": "data", "type": "bytes[]"}], "name": "multicall", "outputs": [{"name": "results", "type": "bytes[]"}], "stateMutability": "nonpayable", "type": "function"},
 ]
 
 LOAN_REGISTRY_ABI = [
@@ -39,8 +44,25 @@ LOAN_REGISTRY_ABI = [
     {"inputs": [{"name": "loanId", "type": "string"}], "name": "markCompleted", "outputs": [], "stateMutability": "nonpayable", "type": "function"},
     {"inputs": [{"name": "loanId", "type": "string"}], "name": "markDefaulted", "outputs": [], "stateMutability": "nonpayable", "type": "function"},
     {"inputs": [{"name": "loanId", "type": "string"}], "name": "getTotalRepaid", "outputs": [{"name": "", "type": "uint256"}], "stateMutability": "view", "type": "function"},
+    {"inputs": [{"name": "data", "type": "bytes[]"}], "name": "multicall", "outputs": [{"name": "results", "type": "bytes[]"}], "stateMutability": "nonpayable", "type": "function"},
 ]
 
+# Write operation -> contract it calls (see build_call)
+WRITE_OPERATIONS = {
+    "stake_for_vouch": "saathi",
+    "slash_vouch": "saathi",
+    "reward_user": "saathi",
+    "mint_trust_score": "trust_score",
+    "update_trust_score": "trust_score",
+    "create_loan_record": "loan_registry",
+    "record_repayment": "loan_registry",
+    "mark_loan_completed": "loan_registry",
+    "mark_loan_defaulted": "loan_registry",
+}
+
+# Contracts inheriting OpenZeppelin Multicall (owner calls survive the delegatecall)
+MULTICALL_CONTRACTS = {"trust_score", "loan_registry"}
+
 
 class AdvancedBlockchainService:
     """
@@ -52,17 +74,21 @@ class AdvancedBlockchainService:
     - Transaction retry with exponential backoff
     - Event listening for real-time updates
     - Multi-contract orchestration
+    
+    All RPC goes through AsyncWeb3 over one pooled aiohttp session, so no
+    call blocks the event loop. Nonces come from a local NonceManager, so
+    concurrent writes from the hot wallet are signed and sent in parallel.
+    Confirmations are tracked by a single shared ConfirmationTracker loop
+    rather than one poll loop per transaction. View calls go through a
+    BlockReadCache: one RPC call per (method, args) per block.
     """
     
     def __init__(self):
-        self.w3 = Web3(Web3.HTTPProvider(settings.polygon_rpc_url))
-        
-        # Inject POA middleware for Polygon (if available)
-        try:
-            from web3.middleware import geth_poa_middleware
-            self.w3.middleware_onion.inject(geth_poa_middleware, layer=0)
-        except ImportError:
-            logger.warning("geth_poa_middleware not available, skipping")
+        self.provider = AsyncWeb3.AsyncHTTPProvider(settings.polygon_rpc_url)
+        self.w3 = AsyncWeb3(self.provider)
+        self._inject_poa_middleware()
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._session_lock: Optional[asyncio.Lock] = None
         
         # Only initialize account if private key is configured
         self.account = None
@@ -80,6 +106,62 @@ class AdvancedBlockchainService:
         
         # Transaction tracking
         self.pending_txs: Dict[str, Dict] = {}
+        self.nonces = NonceManager(self._pending_transaction_count)
+        self._gas_price: Optional[Tuple[int, float]] = None
+        self.confirmations = ConfirmationTracker(self.w3, poll_interval=settings.blockchain_poll_interval)
+        self.reads = BlockReadCache(
+            self._block_number,
+            ttl=settings.blockchain_read_cache_ttl,
+            head_ttl=settings.blockchain_head_ttl,
+            max_entries=settings.blockchain_read_cache_size,
+        )
+    
+    def _inject_poa_middleware(self):
+        """Polygon blocks carry extra POA data (middleware name differs across web3 versions)"""
+        try:
+            from web3.middleware import ExtraDataToPOAMiddleware
+            self.w3.middleware_onion.inject(ExtraDataToPOAMiddleware, layer=0)
+            return
+        except ImportError:
+            pass
+        try:
+            from web3.middleware import async_geth_poa_middleware
+            self.w3.middleware_onion.inject(async_geth_poa_middleware, layer=0)
+        except ImportError:
+            logger.warning("POA middleware not available, skipping")
+    
+    async def _rpc(self) -> AsyncWeb3:
+        """AsyncWeb3 bound to the shared keep-alive session (opened on first use)"""
+        if self._session is None or self._session.closed:
+            if self._session_lock is None:
+                self._session_lock = asyncio.Lock()
+            async with self._session_lock:
+                if self._session is None or self._session.closed:
+                    session = aiohttp.ClientSession(
+                        connector=aiohttp.TCPConnector(
+                            limit=settings.blockchain_max_connections,
+                            keepalive_timeout=settings.blockchain_keepalive_expiry,
+                        ),
+                        timeout=aiohttp.ClientTimeout(total=settings.blockchain_rpc_timeout),
+                    )
+                    await self.provider.cache_async_session(session)
+                    self._session = session
+        return self.w3
+    
+    async def _pending_transaction_count(self) -> int:
+        w3 = await self._rpc()
+        return await w3.eth.get_transaction_count(self.account.address, "pending")
+    
+    async def _block_number(self) -> int:
+        w3 = await self._rpc()
+        return await w3.eth.block_number
+    
+    async def aclose(self):
+        """Stop confirmation tracking and close the RPC session (app shutdown)"""
+        await self.confirmations.aclose()
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
     
     @property
     def is_configured(self) -> bool:
@@ -106,19 +188,27 @@ class AdvancedBlockchainService:
                 abi=LOAN_REGISTRY_ABI
             )
     
-    def is_connected(self) -> bool:
+    async def is_connected(self) -> bool:
         """Check blockchain connection"""
-        return self.w3.is_connected()
+        w3 = await self._rpc()
+        return await w3.is_connected()
     
     async def get_gas_price(self) -> int:
-        """Get current gas price with buffer"""
-        base_price = self.w3.eth.gas_price
-        return int(base_price * 1.1)  # 10% buffer
+        """Get current gas price with buffer (shared by sends within blockchain_gas_price_ttl)"""
+        now = asyncio.get_running_loop().time()
+        if self._gas_price is not None and now - self._gas_price[1] < settings.blockchain_gas_price_ttl:
+            return self._gas_price[0]
+        w3 = await self._rpc()
+        base_price = await w3.eth.gas_price
+        price = int(base_price * 1.1)  # 10% buffer
+        self._gas_price = (price, now)
+        return price
     
     async def estimate_gas(self, tx: Dict) -> int:
         """Estimate gas for transaction"""
         try:
-            estimated = self.w3.eth.estimate_gas(tx)
+            w3 = await self._rpc()
+            estimated = await w3.eth.estimate_gas(tx)
             return int(estimated * 1.2)  # 20% buffer for safety
         except Exception as e:
             logger.warning(f"Gas estimation failed: {e}, using default")
@@ -128,10 +218,14 @@ class AdvancedBlockchainService:
         self,
         contract_func,
         max_retries: int = 3,
+        touches: Iterable[str] = (),
     ) -> str:
         """
         Send transaction with retry logic
         Returns transaction hash (real or simulated)
+        
+        `touches`: addresses whose on-chain state the call changes (their
+        cached reads are bypassed until it confirms); the sender is implied.
         """
         if not self.is_configured:
             import secrets
@@ -139,17 +233,29 @@ class AdvancedBlockchainService:
             logger.warning(f"Blockchain private key missing - Simulated Tx: {sim_hash}")
             return sim_hash
 
+        touches = (self.account.address, *touches)
+        self.reads.begin_write(touches)
+        try:
+            tx_hash = await self._send(contract_func, max_retries, touches)
+        except BaseException:
+            self.reads.end_write(touches)
+            raise
+        if not tx_hash:
+            self.reads.end_write(touches)
+        return tx_hash
+    
+    async def _send(self, contract_func, max_retries: int, touches: Tuple[str, ...]) -> str:
+        w3 = await self._rpc()
         for attempt in range(max_retries):
+            # Local nonce: concurrent sends are pipelined instead of racing on-chain counts
+            nonce = await self.nonces.allocate()
             try:
                 # Build transaction
-                nonce = self.w3.eth.get_transaction_count(self.account.address)
-                gas_price = await self.get_gas_price()
-                
-                tx = contract_func.build_transaction({
+                tx = await contract_func.build_transaction({
                     "from": self.account.address,
                     "nonce": nonce,
                     "gas": 300000,
-                    "gasPrice": gas_price,
+                    "gasPrice": await self.get_gas_price(),
                     "chainId": self.chain_id,
                 })
                 
@@ -158,59 +264,93 @@ class AdvancedBlockchainService:
                 
                 # Sign and send
                 signed = self.account.sign_transaction(tx)
-                tx_hash = self.w3.eth.send_raw_transaction(signed.rawTransaction)
+                raw = getattr(signed, "raw_transaction", None) or signed.rawTransaction
+                tx_hash = Web3.to_hex(await w3.eth.send_raw_transaction(raw))
                 
-                logger.info(f"Transaction sent: {tx_hash.hex()}")
+                logger.info(f"Transaction sent: {tx_hash} (nonce {nonce})")
                 
-                # Track pending transaction
-                self.pending_txs[tx_hash.hex()] = {
-                    "hash": tx_hash.hex(),
+                # Track pending transaction until it confirms or times out
+                self.pending_txs[tx_hash] = {
+                    "hash": tx_hash,
+                    "nonce": nonce,
                     "status": "pending",
                     "attempt": attempt + 1,
                 }
+                self.confirmations.watch(
+                    tx_hash,
+                    settings.blockchain_confirmations,
+                    settings.blockchain_confirmation_timeout,
+                ).add_done_callback(lambda f, h=tx_hash: self._settle_pending(h, f, touches))
                 
-                return tx_hash.hex()
+                return tx_hash
                 
             except Exception as e:
                 logger.error(f"Transaction attempt {attempt + 1} failed: {e}")
+                if is_nonce_error(e):
+                    # Nonce already used on-chain: reseed and retry right away
+                    await self.nonces.resync()
+                    if attempt == max_retries - 1:
+                        raise
+                    continue
+                self.nonces.release(nonce)
                 if attempt == max_retries - 1:
                     raise
                 await asyncio.sleep(2 ** attempt)  # Exponential backoff
         
         return ""
     
+    def _settle_pending(self, tx_hash: str, future: asyncio.Future, touches: Tuple[str, ...] = ()):
+        self.pending_txs.pop(tx_hash, None)
+        self.reads.end_write(touches)
+        if not future.cancelled() and not future.result().get("confirmed"):
+            # Possibly dropped, leaving a nonce gap that would stall later transactions
+            logger.warning(f"Transaction {tx_hash} not confirmed: {future.result().get('status')}")
+            asyncio.ensure_future(self.nonces.resync())
+    
     async def wait_for_confirmation(
         self,
         tx_hash: str,
         confirmations: int = 2,
         timeout: int = 120,
     ) -> Dict[str, Any]:
-        """Wait for transaction confirmation"""
-        import asyncio
-        
-        start = asyncio.get_event_loop().time()
-        while asyncio.get_event_loop().time() - start < timeout:
-            try:
-                receipt = self.w3.eth.get_transaction_receipt(tx_hash)
-                if receipt:
-                    current_block = self.w3.eth.block_number
-                    if current_block - receipt["blockNumber"] >= confirmations:
-                        return {
-                            "confirmed": True,
-                            "block_number": receipt["blockNumber"],
-                            "gas_used": receipt["gasUsed"],
-                            "status": "success" if receipt["status"] == 1 else "failed",
-                        }
-            except Exception:
-                pass
-            await asyncio.sleep(2)
-        
-        return {"confirmed": False, "status": "timeout"}
+        """Wait for transaction confirmation (shared block poll, see ConfirmationTracker)"""
+        await self._rpc()
+        return await self.confirmations.wait(tx_hash, confirmations, timeout)
+    
+    # ============================================
+    # Batched Writes
+    # ============================================
+    
+    def build_call(self, kind: str, args: Dict[str, Any]):
+        """Contract function for a write operation, without sending it"""
+        contract_key = WRITE_OPERATIONS.get(kind)
+        if contract_key is None:
+            raise ValueError(f"Unknown write operation: {kind}")
+        if contract_key not in self.contracts:
+            raise ValueError(f"Contract not configured: {contract_key}")
+        return getattr(self, f"_{kind}_call")(**args)
+    
+    @staticmethod
+    def touched_addresses(args: Dict[str, Any]) -> Tuple[str, ...]:
+        """Addresses a write operation's arguments name (cached reads to invalidate)"""
+        return tuple(value for name, value in args.items() if name.endswith("_address"))
+    
+    def batch_call(self, contract_key: str, calls: List) -> Any:
+        """One multicall transaction running `calls` (functions of the same contract) in order"""
+        return self.contracts[contract_key].functions.multicall(
+            [call._encode_transaction_data() for call in calls]
+        )
     
     # ============================================
     # SAATHI Token Operations
     # ============================================
     
+    def _stake_for_vouch_call(self, voucher_address: str, vouchee_address: str, amount: int):
+        return self.contracts["saathi"].functions.stakeForVouch(
+            Web3.to_checksum_address(vouchee_address),
+            amount * 10**18  # Convert to wei
+        )
+    
     async def stake_for_vouch(
         self,
         voucher_address: str,
@@ -222,13 +362,15 @@ class AdvancedBlockchainService:
             logger.warning("SAATHI contract not configured")
             return ""
         
-        contract = self.contracts["saathi"]
-        func = contract.functions.stakeForVouch(
-            Web3.to_checksum_address(vouchee_address),
-            amount * 10**18  # Convert to wei
+        func = self._stake_for_vouch_call(voucher_address, vouchee_address, amount)
+        return await self.send_transaction(func, touches=(voucher_address, vouchee_address))
+    
+    def _slash_vouch_call(self, voucher_address: str, defaulter_address: str, percentage: int = 50):
+        return self.contracts["saathi"].functions.slash(
+            Web3.to_checksum_address(voucher_address),
+            Web3.to_checksum_address(defaulter_address),
+            percentage
         )
-        
-        return await self.send_transaction(func)
     
     async def slash_vouch(
         self,
@@ -240,14 +382,15 @@ class AdvancedBlockchainService:
         if "saathi" not in self.contracts:
             return ""
         
-        contract = self.contracts["saathi"]
-        func = contract.functions.slash(
-            Web3.to_checksum_address(voucher_address),
-            Web3.to_checksum_address(defaulter_address),
-            percentage
+        func = self._slash_vouch_call(voucher_address, defaulter_address, percentage)
+        return await self.send_transaction(func, touches=(voucher_address, defaulter_address))
+    
+    def _reward_user_call(self, user_address: str, amount: int, reason: str):
+        return self.contracts["saathi"].functions.reward(
+            Web3.to_checksum_address(user_address),
+            amount * 10**18,
+            reason
         )
-        
-        return await self.send_transaction(func)
     
     async def reward_user(
         self,
@@ -259,24 +402,21 @@ class AdvancedBlockchainService:
         if "saathi" not in self.contracts:
             return ""
         
-        contract = self.contracts["saathi"]
-        func = contract.functions.reward(
-            Web3.to_checksum_address(user_address),
-            amount * 10**18,
-            reason
-        )
-        
-        return await self.send_transaction(func)
+        func = self._reward_user_call(user_address, amount, reason)
+        return await self.send_transaction(func, touches=(user_address,))
     
     async def get_saathi_balance(self, address: str) -> Decimal:
-        """Get SAATHI token balance"""
+        """Get SAATHI token balance (cached per block)"""
         if "saathi" not in self.contracts:
             return Decimal(0)
         
-        contract = self.contracts["saathi"]
-        balance_wei = contract.functions.balanceOf(
-            Web3.to_checksum_address(address)
-        ).call()
+        await self._rpc()
+        address = Web3.to_checksum_address(address)
+        func = self.contracts["saathi"].functions.balanceOf(address)
+        balance_wei = await self.reads.read(
+            "saathi", "balanceOf", (address,),
+            lambda block: func.call(block_identifier=block),
+        )
         
         return Decimal(balance_wei) / Decimal(10**18)
     
@@ -284,6 +424,12 @@ class AdvancedBlockchainService:
     # Trust Score Operations
     # ============================================
     
+    def _mint_trust_score_call(self, user_address: str, initial_score: int = 10):
+        return self.contracts["trust_score"].functions.mint(
+            Web3.to_checksum_address(user_address),
+            initial_score
+        )
+    
     async def mint_trust_score(
         self,
         user_address: str,
@@ -293,13 +439,15 @@ class AdvancedBlockchainService:
         if "trust_score" not in self.contracts:
             return ""
         
-        contract = self.contracts["trust_score"]
-        func = contract.functions.mint(
+        func = self._mint_trust_score_call(user_address, initial_score)
+        return await self.send_transaction(func, touches=(user_address,))
+    
+    def _update_trust_score_call(self, user_address: str, new_score: int, reason: str):
+        return self.contracts["trust_score"].functions.updateScore(
             Web3.to_checksum_address(user_address),
-            initial_score
+            new_score,
+            reason
         )
-        
-        return await self.send_transaction(func)
     
     async def update_trust_score(
         self,
@@ -311,29 +459,34 @@ class AdvancedBlockchainService:
         if "trust_score" not in self.contracts:
             return ""
         
-        contract = self.contracts["trust_score"]
-        func = contract.functions.updateScore(
-            Web3.to_checksum_address(user_address),
-            new_score,
-            reason
-        )
-        
-        return await self.send_transaction(func)
+        func = self._update_trust_score_call(user_address, new_score, reason)
+        return await self.send_transaction(func, touches=(user_address,))
     
     async def get_trust_score(self, user_address: str) -> int:
-        """Get user's on-chain trust score"""
+        """Get user's on-chain trust score (cached per block)"""
         if "trust_score" not in self.contracts:
             return 0
         
-        contract = self.contracts["trust_score"]
-        return contract.functions.getScore(
-            Web3.to_checksum_address(user_address)
-        ).call()
+        await self._rpc()
+        user_address = Web3.to_checksum_address(user_address)
+        func = self.contracts["trust_score"].functions.getScore(user_address)
+        return await self.reads.read(
+            "trust_score", "getScore", (user_address,),
+            lambda block: func.call(block_identifier=block),
+        )
     
     # ============================================
     # Loan Registry Operations
     # ============================================
     
+    def _create_loan_record_call(self, loan_id: str, borrower_address: str, amount: int, tenure_days: int):
+        return self.contracts["loan_registry"].functions.createLoan(
+            loan_id,
+            Web3.to_checksum_address(borrower_address),
+            amount * 100,  # Store in paise
+            tenure_days
+        )
+    
     async def create_loan_record(
         self,
         loan_id: str,
@@ -345,15 +498,14 @@ class AdvancedBlockchainService:
         if "loan_registry" not in self.contracts:
             return ""
         
-        contract = self.contracts["loan_registry"]
-        func = contract.functions.createLoan(
+        func = self._create_loan_record_call(loan_id, borrower_address, amount, tenure_days)
+        return await self.send_transaction(func)
+    
+    def _record_repayment_call(self, loan_id: str, amount: int):
+        return self.contracts["loan_registry"].functions.recordRepayment(
             loan_id,
-            Web3.to_checksum_address(borrower_address),
-            amount * 100,  # Store in paise
-            tenure_days
+            amount * 100
         )
-        
-        return await self.send_transaction(func)
     
     async def record_repayment(
         self,
@@ -364,31 +516,28 @@ class AdvancedBlockchainService:
         if "loan_registry" not in self.contracts:
             return ""
         
-        contract = self.contracts["loan_registry"]
-        func = contract.functions.recordRepayment(
-            loan_id,
-            amount * 100
-        )
-        
+        func = self._record_repayment_call(loan_id, amount)
         return await self.send_transaction(func)
     
+    def _mark_loan_completed_call(self, loan_id: str):
+        return self.contracts["loan_registry"].functions.markCompleted(loan_id)
+    
     async def mark_loan_completed(self, loan_id: str) -> str:
         """Mark loan as completed on-chain"""
         if "loan_registry" not in self.contracts:
             return ""
         
-        contract = self.contracts["loan_registry"]
-        func = contract.functions.markCompleted(loan_id)
-        return await self.send_transaction(func)
+        return await self.send_transaction(self._mark_loan_completed_call(loan_id))
+    
+    def _mark_loan_defaulted_call(self, loan_id: str):
+        return self.contracts["loan_registry"].functions.markDefaulted(loan_id)
     
     async def mark_loan_defaulted(self, loan_id: str) -> str:
         """Mark loan as defaulted on-chain"""
         if "loan_registry" not in self.contracts:
             return ""
         
-        contract = self.contracts["loan_registry"]
-        func = contract.functions.markDefaulted(loan_id)
-        return await self.send_transaction(func)
+        return await self.send_transaction(self._mark_loan_defaulted_call(loan_id))
     
     # ============================================
     # Block Explorer Links
@@ -0,0 +1,384 @@
+"""
+Chain Write Queue - Durable outbound queue for on-chain writes
+Writes collected over a short window go out as one multicall per contract
+"""
+
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+import asyncio
+import logging
+import os
+import secrets
+import socket
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows - single worker only, every process owns its queue
+    fcntl = None
+
+from app.services.advanced_blockchain import MULTICALL_CONTRACTS, WRITE_OPERATIONS
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+SENDING = "sending"  # Claimed by the owner process; the send may or may not have reached the chain
+SENT = "sent"
+CONFIRMED = "confirmed"
+FAILED = "failed"
+UNCONFIRMED = "unconfirmed"  # Not mined before the confirmation timeout (not resent: it may still land)
+SIMULATED = "simulated"  # No hot wallet configured
+
+StatusCallback = Callable[[Dict[str, Any], Optional[str], str], Awaitable[Any]]
+
+
+class ChainWriteQueue:
+    """
+    Accumulates contract writes and submits them in batches
+
+    Every operation is a row in a local store table before `enqueue`
+    returns, so queued and in-flight writes survive a restart: queued rows
+    are flushed again and sent rows go back to confirmation tracking.
+
+    Only one process sends. With `owner_lock` set, the worker holding that
+    file lock owns the hot wallet's nonces; the others only persist rows,
+    which the owner picks up from the shared table, and take over when it
+    exits. Each row is claimed (status `sending` plus the owner id) before
+    it is sent, and a row left `sending` by a dead owner is marked
+    unconfirmed rather than sent twice.
+
+    `window` seconds after the first enqueue, up to `max_batch` operations
+    are flushed. With `multicall` on, the operations for one Multicall
+    contract become a single transaction. Everything else is sent as
+    individual transactions, pipelined through the service's nonce manager.
+    Operations sharing an `order_key` (e.g. a loan id) are sent one after
+    another, so their nonces (and on-chain order) follow the enqueue order.
+    A reverted multicall reverts every call in it, so its operations are
+    retried one per transaction to isolate the failing one.
+
+    `on_status(reference, tx_hash, status)` is awaited whenever an
+    operation that carries a reference (e.g. {"table": "repayments",
+    "id": ...}) is sent, confirmed or fails.
+    """
+
+    def __init__(
+        self,
+        service,
+        table,
+        window: float = 2.0,
+        max_batch: int = 25,
+        max_attempts: int = 3,
+        multicall: bool = False,
+        confirmations: int = 2,
+        confirmation_timeout: float = 300.0,
+        on_status: Optional[StatusCallback] = None,
+        owner_lock: Optional[str] = None,
+    ):
+        self.service = service
+        self.table = table
+        self.window = window
+        self.max_batch = max_batch
+        self.max_attempts = max_attempts
+        self.multicall = multicall
+        self.confirmations = confirmations
+        self.confirmation_timeout = confirmation_timeout
+        self.on_status = on_status
+        self.owner_lock = owner_lock
+        self.owner_id = f"{socket.gethostname()}:{os.getpid()}"
+
+        self._owner_fd: Optional[int] = None
+        self._owner = False
+        self._held_keys: Set[str] = set()  # Order keys with an operation requeued this flush
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._settling: Set[asyncio.Task] = set()
+
+        # Metrics
+        self.enqueued = 0
+        self.flushes = 0
+        self.transactions = 0
+        self.ops_sent = 0
+        self.batched_ops = 0
+        self.confirmed = 0
+        self.failed = 0
+        self.unbatched = 0
+        self.last_latency = 0.0
+        self.max_latency = 0.0
+        self._avg_latency = 0.0
+        self._latency_samples = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    @property
+    def is_owner(self) -> bool:
+        return self._owner
+
+    def start(self):
+        """Start the flush loop, standing by until this process owns the queue (needs a running event loop)"""
+        if self.running:
+            return
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._run(), name="chain-writes")
+
+    def _acquire_ownership(self) -> bool:
+        if self.owner_lock is None or fcntl is None:
+            return True
+        fd = os.open(self.owner_lock, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        self._owner_fd = fd
+        return True
+
+    def _release_ownership(self):
+        if self._owner_fd is not None:
+            os.close(self._owner_fd)  # Releases the flock
+            self._owner_fd = None
+        self._owner = False
+
+    async def _resume(self):
+        """Pick up the work a previous owner left in the table"""
+        sent: Dict[str, List[str]] = {}
+        for row in self.table.find("status", SENT):
+            sent.setdefault(row["tx_hash"], []).append(row["id"])
+        for tx_hash, ids in sent.items():
+            self._track(tx_hash, ids)
+        # The owner died mid-send: the transaction may still land, so never resend it
+        stranded = self.table.find("status", SENDING)
+        for op in stranded:
+            self.table.update(op["id"], {"status": UNCONFIRMED, "error": f"owner {op.get('owner')} exited while sending"})
+        self.failed += len(stranded)
+        await self._report(stranded, None, UNCONFIRMED)
+        queued = self.table.count("status", QUEUED)
+        if queued or sent or stranded:
+            logger.info(
+                f"Chain write queue resumed {queued} queued, {len(sent)} sent transactions "
+                f"({len(stranded)} interrupted sends marked unconfirmed)"
+            )
+        if queued:
+            self._wake.set()
+
+    # --- Producers ---
+    async def enqueue(
+        self,
+        kind: str,
+        args: Dict[str, Any],
+        order_key: Optional[str] = None,
+        reference: Optional[Dict[str, str]] = None,
+    ) -> Dict[str, Any]:
+        """Persist a write (`kind` is an AdvancedBlockchainService write method) for the next flush"""
+        if kind not in WRITE_OPERATIONS:
+            raise ValueError(f"Unknown write operation: {kind}")
+        if not self.running:
+            self.start()
+        # Persisted only: the owner process (maybe another worker) sends it
+        row = self.table.insert({
+            "id": f"cw-{secrets.token_hex(6)}",
+            "kind": kind,
+            "args": args,
+            "order_key": str(order_key) if order_key is not None else None,
+            "reference": reference,
+            "status": QUEUED,
+            "solo": False,
+            "attempts": 0,
+            "tx_hash": None,
+            "error": None,
+            "enqueued_at": time.time(),
+        })
+        self.enqueued += 1
+        self._wake.set()
+        return row
+
+    # --- Flushing ---
+    async def _run(self):
+        while not self._acquire_ownership():
+            await asyncio.sleep(self.window)
+        self._owner = True
+        await self._resume()
+        while True:
+            try:
+                # Other workers only persist their rows: look for them between local wakeups
+                await asyncio.wait_for(self._wake.wait(), self.window)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            if not self.table.count("status", QUEUED):
+                continue
+            await asyncio.sleep(self.window)
+            # Requeued operations wait for the next window instead of spinning here
+            rows = sorted(self.table.find("status", QUEUED), key=lambda row: row["enqueued_at"])
+            self._held_keys.clear()
+            for start in range(0, len(rows), self.max_batch):
+                # A requeued operation goes first next window: hold back the rest of its key until then
+                batch = [row for row in rows[start:start + self.max_batch] if row["order_key"] not in self._held_keys]
+                try:
+                    await self._flush(batch)
+                except Exception as e:
+                    # Rows stay in the table and are picked up again on restart
+                    logger.error(f"Chain write flush failed: {e}")
+
+    async def _flush(self, rows: List[Dict[str, Any]]):
+        groups: Dict[str, List[Dict[str, Any]]] = {}
+        for row in rows:
+            groups.setdefault(WRITE_OPERATIONS[row["kind"]], []).append(row)
+
+        sends = []
+        for contract_key, ops in groups.items():
+            batchable = [op for op in ops if not op["solo"]]
+            if self.multicall and contract_key in MULTICALL_CONTRACTS and len(batchable) > 1:
+                sends.append(self._send(contract_key, batchable))
+                ops = [op for op in ops if op["solo"]]
+            for chain in self._chains(ops):
+                sends.append(self._send_chain(contract_key, chain))
+        await asyncio.gather(*sends)
+        self.flushes += 1
+
+    @staticmethod
+    def _chains(ops: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+        """Split into sequences that must be sent in order (same order_key)"""
+        chains: Dict[Any, List[Dict[str, Any]]] = {}
+        for op in ops:
+            chains.setdefault(op["order_key"] or op["id"], []).append(op)
+        return list(chains.values())
+
+    async def _send_chain(self, contract_key: str, chain: List[Dict[str, Any]]):
+        for op in chain:
+            if not await self._send(contract_key, [op]):
+                # Keep the order: later operations of this key stay queued behind it
+                return
+
+    def _claim(self, op: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        return self.table.update_if(op["id"], {"status": QUEUED}, {"status": SENDING, "owner": self.owner_id})
+
+    async def _send(self, contract_key: str, ops: List[Dict[str, Any]]) -> bool:
+        ops = [claimed for claimed in map(self._claim, ops) if claimed is not None]
+        if not ops:
+            return True
+        try:
+            calls = [self.service.build_call(op["kind"], op["args"]) for op in ops]
+            func = calls[0] if len(calls) == 1 else self.service.batch_call(contract_key, calls)
+            touches = [address for op in ops for address in self.service.touched_addresses(op["args"])]
+            tx_hash = await self.service.send_transaction(func, touches=touches)
+        except Exception as e:
+            logger.error(f"Chain write {contract_key} ({len(ops)} ops) not sent: {e}")
+            await self._retry(ops, str(e))
+            return False
+
+        status = SENT if self.service.is_configured else SIMULATED
+        now = time.time()
+        for op in ops:
+            self.table.update(op["id"], {"status": status, "tx_hash": tx_hash, "sent_at": now, "batch_size": len(ops)})
+            self._record_latency(now - op["enqueued_at"])
+        self.transactions += 1
+        self.ops_sent += len(ops)
+        if len(ops) > 1:
+            self.batched_ops += len(ops)
+        await self._report(ops, tx_hash, status)
+        if status == SENT:
+            self._track(tx_hash, [op["id"] for op in ops])
+        return True
+
+    async def _retry(self, ops: List[Dict[str, Any]], error: str):
+        """Requeue after a failed send, or give up after max_attempts"""
+        exhausted = []
+        for op in ops:
+            attempts = op["attempts"] + 1
+            if attempts >= self.max_attempts:
+                self.table.update(op["id"], {"status": FAILED, "attempts": attempts, "error": error})
+                exhausted.append(op)
+            else:
+                self.table.update(op["id"], {"status": QUEUED, "attempts": attempts, "error": error})
+                if op["order_key"] is not None:
+                    self._held_keys.add(op["order_key"])
+        self.failed += len(exhausted)
+        if len(exhausted) < len(ops):
+            self._wake.set()
+        await self._report(exhausted, None, FAILED)
+
+    # --- Confirmations ---
+    def _track(self, tx_hash: str, ids: List[str]):
+        future = self.service.confirmations.watch(tx_hash, self.confirmations, self.confirmation_timeout)
+        task = asyncio.ensure_future(self._settle(tx_hash, ids, future))
+        self._settling.add(task)
+        task.add_done_callback(self._settling.discard)
+
+    async def _settle(self, tx_hash: str, ids: List[str], future: asyncio.Future):
+        result = await future
+        ops = [row for row in map(self.table.get, ids) if row and row["status"] == SENT]
+        if result.get("status") == "success":
+            for op in ops:
+                self.table.update(op["id"], {"status": CONFIRMED, "block_number": result.get("block_number")})
+            self.confirmed += len(ops)
+            await self._report(ops, tx_hash, CONFIRMED)
+        elif result.get("status") == "failed" and len(ops) > 1:
+            # One reverting call reverts the whole multicall: retry each on its own
+            for op in ops:
+                self.table.update(op["id"], {"status": QUEUED, "solo": True, "tx_hash": None, "error": "batch reverted"})
+            self.unbatched += len(ops)
+            self._wake.set()
+        else:
+            status = FAILED if result.get("status") == "failed" else UNCONFIRMED
+            for op in ops:
+                self.table.update(op["id"], {"status": status, "error": result.get("status")})
+            self.failed += len(ops)
+            await self._report(ops, tx_hash, status)
+
+    async def _report(self, ops: List[Dict[str, Any]], tx_hash: Optional[str], status: str):
+        if self.on_status is None:
+            return
+        for op in ops:
+            if not op.get("reference"):
+                continue
+            try:
+                await self.on_status(op["reference"], tx_hash, status)
+            except Exception as e:
+                logger.warning(f"Chain write status update failed for {op['reference']}: {e}")
+
+    def _record_latency(self, latency: float):
+        self.last_latency = latency
+        self.max_latency = max(self.max_latency, latency)
+        self._avg_latency = latency if not self._latency_samples else 0.9 * self._avg_latency + 0.1 * latency
+        self._latency_samples += 1
+
+    # --- Lifecycle ---
+    async def aclose(self):
+        """Stop flushing; queued and sent rows stay in the table for the next start"""
+        tasks = list(self._settling)
+        if self._task is not None:
+            tasks.append(self._task)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = None
+        self._settling.clear()
+        self._release_ownership()
+
+    def get(self, op_id: str) -> Optional[Dict[str, Any]]:
+        return self.table.get(op_id)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "owner": self.is_owner,
+            "multicall": self.multicall,
+            "window_seconds": self.window,
+            "depth": self.table.count("status", QUEUED),
+            "in_flight": self.table.count("status", SENT),
+            "enqueued": self.enqueued,
+            "flushes": self.flushes,
+            "transactions": self.transactions,
+            "ops_sent": self.ops_sent,
+            "ops_per_tx": round(self.ops_sent / self.transactions, 2) if self.transactions else 0.0,
+            "batched_ops": self.batched_ops,
+            "unbatched": self.unbatched,
+            "confirmed": self.confirmed,
+            "failed": self.failed,
+            "flush_latency_ms": {
+                "last": round(self.last_latency * 1000, 1),
+                "avg": round(self._avg_latency * 1000, 1),
+                "max": round(self.max_latency * 1000, 1),
+            },
+        }
@@ -0,0 +1,168 @@
+"""
+Chain Read Cache - Block-aware cache for contract view calls
+Repeated reads at the same block are answered without touching the RPC node
+"""
+
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, Optional, Set, Tuple
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def _addresses(args: Iterable[Any]) -> Set[str]:
+    return {a.lower() for a in args if isinstance(a, str) and a.startswith("0x") and len(a) == 42}
+
+
+class BlockReadCache:
+    """
+    View-call results keyed by (contract, method, args, block number)
+
+    The head block number is itself fetched at most once per `head_ttl`
+    seconds (about one Polygon block), and each read is made *at* that
+    block, so every reader between two blocks shares one RPC call per key.
+    Concurrent misses for the same key wait on one call. Entries also
+    expire after `ttl` seconds in case the head stops moving.
+
+    Our own writes: `begin_write(addresses)` drops cached reads for those
+    addresses and sends their reads straight to the node until the
+    matching `end_write` (transaction confirmed or abandoned), which also
+    forces a fresh head so the post-write state is read.
+    """
+
+    def __init__(
+        self,
+        fetch_head: Callable[[], Awaitable[int]],
+        ttl: float = 10.0,
+        head_ttl: float = 2.0,
+        max_entries: int = 10000,
+    ):
+        self._fetch_head = fetch_head
+        self.ttl = ttl
+        self.head_ttl = head_ttl
+        self.max_entries = max_entries
+        self._head: Optional[Tuple[int, float]] = None
+        self._head_fetch: Optional[asyncio.Future] = None
+        self._entries: "OrderedDict[Hashable, Tuple[Any, float]]" = OrderedDict()
+        self._by_address: Dict[str, Set[Hashable]] = {}
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self._writing: Dict[str, int] = {}  # Address -> unconfirmed writes touching it
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.head_fetches = 0
+        self.invalidations = 0
+
+    # --- Head ---
+    async def head(self) -> int:
+        now = time.monotonic()
+        if self._head is not None and now - self._head[1] < self.head_ttl:
+            return self._head[0]
+        if self._head_fetch is None:
+            self._head_fetch = asyncio.ensure_future(self._refresh_head())
+        return await asyncio.shield(self._head_fetch)
+
+    async def _refresh_head(self) -> int:
+        try:
+            number = await self._fetch_head()
+            self.head_fetches += 1
+            if self._head is not None and number != self._head[0]:
+                # Every cached key names an older block now
+                self._entries.clear()
+                self._by_address.clear()
+            self._head = (number, time.monotonic())
+            return number
+        finally:
+            self._head_fetch = None
+
+    # --- Reads ---
+    async def read(
+        self,
+        contract: str,
+        method: str,
+        args: Tuple[Any, ...],
+        call: Callable[[Any], Awaitable[Any]],
+    ) -> Any:
+        """`call(block_identifier)` on a miss; the cached value otherwise"""
+        addresses = _addresses(args)
+        if any(address in self._writing for address in addresses):
+            self.bypassed += 1
+            return await call("latest")
+
+        block = await self.head()
+        key = (contract, method, args, block)
+        entry = self._entries.get(key)
+        if entry is not None and time.monotonic() - entry[1] < self.ttl:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+        pending = self._inflight.get(key)
+        if pending is not None:
+            self.hits += 1
+            return await asyncio.shield(pending)
+
+        self.misses += 1
+        future = self._inflight[key] = asyncio.get_running_loop().create_future()
+        try:
+            value = await call(block)
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # Retrieved: waiters re-raise it, nobody else has to
+            raise
+        else:
+            future.set_result(value)
+            if not any(address in self._writing for address in addresses):
+                self._store(key, value, addresses)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    def _store(self, key: Hashable, value: Any, addresses: Set[str]):
+        self._entries[key] = (value, time.monotonic())
+        self._entries.move_to_end(key)
+        for address in addresses:
+            self._by_address.setdefault(address, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    # --- Our writes ---
+    def invalidate(self, address: str):
+        for key in self._by_address.pop(address.lower(), ()):
+            if self._entries.pop(key, None) is not None:
+                self.invalidations += 1
+
+    def begin_write(self, addresses: Iterable[str]):
+        for address in _addresses(addresses):
+            self._writing[address] = self._writing.get(address, 0) + 1
+            self.invalidate(address)
+
+    def end_write(self, addresses: Iterable[str]):
+        for address in _addresses(addresses):
+            remaining = self._writing.get(address, 0) - 1
+            if remaining > 0:
+                self._writing[address] = remaining
+            else:
+                self._writing.pop(address, None)
+            self.invalidate(address)
+        self._head = None
+
+    def clear(self):
+        self._entries.clear()
+        self._by_address.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "head": self._head[0] if self._head else None,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            "bypassed": self.bypassed,
+            "head_fetches": self.head_fetches,
+            "invalidations": self.invalidations,
+            "writes_pending": sum(self._writing.values()),
+        }
@@ -3,14 +3,18 @@ ElevenLabs Text-to-Speech Service
 Real voice output for Nova AI in multiple languages
 """
 
+import asyncio
 import httpx
 import logging
-from typing import Optional
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import AsyncIterator, Dict, Optional, Set, Tuple
 import base64
 import hashlib
-from pathlib import Path
 
 from app.config import get_settings
+from app.services.tts_cache import TTSCache
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
@@ -24,6 +28,11 @@ class ElevenLabsService:
     - English: Adam (conversational, warm)
     - Hindi: Custom cloned or Raj
     - Malayalam: Custom cloned or Indian female
+    
+    `stream` proxies audio chunks from the streaming endpoint as they
+    arrive (first audio long before the clip is complete) and stores the
+    finished clip in the cache without delaying the response. Cached clips are
+    served from memory or as files, never re-encoded.
     """
     
     def __init__(self):
@@ -40,9 +49,39 @@ class ElevenLabsService:
         # Model ID for multilingual
         self.model_id = "eleven_multilingual_v2"
         
-        # Cache directory
-        self.cache_dir = Path("/tmp/kredefy_tts_cache")
-        self.cache_dir.mkdir(exist_ok=True)
+        # Hot clips in memory, the rest on disk (both LRU, size-capped)
+        self.cache = TTSCache(
+            settings.tts_cache_dir,
+            memory_bytes=settings.tts_memory_cache_bytes,
+            disk_bytes=settings.tts_disk_cache_bytes,
+        )
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._clips: "OrderedDict[str, Tuple[str, str]]" = OrderedDict()  # Clip id -> (text, voice)
+        self._cache_writes: Set[asyncio.Task] = set()
+        self._client: Optional[httpx.AsyncClient] = None
+        
+        # Streaming metrics
+        self.streams = 0
+        self.last_first_chunk = 0.0
+        self._avg_first_chunk = 0.0
+    
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Pooled keep-alive client (saves a TLS handshake per clip)"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers=self._get_headers(),
+                timeout=httpx.Timeout(30.0, connect=5.0),
+            )
+        return self._client
+    
+    async def aclose(self):
+        if self._cache_writes:
+            await asyncio.gather(*self._cache_writes, return_exceptions=True)
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
     
     def _get_headers(self) -> dict:
         return {
@@ -50,23 +89,15 @@ class ElevenLabsService:
             "Content-Type": "application/json",
         }
     
+    def voice_for(self, language: str = "en", voice_id: Optional[str] = None) -> str:
+        """Explicit voice, else the language's voice"""
+        return voice_id or self.voices.get(language, self.voices["en"])
+    
     def _get_cache_key(self, text: str, voice_id: str) -> str:
         """Generate cache key for TTS output"""
         content = f"{text}:{voice_id}:{self.model_id}"
         return hashlib.md5(content.encode()).hexdigest()
     
-    def _get_cached(self, cache_key: str) -> Optional[bytes]:
-        """Get cached audio if exists"""
-        cache_file = self.cache_dir / f"{cache_key}.mp3"
-        if cache_file.exists():
-            return cache_file.read_bytes()
-        return None
-    
-    def _save_to_cache(self, cache_key: str, audio_data: bytes):
-        """Save audio to cache"""
-        cache_file = self.cache_dir / f"{cache_key}.mp3"
-        cache_file.write_bytes(audio_data)
-    
     async def text_to_speech(
         self,
         text: str,
@@ -78,43 +109,133 @@ class ElevenLabsService:
         Returns MP3 audio bytes
         """
         # Use language-specific voice
-        voice = voice_id or self.voices.get(language, self.voices["en"])
+        voice = self.voice_for(language, voice_id)
         
         # Check cache first
         cache_key = self._get_cache_key(text, voice)
-        cached = self._get_cached(cache_key)
+        cached = await self.cache.get(cache_key)
         if cached:
-            logger.info(f"TTS cache hit for: {text[:30]}...")
+            logger.debug(f"TTS cache hit for: {text[:30]}...")
             return cached
         
-        # Call ElevenLabs API
-        async with httpx.AsyncClient() as client:
-            payload = {
-                "text": text,
-                "model_id": self.model_id,
-                "voice_settings": {
-                    "stability": 0.5,
-                    "similarity_boost": 0.75,
-                    "style": 0.0,
-                    "use_speaker_boost": True,
-                }
-            }
-            
-            response = await client.post(
-                f"{self.base_url}/text-to-speech/{voice}",
-                json=payload,
-                headers=self._get_headers(),
-                timeout=30.0,
-            )
-            response.raise_for_status()
-            
-            audio_data = response.content
-            
-            # Cache the result
-            self._save_to_cache(cache_key, audio_data)
-            
-            logger.info(f"TTS generated for: {text[:30]}... ({len(audio_data)} bytes)")
+        # Identical phrases requested together share one synthesis
+        pending = self._inflight.get(cache_key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+        future = self._inflight[cache_key] = asyncio.get_running_loop().create_future()
+        try:
+            audio_data = await self._synthesize(text, voice)
+            await self.cache.put(cache_key, audio_data)
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # Retrieved: only concurrent waiters re-raise it
+            raise
+        else:
+            future.set_result(audio_data)
             return audio_data
+        finally:
+            self._inflight.pop(cache_key, None)
+    
+    def _payload(self, text: str) -> dict:
+        return {
+            "text": text,
+            "model_id": self.model_id,
+            "voice_settings": {
+                "stability": 0.5,
+                "similarity_boost": 0.75,
+                "style": 0.0,
+                "use_speaker_boost": True,
+            }
+        }
+    
+    async def _synthesize(self, text: str, voice: str) -> bytes:
+        """Call ElevenLabs API"""
+        response = await self.client.post(f"/text-to-speech/{voice}", json=self._payload(text))
+        response.raise_for_status()
+        
+        audio_data = response.content
+        logger.info(f"TTS generated for: {text[:30]}... ({len(audio_data)} bytes)")
+        return audio_data
+    
+    # ============================================
+    # Streaming
+    # ============================================
+    
+    def prepare_clip(self, text: str, language: str = "en", voice_id: Optional[str] = None) -> str:
+        """Clip id for `text`, fetchable later through `stream` / `cached_clip`"""
+        voice = self.voice_for(language, voice_id)
+        clip_id = self._get_cache_key(text, voice)
+        self._clips[clip_id] = (text, voice)
+        self._clips.move_to_end(clip_id)
+        while len(self._clips) > settings.tts_max_pending_clips:
+            self._clips.popitem(last=False)
+        return clip_id
+    
+    def has_clip(self, clip_id: str) -> bool:
+        return clip_id in self._clips or clip_id in self.cache.memory or clip_id in self.cache.disk
+    
+    def cached_clip(self, clip_id: str) -> Tuple[Optional[bytes], Optional[Path]]:
+        """(bytes, None) from memory, (None, file) from disk, or (None, None)"""
+        return self.cache.peek(clip_id)
+    
+    async def stream(self, clip_id: str) -> AsyncIterator[bytes]:
+        """Audio chunks for a prepared clip, from the cache or straight from the API"""
+        cached = await self.cache.get(clip_id)
+        if cached is not None:
+            yield cached
+            return
+        pending = self._inflight.get(clip_id)
+        if pending is not None:
+            yield await asyncio.shield(pending)
+            return
+        if clip_id not in self._clips:
+            raise KeyError(clip_id)
+        
+        text, voice = self._clips[clip_id]
+        future = self._inflight[clip_id] = asyncio.get_running_loop().create_future()
+        chunks = []
+        started = time.monotonic()
+        try:
+            async with self.client.stream(
+                "POST", f"/text-to-speech/{voice}/stream", json=self._payload(text)
+            ) as response:
+                response.raise_for_status()
+                async for chunk in response.aiter_bytes():
+                    if not chunks:
+                        self._record_first_chunk(time.monotonic() - started)
+                    chunks.append(chunk)
+                    yield chunk
+        except BaseException as e:
+            # Failed or client went away: later requests synthesize again
+            if not future.done():
+                future.set_exception(e if isinstance(e, Exception) else ConnectionError("TTS stream aborted"))
+                future.exception()
+            self._inflight.pop(clip_id, None)
+            raise
+        
+        audio_data = b"".join(chunks)
+        future.set_result(audio_data)
+        self._inflight.pop(clip_id, None)
+        self._clips.pop(clip_id, None)
+        task = asyncio.ensure_future(self.cache.put(clip_id, audio_data))
+        self._cache_writes.add(task)
+        task.add_done_callback(self._cache_writes.discard)
+        logger.info(f"TTS streamed for: {text[:30]}... ({len(audio_data)} bytes)")
+    
+    def _record_first_chunk(self, seconds: float):
+        self.last_first_chunk = seconds
+        self._avg_first_chunk = seconds if not self.streams else 0.9 * self._avg_first_chunk + 0.1 * seconds
+        self.streams += 1
+    
+    def stream_stats(self):
+        return {
+            "streams": self.streams,
+            "first_chunk_ms": {
+                "last": round(self.last_first_chunk * 1000, 1),
+                "avg": round(self._avg_first_chunk * 1000, 1),
+            },
+            "cache_writes_pending": len(self._cache_writes),
+        }
     
     async def text_to_speech_base64(
         self,
@@ -142,15 +263,10 @@ class ElevenLabsService:
     
     async def get_voices(self) -> list:
         """Get available voices from ElevenLabs"""
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{self.base_url}/voices",
-                headers=self._get_headers(),
-                timeout=15.0,
-            )
-            response.raise_for_status()
-            data = response.json()
-            return data.get("voices", [])
+        response = await self.client.get("/voices", timeout=15.0)
+        response.raise_for_status()
+        data = response.json()
+        return data.get("voices", [])
 
 
 # Singleton instance
@@ -0,0 +1,184 @@
+"""
+Event Queue - Per-key coalescing work queue
+Events for one key arriving within a short window are handled as one batch
+"""
+
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class CoalescingQueue:
+    """
+    Worker pool over batches of events grouped by key (e.g. user id)
+
+    The first event for a key opens a batch that becomes ready `window`
+    seconds later; events submitted meanwhile join it. A worker hands the
+    whole batch to `handler(key, items)`. A key is never processed by two
+    workers at once: a batch that becomes ready while the previous one is
+    still in flight waits for it to finish.
+
+    Back-pressure: once `max_pending` events are waiting, `submit` waits up
+    to `submit_timeout` seconds for room and then drops the event.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[str, List[Any]], Awaitable[Any]],
+        workers: int = 4,
+        window: float = 0.5,
+        max_pending: int = 10000,
+        submit_timeout: float = 5.0,
+        name: str = "events",
+    ):
+        self.handler = handler
+        self.workers = workers
+        self.window = window
+        self.max_pending = max_pending
+        self.submit_timeout = submit_timeout
+        self.name = name
+
+        self._batches: Dict[str, List[Any]] = {}
+        self._opened_at: Dict[str, float] = {}
+        self._timers: Dict[str, asyncio.TimerHandle] = {}
+        self._in_flight: Set[str] = set()
+        self._ready: Optional[asyncio.Queue] = None
+        self._space: Optional[asyncio.Event] = None
+        self._tasks: List[asyncio.Task] = []
+        self._closing = False
+        self.pending_events = 0
+
+        # Metrics
+        self.submitted = 0
+        self.processed = 0
+        self.batches = 0
+        self.failed = 0
+        self.dropped = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self._avg_lag = 0.0
+
+    @property
+    def running(self) -> bool:
+        """Accepting events (workers started and not shutting down)"""
+        return bool(self._tasks) and not self._closing
+
+    def start(self):
+        """Spawn the workers (needs a running event loop)"""
+        if self._tasks:
+            return
+        self._closing = False
+        self._ready = asyncio.Queue()
+        self._space = asyncio.Event()
+        self._tasks = [
+            asyncio.create_task(self._worker(), name=f"{self.name}-worker-{i}")
+            for i in range(self.workers)
+        ]
+        logger.info(f"{self.name} queue started with {self.workers} workers")
+
+    # --- Producers ---
+    async def submit(self, key: str, item: Any) -> bool:
+        """Add an event to `key`'s open batch; False if it was dropped"""
+        key = str(key)
+        deadline = time.monotonic() + self.submit_timeout
+        while self.pending_events >= self.max_pending:
+            remaining = deadline - time.monotonic()
+            self._space.clear()
+            try:
+                await asyncio.wait_for(self._space.wait(), max(0.0, remaining))
+            except asyncio.TimeoutError:
+                self.dropped += 1
+                logger.warning(f"{self.name} queue full, dropped event for {key}")
+                return False
+
+        batch = self._batches.get(key)
+        if batch is None:
+            batch = self._batches[key] = []
+            self._opened_at[key] = time.monotonic()
+            self._timers[key] = asyncio.get_running_loop().call_later(self.window, self._release, key)
+        batch.append(item)
+        self.pending_events += 1
+        self.submitted += 1
+        return True
+
+    def _release(self, key: str):
+        """Window elapsed: hand the batch to a worker (unless the key is busy)"""
+        self._timers.pop(key, None)
+        if key not in self._in_flight and key in self._batches:
+            self._ready.put_nowait(key)
+
+    # --- Workers ---
+    async def _worker(self):
+        while True:
+            key = await self._ready.get()
+            try:
+                items = self._batches.pop(key, None)
+                if items is None:
+                    continue
+                lag = time.monotonic() - self._opened_at.pop(key)
+                self.pending_events -= len(items)
+                self._space.set()
+                self._record_lag(lag)
+
+                self._in_flight.add(key)
+                try:
+                    await self.handler(key, items)
+                    self.processed += len(items)
+                except Exception as e:
+                    self.failed += len(items)
+                    logger.error(f"{self.name} handler failed for {key}: {e}")
+                finally:
+                    self._in_flight.discard(key)
+                    self.batches += 1
+                    # A batch that became ready while this one ran
+                    if key in self._batches and key not in self._timers:
+                        self._ready.put_nowait(key)
+            finally:
+                self._ready.task_done()
+
+    def _record_lag(self, lag: float):
+        self.last_lag = lag
+        self.max_lag = max(self.max_lag, lag)
+        self._avg_lag = lag if not self.batches else 0.9 * self._avg_lag + 0.1 * lag
+
+    # --- Shutdown ---
+    async def aclose(self, timeout: float = 5.0):
+        """Flush open batches without waiting for their windows, then stop the workers"""
+        if not self._tasks:
+            return
+        self._closing = True
+        for key, timer in list(self._timers.items()):
+            timer.cancel()
+            self._release(key)
+        try:
+            await asyncio.wait_for(self._ready.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"{self.name} queue closed with {self.pending_events} events unprocessed")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "workers": self.workers,
+            "window_seconds": self.window,
+            "pending_keys": len(self._batches),
+            "pending_events": self.pending_events,
+            "in_flight": len(self._in_flight),
+            "submitted": self.submitted,
+            "processed": self.processed,
+            "batches": self.batches,
+            "coalesced": max(0, self.processed + self.failed - self.batches),
+            "failed": self.failed,
+            "dropped": self.dropped,
+            "lag_ms": {
+                "last": round(self.last_lag * 1000, 1),
+                "avg": round(self._avg_lag * 1000, 1),
+                "max": round(self.max_lag * 1000, 1),
+            },
+        }
@@ -4,12 +4,17 @@ Manages Circle Wars, Bharosa Streaks, and Badges.
 """
 
 import logging
-from typing import Dict, Any, List
+import time
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime, timedelta
+from app.config import get_settings
+from app.services.event_queue import CoalescingQueue
+from app.services.leaderboard import CircleLeaderboard, CircleStats
 from app.services.supabase import supabase_service
 import asyncio
 
 logger = logging.getLogger(__name__)
+settings = get_settings()
 
 class GamificationService:
     """
@@ -38,25 +43,68 @@ class GamificationService:
         }
     }
     
+    def __init__(self):
+        self.leaderboard = CircleLeaderboard()
+        self._leaderboard_built_at: Optional[float] = None
+        self._leaderboard_lock = asyncio.Lock()
+        self.queue = CoalescingQueue(
+            self.apply_events,
+            workers=settings.gamification_workers,
+            window=settings.gamification_coalesce_window,
+            max_pending=settings.gamification_max_pending,
+            submit_timeout=settings.gamification_submit_timeout,
+            name="gamification",
+        )
+    
+    STREAK_EVENTS = ('login', 'repayment', 'vouch')
+    
     async def process_event(self, user_id: str, event_type: str, data: Dict = None):
-        """Main entry point for gamification events"""
-        logger.info(f"Processing gamification event: {event_type} for {user_id}")
+        """Main entry point for gamification events (applied immediately)"""
+        return await self.apply_events(user_id, [(event_type, data)])
+    
+    async def submit_event(self, user_id: str, event_type: str, data: Dict = None) -> bool:
+        """
+        Queue an event for the worker pool. Events for the same user within
+        the coalescing window are applied together; without running workers
+        (scripts, tests) the event is applied inline.
+        """
+        if not self.queue.running:
+            result = await self.process_event(user_id, event_type, data)
+            return "error" not in result
+        return await self.queue.submit(user_id, (event_type, data))
+    
+    async def apply_events(self, user_id: str, events: List[Tuple[str, Optional[Dict]]]) -> Dict[str, Any]:
+        """
+        Apply a batch of one user's events: the profile is read once, streak,
+        badges and XP are updated together and written back in one update
+        """
+        logger.info(f"Processing {len(events)} gamification event(s) for {user_id}")
         
         try:
+            profile = await supabase_service.get_profile(user_id)
+            if not profile:
+                return {"error": "Profile not found"}
+            metadata = dict(profile.get('metadata') or {})
+            
             # 1. Update Streaks (Daily Login / Activity)
-            if event_type in ['login', 'repayment', 'vouch']:
-                await self._update_streak(user_id)
+            streak_updated = False
+            if any(event_type in self.STREAK_EVENTS for event_type, _ in events):
+                streak_updated = self._update_streak(metadata)
             
             # 2. Check for Badges
-            new_badges = await self._check_badges(user_id, event_type)
+            new_badges = await self._check_badges(user_id, metadata)
             
             # 3. Update XP/Score
-            xp_gain = self._calculate_xp(event_type, data)
+            xp_gain = sum(self._calculate_xp(event_type, data) for event_type, data in events)
             if xp_gain > 0:
-                await self._award_xp(user_id, xp_gain)
+                self._award_xp(metadata, xp_gain)
+            
+            if streak_updated or new_badges or xp_gain > 0:
+                await supabase_service.update_profile(user_id, {"metadata": metadata})
                 
             return {
-                "streak_updated": True,
+                "events": len(events),
+                "streak_updated": streak_updated,
                 "new_badges": new_badges,
                 "xp_gained": xp_gain
             }
@@ -64,52 +112,104 @@ class GamificationService:
         except Exception as e:
             logger.error(f"Gamification failed: {e}")
             return {"error": str(e)}
+    
+    def start(self):
+        """Start the event workers (app startup)"""
+        self.queue.start()
+    
+    async def aclose(self):
+        """Apply queued events and stop the workers (app shutdown)"""
+        await self.queue.aclose(timeout=settings.gamification_drain_timeout)
 
-    async def calculate_circle_leaderboard(self) -> List[Dict]:
+    # ============================================
+    # CIRCLE WARS LEADERBOARD
+    # ============================================
+    
+    def _leaderboard_stale(self) -> bool:
+        if self._leaderboard_built_at is None:
+            return True
+        interval = settings.leaderboard_rebuild_seconds
+        return interval > 0 and time.monotonic() - self._leaderboard_built_at >= interval
+    
+    async def _ensure_leaderboard(self):
+        """Build the leaderboard on first use and reconcile it periodically"""
+        if not self._leaderboard_stale():
+            return
+        async with self._leaderboard_lock:
+            if self._leaderboard_stale():  # Another request may have rebuilt it while we waited
+                await self.rebuild_leaderboard()
+    
+    async def rebuild_leaderboard(self):
+        """
+        Recompute every circle's components with three aggregate reads
+        (circles, loan outcomes, active vouches per circle). Between
+        rebuilds record_circle_event keeps it current; the periodic rebuild
+        also picks up changes made by other workers.
+        """
+        circles, outcomes, graph = await asyncio.gather(
+            supabase_service.get_all_circles(),
+            supabase_service.get_loan_outcomes_by_circle(),
+            supabase_service.get_vouch_graph(),
+        )
+        vouches = graph.count_by("circle_id")
+        
+        self.leaderboard.load(
+            CircleStats(
+                str(circle["id"]),
+                name=circle.get("name"),
+                repaid_loans=outcomes.get(str(circle["id"]), {}).get("completed", 0),
+                defaults=outcomes.get(str(circle["id"]), {}).get("defaulted", 0),
+                active_vouches=vouches.get(str(circle["id"]), 0),
+            )
+            for circle in circles
+        )
+        self._leaderboard_built_at = time.monotonic()
+        logger.info(f"Circle leaderboard rebuilt: {len(self.leaderboard)} circles")
+    
+    def record_circle_event(self, circle_id: Optional[str], event: str, count: int = 1):
+        """
+        Apply a circle event ("loan_repaid", "default", "vouch", "vouch_released")
+        to the live leaderboard. Before the first build this is a no-op: the
+        build reads the already-written state.
+        """
+        if not circle_id or self._leaderboard_built_at is None:
+            return
+        try:
+            self.leaderboard.apply(str(circle_id), event, count)
+        except Exception as e:
+            logger.warning(f"Leaderboard update failed for {circle_id}: {e}")
+    
+    async def calculate_circle_leaderboard(self, offset: int = 0, limit: int = 20) -> List[Dict]:
         """
         Circle Wars Logic: Rank circles by 'Trust Velocity'
         Score = (Repayment Rate * 100) + (Vouch Activity * 10) - (Defaults * 500)
         """
-        circles = await supabase_service.get_all_circles() # Need to implement this in supabase_service if missing
-        
-        leaderboard = []
-        for circle in circles:
-            score = 0
-            # Fetch stats (mocked aggregation for now, simpler query in prod)
-            members = await supabase_service.get_circle_members(circle['id'])
-            
-            # Simulated stats for demo depth
-            repayment_rate = 0.95 # fetch real data
-            active_vouches = len(members) * 2
-            defaults = 0 
-            
-            score = (repayment_rate * 100) + (active_vouches * 10) - (defaults * 500)
-            
-            leaderboard.append({
-                "circle_id": circle['id'],
-                "name": circle['name'],
-                "score": int(score),
-                "rank": 0 # filled later
-            })
-            
-        # Sort
-        leaderboard.sort(key=lambda x: x['score'], reverse=True)
-        
-        # Assign ranks
-        for i, item in enumerate(leaderboard):
-            item['rank'] = i + 1
-            
-        return leaderboard
+        await self._ensure_leaderboard()
+        page = self.leaderboard.page(offset, limit)
+        await self._fill_names(page)
+        return page
+    
+    async def get_circle_rank(self, circle_id: str) -> Optional[Dict]:
+        await self._ensure_leaderboard()
+        entry = self.leaderboard.rank(circle_id)
+        if entry:
+            await self._fill_names([entry])
+        return entry
+    
+    async def _fill_names(self, entries: List[Dict]):
+        """Circles first seen through an event have no name until fetched"""
+        for entry in entries:
+            if entry["name"] is None:
+                circle = await supabase_service.get_circle(entry["circle_id"]) or {}
+                entry["name"] = circle.get("name", "Circle")
+                self.leaderboard.set_name(entry["circle_id"], entry["name"])
 
-    async def _update_streak(self, user_id: str):
-        """Maintain 'Bharosa Streak' logic"""
-        profile = await supabase_service.get_profile(user_id)
-        metadata = profile.get('metadata') or {}
-        
+    def _update_streak(self, metadata: Dict, today=None) -> bool:
+        """Maintain 'Bharosa Streak' logic; False when today was already counted"""
         last_active = metadata.get('last_active_date')
         current_streak = metadata.get('streak_days', 0)
         
-        today = datetime.utcnow().date()
+        today = today or datetime.utcnow().date()
         
         if not last_active:
             # First time
@@ -117,23 +217,20 @@ class GamificationService:
         else:
             last_date = datetime.fromisoformat(last_active).date()
             if last_date == today:
-                return # Already counted today
+                return False # Already counted today
             elif last_date == today - timedelta(days=1):
                 new_streak = current_streak + 1
             else:
                 new_streak = 1 # Streak broken!
                 
-        # Update DB
         metadata['last_active_date'] = today.isoformat()
         metadata['streak_days'] = new_streak
-        
-        await supabase_service.update_profile(user_id, {"metadata": metadata})
+        return True
 
-    async def _check_badges(self, user_id: str, event_type: str) -> List[str]:
-        """Check if user earned new badges"""
+    async def _check_badges(self, user_id: str, metadata: Dict) -> List[str]:
+        """Check if user earned new badges (added to `metadata`)"""
         awarded = []
-        profile = await supabase_service.get_profile(user_id)
-        current_badges = (profile.get('metadata') or {}).get('badges', [])
+        current_badges = metadata.get('badges', [])
         
         # Example Check: The Anchor
         if "the_anchor" not in current_badges:
@@ -143,10 +240,7 @@ class GamificationService:
                 awarded.append("the_anchor")
         
         if awarded:
-            # Grant badges
-            metadata = profile.get('metadata') or {}
             metadata['badges'] = current_badges + awarded
-            await supabase_service.update_profile(user_id, {"metadata": metadata})
             
         return awarded
 
@@ -156,9 +250,8 @@ class GamificationService:
         if event_type == 'login': return 10
         return 0
 
-    async def _award_xp(self, user_id: str, amount: int):
-        # In real app, increment XP column
-        # For now, just logging or storing in metadata
-        pass
+    def _award_xp(self, metadata: Dict, amount: int):
+        # In real app, increment XP column; metadata is what /gamification/stats reads
+        metadata['xp'] = metadata.get('xp', 0) + amount
 
 gamification_service = GamificationService()
@@ -0,0 +1,210 @@
+"""
+Geospatial Index - Nearby user discovery
+Fixed lat/lon cell grid with radius and k-nearest queries
+"""
+
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+import math
+import time
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371
+KM_PER_DEGREE = 111.32
+
+
+def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Calculate distance between two points in km using Haversine formula"""
+    lat1_rad = math.radians(lat1)
+    lat2_rad = math.radians(lat2)
+    delta_lat = math.radians(lat2 - lat1)
+    delta_lon = math.radians(lon2 - lon1)
+
+    a = math.sin(delta_lat/2)**2 + math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(delta_lon/2)**2
+    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
+
+    return EARTH_RADIUS_KM * c
+
+
+def haversine_many(lat: float, lon: float, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """Distances in km from one origin to arrays of points, in a single vectorized pass"""
+    lat_rad = math.radians(lat)
+    lats_rad = np.radians(lats)
+    delta_lat = lats_rad - lat_rad
+    delta_lon = np.radians(lons - lon)
+
+    a = np.sin(delta_lat / 2) ** 2 + math.cos(lat_rad) * np.cos(lats_rad) * np.sin(delta_lon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+class GeoGridIndex:
+    """
+    User locations bucketed into `cell_deg` x `cell_deg` grid cells
+
+    Coordinates live in contiguous float64 arrays (one slot per user, slots
+    are reused after removal); cells only hold slot numbers. A radius query
+    gathers the slots of the cells overlapping its bounding box and computes
+    all their distances with one vectorized haversine, so its cost depends on
+    local density rather than on the total number of users. Locations older
+    than `ttl` seconds are evicted (oldest first) on every write and query.
+    """
+
+    def __init__(self, cell_deg: float = 0.05, ttl: Optional[float] = None, initial_capacity: int = 1024):
+        self.cell_deg = cell_deg
+        self.ttl = ttl
+        self.cols = int(math.ceil(360 / cell_deg))
+        self.lats = np.zeros(initial_capacity, dtype=np.float64)
+        self.lons = np.zeros(initial_capacity, dtype=np.float64)
+        self.updated = np.zeros(initial_capacity, dtype=np.float64)
+        self._ids: List[Optional[str]] = [None] * initial_capacity
+        self._free: List[int] = list(range(initial_capacity - 1, -1, -1))
+        self._slots: "OrderedDict[str, int]" = OrderedDict()  # user -> slot, least recently updated first
+        self._cells: Dict[Tuple[int, int], Set[int]] = {}
+        self.evicted = 0
+
+    # --- Cells ---
+    def _cell(self, lat: float, lon: float) -> Tuple[int, int]:
+        row = int(math.floor((lat + 90) / self.cell_deg))
+        col = int(math.floor((lon + 180) / self.cell_deg)) % self.cols
+        return row, col
+
+    def _cells_within(self, lat: float, lon: float, radius_km: float) -> Iterable[Tuple[int, int]]:
+        lat_span = radius_km / KM_PER_DEGREE
+        cos_lat = math.cos(math.radians(min(89.9, abs(lat) + lat_span)))
+        lon_span = min(180.0, radius_km / (KM_PER_DEGREE * cos_lat))
+
+        row_min, col_min = self._cell(max(-90.0, lat - lat_span), lon - lon_span)
+        row_max, _ = self._cell(min(90.0, lat + lat_span), lon)
+        n_cols = min(self.cols, int(math.floor(2 * lon_span / self.cell_deg)) + 2)
+        for row in range(row_min, row_max + 1):
+            for i in range(n_cols):
+                yield row, (col_min + i) % self.cols
+
+    # --- Slots ---
+    def _grow(self):
+        old = len(self._ids)
+        new = old * 2
+        for name in ("lats", "lons", "updated"):
+            grown = np.zeros(new, dtype=np.float64)
+            grown[:old] = getattr(self, name)
+            setattr(self, name, grown)
+        self._ids.extend([None] * (new - old))
+        self._free.extend(range(new - 1, old - 1, -1))
+
+    # --- Writes ---
+    def upsert(self, user_id: str, lat: float, lon: float, now: Optional[float] = None):
+        now = time.time() if now is None else now
+        self.remove(user_id)
+        if not self._free:
+            self._grow()
+        slot = self._free.pop()
+        self.lats[slot] = lat
+        self.lons[slot] = lon
+        self.updated[slot] = now
+        self._ids[slot] = user_id
+        self._slots[user_id] = slot
+        self._cells.setdefault(self._cell(lat, lon), set()).add(slot)
+        self.evict_stale(now)
+
+    def remove(self, user_id: str) -> bool:
+        slot = self._slots.pop(user_id, None)
+        if slot is None:
+            return False
+        cell = self._cell(self.lats[slot], self.lons[slot])
+        members = self._cells.get(cell)
+        if members is not None:
+            members.discard(slot)
+            if not members:
+                del self._cells[cell]
+        self._ids[slot] = None
+        self._free.append(slot)
+        return True
+
+    def evict_stale(self, now: Optional[float] = None) -> int:
+        """Drop locations not refreshed within `ttl` seconds"""
+        if self.ttl is None:
+            return 0
+        cutoff = (time.time() if now is None else now) - self.ttl
+        removed = 0
+        while self._slots:
+            user_id, slot = next(iter(self._slots.items()))
+            if self.updated[slot] > cutoff:
+                break
+            self.remove(user_id)
+            removed += 1
+        self.evicted += removed
+        return removed
+
+    # --- Queries ---
+    def get(self, user_id: str) -> Optional[Dict[str, Any]]:
+        slot = self._slots.get(user_id)
+        if slot is None:
+            return None
+        return {
+            "latitude": float(self.lats[slot]),
+            "longitude": float(self.lons[slot]),
+            "updated_at": float(self.updated[slot]),
+        }
+
+    def within(
+        self,
+        lat: float,
+        lon: float,
+        radius_km: float,
+        exclude: Optional[str] = None,
+        now: Optional[float] = None,
+    ) -> List[Tuple[str, float]]:
+        """(user_id, distance_km) pairs inside the radius, nearest first"""
+        self.evict_stale(now)
+        buckets = [self._cells[c] for c in set(self._cells_within(lat, lon, radius_km)) if c in self._cells]
+        if not buckets:
+            return []
+        slots = np.fromiter((s for bucket in buckets for s in bucket), dtype=np.intp)
+
+        distances = haversine_many(lat, lon, self.lats[slots], self.lons[slots])
+        inside = distances <= radius_km
+        slots, distances = slots[inside], distances[inside]
+        order = np.argsort(distances, kind="stable")
+
+        ids = self._ids
+        return [
+            (ids[slot], distance)
+            for slot, distance in zip(slots[order].tolist(), distances[order].tolist())
+            if ids[slot] != exclude
+        ]
+
+    def nearest(
+        self,
+        lat: float,
+        lon: float,
+        k: int,
+        max_radius_km: float = 500.0,
+        exclude: Optional[str] = None,
+        now: Optional[float] = None,
+    ) -> List[Tuple[str, float]]:
+        """k closest users within `max_radius_km`, nearest first"""
+        radius = self.cell_deg * KM_PER_DEGREE
+        while True:
+            radius = min(radius, max_radius_km)
+            found = self.within(lat, lon, radius, exclude=exclude, now=now)
+            # Everything inside `radius` was seen, so the k best here are the k best overall
+            if len(found) >= k or radius >= max_radius_km:
+                return found[:k]
+            radius *= 2
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def __contains__(self, user_id: str) -> bool:
+        return user_id in self._slots
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "locations": len(self._slots),
+            "capacity": len(self._ids),
+            "cells": len(self._cells),
+            "cell_deg": self.cell_deg,
+            "ttl_seconds": self.ttl,
+            "evicted": self.evicted,
+        }
@@ -0,0 +1,190 @@
+"""
+Graph Layout - Node positions for the trust network visualization
+Vectorized radial and force-directed layouts, plus a version-checked layout cache
+"""
+
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple
+import math
+import time
+
+import numpy as np
+
+Positions = Dict[str, Tuple[float, float]]
+
+
+# ============================================
+# LAYOUTS
+# ============================================
+
+def radial_layout(
+    network,
+    origin: Tuple[float, float] = (200, 150),
+    ring_spacing: float = 120,
+    min_gap: float = 40,
+) -> Positions:
+    """
+    Center at `origin`, each BFS level on its own ring
+
+    Nodes of a ring are ordered by the angle of the node that discovered them,
+    so subtrees stay in their parent's sector instead of crossing the
+    picture. A ring grows past `ring_spacing * level` when it needs more
+    circumference to keep neighbours at least `min_gap` apart.
+    """
+    positions: Positions = {}
+    angles: Dict[str, float] = {}
+    radius = 0.0
+    for level, node_ids in enumerate(network.levels()):
+        if not node_ids:
+            continue
+        n = len(node_ids)
+        if level:
+            radius = max(radius + ring_spacing, ring_spacing * level, n * min_gap / (2 * math.pi))
+            parent_angles = np.array([angles.get(network.parents.get(nid), 0.0) for nid in node_ids])
+            order = np.argsort(parent_angles, kind="stable")
+            node_ids = [node_ids[i] for i in order]
+
+        theta = np.arange(n) * (2 * math.pi / n)
+        xs = np.round(origin[0] + radius * np.cos(theta), 1).tolist()
+        ys = np.round(origin[1] + radius * np.sin(theta), 1).tolist()
+        for node_id, angle, x, y in zip(node_ids, theta.tolist(), xs, ys):
+            angles[node_id] = angle
+            positions[node_id] = (x, y)
+    return positions
+
+
+def force_layout(
+    network,
+    origin: Tuple[float, float] = (200, 150),
+    ring_spacing: float = 120,
+    iterations: int = 60,
+    initial: Optional[Positions] = None,
+) -> Positions:
+    """
+    Fruchterman-Reingold spring layout, seeded from the radial layout
+
+    All pairwise repulsions are computed as one (n, n, 2) array per
+    iteration and edge attractions with a scatter-add; a full 150-node
+    network settles in tens of milliseconds. The center stays pinned at `origin` and
+    the result is deterministic for a given network.
+    """
+    seed = initial if initial is not None else radial_layout(network, origin, ring_spacing)
+    node_ids = list(network.nodes)
+    n = len(node_ids)
+    if n < 2:
+        return {nid: seed.get(nid, origin) for nid in node_ids}
+
+    index = {nid: i for i, nid in enumerate(node_ids)}
+    pos = np.array([seed.get(nid, origin) for nid in node_ids], dtype=np.float64)
+    pairs = [(index[e["from"]], index[e["to"]]) for e in network.edges if e["from"] in index and e["to"] in index]
+    src, dst = (np.array(side, dtype=np.intp) for side in zip(*pairs)) if pairs else (None, None)
+    center = index.get(network.center)
+
+    k = ring_spacing * 0.75  # Ideal edge length
+    temperature = ring_spacing / 2
+    cooling = 0.02 ** (1 / max(1, iterations))  # Ends at 2% of the initial step
+    for _ in range(iterations):
+        delta = pos[:, None, :] - pos[None, :, :]
+        dist = np.sqrt((delta ** 2).sum(axis=-1))
+        np.fill_diagonal(dist, np.inf)
+        dist = np.maximum(dist, 0.01)
+        disp = (delta * (k * k / dist ** 2)[..., None]).sum(axis=1)
+
+        if src is not None:
+            d = pos[src] - pos[dst]
+            length = np.maximum(np.sqrt((d ** 2).sum(axis=-1)), 0.01)
+            pull = d * (length / k)[:, None]
+            np.add.at(disp, src, -pull)
+            np.add.at(disp, dst, pull)
+
+        step = np.maximum(np.sqrt((disp ** 2).sum(axis=-1)), 1e-9)
+        pos += disp * (np.minimum(step, temperature) / step)[:, None]
+        if center is not None:
+            pos[center] = origin
+        temperature *= cooling
+
+    rounded = np.round(pos, 1).tolist()
+    return {nid: (x, y) for nid, (x, y) in zip(node_ids, rounded)}
+
+
+LAYOUTS = {"radial": radial_layout, "force": force_layout}
+
+
+def compute_layout(network, method: str = "force", **options: Any) -> Positions:
+    if method not in LAYOUTS:
+        raise ValueError(f"Unknown graph layout: {method}")
+    return LAYOUTS[method](network, **options)
+
+
+# ============================================
+# CACHE
+# ============================================
+
+class LayoutCache:
+    """
+    Rendered network payloads keyed by (center_user, depth, ...)
+
+    An entry remembers the vouch graph version it was built from and the
+    users it contains. It is served while none of those users has been
+    touched by a later graph change (`VouchGraph.user_version`) and it is
+    younger than `ttl` (profile names and scores are not versioned), so a
+    hit costs O(nodes) and no queries. Least recently used entries are
+    dropped beyond `max_entries`.
+    """
+
+    def __init__(self, max_entries: int = 512, ttl: float = 300):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, Tuple[int, float, List[str], Dict[str, Any]]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable, graph, now: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        version, built_at, node_ids, payload = entry
+        now = time.monotonic() if now is None else now
+        if now - built_at > self.ttl or any(graph.user_version(u) > version for u in node_ids):
+            del self._entries[key]
+            self.invalidations += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return payload
+
+    def put(
+        self,
+        key: Hashable,
+        version: int,
+        node_ids: Iterable[str],
+        payload: Dict[str, Any],
+        now: Optional[float] = None,
+    ):
+        """Store a payload built from graph `version` (read it before building, not after)"""
+        if self.max_entries <= 0:
+            return
+        now = time.monotonic() if now is None else now
+        self._entries[key] = (version, now, list(dict.fromkeys(node_ids)), payload)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+        }
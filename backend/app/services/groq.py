@@ -3,10 +3,13 @@ Groq AI Service - LLM and Voice
 """
 
 from groq import Groq
+import asyncio
 import logging
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, AsyncIterator, List
 
 from app.config import get_settings
+from app.services.llm_client import AsyncLLMClient
+from app.services.llm_cache import ResponseCache
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
@@ -16,29 +19,63 @@ class GroqService:
     """Groq AI for LLM and transcription"""
     
     def __init__(self):
-        self.client = Groq(api_key=settings.groq_api_key)
+        self.client = Groq(api_key=settings.groq_api_key)  # Sync SDK, used for Whisper only
+        self.llm = AsyncLLMClient(
+            base_url=settings.groq_base_url,
+            api_key=settings.groq_api_key,
+            max_concurrency=settings.llm_max_concurrency,
+            max_queue=settings.llm_max_queue,
+            queue_timeout=settings.llm_queue_timeout,
+            request_timeout=settings.llm_request_timeout,
+            max_connections=settings.llm_max_connections,
+        )
         self.model = "llama-3.3-70b-versatile"
+        self.response_cache = ResponseCache(
+            max_entries=settings.llm_cache_size,
+            ttl=settings.llm_cache_ttl,
+        )
+    
+    def _messages(self, message: str, system_prompt: str, language: str) -> List[Dict[str, str]]:
+        system = system_prompt or self._get_nova_prompt(language)
+        return [
+            {"role": "system", "content": system},
+            {"role": "user", "content": message},
+        ]
     
     async def chat(
         self,
         message: str,
         system_prompt: str = "",
         language: str = "en",
+        cache: bool = False,
     ) -> str:
-        """Chat with Nova AI assistant"""
-        system = system_prompt or self._get_nova_prompt(language)
+        """
+        Chat with Nova AI assistant
+        
+        cache=True serves repeated prompts (same normalized prompt, system
+        prompt and model) from the response cache. Use it for classification
+        style calls, not for conversational replies.
+        """
+        messages = self._messages(message, system_prompt, language)
+        cache_key = None
+        if cache:
+            cache_key = ResponseCache.make_key(
+                message, messages[0]["content"], self.model, max_tokens=600, temperature=0.7
+            )
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                return cached
         
         try:
-            response = self.client.chat.completions.create(
+            response = await self.llm.chat_completion(
+                messages,
                 model=self.model,
-                messages=[
-                    {"role": "system", "content": system},
-                    {"role": "user", "content": message},
-                ],
                 max_tokens=600,
                 temperature=0.7,
             )
-            return response.choices[0].message.content
+            if cache_key:
+                self.response_cache.put(cache_key, response)
+            return response
         except Exception as e:
             logger.error(f"Groq API Error: {str(e)}")
             # Fallback for demo if API fails
@@ -46,9 +83,26 @@ class GroqService:
                 return f"[System: Groq API Key Missing/Invalid] I cannot think right now. Please check backend .env. (Simulated Response: {message})"
             return f"I am having trouble thinking (Error: {str(e)[:50]}...)"
     
+    async def chat_stream(
+        self,
+        message: str,
+        system_prompt: str = "",
+        language: str = "en",
+    ) -> AsyncIterator[str]:
+        """Stream Nova's reply token by token"""
+        async for token in self.llm.stream_chat_completion(
+            self._messages(message, system_prompt, language),
+            model=self.model,
+            max_tokens=600,
+            temperature=0.7,
+        ):
+            yield token
+    
     async def transcribe(self, audio_file) -> str:
         """Transcribe audio using Whisper"""
-        response = self.client.audio.transcriptions.create(
+        # The SDK call is blocking; keep it off the event loop
+        response = await asyncio.to_thread(
+            self.client.audio.transcriptions.create,
             model="whisper-large-v3",
             file=audio_file,
         )
@@ -63,7 +117,7 @@ class GroqService:
         Return: {{"type": "income" or "expense", "category": "category_name", "amount": number_if_mentioned}}
         """
         
-        response = await self.chat(prompt)
+        response = await self.chat(prompt, cache=True)
         try:
             import json
             return json.loads(response)
@@ -88,4 +142,8 @@ You can help with: checking loan status, explaining EMIs, answering questions ab
         return prompts.get(language, prompts["en"])
 
 
+    async def aclose(self):
+        await self.llm.aclose()
+
+
 groq_service = GroqService()
@@ -0,0 +1,249 @@
+"""
+Circle Leaderboard - Circle Wars rankings
+Per-circle score components kept in an indexable skip list ordered by score
+"""
+
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple
+import random
+
+
+# ============================================
+# RANKED SKIP LIST
+# ============================================
+
+class _Node:
+    __slots__ = ("key", "value", "next", "width")
+
+    def __init__(self, key, value, level: int):
+        self.key = key
+        self.value = value
+        self.next: List[Optional["_Node"]] = [None] * level
+        self.width: List[int] = [1] * level  # Positions skipped by following next[i]
+
+
+class RankedSkipList:
+    """
+    Sorted key -> value map with positional access
+
+    Each forward link stores how many positions it skips, so insert, remove
+    and rank-of-key are O(log n), and reading `limit` items from any offset
+    is O(log n + limit). Keys must be unique and mutually comparable.
+    """
+
+    MAX_LEVEL = 24
+    P = 0.25
+
+    def __init__(self, seed: Optional[int] = None):
+        self._rng = random.Random(seed)
+        self._head = _Node(None, None, self.MAX_LEVEL)
+        self._size = 0
+
+    def _random_level(self) -> int:
+        level = 1
+        while level < self.MAX_LEVEL and self._rng.random() < self.P:
+            level += 1
+        return level
+
+    def _predecessors(self, key) -> Tuple[List[_Node], List[int]]:
+        """Last node before `key` on every level, and its position (head = 0)"""
+        update: List[_Node] = [self._head] * self.MAX_LEVEL
+        positions = [0] * self.MAX_LEVEL
+        node, pos = self._head, 0
+        for i in reversed(range(self.MAX_LEVEL)):
+            while node.next[i] is not None and node.next[i].key < key:
+                pos += node.width[i]
+                node = node.next[i]
+            update[i], positions[i] = node, pos
+        return update, positions
+
+    def insert(self, key, value=None):
+        update, positions = self._predecessors(key)
+        found = update[0].next[0]
+        if found is not None and found.key == key:
+            found.value = value
+            return
+
+        at = positions[0] + 1
+        node = _Node(key, value, self._random_level())
+        for i in range(self.MAX_LEVEL):
+            prev = update[i]
+            if i < len(node.next):
+                node.next[i] = prev.next[i]
+                node.width[i] = prev.width[i] - (at - positions[i]) + 1
+                prev.next[i] = node
+                prev.width[i] = at - positions[i]
+            else:
+                prev.width[i] += 1
+        self._size += 1
+
+    def remove(self, key) -> bool:
+        update, _ = self._predecessors(key)
+        node = update[0].next[0]
+        if node is None or node.key != key:
+            return False
+        for i in range(self.MAX_LEVEL):
+            prev = update[i]
+            if prev.next[i] is node:
+                prev.width[i] += node.width[i] - 1
+                prev.next[i] = node.next[i]
+            else:
+                prev.width[i] -= 1
+        self._size -= 1
+        return True
+
+    def rank(self, key) -> Optional[int]:
+        """0-based position of `key`, or None"""
+        update, positions = self._predecessors(key)
+        node = update[0].next[0]
+        if node is None or node.key != key:
+            return None
+        return positions[0]
+
+    def slice(self, offset: int, limit: int) -> List[Tuple[Any, Any]]:
+        """(key, value) pairs at positions offset .. offset + limit - 1"""
+        if offset < 0 or limit <= 0 or offset >= self._size:
+            return []
+        target = offset + 1
+        node, pos = self._head, 0
+        for i in reversed(range(self.MAX_LEVEL)):
+            while node.next[i] is not None and pos + node.width[i] <= target:
+                pos += node.width[i]
+                node = node.next[i]
+
+        items = []
+        while node is not None and len(items) < limit:
+            items.append((node.key, node.value))
+            node = node.next[0]
+        return items
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __iter__(self):
+        node = self._head.next[0]
+        while node is not None:
+            yield node.key, node.value
+            node = node.next[0]
+
+
+# ============================================
+# CIRCLE LEADERBOARD
+# ============================================
+
+class CircleStats:
+    """Score components of one circle"""
+
+    __slots__ = ("circle_id", "name", "repaid_loans", "defaults", "active_vouches")
+
+    def __init__(self, circle_id: str, name: Optional[str] = None, repaid_loans: int = 0, defaults: int = 0, active_vouches: int = 0):
+        self.circle_id = circle_id
+        self.name = name
+        self.repaid_loans = repaid_loans
+        self.defaults = defaults
+        self.active_vouches = active_vouches
+
+    @property
+    def repayment_rate(self) -> float:
+        closed = self.repaid_loans + self.defaults
+        return self.repaid_loans / closed if closed else 0.0
+
+    @property
+    def score(self) -> int:
+        """Trust Velocity = (Repayment Rate * 100) + (Vouch Activity * 10) - (Defaults * 500)"""
+        return int(self.repayment_rate * 100 + self.active_vouches * 10 - self.defaults * 500)
+
+
+class CircleLeaderboard:
+    """
+    Circles ranked by Trust Velocity, updated one event at a time
+
+    Events adjust a circle's components and move just that circle in the
+    ranking (O(log n)). Top-K and page reads walk K entries; rank-of-circle
+    is O(log n). Ties are broken by circle id so the order is stable.
+    """
+
+    EVENTS = {
+        "loan_repaid": ("repaid_loans", 1),
+        "default": ("defaults", 1),
+        "vouch": ("active_vouches", 1),
+        "vouch_released": ("active_vouches", -1),
+    }
+
+    def __init__(self, seed: Optional[int] = None):
+        self._seed = seed
+        self._stats: Dict[str, CircleStats] = {}
+        self._keys: Dict[str, Tuple[int, str]] = {}
+        self._ranking = RankedSkipList(seed)
+
+    def load(self, circles: Iterable[CircleStats]):
+        """Replace every circle (initial build / periodic reconciliation)"""
+        self._stats.clear()
+        self._keys.clear()
+        self._ranking = RankedSkipList(self._seed)
+        for stats in circles:
+            self._stats[stats.circle_id] = stats
+            self._reposition(stats)
+
+    def _reposition(self, stats: CircleStats):
+        old = self._keys.get(stats.circle_id)
+        if old is not None:
+            self._ranking.remove(old)
+        key = (-stats.score, stats.circle_id)
+        self._keys[stats.circle_id] = key
+        self._ranking.insert(key, stats)
+
+    def apply(self, circle_id: str, event: str, count: int = 1) -> CircleStats:
+        """Apply a repayment / default / vouch event to a circle"""
+        if event not in self.EVENTS:
+            raise ValueError(f"Unknown leaderboard event: {event}")
+        field, step = self.EVENTS[event]
+        circle_id = str(circle_id)
+        stats = self._stats.get(circle_id)
+        if stats is None:
+            stats = self._stats[circle_id] = CircleStats(circle_id)
+        setattr(stats, field, max(0, getattr(stats, field) + step * count))
+        self._reposition(stats)
+        return stats
+
+    def set_name(self, circle_id: str, name: str):
+        stats = self._stats.get(str(circle_id))
+        if stats is not None:
+            stats.name = name
+
+    def remove(self, circle_id: str) -> bool:
+        key = self._keys.pop(str(circle_id), None)
+        if key is None:
+            return False
+        del self._stats[str(circle_id)]
+        return self._ranking.remove(key)
+
+    # --- Reads ---
+    @staticmethod
+    def _entry(stats: CircleStats, position: int) -> Dict[str, Any]:
+        return {
+            "circle_id": stats.circle_id,
+            "name": stats.name,
+            "score": stats.score,
+            "rank": position + 1,
+            "repayment_rate": round(stats.repayment_rate, 3),
+            "active_vouches": stats.active_vouches,
+            "defaults": stats.defaults,
+        }
+
+    def page(self, offset: int = 0, limit: int = 20) -> List[Dict[str, Any]]:
+        return [self._entry(stats, offset + i) for i, (_, stats) in enumerate(self._ranking.slice(offset, limit))]
+
+    def top(self, k: int = 10) -> List[Dict[str, Any]]:
+        return self.page(0, k)
+
+    def rank(self, circle_id: str) -> Optional[Dict[str, Any]]:
+        key = self._keys.get(str(circle_id))
+        if key is None:
+            return None
+        return self._entry(self._stats[str(circle_id)], self._ranking.rank(key))
+
+    def __len__(self) -> int:
+        return len(self._ranking)
+
+    def __contains__(self, circle_id: Hashable) -> bool:
+        return str(circle_id) in self._stats
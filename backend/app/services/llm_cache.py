@@ -0,0 +1,74 @@
+"""
+LLM Response Cache
+Exact-match TTL/LRU cache for deterministic-enough LLM calls
+"""
+
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+import hashlib
+import time
+
+
+def normalize_prompt(text: str) -> str:
+    """Case- and whitespace-insensitive form of a prompt"""
+    return " ".join((text or "").lower().split())
+
+
+class ResponseCache:
+    """
+    Bounded LRU of LLM completions keyed on (normalized prompt, system prompt,
+    model, sampling params). Entries expire after `ttl` seconds.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 600.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(prompt: str, system_prompt: str, model: str, **params: Any) -> str:
+        parts = [normalize_prompt(prompt), normalize_prompt(system_prompt), model]
+        parts.extend(f"{k}={params[k]}" for k in sorted(params))
+        return hashlib.sha256("\x1f".join(parts).encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        stored_at, value = entry
+        if time.monotonic() - stored_at > self.ttl:
+            del self._entries[key]
+            self.evictions += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: str, value: str):
+        if self.max_entries <= 0:
+            return
+        self._entries[key] = (time.monotonic(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
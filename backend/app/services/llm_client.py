@@ -0,0 +1,196 @@
+"""
+Async LLM Client
+Pooled, concurrency-limited client for OpenAI-compatible chat completion APIs (Groq)
+"""
+
+import asyncio
+import json
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+
+class LLMClientError(Exception):
+    """Base error for the LLM client"""
+    pass
+
+
+class LLMQueueFullError(LLMClientError):
+    """Raised when too many requests are already waiting for a slot"""
+    pass
+
+
+class LLMQueueTimeout(LLMClientError):
+    """Raised when a request could not get a slot before its deadline"""
+    pass
+
+
+class AsyncLLMClient:
+    """
+    Async chat-completions client with a shared connection pool
+
+    - One httpx.AsyncClient (keep-alive pool) per process
+    - At most `max_concurrency` requests in flight; the rest queue
+    - Queued requests give up at their deadline instead of piling up
+    - Token streaming over server-sent events
+
+    Works against any OpenAI-compatible endpoint, including a local stub
+    server (point `base_url` at it) or an httpx transport for tests.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        api_key: str,
+        max_concurrency: int = 8,
+        max_queue: int = 100,
+        queue_timeout: float = 10.0,
+        request_timeout: float = 30.0,
+        max_connections: int = 20,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.request_timeout = request_timeout
+        self.max_connections = max_connections
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+        # Metrics
+        self.in_flight = 0
+        self.queued = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.total_queue_wait_ms = 0
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers={"Authorization": f"Bearer {self.api_key}"},
+                timeout=httpx.Timeout(self.request_timeout, connect=5.0),
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+                transport=self._transport,
+            )
+        return self._client
+
+    @asynccontextmanager
+    async def _slot(self, deadline: Optional[float] = None):
+        """Wait (bounded) for a concurrency slot"""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        if self._semaphore.locked() and self.queued >= self.max_queue:
+            self.rejected += 1
+            raise LLMQueueFullError(f"LLM queue full ({self.queued} waiting)")
+
+        timeout = self.queue_timeout if deadline is None else deadline - time.monotonic()
+        start = time.monotonic()
+        self.queued += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=max(timeout, 0))
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise LLMQueueTimeout(f"No LLM slot within {timeout:.1f}s")
+        finally:
+            self.queued -= 1
+
+        self.total_queue_wait_ms += int((time.monotonic() - start) * 1000)
+        self.in_flight += 1
+        try:
+            yield
+            self.completed += 1
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+
+    async def chat_completion(
+        self,
+        messages: List[Dict[str, str]],
+        model: str,
+        max_tokens: int = 600,
+        temperature: float = 0.7,
+        deadline: Optional[float] = None,
+    ) -> str:
+        """Return the full completion text"""
+        payload = {
+            "model": model,
+            "messages": messages,
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+        }
+        async with self._slot(deadline):
+            response = await self.client.post("/chat/completions", json=payload)
+            response.raise_for_status()
+            data = response.json()
+        return data["choices"][0]["message"]["content"]
+
+    async def stream_chat_completion(
+        self,
+        messages: List[Dict[str, str]],
+        model: str,
+        max_tokens: int = 600,
+        temperature: float = 0.7,
+        deadline: Optional[float] = None,
+    ) -> AsyncIterator[str]:
+        """Yield completion tokens as the server sends them"""
+        payload = {
+            "model": model,
+            "messages": messages,
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            "stream": True,
+        }
+        async with self._slot(deadline):
+            async with self.client.stream("POST", "/chat/completions", json=payload) as response:
+                if response.is_error:
+                    await response.aread()
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[len("data:"):].strip()
+                    if data == "[DONE]":
+                        break
+                    try:
+                        chunk = json.loads(data)
+                    except ValueError:
+                        logger.warning(f"Skipping malformed LLM stream chunk: {data[:80]}")
+                        continue
+                    delta = chunk.get("choices", [{}])[0].get("delta", {}).get("content")
+                    if delta:
+                        yield delta
+
+    def stats(self) -> Dict[str, Any]:
+        served = self.completed + self.failed
+        return {
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "max_concurrency": self.max_concurrency,
+            "avg_queue_wait_ms": round(self.total_queue_wait_ms / served, 1) if served else 0.0,
+        }
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
@@ -0,0 +1,542 @@
+"""
+Local Store Engine
+In-memory indexed tables backing the SupabaseService offline fallback
+
+Tables are loaded once per process and served from memory. Every write is
+applied in place, updates the secondary indexes and is appended to a per-table
+write-ahead log. Once the log grows past a threshold it is folded into a
+compact snapshot on a background thread, so a write never rewrites the dataset.
+Worker processes sharing a directory see each other's writes through the log.
+"""
+
+from contextlib import contextmanager
+import copy
+import json
+import logging
+import os
+import secrets
+import threading
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+
+try:
+    import fcntl
+except ImportError:  # Windows - single process only, no cross-process locking
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+def _json_default(obj: Any) -> Any:
+    """Serialize the non-JSON types that show up in our rows"""
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, (Decimal, UUID)):
+        return str(obj)  # Use string to preserve precision
+    return str(obj)  # Fallback to string for everything else to prevent crash
+
+
+def _encode(obj: Any) -> str:
+    return json.dumps(obj, default=_json_default, separators=(",", ":"))
+
+
+# ============================================
+# PERSISTENCE ENGINES
+# ============================================
+
+class MemoryEngine:
+    """Volatile engine - tables live only as long as the process"""
+
+    @contextmanager
+    def locked(self, table: str, exclusive: bool = True):
+        yield
+
+    def load(self, table: str) -> Tuple[Optional[List[Dict]], List[Dict]]:
+        """Return (snapshot rows or None if the table was never persisted, log ops)"""
+        return None, []
+
+    def tail(self, table: str) -> Optional[List[Dict]]:
+        """Log ops appended by other processes since the last load / tail (None: reload the table)"""
+        return []
+
+    def append(self, table: str, op: Dict):
+        pass
+
+    def needs_compaction(self, table: str) -> bool:
+        return False
+
+    def compact(self, table: str, primary_key: str = "id"):
+        pass
+
+
+class WALEngine(MemoryEngine):
+    """
+    Durable engine: compact JSON snapshot + append-only JSONL write-ahead log
+
+    Files per table (inside `directory`):
+        <table>.snapshot.json   - rows as of the last compaction
+        <table>.wal.compacting  - log segment being folded into a new snapshot
+        <table>.wal             - live log, one op per line
+        <table>.lock            - flock around appends, log reads and rotation
+    Log ops are full-row puts and deletes, so replaying a segment twice is harmless.
+
+    Several processes (gunicorn workers) may share one directory. Appends
+    hold the table lock exclusively, and before every access a process
+    replays the lines appended since it last read the log (`tail`), so all
+    workers converge on the log order. Compaction folds the previous
+    snapshot and the rotated segment from disk, never one process's memory,
+    and runs in one process at a time; a process whose log was rotated under
+    it reloads the table.
+    """
+
+    def __init__(self, directory: str, compact_every: int = 1000, fsync: bool = False):
+        self.directory = directory
+        self.compact_every = compact_every
+        self.fsync = fsync
+        self._logs: Dict[str, Any] = {}  # Append handles
+        self._readers: Dict[str, Any] = {}  # Read position in each live log
+        self._log_lines: Dict[str, int] = {}
+        self._compacting: Dict[str, threading.Thread] = {}
+        self._lock = threading.RLock()
+        self._held = threading.local()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, table: str, suffix: str) -> str:
+        return os.path.join(self.directory, f"{table}.{suffix}")
+
+    @contextmanager
+    def locked(self, table: str, exclusive: bool = True):
+        """Cross-process lock on a table's files (re-entrant within a thread)"""
+        held = self._held.__dict__.setdefault("tables", {})
+        if table in held:
+            if exclusive and not held[table]:
+                raise RuntimeError(f"Cannot upgrade shared lock on local table {table}")
+            yield
+            return
+        fd = os.open(self._path(table, "lock"), os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            held[table] = exclusive
+            yield
+        finally:
+            held.pop(table, None)
+            os.close(fd)  # Releases the flock
+
+    @staticmethod
+    def _is_current(path: str, handle) -> bool:
+        """True while `handle` is still the file at `path` (not rotated away)"""
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return False
+        own = os.fstat(handle.fileno())
+        return (st.st_dev, st.st_ino) == (own.st_dev, own.st_ino)
+
+    def _read_ops(self, f, path: str) -> List[Dict]:
+        ops = []
+        while True:
+            start = f.tell()
+            line = f.readline()
+            if not line:
+                break
+            if not line.endswith(b"\n"):
+                f.seek(start)  # Unterminated tail: reread once it is complete
+                break
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                ops.append(json.loads(line))
+            except ValueError:
+                # Torn write from a crash - everything before it is intact
+                logger.warning(f"Skipping corrupt WAL line in {path}")
+        return ops
+
+    def _read_log(self, path: str) -> List[Dict]:
+        if not os.path.exists(path):
+            return []
+        with open(path, "rb") as f:
+            return self._read_ops(f, path)
+
+    def load(self, table: str) -> Tuple[Optional[List[Dict]], List[Dict]]:
+        snapshot_path = self._path(table, "snapshot.json")
+        live = self._path(table, "wal")
+        with self._lock, self.locked(table, exclusive=False):
+            rows = None
+            if os.path.exists(snapshot_path):
+                with open(snapshot_path, "r") as f:
+                    rows = json.load(f)
+            ops = self._read_log(self._path(table, "wal.compacting"))
+
+            previous = self._readers.pop(table, None)
+            if previous is not None:
+                previous.close()
+            open(live, "ab").close()  # Always have a live log to follow
+            reader = self._readers[table] = open(live, "rb")
+            ops.extend(self._read_ops(reader, live))
+        self._log_lines[table] = len(ops)
+
+        if rows is None and ops:
+            rows = []
+        return rows, ops
+
+    def tail(self, table: str) -> Optional[List[Dict]]:
+        reader = self._readers.get(table)
+        if reader is None:
+            return []
+        live = self._path(table, "wal")
+        try:
+            st = os.stat(live)
+        except FileNotFoundError:
+            return None  # Rotated by a compaction: reload snapshot + log
+        own = os.fstat(reader.fileno())
+        if (st.st_dev, st.st_ino) != (own.st_dev, own.st_ino):
+            return None
+        if st.st_size == reader.tell():
+            return []  # Nothing new (one stat on the hot path)
+        with self._lock, self.locked(table, exclusive=False):
+            ops = self._read_ops(reader, live)
+        self._log_lines[table] = self._log_lines.get(table, 0) + len(ops)
+        return ops
+
+    def append(self, table: str, op: Dict):
+        line = (_encode(op) + "\n").encode()
+        live = self._path(table, "wal")
+        with self._lock, self.locked(table, exclusive=True):
+            log = self._logs.get(table)
+            if log is None or not self._is_current(live, log):
+                if log is not None:
+                    log.close()
+                log = self._logs[table] = open(live, "ab")
+            reader = self._readers.get(table)
+            caught_up = (
+                reader is not None
+                and self._is_current(live, reader)
+                and reader.tell() == os.fstat(log.fileno()).st_size
+            )
+            log.write(line)
+            log.flush()
+            if self.fsync:
+                os.fsync(log.fileno())
+            if caught_up:
+                reader.seek(0, os.SEEK_END)  # Our own op is already applied in memory
+            self._log_lines[table] = self._log_lines.get(table, 0) + 1
+
+    def needs_compaction(self, table: str) -> bool:
+        worker = self._compacting.get(table)
+        if worker is not None and worker.is_alive():
+            return False
+        return self._log_lines.get(table, 0) >= self.compact_every
+
+    def compact(self, table: str, primary_key: str = "id"):
+        """Rotate the live log and fold it into a fresh snapshot in the background"""
+        previous = self._compacting.get(table)
+        if previous is not None:
+            previous.join()
+        self._log_lines[table] = 0
+        worker = threading.Thread(
+            target=self._compact,
+            args=(table, primary_key),
+            name=f"local-store-compact-{table}",
+            daemon=True,
+        )
+        self._compacting[table] = worker
+        worker.start()
+
+    def _compact(self, table: str, primary_key: str):
+        guard = os.open(self._path(table, "compact.lock"), os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            if fcntl is not None:
+                try:
+                    fcntl.flock(guard, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    return  # Another process is compacting this table
+            segment = self._path(table, "wal.compacting")
+            live = self._path(table, "wal")
+            with self.locked(table, exclusive=True):
+                if os.path.exists(live):
+                    if os.path.exists(segment):
+                        # A previous compaction died mid-way; keep both segments in order
+                        with open(segment, "ab") as dst, open(live, "rb") as src:
+                            dst.write(src.read())
+                        os.remove(live)
+                    else:
+                        os.replace(live, segment)
+            self._write_snapshot(table, primary_key)
+        finally:
+            os.close(guard)
+
+    def _write_snapshot(self, table: str, primary_key: str):
+        snapshot_path = self._path(table, "snapshot.json")
+        segment = self._path(table, "wal.compacting")
+        tmp_path = f"{snapshot_path}.{secrets.token_hex(4)}.tmp"
+        try:
+            rows: Dict[str, Dict] = {}
+            if os.path.exists(snapshot_path):
+                with open(snapshot_path, "r") as f:
+                    rows = {str(row[primary_key]): row for row in json.load(f)}
+            for op in self._read_log(segment):
+                if op.get("op") == "put":
+                    rows[str(op["row"][primary_key])] = op["row"]
+                elif op.get("op") == "del":
+                    rows.pop(str(op["pk"]), None)
+            with open(tmp_path, "w") as f:
+                f.write(_encode(list(rows.values())))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, snapshot_path)
+            with self.locked(table, exclusive=True):  # Not while another process loads
+                if os.path.exists(segment):
+                    os.remove(segment)
+            logger.info(f"Compacted local table {table} ({len(rows)} rows)")
+        except Exception as e:
+            logger.error(f"Local store compaction failed for {table}: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def flush(self, table: str, primary_key: str = "id"):
+        """Synchronously compact a table (used on shutdown and in tests)"""
+        self.compact(table, primary_key)
+        self._compacting[table].join()
+
+    def close(self):
+        with self._lock:
+            for handle in [*self._logs.values(), *self._readers.values()]:
+                handle.close()
+            self._logs.clear()
+            self._readers.clear()
+        for worker in list(self._compacting.values()):
+            worker.join()
+
+
+# ============================================
+# INDEXED TABLE
+# ============================================
+
+class LocalTable:
+    """
+    In-memory table with a primary key and secondary equality indexes
+
+    Index values are compared as strings, matching how the fallback code has
+    always compared ids (`str(row["user_id"]) == str(user_id)`). Buckets keep
+    insertion order so lookups return rows in the order they were written.
+    Reads hand out copies; the stored rows are only changed through the table.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        engine: MemoryEngine,
+        primary_key: str = "id",
+        indexes: Iterable[str] = (),
+    ):
+        self.name = name
+        self.engine = engine
+        self.primary_key = primary_key
+        self.index_fields = tuple(indexes)
+        self._rows: Dict[str, Dict] = {}
+        self._indexes: Dict[str, Dict[str, Dict[str, None]]] = {
+            field: {} for field in self.index_fields
+        }
+
+    # --- Loading ---
+    def load(
+        self,
+        legacy_rows: Callable[[], Optional[Iterable[Dict]]] = None,
+        seed_rows: Callable[[], Iterable[Dict]] = None,
+    ):
+        """
+        Populate the table from the engine. A table the engine has never seen
+        is imported from its legacy JSON file, or seeded if that is missing too.
+        """
+        with self.engine.locked(self.name):
+            rows, ops = self.engine.load(self.name)
+            if rows is None:
+                # Import under the lock so concurrent workers do it once
+                imported = legacy_rows() if legacy_rows else None
+                if imported is None and seed_rows:
+                    imported = seed_rows()
+                for row in imported or []:
+                    self.insert(row)
+                return
+        self._apply(rows, ops)
+
+    def _apply(self, rows: Iterable[Dict], ops: Iterable[Dict]):
+        for row in rows:
+            self._put(row)
+        for op in ops:
+            if op.get("op") == "put":
+                self._put(op["row"])
+            elif op.get("op") == "del":
+                self._delete(op["pk"])
+
+    def _sync(self):
+        """Apply log entries appended by other processes since this one last looked"""
+        ops = self.engine.tail(self.name)
+        if ops is None:
+            # Log rotated by a compaction: rebuild from the new snapshot
+            self._rows.clear()
+            for field in self.index_fields:
+                self._indexes[field].clear()
+            rows, ops = self.engine.load(self.name)
+            self._apply(rows or [], ops)
+        elif ops:
+            self._apply((), ops)
+
+    # --- Internal mutation ---
+    def _key(self, value: Any) -> str:
+        return str(value)
+
+    def _index_add(self, pk: str, row: Dict):
+        for field in self.index_fields:
+            if field in row and row[field] is not None:
+                self._indexes[field].setdefault(self._key(row[field]), {})[pk] = None
+
+    def _index_remove(self, pk: str, row: Dict):
+        for field in self.index_fields:
+            if field in row and row[field] is not None:
+                bucket = self._indexes[field].get(self._key(row[field]))
+                if bucket is not None:
+                    bucket.pop(pk, None)
+                    if not bucket:
+                        del self._indexes[field][self._key(row[field])]
+
+    def _put(self, row: Dict):
+        pk = self._key(row[self.primary_key])
+        existing = self._rows.get(pk)
+        if existing is not None:
+            self._index_remove(pk, existing)
+        self._rows[pk] = row
+        self._index_add(pk, row)
+
+    def _delete(self, pk: Any) -> Optional[Dict]:
+        pk = self._key(pk)
+        row = self._rows.pop(pk, None)
+        if row is not None:
+            self._index_remove(pk, row)
+        return row
+
+    def _persist(self, op: Dict):
+        self.engine.append(self.name, op)
+        if self.engine.needs_compaction(self.name):
+            self.engine.compact(self.name, self.primary_key)
+
+    # --- Public API ---
+    def __len__(self) -> int:
+        self._sync()
+        return len(self._rows)
+
+    def get(self, pk: Any) -> Optional[Dict]:
+        self._sync()
+        row = self._rows.get(self._key(pk))
+        return copy.deepcopy(row) if row is not None else None
+
+    def find(self, field: str, value: Any) -> List[Dict]:
+        """Rows whose indexed `field` equals `value`"""
+        self._sync()
+        bucket = self._indexes[field].get(self._key(value), {})
+        return [copy.deepcopy(self._rows[pk]) for pk in bucket]
+
+    def find_one(self, field: str, value: Any) -> Optional[Dict]:
+        self._sync()
+        bucket = self._indexes[field].get(self._key(value))
+        if not bucket:
+            return None
+        return copy.deepcopy(self._rows[next(iter(bucket))])
+
+    def count(self, field: str, value: Any) -> int:
+        self._sync()
+        return len(self._indexes[field].get(self._key(value), {}))
+
+    def all(self) -> List[Dict]:
+        self._sync()
+        return [copy.deepcopy(row) for row in self._rows.values()]
+
+    def insert(self, row: Dict) -> Dict:
+        """Insert or replace a row; returns the stored (JSON-normalized) copy"""
+        if row.get(self.primary_key) is None:
+            row = {**row, self.primary_key: f"{self.name}-{secrets.token_hex(4)}"}
+        # Round-trip through JSON so memory holds exactly what a restart would load
+        encoded = _encode(row)
+        stored = json.loads(encoded)
+        self._sync()
+        self._put(stored)
+        self._persist({"op": "put", "row": stored})
+        return copy.deepcopy(stored)
+
+    def update(self, pk: Any, updates: Dict) -> Optional[Dict]:
+        self._sync()
+        existing = self._rows.get(self._key(pk))
+        if existing is None:
+            return None
+        return self.insert({**existing, **updates})
+
+    def update_if(self, pk: Any, expected: Dict, updates: Dict) -> Optional[Dict]:
+        """Compare-and-set: update only while the row still holds `expected` (atomic across processes)"""
+        with self.engine.locked(self.name):
+            self._sync()
+            existing = self._rows.get(self._key(pk))
+            if existing is None or any(existing.get(field) != value for field, value in expected.items()):
+                return None
+            return self.insert({**existing, **updates})
+
+    def delete(self, pk: Any) -> Optional[Dict]:
+        self._sync()
+        row = self._delete(pk)
+        if row is not None:
+            self._persist({"op": "del", "pk": self._key(pk)})
+        return row
+
+
+# ============================================
+# STORE
+# ============================================
+
+class LocalStore:
+    """Registry of local tables sharing one persistence engine"""
+
+    def __init__(self, engine: MemoryEngine):
+        self.engine = engine
+        self.tables: Dict[str, LocalTable] = {}
+        self._lock = threading.Lock()
+
+    def table(
+        self,
+        name: str,
+        primary_key: str = "id",
+        indexes: Iterable[str] = (),
+        legacy_rows: Callable[[], Optional[Iterable[Dict]]] = None,
+        seed_rows: Callable[[], Iterable[Dict]] = None,
+    ) -> LocalTable:
+        """Get a table, loading it on first access"""
+        table = self.tables.get(name)
+        if table is not None:
+            return table
+        with self._lock:
+            if name not in self.tables:
+                table = LocalTable(name, self.engine, primary_key, indexes)
+                table.load(legacy_rows, seed_rows)
+                self.tables[name] = table
+            return self.tables[name]
+
+    def flush(self):
+        """Fold every table's log into its snapshot"""
+        if isinstance(self.engine, WALEngine):
+            for name, table in self.tables.items():
+                self.engine.flush(name, table.primary_key)
+
+    def close(self):
+        if isinstance(self.engine, WALEngine):
+            self.engine.close()
+
+
+def create_local_store(engine: str, directory: str, compact_every: int = 1000) -> LocalStore:
+    """Build a store for the configured engine name ("wal" or "memory")"""
+    if engine == "memory":
+        return LocalStore(MemoryEngine())
+    if engine != "wal":
+        raise ValueError(f"Unknown local store engine: {engine}")
+    return LocalStore(WALEngine(directory, compact_every=compact_every))
@@ -0,0 +1,250 @@
+"""
+Location Store - Shared, persistent user locations for nearby discovery
+Fixed-width records in an mmap'd file, mirrored into a per-process GeoGridIndex
+"""
+
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Tuple
+import hashlib
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+
+import numpy as np
+
+from app.services.geo_index import GeoGridIndex
+
+try:
+    import fcntl
+except ImportError:  # Windows - single worker only, no cross-process locking
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"KRLOC001"
+HEADER = struct.Struct("<8sQQ")  # magic, slots, global write sequence
+HEADER_SIZE = 64
+RECORD = np.dtype([
+    ("user_id", "S64"),
+    ("lat", "<f8"),
+    ("lon", "<f8"),
+    ("updated", "<f8"),
+    ("seq", "<u8"),
+])
+
+
+class LocationStoreFullError(Exception):
+    """Every slot a user's id hashes to holds another user's live location"""
+    pass
+
+
+class LocationStore:
+    """
+    User locations shared by every worker on the host and kept across restarts
+
+    The file is a header plus `slots` fixed-width records (user id, lat, lon,
+    update time, write sequence), placed by hashing the user id with bounded
+    linear probing. Writers take an exclusive flock and stamp each record
+    with the next global sequence number; every process keeps its own
+    GeoGridIndex for queries and, before reading, applies just the records
+    whose sequence is newer than the last one it saw.
+
+    Updates are coalesced: a ping within `min_interval` seconds of the last
+    stored one is dropped, and an unchanged position is only rewritten every
+    `refresh_interval` seconds to keep it from expiring. Records older than
+    `ttl` are treated as free slots and purged periodically. When every slot
+    in a new user's probe window holds a live location the update is
+    rejected (and counted in `rejected`) rather than evicting another user.
+    """
+
+    PROBES = 32
+    PURGE_EVERY = 1024  # Writes between full expiry sweeps
+
+    def __init__(
+        self,
+        path: str,
+        slots: int = 262144,
+        ttl: float = 86400,
+        min_interval: float = 30,
+        refresh_interval: float = 300,
+        cell_deg: float = 0.05,
+    ):
+        self.path = path
+        self.slots = slots
+        self.ttl = ttl
+        self.min_interval = min_interval
+        self.refresh_interval = refresh_interval
+        self.index = GeoGridIndex(cell_deg=cell_deg, ttl=ttl)
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        size = HEADER_SIZE + slots * RECORD.itemsize
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        self._thread_lock = threading.Lock()
+        with self._locked(exclusive=True):
+            if os.fstat(self._fd).st_size != size or os.pread(self._fd, 8, 0) != MAGIC:
+                if os.fstat(self._fd).st_size:
+                    logger.warning(f"Resetting location store {path} (size/format changed)")
+                os.ftruncate(self._fd, 0)
+                os.ftruncate(self._fd, size)
+                os.pwrite(self._fd, HEADER.pack(MAGIC, slots, 0), 0)
+        self._map = mmap.mmap(self._fd, size)
+        self._records = np.ndarray(slots, dtype=RECORD, buffer=self._map, offset=HEADER_SIZE)
+
+        self._seen_seq = 0
+        self._slot_users: Dict[int, str] = {}  # slot -> user mirrored into the index
+        self._user_slots: Dict[str, int] = {}
+        self.coalesced = 0
+        self.rejected = 0
+        self.writes = 0
+        self.sync()
+
+    # --- Locking ---
+    @contextmanager
+    def _locked(self, exclusive: bool):
+        with self._thread_lock:
+            if fcntl is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _global_seq(self) -> int:
+        return HEADER.unpack_from(self._map, 0)[2]
+
+    def _next_seq(self) -> int:
+        seq = self._global_seq() + 1
+        HEADER.pack_into(self._map, 0, MAGIC, self.slots, seq)
+        return seq
+
+    # --- Records ---
+    def _probe_window(self, key: bytes) -> np.ndarray:
+        start = int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "little") % self.slots
+        return (start + np.arange(min(self.PROBES, self.slots))) % self.slots
+
+    def _find_slot(self, key: bytes, now: float) -> Tuple[Optional[int], bool]:
+        """-> (slot, holds_key). Falls back to an empty/expired slot; slot is None when there is none"""
+        window = self._probe_window(key)
+        records = self._records[window]
+        match = np.nonzero(records["user_id"] == key)[0]
+        if match.size:
+            return int(window[match[0]]), True
+        free = np.nonzero((records["seq"] == 0) | (records["updated"] <= now - self.ttl))[0]
+        if free.size:
+            return int(window[free[0]]), False
+        return None, False
+
+    def update(self, user_id: str, lat: float, lon: float, now: Optional[float] = None) -> bool:
+        """
+        Store a location; returns False when the update was coalesced away
+
+        Raises LocationStoreFullError when the user has no slot and every
+        candidate slot holds a live location.
+        """
+        now = time.time() if now is None else now
+        key = str(user_id).encode()
+        if len(key) > RECORD["user_id"].itemsize:
+            raise ValueError(f"user id too long for location store: {user_id}")
+
+        with self._locked(exclusive=True):
+            slot, existing = self._find_slot(key, now)
+            if slot is None:
+                self.rejected += 1
+                raise LocationStoreFullError(f"no free location slot for {user_id}")
+            if existing:
+                record = self._records[slot]
+                age = now - record["updated"]
+                if age < self.ttl:
+                    moved = (record["lat"], record["lon"]) != (lat, lon)
+                    if age < self.min_interval or (not moved and age < self.refresh_interval):
+                        self.coalesced += 1
+                        return False
+
+            seq = self._next_seq()
+            self._records[slot] = (key, lat, lon, now, seq)
+            self.writes += 1
+            if seq % self.PURGE_EVERY == 0:
+                self._purge_expired(now)
+
+        self.sync()
+        return True
+
+    def _purge_expired(self, now: float) -> int:
+        stale = np.nonzero((self._records["seq"] != 0) & (self._records["updated"] <= now - self.ttl))[0]
+        if stale.size:
+            seq = self._next_seq()
+            self._records["user_id"][stale] = b""
+            self._records["seq"][stale] = seq
+        return int(stale.size)
+
+    def purge_expired(self, now: Optional[float] = None) -> int:
+        """Free every expired record (also runs automatically every PURGE_EVERY writes)"""
+        with self._locked(exclusive=True):
+            removed = self._purge_expired(time.time() if now is None else now)
+        self.sync()
+        return removed
+
+    # --- Index mirroring ---
+    def sync(self):
+        """Apply records written (by any process) since the last sync to the local index"""
+        if self._global_seq() == self._seen_seq:
+            return
+        with self._locked(exclusive=False):
+            seq = self._global_seq()
+            if seq < self._seen_seq:
+                # File was reset by another process - rebuild from scratch
+                for user_id in list(self._user_slots):
+                    self.index.remove(user_id)
+                self._slot_users.clear()
+                self._user_slots.clear()
+                self._seen_seq = 0
+            changed = np.nonzero(self._records["seq"] > self._seen_seq)[0]
+            rows = self._records[changed].copy()
+        self._seen_seq = seq
+
+        for slot, row in sorted(zip(changed.tolist(), rows), key=lambda item: item[1]["seq"]):
+            previous = self._slot_users.pop(slot, None)
+            if previous is not None and self._user_slots.get(previous) == slot:
+                del self._user_slots[previous]
+                self.index.remove(previous)
+            user_id = row["user_id"].decode()
+            if user_id:
+                self._slot_users[slot] = user_id
+                self._user_slots[user_id] = slot
+                self.index.upsert(user_id, float(row["lat"]), float(row["lon"]), now=float(row["updated"]))
+
+    # --- Queries ---
+    def get(self, user_id: str) -> Optional[Dict[str, Any]]:
+        self.sync()
+        return self.index.get(str(user_id))
+
+    def within(self, lat: float, lon: float, radius_km: float, exclude: Optional[str] = None) -> List[Tuple[str, float]]:
+        self.sync()
+        return self.index.within(lat, lon, radius_km, exclude=exclude)
+
+    def nearest(self, lat: float, lon: float, k: int, exclude: Optional[str] = None) -> List[Tuple[str, float]]:
+        self.sync()
+        return self.index.nearest(lat, lon, k, exclude=exclude)
+
+    def __len__(self) -> int:
+        self.sync()
+        return len(self.index)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.index.stats(),
+            "slots": self.slots,
+            "writes": self.writes,
+            "coalesced": self.coalesced,
+            "rejected": self.rejected,
+            "sequence": self._seen_seq,
+        }
+
+    def close(self):
+        del self._records
+        self._map.close()
+        os.close(self._fd)
@@ -4,101 +4,155 @@ Integrates with the specialized Mastra Node.js service
 """
 
 import httpx
+import importlib.util
 import logging
 from typing import Optional, Dict, Any, List
 from app.config import get_settings
+from app.utils import CircuitBreaker, CircuitOpenError
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
+UNAVAILABLE = {"success": False, "error": "Mastra service unavailable", "fallback": True}
+
+
 class MastraService:
-    """Mastra AI client for multi-agent collaboration"""
-    
+    """
+    Mastra AI client for multi-agent collaboration
+
+    All calls share one pooled httpx.AsyncClient (keep-alive, HTTP/2 when
+    `h2` is installed) opened/closed by the app lifespan. Connection errors
+    and 5xx responses trip a circuit breaker; while it is open every call
+    returns the fallback result immediately so callers go straight to the
+    local agents.
+    """
+
     def __init__(self):
         self.base_url = settings.mastra_service_url or "http://localhost:4000"
-        self.timeout = 60.0 # Agentic workflows can be slow
-    
+        self.timeout = settings.mastra_timeout
+        self.http2 = settings.mastra_http2 and importlib.util.find_spec("h2") is not None
+        self.circuit = CircuitBreaker(
+            name="mastra",
+            failure_threshold=settings.mastra_failure_threshold,
+            recovery_timeout=settings.mastra_recovery_timeout,
+            success_threshold=1,
+        )
+        self._client: Optional[httpx.AsyncClient] = None
+        self.skipped = 0  # Calls short-circuited while Mastra was down
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                http2=self.http2,
+                timeout=httpx.Timeout(self.timeout, connect=settings.mastra_connect_timeout),
+                limits=httpx.Limits(
+                    max_connections=settings.mastra_max_connections,
+                    max_keepalive_connections=settings.mastra_max_keepalive,
+                    keepalive_expiry=settings.mastra_keepalive_expiry,
+                ),
+            )
+        return self._client
+
+    @property
+    def available(self) -> bool:
+        """False while the circuit is open (Mastra recently unreachable)"""
+        return self.circuit.is_available
+
+    def start(self):
+        """Open the shared connection pool (called from the app lifespan)"""
+        return self.client
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _post(self, path: str, payload: Dict[str, Any], label: str) -> Dict[str, Any]:
+        """POST to Mastra; never raises, returns a {"success": False} dict on failure"""
+        if not self.available:
+            self.skipped += 1
+            return dict(UNAVAILABLE)
+
+        try:
+            async with self.circuit:
+                response = await self.client.post(path, json=payload)
+                if response.status_code >= 500:
+                    response.raise_for_status()
+        except (CircuitOpenError, httpx.TransportError) as e:
+            logger.warning(f"[MASTRA] Service unavailable for {label} (Fallback to local): {e}")
+            return dict(UNAVAILABLE)
+        except Exception as e:
+            logger.error(f"[MASTRA] {label} failed: {e}")
+            return {"success": False, "error": str(e)}
+
+        try:
+            response.raise_for_status()
+            return response.json()
+        except Exception as e:
+            logger.error(f"[MASTRA] {label} failed: {e}")
+            return {"success": False, "error": str(e)}
+
     async def chat(self, user_id: str, message: str, language: str = "en", context: Dict = None) -> Dict[str, Any]:
         """Chat with Nova via Mastra service"""
-        async with httpx.AsyncClient() as client:
-            try:
-                logger.info(f"[MASTRA] Sending chat request to {self.base_url}/agents/nova/chat")
-                response = await client.post(
-                    f"{self.base_url}/agents/nova/chat",
-                    json={
-                        "userId": user_id,
-                        "message": message,
-                        "language": language,
-                        "context": context or {}
-                    },
-                    timeout=self.timeout
-                )
-                response.raise_for_status()
-                result = response.json()
-                logger.info(f"[MASTRA] Chat response received: success={result.get('success', 'N/A')}")
-                return result
-            except httpx.ConnectError as e:
-                logger.warning(f"[MASTRA] Service unavailable (Fallback to local): {e}")
-                return {"success": False, "error": "Mastra service unavailable", "fallback": True}
-            except Exception as e:
-                logger.error(f"[MASTRA] Chat failed: {e}")
-                return {"success": False, "error": str(e)}
+        logger.info(f"[MASTRA] Sending chat request to {self.base_url}/agents/nova/chat")
+        result = await self._post(
+            "/agents/nova/chat",
+            {
+                "userId": user_id,
+                "message": message,
+                "language": language,
+                "context": context or {}
+            },
+            "Chat",
+        )
+        logger.info(f"[MASTRA] Chat response received: success={result.get('success', 'N/A')}")
+        return result
 
     async def assess_risk(self, user_id: str, loan_amount: float, user_data: Dict) -> Dict[str, Any]:
         """Assess loan risk via Mastra RiskOracle"""
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.post(
-                    f"{self.base_url}/agents/risk-oracle/assess",
-                    json={
-                        "userId": user_id,
-                        "loanAmount": loan_amount,
-                        "userData": user_data
-                    },
-                    timeout=self.timeout
-                )
-                response.raise_for_status()
-                return response.json()
-            except Exception as e:
-                logger.error(f"Mastra risk assessment failed: {e}")
-                return {"success": False, "error": str(e)}
+        return await self._post(
+            "/agents/risk-oracle/assess",
+            {
+                "userId": user_id,
+                "loanAmount": loan_amount,
+                "userData": user_data
+            },
+            "Risk assessment",
+        )
 
     async def check_fraud(self, user_data: Dict, patterns: List[str] = None) -> Dict[str, Any]:
         """Check for fraud via Mastra FraudGuard"""
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.post(
-                    f"{self.base_url}/agents/fraud-guard/check",
-                    json={
-                        "userData": user_data,
-                        "patterns": patterns or []
-                    },
-                    timeout=self.timeout
-                )
-                response.raise_for_status()
-                return response.json()
-            except Exception as e:
-                logger.error(f"Mastra fraud check failed: {e}")
-                return {"success": False, "error": str(e)}
+        return await self._post(
+            "/agents/fraud-guard/check",
+            {
+                "userData": user_data,
+                "patterns": patterns or []
+            },
+            "Fraud check",
+        )
 
     async def run_loan_workflow(self, user_id: str, loan_amount: float, purpose: str, user_data: Dict) -> Dict[str, Any]:
         """Run full agentic loan workflow via Mastra"""
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.post(
-                    f"{self.base_url}/workflows/loan-request",
-                    json={
-                        "userId": user_id,
-                        "loanAmount": loan_amount,
-                        "purpose": purpose,
-                        "userData": user_data
-                    },
-                    timeout=self.timeout
-                )
-                response.raise_for_status()
-                return response.json()
-            except Exception as e:
-                logger.error(f"Mastra loan workflow failed: {e}")
-                return {"success": False, "error": str(e)}
+        return await self._post(
+            "/workflows/loan-request",
+            {
+                "userId": user_id,
+                "loanAmount": loan_amount,
+                "purpose": purpose,
+                "userData": user_data
+            },
+            "Loan workflow",
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "available": self.available,
+            "circuit": self.circuit.state.value,
+            "consecutive_failures": self.circuit.failure_count,
+            "skipped": self.skipped,
+            "http2": self.http2,
+        }
 
 mastra_service = MastraService()
@@ -0,0 +1,87 @@
+"""
+Nonce Manager - Local nonce allocation for the hot wallet
+Lets transactions from one account be signed and sent concurrently
+"""
+
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+import asyncio
+import heapq
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Node error fragments meaning "that nonce is no longer usable"
+NONCE_ERRORS = (
+    "nonce too low",
+    "already known",
+    "known transaction",
+    "replacement transaction underpriced",
+    "invalid nonce",
+    "nonce has already been used",
+)
+
+
+def is_nonce_error(error: Exception) -> bool:
+    message = str(error).lower()
+    return any(fragment in message for fragment in NONCE_ERRORS)
+
+
+class NonceManager:
+    """
+    Hands out nonces for one sending account without asking the chain each time
+
+    Seeded once from the account's pending transaction count, then counts
+    up locally, so concurrent senders never race for the same nonce and
+    never wait for each other's confirmations. A nonce that was allocated
+    but never broadcast is `release`d and handed out again before any new
+    one, so it cannot leave a gap that stalls every later transaction. When
+    the node rejects a nonce (another process used the wallet, or our
+    transactions were dropped) `resync` reseeds from the chain.
+    """
+
+    def __init__(self, fetch_count: Callable[[], Awaitable[int]]):
+        self._fetch = fetch_count
+        self._next: Optional[int] = None
+        self._released: List[int] = []  # Min-heap of allocated but unsent nonces
+        self._lock = asyncio.Lock()
+        self.allocated = 0
+        self.reused = 0
+        self.resyncs = 0
+
+    async def allocate(self) -> int:
+        async with self._lock:
+            if self._next is None:
+                self._next = await self._fetch()
+                logger.info(f"Nonce manager seeded at {self._next}")
+            if self._released:
+                self.reused += 1
+                return heapq.heappop(self._released)
+            nonce = self._next
+            self._next += 1
+            self.allocated += 1
+            return nonce
+
+    def release(self, nonce: int):
+        """`nonce` was never broadcast: reuse it next so no gap is left"""
+        if self._next is not None and nonce < self._next and nonce not in self._released:
+            heapq.heappush(self._released, nonce)
+
+    async def resync(self) -> int:
+        """Reseed from the chain after the node rejected one of our nonces"""
+        async with self._lock:
+            chain_next = await self._fetch()
+            if chain_next != self._next:
+                logger.warning(f"Nonce resync: local {self._next} -> chain {chain_next}")
+            self._next = chain_next
+            self._released = []
+            self.resyncs += 1
+            return chain_next
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "next": self._next,
+            "released": len(self._released),
+            "allocated": self.allocated,
+            "reused": self.reused,
+            "resyncs": self.resyncs,
+        }
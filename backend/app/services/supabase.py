@@ -3,13 +3,17 @@ Supabase Service
 Handles all database operations via Supabase Python client
 """
 
-from typing import Optional, List, Any, Dict
+from typing import Optional, List, Any, Dict, Callable, Iterable
+from functools import wraps
+import asyncio
+import inspect
 from uuid import UUID
 from supabase import create_client, Client
 from supabase.lib.client_options import ClientOptions
 import logging
 import json
 import os
+import time
 from datetime import datetime, timedelta
 from decimal import Decimal
 import secrets
@@ -17,6 +21,8 @@ import secrets
 logger = logging.getLogger(__name__)
 
 from app.config import get_settings
+from app.services.local_store import LocalStore, LocalTable, create_local_store
+from app.services.vouch_graph import VouchGraph
 settings = get_settings()
 
 # File-based persistent fallback for OTPs, Profiles and Demo Data
@@ -24,6 +30,7 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__fil
 OTP_CACHE_FILE = os.path.join(BASE_DIR, "otp_cache.json")
 PROFILE_CACHE_FILE = os.path.join(BASE_DIR, "profile_cache.json")
 DEMO_DATA_FILE = os.path.join(BASE_DIR, "demo_data.json")
+LOCAL_STORE_DIR = settings.local_store_dir or os.path.join(BASE_DIR, "local_store")
 
 def _read_json_file(file_path: str) -> Dict[str, Any]:
     if not os.path.exists(file_path):
@@ -83,9 +90,63 @@ def _ensure_profile_schema(data: Dict) -> Dict:
     }
     return full_data
 
+def _legacy_rows(file_name: str, layout: str):
+    """Read a pre-store JSON fallback file as a flat row list (None if absent)"""
+    def load():
+        path = os.path.join(BASE_DIR, file_name)
+        if not os.path.exists(path):
+            return None
+        data = _read_json_file(path)
+        if layout == "values":  # {key: row}
+            return list(data.values())
+        if layout == "grouped":  # {key: [row, ...]}
+            return [row for rows in data.values() for row in rows]
+        return data.get(layout, [])  # {"all_loans": [row, ...]}
+    return load
+
+
+# Fallback tables: name -> (indexes, legacy file, legacy layout)
+LOCAL_TABLES = {
+    "profiles": (("phone",), "profile_cache.json", "values"),
+    "circles": ((), "circles.json", "values"),
+    "circle_members": (("circle_id", "user_id"), "circle_members.json", "grouped"),
+    "loans": (("borrower_id", "circle_id", "status"), "loans.json", "all_loans"),
+    "vouches": (("voucher_id", "vouchee_id", "circle_id"), "vouches.json", "grouped"),
+    "saathi_transactions": (("user_id",), "saathi_tx.json", "grouped"),
+    "diary_entries": (("user_id",), "diary_entries.json", "grouped"),
+}
+
+
+def _touches_users(users: Callable[[Any, Dict[str, Any]], Iterable]):
+    """
+    Mark a write method as changing per-user data. After the write, `users`
+    is called with (result, bound arguments) and every returned id is
+    reported to the registered write listeners.
+    """
+    def decorator(func):
+        signature = inspect.signature(func)
+        
+        @wraps(func)
+        async def wrapper(self, *args, **kwargs):
+            result = await func(self, *args, **kwargs)
+            try:
+                bound = signature.bind(self, *args, **kwargs)
+                bound.apply_defaults()
+                self._notify_write(func.__name__, users(result, bound.arguments))
+            except Exception as e:
+                logger.warning(f"Write notification failed for {func.__name__}: {e}")
+            return result
+        return wrapper
+    return decorator
+
+
 class SupabaseService:
     def __init__(self):
         self._client: Optional[Client] = None
+        self._store: Optional[LocalStore] = None
+        self._write_listeners: List[Callable[[str, str], None]] = []
+        self._vouch_graph = VouchGraph()
+        self._vouch_graph_refresh: Optional[asyncio.Task] = None
     
     @property
     def client(self) -> Client:
@@ -93,6 +154,53 @@ class SupabaseService:
             self._client = create_client(settings.supabase_url, settings.supabase_key)
         return self._client
     
+    async def _execute(self, query):
+        """
+        Send a supabase-py request from a worker thread
+
+        The client is synchronous, so only the round trip leaves the event
+        loop: local tables and the vouch graph are only touched on the loop.
+        """
+        return await asyncio.to_thread(query.execute)
+    
+    @property
+    def store(self) -> LocalStore:
+        """Local indexed store used whenever Supabase is unreachable"""
+        if self._store is None:
+            self._store = create_local_store(
+                settings.local_store_engine,
+                LOCAL_STORE_DIR,
+                compact_every=settings.local_store_compact_every,
+            )
+        return self._store
+    
+    def close_local_store(self):
+        """Fold pending WAL entries into snapshots before the process exits"""
+        if self._store is not None:
+            self._store.flush()
+            self._store.close()
+    
+    def add_write_listener(self, listener: Callable[[str, str], None]):
+        """Register `listener(user_id, operation)`, called after writes touching a user"""
+        self._write_listeners.append(listener)
+    
+    def _notify_write(self, operation: str, user_ids: Iterable):
+        for user_id in {str(uid) for uid in user_ids if uid}:
+            for listener in self._write_listeners:
+                try:
+                    listener(user_id, operation)
+                except Exception as e:
+                    logger.warning(f"Write listener failed for {operation}: {e}")
+    
+    def _table(self, name: str) -> LocalTable:
+        indexes, legacy_file, layout = LOCAL_TABLES[name]
+        return self.store.table(
+            name,
+            indexes=indexes,
+            legacy_rows=_legacy_rows(legacy_file, layout),
+            seed_rows=self._seed_rows(name),
+        )
+    
     # --- Auth & OTP ---
     async def store_otp(self, phone: str, otp: str, expires_minutes: int = 10) -> bool:
         expires_at_dt = datetime.utcnow() + timedelta(minutes=expires_minutes)
@@ -100,8 +208,8 @@ class SupabaseService:
         cache[phone] = {"otp": str(otp), "expires_at": expires_at_dt}
         _write_otp_cache(cache)
         try:
-            self.client.table("otp_codes").upsert({"phone": phone, "otp": str(otp), "expires_at": expires_at_dt.isoformat()}).execute()
-        except: pass
+            await self._execute(self.client.table("otp_codes").upsert({"phone": phone, "otp": str(otp), "expires_at": expires_at_dt.isoformat()}))
+        except Exception: pass
         return True
     
     async def verify_stored_otp(self, phone: str, otp: str) -> bool:
@@ -116,39 +224,37 @@ class SupabaseService:
         try:
             payload = jwt.decode(token, settings.jwt_secret, algorithms=["HS256"])
             return {"id": payload.get("sub"), "phone": payload.get("phone")}
-        except: return None
+        except Exception: return None
 
     # --- Profiles ---
     async def get_profile(self, user_id: str) -> Optional[Dict]:
         try:
             # print(f"DEBUG: Fetching profile for {user_id}")
-            res = self.client.table("profiles").select("*").eq("id", user_id).execute()
+            res = await self._execute(self.client.table("profiles").select("*").eq("id", user_id))
             if res.data: return _ensure_profile_schema(res.data[0])
         except Exception as e:
             # print(f"DEBUG: DB fetch failed (fallback active): {e}")
             pass
             
-        profiles = _read_json_file(PROFILE_CACHE_FILE)
-        for p in profiles.values():
-            if str(p.get("id")) == str(user_id): return _ensure_profile_schema(p)
-        return None
+        p = self._table("profiles").get(user_id)
+        return _ensure_profile_schema(p) if p else None
 
     async def get_user_stats(self, user_id: str) -> Dict:
         """Get calculated stats for gamification"""
         # In real app, this would use aggregation queries
-        # Here we loop through jsons
+        # Here we read the local store indexes
         
         # Vouches
         try:
-            vouches = await self.get_vouches_given(user_id)
-            active_vouches = len([v for v in vouches if v.get('status') == 'active'])
-        except: active_vouches = 0
+            graph = await self.get_vouch_graph()
+            active_vouches = len(graph.given(user_id, status="active"))
+        except Exception: active_vouches = 0
         
         # Loans
         try:
             loans = await self.get_user_loans(user_id)
             repaid = len([l for l in loans if l.get('status') == 'closed'])
-        except: repaid = 0
+        except Exception: repaid = 0
             
         return {
             "successful_vouches": active_vouches, # Mock logic
@@ -157,59 +263,64 @@ class SupabaseService:
         }
 
 
+    async def get_profiles_by_ids(self, user_ids: Iterable[str]) -> Dict[str, Dict]:
+        """Profiles for many users in one query -> {user_id: profile} (missing ids omitted)"""
+        ids = list(dict.fromkeys(str(u) for u in user_ids))
+        if not ids:
+            return {}
+        try:
+            res = await self._execute(self.client.table("profiles").select("*").in_("id", ids))
+            if res.data:
+                return {str(p["id"]): _ensure_profile_schema(p) for p in res.data}
+        except Exception: pass
+
+        profiles = self._table("profiles")
+        found = {}
+        for user_id in ids:
+            p = profiles.get(user_id)
+            if p:
+                found[user_id] = _ensure_profile_schema(p)
+        return found
+
     async def get_profile_by_phone(self, phone: str) -> Optional[Dict]:
         try:
-            res = self.client.table("profiles").select("*").eq("phone", phone).execute()
+            res = await self._execute(self.client.table("profiles").select("*").eq("phone", phone))
             if res.data: return _ensure_profile_schema(res.data[0])
-        except: pass
-        profiles = _read_json_file(PROFILE_CACHE_FILE)
-        p = profiles.get(phone)
+        except Exception: pass
+        p = self._table("profiles").find_one("phone", phone)
         return _ensure_profile_schema(p) if p else None
 
     async def create_profile(self, user_id: str, data: Dict) -> Dict:
         full_data = _ensure_profile_schema({**data, "id": user_id})
         try:
-            res = self.client.table("profiles").insert(full_data).execute()
+            res = await self._execute(self.client.table("profiles").insert(full_data))
             if res.data: return _ensure_profile_schema(res.data[0])
-        except: pass
-        profiles = _read_json_file(PROFILE_CACHE_FILE)
-        profiles[full_data["phone"]] = full_data
-        _write_json_file(PROFILE_CACHE_FILE, profiles)
+        except Exception: pass
+        profiles = self._table("profiles")
+        # Profiles were historically keyed by phone: a new profile replaces the old one
+        for existing in profiles.find("phone", full_data["phone"]):
+            profiles.delete(existing["id"])
+        profiles.insert(full_data)
         return full_data
+    @_touches_users(lambda result, args: [args["user_id"]])
     async def update_profile(self, user_id: str, updates: Dict) -> Dict:
         """Update profile with persistence"""
         try:
-            res = self.client.table("profiles").update(updates).eq("id", user_id).execute()
+            res = await self._execute(self.client.table("profiles").update(updates).eq("id", user_id))
             if res.data: return _ensure_profile_schema(res.data[0])
         except Exception as e:
             logger.warning(f"DB update profile failed: {e}")
         
-        # Fallback File
-        profiles = _read_json_file(PROFILE_CACHE_FILE)
-        # Find user by ID in values
-        target_phone = None
-        for phone, p in profiles.items():
-            if str(p.get("id")) == str(user_id):
-                target_phone = phone
-                p.update(updates)
-                break
-        
-        if target_phone:
-            _write_json_file(PROFILE_CACHE_FILE, profiles)
-            return profiles[target_phone]
-        return {}
+        # Fallback Store
+        return self._table("profiles").update(user_id, updates) or {}
 
 
-    # --- Circles ---
     # --- Persistent Data Management ---
-    def _initialize_seed_data(self):
-        """Seed JSON files with initial realistic data if they don't exist"""
-        
-        # 1. Circles
-        circles_file = os.path.join(BASE_DIR, "circles.json")
-        if not os.path.exists(circles_file):
-            _write_json_file(circles_file, {
-                "c-demo": {
+    def _seed_rows(self, table: str):
+        """Initial realistic rows for a fallback table that has never been persisted"""
+        seeds = {
+            "circles": lambda: [
+                {
                     "id": "c-demo", 
                     "name": "Mahila Bachat Gat", 
                     "description": "A support circle for women entrepreneurs in Pune",
@@ -219,83 +330,62 @@ class SupabaseService:
                     "emergency_fund_balance": 15000.00,
                     "created_at": (datetime.utcnow() - timedelta(days=60)).isoformat()
                 }
-            })
-
-        # 2. Circle Members
-        members_file = os.path.join(BASE_DIR, "circle_members.json")
-        if not os.path.exists(members_file):
-            _write_json_file(members_file, {
-                "c-demo": [
-                    {"id": "m-1", "circle_id": "c-demo", "user_id": "u-admin", "role": "admin", "joined_at": (datetime.utcnow() - timedelta(days=60)).isoformat()},
-                    {"id": "m-2", "circle_id": "c-demo", "user_id": "u-anita", "role": "member", "joined_at": (datetime.utcnow() - timedelta(days=55)).isoformat(), "contribution_amount": 5000},
-                    {"id": "m-3", "circle_id": "c-demo", "user_id": "u-sharma", "role": "member", "joined_at": (datetime.utcnow() - timedelta(days=10)).isoformat(), "contribution_amount": 1000}
-                ]
-            })
-            
-        # 3. Loans
-        loans_file = os.path.join(BASE_DIR, "loans.json")
-        if not os.path.exists(loans_file):
-             # Make it a dict of lists keyed by borrower_id is NOT good for global lookup, 
-             # but our current structure uses ID-based lookup.
-             # Let's use a flat list or dict structure. For getting by user, we filter.
-             # Actually, let's keep the file simple: List of all loans.
-             _write_json_file(loans_file, {
-                 "all_loans": [
-                     {
-                        "id": "l-1", 
-                        "borrower_id": "u-demo", # The text user
-                        "circle_id": "c-demo",
-                        "circle_name": "Mahila Bachat Gat",
-                        "amount": 5000.0, 
-                        "status": "repaying", 
-                        "purpose": "Emergency Medical", 
-                        "emi_amount": 550.0, 
-                        "total_repaid": 1100.0, 
-                        "interest_rate": 0.10,
-                        "tenure_days": 90,
-                        "next_emi_date": (datetime.utcnow() + timedelta(days=7)).isoformat(),
-                        "votes_for": 5,
-                        "votes_against": 0,
-                        "votes_total": 5,
-                        "created_at": (datetime.utcnow() - timedelta(days=20)).isoformat()
-                    },
-                    {
-                        "id": "l-vote-1",
-                        "borrower_id": "u-sharma", 
-                        "borrower_name": "Rahul Sharma",
-                        "circle_id": "c-demo",
-                        "amount": 10000.0,
-                        "purpose": "Shop Expansion",
-                        "interest_rate": 0.10,
-                        "tenure_days": 180,
-                        "status": "voting",
-                        "votes_for": 2,
-                        "votes_against": 0,
-                        "votes_total": 4, 
-                        "created_at": datetime.utcnow().isoformat()
-                    }
-                 ]
-             })
-             
-        # 4. Vouches
-        vouches_file = os.path.join(BASE_DIR, "vouches.json")
-        if not os.path.exists(vouches_file):
-             # Keyed by vouchee_id
-            _write_json_file(vouches_file, {
-                "u-demo": [
-                    {
-                        "id": "v-1", 
-                        "voucher_id": "u-anita", 
-                        "voucher_name": "Anita Devi",
-                        "vouchee_id": "u-demo",
-                        "circle_id": "c-demo",
-                        "vouch_level": "strong", 
-                        "saathi_staked": 50.0,
-                        "status": "active", 
-                        "created_at": (datetime.utcnow() - timedelta(days=15)).isoformat()
-                    }
-                ]
-            })
+            ],
+            "circle_members": lambda: [
+                {"id": "m-1", "circle_id": "c-demo", "user_id": "u-admin", "role": "admin", "joined_at": (datetime.utcnow() - timedelta(days=60)).isoformat()},
+                {"id": "m-2", "circle_id": "c-demo", "user_id": "u-anita", "role": "member", "joined_at": (datetime.utcnow() - timedelta(days=55)).isoformat(), "contribution_amount": 5000},
+                {"id": "m-3", "circle_id": "c-demo", "user_id": "u-sharma", "role": "member", "joined_at": (datetime.utcnow() - timedelta(days=10)).isoformat(), "contribution_amount": 1000}
+            ],
+            "loans": lambda: [
+                {
+                    "id": "l-1", 
+                    "borrower_id": "u-demo", # The text user
+                    "circle_id": "c-demo",
+                    "circle_name": "Mahila Bachat Gat",
+                    "amount": 5000.0, 
+                    "status": "repaying", 
+                    "purpose": "Emergency Medical", 
+                    "emi_amount": 550.0, 
+                    "total_repaid": 1100.0, 
+                    "interest_rate": 0.10,
+                    "tenure_days": 90,
+                    "next_emi_date": (datetime.utcnow() + timedelta(days=7)).isoformat(),
+                    "votes_for": 5,
+                    "votes_against": 0,
+                    "votes_total": 5,
+                    "created_at": (datetime.utcnow() - timedelta(days=20)).isoformat()
+                },
+                {
+                    "id": "l-vote-1",
+                    "borrower_id": "u-sharma", 
+                    "borrower_name": "Rahul Sharma",
+                    "circle_id": "c-demo",
+                    "amount": 10000.0,
+                    "purpose": "Shop Expansion",
+                    "interest_rate": 0.10,
+                    "tenure_days": 180,
+                    "status": "voting",
+                    "votes_for": 2,
+                    "votes_against": 0,
+                    "votes_total": 4, 
+                    "created_at": datetime.utcnow().isoformat()
+                }
+            ],
+            "vouches": lambda: [
+                {
+                    "id": "v-1", 
+                    "voucher_id": "u-anita", 
+                    "voucher_name": "Anita Devi",
+                    "vouchee_id": "u-demo",
+                    "circle_id": "c-demo",
+                    "vouch_level": "strong", 
+                    "saathi_staked": 50.0,
+                    "status": "active", 
+                    "created_at": (datetime.utcnow() - timedelta(days=15)).isoformat()
+                }
+            ],
+        }
+        return seeds.get(table)
 
     # --- Circles ---
     async def create_circle(self, data: Dict) -> Dict:
@@ -309,47 +399,39 @@ class SupabaseService:
         
         # Try DB
         try:
-            res = self.client.table("circles").insert(data).execute()
+            res = await self._execute(self.client.table("circles").insert(data))
             if res.data: return res.data[0]
-        except: pass
-        
-        # Fallback File
-        self._initialize_seed_data()
-        circles_file = os.path.join(BASE_DIR, "circles.json")
-        circles = _read_json_file(circles_file)
-        circles[data["id"]] = data
-        _write_json_file(circles_file, circles)
+        except Exception: pass
+        
+        # Fallback Store
+        self._table("circles").insert(data)
         return data
 
     async def get_circle(self, circle_id: str) -> Optional[Dict]:
         try:
-            res = self.client.table("circles").select("*").eq("id", circle_id).execute()
+            res = await self._execute(self.client.table("circles").select("*").eq("id", circle_id))
             if res.data: return res.data[0]
-        except: pass
+        except Exception: pass
         
-        self._initialize_seed_data()
-        circles = _read_json_file(os.path.join(BASE_DIR, "circles.json"))
-        return circles.get(circle_id)
+        return self._table("circles").get(circle_id)
 
     async def get_user_circles(self, user_id: str) -> List[Dict]:
         try:
-            res = self.client.table("circle_members").select("*, circles(*)").eq("user_id", user_id).execute()
+            res = await self._execute(self.client.table("circle_members").select("*, circles(*)").eq("user_id", user_id))
             if res.data: return res.data
-        except: pass
+        except Exception: pass
+        
+        members_table = self._table("circle_members")
+        circles_table = self._table("circles")
         
-        self._initialize_seed_data()
-        members_data = _read_json_file(os.path.join(BASE_DIR, "circle_members.json"))
-        circles_data = _read_json_file(os.path.join(BASE_DIR, "circles.json"))
+        # Hack: Always show demo circles to current user if it's the demo setup
+        members = members_table.all() if user_id == "u-demo" else members_table.find("user_id", user_id)
         
         results = []
-        # Naive iteration
-        for cid, members in members_data.items():
-            for m in members:
-                # Relaxed string check
-                if str(m.get("user_id")) == str(user_id) or user_id == "u-demo": 
-                    # Hack: Always show demo circles to current user if it's the demo setup
-                    if cid in circles_data:
-                        results.append({**m, "circles": circles_data[cid]})
+        for m in members:
+            circle = circles_table.get(m.get("circle_id"))
+            if circle:
+                results.append({**m, "circles": circle})
         
         # If absolutely nothing found, and user is new, maybe show nothing? 
         # But for demo purposes, let's attach them to the demo circle if they have none
@@ -357,15 +439,68 @@ class SupabaseService:
              return []
         return results
 
+    async def get_circle_names_bulk(self, user_ids: Iterable[str], per_user: int = 3) -> Dict[str, List[str]]:
+        """Names of up to `per_user` circles for each user, in one query"""
+        ids = list(dict.fromkeys(str(u) for u in user_ids))
+        names: Dict[str, List[str]] = {user_id: [] for user_id in ids}
+        if not ids:
+            return names
+        try:
+            res = await self._execute(self.client.table("circle_members").select("user_id, circles(name)").in_("user_id", ids))
+            if res.data is not None:
+                for row in res.data:
+                    user_names = names.setdefault(str(row["user_id"]), [])
+                    if len(user_names) < per_user:
+                        user_names.append((row.get("circles") or {}).get("name", "Unknown"))
+                return names
+        except Exception: pass
+
+        members_table = self._table("circle_members")
+        circles_table = self._table("circles")
+        for user_id in ids:
+            for m in members_table.find("user_id", user_id)[:per_user]:
+                circle = circles_table.get(m.get("circle_id"))
+                if circle:
+                    names[user_id].append(circle.get("name", "Unknown"))
+        return names
+
+    async def get_all_circles(self) -> List[Dict]:
+        try:
+            res = await self._execute(self.client.table("circles").select("id, name"))
+            if res.data is not None: return res.data
+        except Exception: pass
+        
+        return self._table("circles").all()
+
+    async def get_loan_outcomes_by_circle(self) -> Dict[str, Dict[str, int]]:
+        """Completed and defaulted loan counts per circle -> {circle_id: {"completed": n, "defaulted": n}}"""
+        outcomes: Dict[str, Dict[str, int]] = {}
+        
+        def count(rows: Iterable[Dict]):
+            for row in rows:
+                if row.get("circle_id") is None:
+                    continue
+                circle = outcomes.setdefault(str(row["circle_id"]), {"completed": 0, "defaulted": 0})
+                circle[row["status"]] += 1
+        
+        try:
+            res = await self._execute(self.client.table("loans").select("circle_id, status").in_("status", ["completed", "defaulted"]))
+            if res.data is not None:
+                count(res.data)
+                return outcomes
+        except Exception: pass
+        
+        loans = self._table("loans")
+        count(loans.find("status", "completed") + loans.find("status", "defaulted"))
+        return outcomes
+
     async def get_circle_members(self, circle_id: str) -> List[Dict]:
         try:
-            res = self.client.table("circle_members").select("*, profiles(*)").eq("circle_id", circle_id).execute()
+            res = await self._execute(self.client.table("circle_members").select("*, profiles(*)").eq("circle_id", circle_id))
             if res.data: return res.data
-        except: pass
+        except Exception: pass
         
-        self._initialize_seed_data()
-        members_data = _read_json_file(os.path.join(BASE_DIR, "circle_members.json"))
-        members = members_data.get(circle_id, [])
+        members = self._table("circle_members").find("circle_id", circle_id)
         
         # Enrich
         for m in members:
@@ -374,6 +509,7 @@ class SupabaseService:
             
         return members
 
+    @_touches_users(lambda result, args: [args["user_id"]])
     async def add_circle_member(self, circle_id: str, user_id: str, role: str = "member") -> Dict:
         """Add a user to a circle"""
         try:
@@ -382,21 +518,14 @@ class SupabaseService:
                 "user_id": user_id,
                 "role": role,
             }
-            res = self.client.table("circle_members").insert(member_data).execute()
+            res = await self._execute(self.client.table("circle_members").insert(member_data))
             if res.data:
                 return res.data[0]
         except Exception as e:
             logger.warning(f"DB insert failed, using JSON fallback: {e}")
         
-        # JSON fallback
+        # Local store fallback
         import uuid
-        from datetime import datetime
-        
-        members_file = os.path.join(BASE_DIR, "circle_members.json")
-        members_data = _read_json_file(members_file)
-        
-        if circle_id not in members_data:
-            members_data[circle_id] = []
         
         new_member = {
             "id": str(uuid.uuid4()),
@@ -405,19 +534,18 @@ class SupabaseService:
             "role": role,
             "joined_at": datetime.utcnow().isoformat()
         }
-        members_data[circle_id].append(new_member)
-        _write_json_file(members_file, members_data)
+        self._table("circle_members").insert(new_member)
         
-        # Update circle member count - circles stored as circles_data[circle_id] = data
-        circles_file = os.path.join(BASE_DIR, "circles.json")
-        circles_data = _read_json_file(circles_file)
-        if circle_id in circles_data:
-            circles_data[circle_id]["member_count"] = circles_data[circle_id].get("member_count", 0) + 1
-            _write_json_file(circles_file, circles_data)
+        # Update circle member count
+        circles = self._table("circles")
+        circle = circles.get(circle_id)
+        if circle:
+            circles.update(circle_id, {"member_count": circle.get("member_count", 0) + 1})
         
         return new_member
 
     # --- Loans & Vouches ---
+    @_touches_users(lambda result, args: [args["data"].get("borrower_id")])
     async def create_loan(self, data: Dict) -> Dict:
         if "id" not in data: data["id"] = f"l-{secrets.token_hex(4)}"
         if "created_at" not in data: data["created_at"] = datetime.utcnow().isoformat()
@@ -425,111 +553,159 @@ class SupabaseService:
         if "votes_for" not in data: data["votes_for"] = 0
         
         try:
-            res = self.client.table("loans").insert(data).execute()
+            res = await self._execute(self.client.table("loans").insert(data))
             if res.data: return res.data[0]
-        except: pass
-        
-        self._initialize_seed_data()
-        loans_file = os.path.join(BASE_DIR, "loans.json")
-        data_store = _read_json_file(loans_file)
-        if "all_loans" not in data_store: data_store["all_loans"] = []
-        data_store["all_loans"].append(data)
-        _write_json_file(loans_file, data_store)
+        except Exception: pass
+        
+        self._table("loans").insert(data)
         return data
 
+    @_touches_users(lambda result, args: [(result or {}).get("borrower_id")])
     async def update_loan(self, loan_id: str, updates: Dict) -> Dict:
         try:
-            res = self.client.table("loans").update(updates).eq("id", loan_id).execute()
+            res = await self._execute(self.client.table("loans").update(updates).eq("id", loan_id))
             if res.data: return res.data[0]
-        except: pass
-        
-        loans_file = os.path.join(BASE_DIR, "loans.json")
-        data_store = _read_json_file(loans_file)
-        loans = data_store.get("all_loans", [])
-        
-        target = None
-        for l in loans:
-            if l["id"] == loan_id:
-                l.update(updates)
-                target = l
-                break
-        
-        if target:
-            _write_json_file(loans_file, data_store)
-            return target
-        return {}
+        except Exception: pass
+        
+        return self._table("loans").update(loan_id, updates) or {}
 
     async def get_user_loans(self, user_id: str) -> List[Dict]:
         try:
-            res = self.client.table("loans").select("*").eq("borrower_id", user_id).execute()
+            res = await self._execute(self.client.table("loans").select("*").eq("borrower_id", user_id))
             if res.data: return res.data
-        except: pass
+        except Exception: pass
         
-        self._initialize_seed_data()
-        data_store = _read_json_file(os.path.join(BASE_DIR, "loans.json"))
-        loans = data_store.get("all_loans", [])
+        loans = self._table("loans")
         
-        # Filter for my loans
-        return [l for l in loans if str(l.get("borrower_id")) == str(user_id) or user_id == "u-demo"]
+        # Filter for my loans (the demo user sees every loan)
+        return loans.all() if user_id == "u-demo" else loans.find("borrower_id", user_id)
+
+    async def get_completed_loan_counts_bulk(self, user_ids: Iterable[str]) -> Dict[str, int]:
+        """Number of completed loans per borrower, for many borrowers in one query"""
+        ids = list(dict.fromkeys(str(u) for u in user_ids))
+        counts = {user_id: 0 for user_id in ids}
+        if not ids:
+            return counts
+        try:
+            res = await self._execute(self.client.table("loans").select("borrower_id").in_("borrower_id", ids).eq("status", "completed"))
+            if res.data is not None:
+                for row in res.data:
+                    counts[str(row["borrower_id"])] = counts.get(str(row["borrower_id"]), 0) + 1
+                return counts
+        except Exception: pass
+
+        loans = self._table("loans")
+        for user_id in ids:
+            counts[user_id] = sum(1 for l in loans.find("borrower_id", user_id) if l.get("status") == "completed")
+        return counts
 
     async def get_pending_loans(self, user_id: str) -> List[Dict]:
         try:
             # Complex query skipped for fallback
             pass
-        except: pass
+        except Exception: pass
         
-        self._initialize_seed_data()
-        data_store = _read_json_file(os.path.join(BASE_DIR, "loans.json"))
-        loans = data_store.get("all_loans", [])
+        loans = self._table("loans").find("status", "voting")
         
         # Return all voting loans except my own
-        return [l for l in loans if l["status"] == "voting" and str(l.get("borrower_id")) != str(user_id)]
+        return [l for l in loans if str(l.get("borrower_id")) != str(user_id)]
 
     async def get_vouches_received(self, user_id: str) -> List[Dict]:
         try:
-            res = self.client.table("vouches").select("*, profiles!vouches_voucher_id_fkey(*)").eq("vouchee_id", user_id).execute()
+            res = await self._execute(self.client.table("vouches").select("*, profiles!vouches_voucher_id_fkey(*)").eq("vouchee_id", user_id))
             if res.data: return res.data
-        except: pass
-        
-        self._initialize_seed_data()
-        data = _read_json_file(os.path.join(BASE_DIR, "vouches.json"))
-        
-        # Use simple key lookup or iterate if needed
-        # Our seed structure is keyed by vouchee_id
-        if user_id in data:
-            return data[user_id]
-        
-        # If user is demo, return demo data
-        if "u-demo" in data:
-             # creating a copy to not mutate cache if we need to set IDs
-             import copy
-             return copy.deepcopy(data["u-demo"])
-             
-        return []
+        except Exception: pass
+        
+        graph = await self.get_vouch_graph()
+        received = graph.received(user_id)
+        if received:
+            return received
+        
+        # If user has none, return demo data
+        return graph.received("u-demo")
+
+    async def count_vouches_received_bulk(self, user_ids: Iterable[str]) -> Dict[str, int]:
+        """Number of vouches received per user, for many users in one query"""
+        ids = list(dict.fromkeys(str(u) for u in user_ids))
+        counts = {user_id: 0 for user_id in ids}
+        if not ids:
+            return counts
+        try:
+            res = await self._execute(self.client.table("vouches").select("vouchee_id").in_("vouchee_id", ids))
+            if res.data is not None:
+                for row in res.data:
+                    counts[str(row["vouchee_id"])] = counts.get(str(row["vouchee_id"]), 0) + 1
+                return counts
+        except Exception: pass
+
+        vouches = self._table("vouches")
+        for user_id in ids:
+            counts[user_id] = vouches.count("vouchee_id", user_id)
+        return counts
 
     async def get_vouches_given(self, user_id: str) -> List[Dict]:
-        self._initialize_seed_data()
-        data = _read_json_file(os.path.join(BASE_DIR, "vouches.json"))
-        
-        results = []
-        for vouchee, vouches in data.items():
-            for v in vouches:
-                if str(v.get("voucher_id")) == str(user_id):
-                    results.append(v)
-        return results
+        graph = await self.get_vouch_graph()
+        return graph.given(user_id)
+
+    async def get_vouch(self, vouch_id: str) -> Optional[Dict]:
+        graph = await self.get_vouch_graph()
+        return graph.get(vouch_id)
+
+    async def get_vouches_given_bulk(self, user_ids: Iterable[str]) -> Dict[str, List[Dict]]:
+        """Vouches given by each of many users -> {voucher_id: [vouch, ...]}"""
+        graph = await self.get_vouch_graph()
+        return {str(u): graph.given(u) for u in dict.fromkeys(user_ids)}
+
+    async def get_vouches_received_bulk(self, user_ids: Iterable[str]) -> Dict[str, List[Dict]]:
+        """Vouches received by each of many users -> {vouchee_id: [vouch, ...]}"""
+        graph = await self.get_vouch_graph()
+        return {str(u): graph.received(u) for u in dict.fromkeys(user_ids)}
+
+    # --- Vouch graph ---
+    async def get_vouch_graph(self) -> VouchGraph:
+        """
+        Adjacency index over every vouch (O(degree) lookups)
+
+        Loaded on first use. Every `vouch_graph_refresh_seconds` it is
+        reloaded in the background to pick up writes from other workers,
+        and requests keep reading the current index until the reload lands;
+        this process's own writes are applied to it immediately.
+        """
+        graph = self._vouch_graph
+        refresh = settings.vouch_graph_refresh_seconds
+        stale = graph.loaded_at is None or (refresh and time.monotonic() - graph.loaded_at > refresh)
+        if stale and (self._vouch_graph_refresh is None or self._vouch_graph_refresh.done()):
+            self._vouch_graph_refresh = asyncio.create_task(self._refresh_vouch_graph(since=graph.version))
+        if graph.loaded_at is None:
+            await asyncio.shield(self._vouch_graph_refresh)
+        return graph
+
+    async def _refresh_vouch_graph(self, since: int):
+        try:
+            rows = await self._fetch_vouches()
+        except Exception as e:
+            # Only an unreachable Supabase falls back to the local rows (an empty table stays empty)
+            logger.warning(f"Vouch graph reload failed, using local vouches: {e}")
+            rows = self._table("vouches").all()
+        self._vouch_graph.load(rows, since=since)
+
+    async def _fetch_vouches(self) -> List[Dict]:
+        """Every vouch from Supabase (raises when it cannot be reached)"""
+        res = await self._execute(self.client.table("vouches").select("*"))
+        return res.data or []
 
 
     # --- Saathi & Trust ---
     async def get_saathi_transactions(self, user_id: str, limit: int = 20) -> List[Dict]:
         try:
-            res = self.client.table("saathi_transactions").select("*").eq("user_id", user_id).order("created_at", desc=True).limit(limit).execute()
+            res = await self._execute(self.client.table("saathi_transactions").select("*").eq("user_id", user_id).order("created_at", desc=True).limit(limit))
             if res.data: return res.data
-        except: pass
+        except Exception: pass
         
-        tx_file = os.path.join(BASE_DIR, "saathi_tx.json")
-        txs = _read_json_file(tx_file).get(user_id, [])
+        txs = self._table("saathi_transactions").find("user_id", user_id)
         return sorted(txs, key=lambda x: x["created_at"], reverse=True)[:limit]
 
+    @_touches_users(lambda result, args: [args["data"].get("voucher_id"), args["data"].get("vouchee_id")])
     async def create_vouch(self, data: Dict) -> Dict:
         """Create a new vouch with persistence"""
         if "id" not in data: data["id"] = f"v-{secrets.token_hex(4)}"
@@ -537,46 +713,78 @@ class SupabaseService:
         if "status" not in data: data["status"] = "active"
         
         try:
-            res = self.client.table("vouches").insert(data).execute()
-            if res.data: return res.data[0]
-        except: pass
-        
-        self._initialize_seed_data()
-        data_store = _read_json_file(os.path.join(BASE_DIR, "vouches.json"))
-        # Keyed by vouchee_id
-        vouchee = data["vouchee_id"]
-        if vouchee not in data_store: data_store[vouchee] = []
-        data_store[vouchee].append(data)
-        _write_json_file(os.path.join(BASE_DIR, "vouches.json"), data_store)
+            res = await self._execute(self.client.table("vouches").insert(data))
+            if res.data:
+                self._vouch_graph.upsert(res.data[0])
+                return res.data[0]
+        except Exception: pass
+        
+        self._table("vouches").insert(data)
+        self._vouch_graph.upsert(data)
         return data
 
+    @_touches_users(lambda result, args: [(result or {}).get("voucher_id"), (result or {}).get("vouchee_id")])
     async def revoke_vouch(self, vouch_id: str):
+        removed = None
         try:
-            self.client.table("vouches").delete().eq("id", vouch_id).execute()
-        except: pass
-        
-        # File update: finding the vouch is tricky since we key by vouchee. 
-        # inefficient search needed
-        vouches_file = os.path.join(BASE_DIR, "vouches.json")
-        data = _read_json_file(vouches_file)
-        
-        found = False
-        for vid, v_list in data.items():
-            for i, v in enumerate(v_list):
-                if v["id"] == vouch_id:
-                    v_list.pop(i)
-                    found = True
-                    break
-            if found: break
-            
-        if found:
-            _write_json_file(vouches_file, data)
+            res = await self._execute(self.client.table("vouches").delete().eq("id", vouch_id))
+            if res.data: removed = res.data[0]
+        except Exception: pass
+        
+        local = self._table("vouches").delete(vouch_id)
+        indexed = self._vouch_graph.remove(vouch_id)
+        return local or removed or indexed
+
+    @_touches_users(lambda result, args: [(result or {}).get("voucher_id"), (result or {}).get("vouchee_id")])
+    async def update_vouch_status(self, vouch_id: str, status: str, tx_hash: Optional[str] = None) -> Optional[Dict]:
+        """Set a vouch's status (active / returned / slashed), optionally recording its tx hash"""
+        vouch_id = str(vouch_id)
+        updates = {"status": status}
+        if tx_hash: updates["blockchain_tx_hash"] = tx_hash
+        try:
+            res = await self._execute(self.client.table("vouches").update(updates).eq("id", vouch_id))
+            if res.data:
+                self._vouch_graph.upsert(res.data[0])
+                return res.data[0]
+        except Exception: pass
+        
+        local = self._table("vouches").update(vouch_id, updates)
+        if local:
+            self._vouch_graph.upsert(local)
+        elif self._vouch_graph.get(vouch_id):
+            self._vouch_graph.upsert({"id": vouch_id, **updates})
+        return local or self._vouch_graph.get(vouch_id)
+
+    async def update_chain_status(self, table: str, record_id: str, tx_hash: Optional[str], status: str) -> Optional[Dict]:
+        """Record the on-chain write status (and tx hash once sent) of a loan / repayment / vouch"""
+        record_id = str(record_id)
+        updates = {"blockchain_status": status}
+        if tx_hash: updates["blockchain_tx_hash"] = tx_hash
+        row = None
+        # The tx hash goes in its own update so a deployment without the
+        # blockchain_status column (migration 20261015) still records it
+        for fields in ([{"blockchain_tx_hash": tx_hash}] if tx_hash else []) + [{"blockchain_status": status}]:
+            try:
+                res = await self._execute(self.client.table(table).update(fields).eq("id", record_id))
+                if res.data: row = res.data[0]
+            except Exception as e:
+                logger.warning(f"Chain status update of {table} {record_id} ({', '.join(fields)}) failed: {e}")
+        if row:
+            if table == "vouches": self._vouch_graph.upsert(row)
+            return row
+
+        if table not in LOCAL_TABLES:
+            return None
+        local = self._table(table).update(record_id, updates)
+        if local and table == "vouches":
+            self._vouch_graph.upsert(local)
+        return local
 
     async def get_trust_score_history(self, user_id: str) -> List[Dict]:
         try:
-            res = self.client.table("trust_score_history").select("*").eq("user_id", user_id).order("created_at").execute()
+            res = await self._execute(self.client.table("trust_score_history").select("*").eq("user_id", user_id).order("created_at"))
             if res.data: return res.data
-        except: pass
+        except Exception: pass
         
         # Fallback history
         return [
@@ -584,93 +792,75 @@ class SupabaseService:
             {"old_score": 80, "new_score": 100, "reason": "Sponsor Bonus", "score": 100, "created_at": datetime.utcnow().isoformat()}
         ]
 
+    @_touches_users(lambda result, args: [args["user_id"]])
     async def update_saathi_balance(self, user_id: str, amount: float):
-        """Update SAATHI balance with JSON persistence"""
+        """Update SAATHI balance with local store persistence"""
         # DB Update
         try:
             p = await self.get_profile(user_id)
             if p:
                 new_bal = float(p.get("saathi_balance", 0)) + amount
-                self.client.table("profiles").update({"saathi_balance": new_bal}).eq("id", user_id).execute()
-        except: pass
-        
-        # JSON Update
-        profiles = _read_json_file(PROFILE_CACHE_FILE)
-        users = [p for p in profiles.values() if str(p.get("id")) == str(user_id)]
-        if users:
-            user = users[0]
-        else:
+                await self._execute(self.client.table("profiles").update({"saathi_balance": new_bal}).eq("id", user_id))
+        except Exception: pass
+        
+        # Local Store Update
+        profiles = self._table("profiles")
+        user = profiles.get(user_id)
+        if not user:
             # Check if fetchable via API was not in cache
-             p = await self.get_profile(user_id)
-             if p:
-                 user = p
-                 profiles[p["phone"]] = p
-             else:
-                 return # Cannot update unknown user
+            user = await self.get_profile(user_id)
+            if not user:
+                return # Cannot update unknown user
         
         current = float(user.get("saathi_balance", 0))
-        user["saathi_balance"] = current + amount
-        _write_json_file(PROFILE_CACHE_FILE, profiles)
+        profiles.insert({**user, "saathi_balance": current + amount})
 
     async def create_saathi_transaction(self, data: Dict):
-        """Log transaction with JSON persistence"""
+        """Log transaction with local store persistence"""
         # Ensure ID
         if "id" not in data: data["id"] = f"tx-{secrets.token_hex(4)}"
         if "created_at" not in data: data["created_at"] = datetime.utcnow().isoformat()
             
         try:
-            self.client.table("saathi_transactions").insert(data).execute()
-        except: pass
+            await self._execute(self.client.table("saathi_transactions").insert(data))
+        except Exception: pass
         
-        # JSON Persist
-        tx_file = os.path.join(BASE_DIR, "saathi_tx.json")
-        txs = _read_json_file(tx_file)
-        uid = str(data["user_id"])
-        if uid not in txs: txs[uid] = []
-        txs[uid].append(data)
-        _write_json_file(tx_file, txs)
+        # Local Store Persist
+        self._table("saathi_transactions").insert(data)
 
+    @_touches_users(lambda result, args: [args["user_id"]])
     async def update_trust_score(self, user_id: str, new_score: int, reason: str):
         try:
-            self.client.table("profiles").update({"trust_score": new_score}).eq("id", user_id).execute()
-            self.client.table("trust_score_history").insert({"user_id": user_id, "score": new_score, "reason": reason}).execute()
-        except: pass
+            await self._execute(self.client.table("profiles").update({"trust_score": new_score}).eq("id", user_id))
+            await self._execute(self.client.table("trust_score_history").insert({"user_id": user_id, "score": new_score, "reason": reason}))
+        except Exception: pass
         
-        # Update local profile cache
-        profiles = _read_json_file(PROFILE_CACHE_FILE)
-        users = [p for p in profiles.values() if str(p.get("id")) == str(user_id)]
-        if users:
-            users[0]["trust_score"] = new_score
-            _write_json_file(PROFILE_CACHE_FILE, profiles)
+        # Update local profile store
+        self._table("profiles").update(user_id, {"trust_score": new_score})
 
     # --- Diary ---
+    @_touches_users(lambda result, args: [args["data"].get("user_id")])
     async def create_diary_entry(self, data: Dict) -> Dict:
-        """Create diary entry with JSON fallback"""
+        """Create diary entry with local store fallback"""
         if "id" not in data: data["id"] = f"entry-{secrets.token_hex(4)}"
         
         try:
-            res = self.client.table("diary_entries").insert(data).execute()
+            res = await self._execute(self.client.table("diary_entries").insert(data))
             if res.data: return res.data[0]
-        except: pass
+        except Exception: pass
         
         # Fallback
-        diary_file = os.path.join(BASE_DIR, "diary_entries.json")
-        entries = _read_json_file(diary_file)
-        uid = str(data["user_id"])
-        if uid not in entries: entries[uid] = []
-        entries[uid].append(data)
-        _write_json_file(diary_file, entries)
+        self._table("diary_entries").insert(data)
         return data
 
     async def get_diary_entries(self, user_id: str, limit: int = 50) -> List[Dict]:
-        """Get diary entries with JSON fallback"""
+        """Get diary entries with local store fallback"""
         try:
-            res = self.client.table("diary_entries").select("*").eq("user_id", user_id).order("recorded_at", desc=True).limit(limit).execute()
+            res = await self._execute(self.client.table("diary_entries").select("*").eq("user_id", user_id).order("recorded_at", desc=True).limit(limit))
             if res.data: return res.data
-        except: pass
+        except Exception: pass
         
-        diary_file = os.path.join(BASE_DIR, "diary_entries.json")
-        entries = _read_json_file(diary_file).get(str(user_id), [])
+        entries = self._table("diary_entries").find("user_id", user_id)
         return sorted(entries, key=lambda x: x["recorded_at"], reverse=True)[:limit]
 
 supabase_service = SupabaseService()
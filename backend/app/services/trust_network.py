@@ -0,0 +1,124 @@
+"""
+Trust Network Builder
+Level-synchronous BFS over the vouch graph, with layout kept separate
+"""
+
+from typing import Any, Dict, List, Optional, Set, Tuple
+import asyncio
+import logging
+
+from app.services.graph_layout import radial_layout
+from app.services.supabase import supabase_service
+
+logger = logging.getLogger(__name__)
+
+
+class TrustNetwork:
+    """Nodes (users) and edges (active vouches) around a center user, without positions"""
+
+    def __init__(self, center: str, depth: int):
+        self.center = center
+        self.depth = depth
+        self.nodes: Dict[str, Dict[str, Any]] = {}  # insertion order = BFS order
+        self.edges: List[Dict[str, Any]] = []
+        self.parents: Dict[str, str] = {}  # node -> node it was discovered from
+        self.truncated = False  # True when the node budget cut the search short
+        self.round_trips = 0
+        self._edge_keys: Set[Tuple[str, str]] = set()
+
+    def add_edge(self, voucher: str, vouchee: str, strength: Any):
+        if (voucher, vouchee) in self._edge_keys:
+            return
+        self._edge_keys.add((voucher, vouchee))
+        self.edges.append({"from": voucher, "to": vouchee, "strength": strength})
+
+    def levels(self) -> List[List[str]]:
+        """Node ids grouped by distance from the center"""
+        grouped: List[List[str]] = [[] for _ in range(self.depth + 1)]
+        for node_id, node in self.nodes.items():
+            grouped[node["depth"]].append(node_id)
+        return grouped
+
+
+async def build_trust_network(
+    center: str,
+    depth: int,
+    max_nodes: int = 150,
+    fanout: int = 5,
+) -> TrustNetwork:
+    """
+    Breadth-first expansion, one batch of queries per depth level
+
+    Every frontier node is fetched together: profiles, vouches given and
+    vouches received are three bulk reads issued concurrently, so a depth-d
+    network costs d + 1 round trips. The vouch lookups are answered from the
+    in-process vouch graph while the profile query is in flight. Users are
+    visited once; expansion stops adding nodes once `max_nodes` is reached.
+    """
+    network = TrustNetwork(center, depth)
+    visited: Set[str] = {center}
+    frontier = [center]
+
+    for level in range(depth + 1):
+        if not frontier:
+            break
+        profiles, given, received = await asyncio.gather(
+            supabase_service.get_profiles_by_ids(frontier),
+            supabase_service.get_vouches_given_bulk(frontier),
+            supabase_service.get_vouches_received_bulk(frontier),
+        )
+        network.round_trips += 1
+
+        next_frontier: List[str] = []
+        for uid in frontier:
+            profile = profiles.get(uid)
+            if not profile:
+                continue
+            network.nodes[uid] = {
+                "id": uid,
+                "name": (profile.get("full_name") or "User")[:10],
+                "trustScore": profile.get("trust_score", 50),
+                "depth": level,
+                "isCenter": level == 0,
+            }
+
+            for vouch in [v for v in given.get(uid, []) if v.get("status") == "active"][:fanout]:
+                vouchee = str(vouch["vouchee_id"])
+                network.add_edge(uid, vouchee, vouch.get("saathi_staked", 10))
+                if level < depth and vouchee not in visited:
+                    if len(visited) >= max_nodes:
+                        network.truncated = True
+                        continue
+                    visited.add(vouchee)
+                    network.parents[vouchee] = uid
+                    next_frontier.append(vouchee)
+
+            for vouch in [v for v in received.get(uid, []) if v.get("status") == "active"][:fanout]:
+                network.add_edge(str(vouch["voucher_id"]), uid, vouch.get("saathi_staked", 10))
+
+        frontier = next_frontier
+
+    return network
+
+
+def to_graph_payload(network: TrustNetwork, positions: Optional[Dict[str, Tuple[float, float]]] = None) -> Dict[str, Any]:
+    """API shape: nodes with x/y, edges, summary counts"""
+    positions = positions if positions is not None else radial_layout(network)
+    nodes = []
+    for node_id, node in network.nodes.items():
+        x, y = positions.get(node_id, (0.0, 0.0))
+        nodes.append({
+            "id": node["id"],
+            "name": node["name"],
+            "trustScore": node["trustScore"],
+            "x": x,
+            "y": y,
+            "isCenter": node["isCenter"],
+        })
+    return {
+        "nodes": nodes,
+        "edges": list(network.edges),
+        "center_user": network.center,
+        "total_connections": len(network.edges),
+        "truncated": network.truncated,
+    }
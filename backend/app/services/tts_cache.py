@@ -0,0 +1,251 @@
+"""
+TTS Cache - Two-tier cache for synthesized speech
+Hot clips in a byte-bounded memory LRU, everything else in a size-capped disk LRU
+"""
+
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+import asyncio
+import logging
+import os
+import secrets
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows - single worker only, no cross-process locking
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryLRU:
+    """Byte-bounded LRU of small blobs"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._items: "OrderedDict[str, bytes]" = OrderedDict()
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        data = self._items.get(key)
+        if data is not None:
+            self._items.move_to_end(key)
+        return data
+
+    def put(self, key: str, data: bytes):
+        if len(data) > self.max_bytes:
+            return
+        self.discard(key)
+        self._items[key] = data
+        self.bytes += len(data)
+        while self.bytes > self.max_bytes:
+            _, evicted = self._items.popitem(last=False)
+            self.bytes -= len(evicted)
+            self.evictions += 1
+
+    def discard(self, key: str):
+        data = self._items.pop(key, None)
+        if data is not None:
+            self.bytes -= len(data)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._items
+
+
+class DiskLRU:
+    """
+    Directory of `<key><suffix>` files with a total-size cap, shared by workers
+
+    The directory is the index: a clip is cached while its file exists, and
+    the file's modification time records its last use (set on every hit).
+    After each write the directory is rescanned under a file lock and the
+    least recently used files are deleted until the total is under the cap,
+    so the cap holds for every worker together; a rescan costs one stat per
+    cached clip. Another worker may still delete a file between a lookup
+    and a read, which readers treat as a miss. File reads, writes and
+    rescans run in worker threads; writes go to a temp file that is renamed
+    into place, so a reader never sees a partial clip.
+    """
+
+    TMP_MAX_AGE = 300  # Seconds before a leftover temp file counts as an interrupted write
+
+    def __init__(self, directory: str, max_bytes: int, suffix: str = ".mp3"):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self.bytes = 0  # Total size at the last rescan (all workers)
+        self.files = 0
+        self.evictions = 0
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._enforce_cap()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}{self.suffix}"
+
+    @contextmanager
+    def _locked(self):
+        fd = os.open(self.directory, os.O_RDONLY)  # The directory itself is the lock file
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            os.close(fd)  # Releases the flock
+
+    @staticmethod
+    def _touch(path: Path) -> bool:
+        """Mark a clip as just used; False if it is gone"""
+        now = time.time_ns()
+        try:
+            os.utime(path, ns=(now, now))
+        except FileNotFoundError:
+            return False
+        return True
+
+    def path(self, key: str) -> Optional[Path]:
+        """File holding `key` (marks it recently used), or None"""
+        path = self._path(key)
+        return path if self._touch(path) else None
+
+    def size(self, key: str) -> int:
+        try:
+            return self._path(key).stat().st_size
+        except FileNotFoundError:
+            return 0
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await asyncio.to_thread(self._read, key)
+
+    def _read(self, key: str) -> Optional[bytes]:
+        path = self._path(key)
+        try:
+            data = path.read_bytes()
+        except FileNotFoundError:
+            return None
+        self._touch(path)
+        return data
+
+    async def put(self, key: str, data: bytes):
+        if len(data) > self.max_bytes:
+            return
+        await asyncio.to_thread(self._write, key, data)
+        await asyncio.to_thread(self._enforce_cap)
+
+    def _write(self, key: str, data: bytes):
+        tmp = self.directory / f".{key}.{secrets.token_hex(4)}.tmp"
+        try:
+            tmp.write_bytes(data)
+            os.replace(tmp, self._path(key))
+        except BaseException:
+            tmp.unlink(missing_ok=True)
+            raise
+        self._touch(self._path(key))
+
+    def _enforce_cap(self):
+        """Rescan the directory and delete least recently used clips until under the cap"""
+        with self._locked():
+            entries = []
+            stale_before = time.time() - self.TMP_MAX_AGE
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    if entry.name.startswith(".") and entry.name.endswith(".tmp"):
+                        if stat.st_mtime < stale_before:
+                            Path(entry.path).unlink(missing_ok=True)  # Write interrupted by a crash
+                        continue
+                    if entry.name.startswith(".") or not entry.name.endswith(self.suffix) or not entry.is_file():
+                        continue
+                    entries.append((stat.st_mtime_ns, entry.path, stat.st_size))
+            total = sum(size for _, _, size in entries)
+            files = len(entries)
+            for _, path, size in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                Path(path).unlink(missing_ok=True)
+                total -= size
+                files -= 1
+                self.evictions += 1
+            self.bytes, self.files = total, files
+
+    def __len__(self) -> int:
+        return self.files
+
+    def __contains__(self, key: str) -> bool:
+        return self._path(key).exists()
+
+
+class TTSCache:
+    """
+    Memory tier in front of a disk tier, with hit and byte counters
+
+    A disk hit is promoted into memory; new clips go into both tiers.
+    """
+
+    def __init__(self, directory: str, memory_bytes: int, disk_bytes: int):
+        self.memory = MemoryLRU(memory_bytes)
+        self.disk = DiskLRU(directory, disk_bytes)
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.bytes_served = 0
+        self.bytes_stored = 0
+
+    async def get(self, key: str) -> Optional[bytes]:
+        data = self.memory.get(key)
+        if data is not None:
+            self.memory_hits += 1
+        else:
+            data = await self.disk.get(key)
+            if data is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self.memory.put(key, data)
+        self.bytes_served += len(data)
+        return data
+
+    def peek(self, key: str) -> Tuple[Optional[bytes], Optional[Path]]:
+        """Hit without reading the disk: (bytes, None) from memory, (None, file) from disk"""
+        data = self.memory.get(key)
+        if data is not None:
+            self.memory_hits += 1
+            self.bytes_served += len(data)
+            return data, None
+        # Re-checked on disk: another worker's eviction may have removed it
+        path = self.disk.path(key)
+        if path is not None:
+            self.disk_hits += 1
+            self.bytes_served += self.disk.size(key)
+        return None, path
+
+    async def put(self, key: str, data: bytes):
+        self.memory.put(key, data)
+        self.bytes_stored += len(data)
+        try:
+            await self.disk.put(key, data)
+        except OSError as e:
+            logger.warning(f"TTS disk cache write failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        hits = self.memory_hits + self.disk_hits
+        total = hits + self.misses
+        return {
+            "hit_ratio": round(hits / total, 3) if total else 0.0,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "bytes_served": self.bytes_served,
+            "bytes_stored": self.bytes_stored,
+            "memory": {"clips": len(self.memory), "bytes": self.memory.bytes, "evictions": self.memory.evictions},
+            "disk": {"clips": len(self.disk), "bytes": self.disk.bytes, "evictions": self.disk.evictions},
+        }
@@ -0,0 +1,174 @@
+"""
+Transaction Confirmation Tracker
+One block-polling loop shared by every pending on-chain transaction
+"""
+
+from typing import Any, Dict, List, Optional, Set
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+TIMEOUT = {"confirmed": False, "status": "timeout"}
+
+
+class _Pending:
+    __slots__ = ("tx_hash", "fresh", "receipt", "waiters")
+
+    def __init__(self, tx_hash: str):
+        self.tx_hash = tx_hash
+        self.fresh = True  # Receipt not looked up yet (may already be mined)
+        self.receipt: Optional[Dict[str, Any]] = None
+        self.waiters: List[tuple] = []  # (confirmations, deadline, future)
+
+
+class ConfirmationTracker:
+    """
+    Waits for transaction confirmations without a poll loop per transaction
+
+    A single task polls the block number every `poll_interval` seconds while
+    anything is pending. For each new block it fetches the header's
+    transaction hashes once and only asks for receipts of our transactions
+    that were included, so the RPC cost follows the block rate, not the
+    number of pending transactions. A newly tracked transaction gets one
+    direct receipt lookup (it may have been mined before it was tracked);
+    after a gap of more than MAX_BLOCK_SCAN blocks every pending receipt is
+    looked up directly instead. Reorgs are not handled: a receipt once seen
+    is trusted.
+    """
+
+    MAX_BLOCK_SCAN = 20
+
+    def __init__(self, w3, poll_interval: float = 2.0):
+        self.w3 = w3
+        self.poll_interval = poll_interval
+        self._pending: Dict[str, _Pending] = {}
+        self._head: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self.polls = 0
+        self.blocks_scanned = 0
+        self.receipt_lookups = 0
+
+    # --- Waiting ---
+    def watch(self, tx_hash: str, confirmations: int = 2, timeout: float = 120) -> asyncio.Future:
+        """Future resolving to the confirmation result (or TIMEOUT) for `tx_hash`"""
+        future = asyncio.get_running_loop().create_future()
+        tx_hash = self._hex(tx_hash)
+        entry = self._pending.get(tx_hash)
+        if entry is None:
+            entry = self._pending[tx_hash] = _Pending(tx_hash)
+        entry.waiters.append((confirmations, time.monotonic() + timeout, future))
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="tx-confirmations")
+        return future
+
+    async def wait(self, tx_hash: str, confirmations: int = 2, timeout: float = 120) -> Dict[str, Any]:
+        return await self.watch(tx_hash, confirmations, timeout)
+
+    # --- Polling ---
+    async def _run(self):
+        while self._pending:
+            try:
+                await self._poll()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Confirmation poll failed: {e}")
+            self._settle(self._head)
+            if self._pending:
+                await asyncio.sleep(self.poll_interval)
+
+    async def _poll(self):
+        fresh = {h for h, entry in self._pending.items() if entry.fresh}
+        head = await self.w3.eth.block_number
+        self.polls += 1
+
+        lookups: Set[str] = set(fresh)
+        unseen = {h for h, entry in self._pending.items() if entry.receipt is None and not entry.fresh}
+        if unseen and self._head is not None and head > self._head:
+            if head - self._head <= self.MAX_BLOCK_SCAN:
+                blocks = await asyncio.gather(*(
+                    self.w3.eth.get_block(number) for number in range(self._head + 1, head + 1)
+                ))
+                self.blocks_scanned += len(blocks)
+                for block in blocks:
+                    included = {self._hex(tx) for tx in block["transactions"]}
+                    lookups |= unseen & included
+            else:
+                lookups |= unseen
+        elif unseen and self._head is None:
+            lookups |= unseen
+
+        if lookups:
+            ordered = list(lookups)
+            receipts = await asyncio.gather(
+                *(self.w3.eth.get_transaction_receipt(h) for h in ordered),
+                return_exceptions=True,
+            )
+            self.receipt_lookups += len(ordered)
+            for tx_hash, receipt in zip(ordered, receipts):
+                entry = self._pending.get(tx_hash)
+                if entry is not None and receipt and not isinstance(receipt, Exception):
+                    entry.receipt = receipt
+        for tx_hash in fresh:
+            if tx_hash in self._pending:
+                self._pending[tx_hash].fresh = False
+        self._head = head
+
+    def _settle(self, head: Optional[int]):
+        """Resolve waiters that are confirmed or out of time; drop finished entries"""
+        now = time.monotonic()
+        for tx_hash, entry in list(self._pending.items()):
+            remaining = []
+            for confirmations, deadline, future in entry.waiters:
+                if future.done():
+                    continue
+                if entry.receipt is not None and head is not None and head - entry.receipt["blockNumber"] >= confirmations:
+                    future.set_result(self._result(entry.receipt))
+                elif now >= deadline:
+                    future.set_result(dict(TIMEOUT))
+                else:
+                    remaining.append((confirmations, deadline, future))
+            entry.waiters = remaining
+            if not remaining:
+                del self._pending[tx_hash]
+
+    @staticmethod
+    def _result(receipt: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "confirmed": True,
+            "block_number": receipt["blockNumber"],
+            "gas_used": receipt["gasUsed"],
+            "status": "success" if receipt["status"] == 1 else "failed",
+        }
+
+    @staticmethod
+    def _hex(value) -> str:
+        """Lower-case 0x-prefixed hash from str / bytes / HexBytes"""
+        text = value.lower() if isinstance(value, str) else bytes(value).hex()
+        return text if text.startswith("0x") else f"0x{text}"
+
+    # --- Lifecycle ---
+    async def aclose(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        for entry in self._pending.values():
+            for _, _, future in entry.waiters:
+                if not future.done():
+                    future.set_result(dict(TIMEOUT))
+        self._pending.clear()
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending": len(self._pending),
+            "head": self._head,
+            "polls": self.polls,
+            "blocks_scanned": self.blocks_scanned,
+            "receipt_lookups": self.receipt_lookups,
+        }
@@ -0,0 +1,155 @@
+"""
+Vouch Graph Index
+In-process adjacency lists over vouches, maintained incrementally on writes
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Set
+import copy
+import time
+
+
+class VouchGraph:
+    """
+    Forward (voucher -> vouches given) and reverse (vouchee -> vouches
+    received) adjacency plus an id -> vouch map
+
+    Every lookup is O(degree). Adjacency holds vouch ids in insertion order;
+    rows are returned as copies so callers cannot corrupt the index.
+    `version` increases on every change and `user_version(user)` on every
+    change touching that user, so derived caches can tell when to refresh.
+    """
+
+    def __init__(self):
+        self._by_id: Dict[str, Dict[str, Any]] = {}
+        self._given: Dict[str, Dict[str, None]] = {}
+        self._received: Dict[str, Dict[str, None]] = {}
+        self._user_versions: Dict[str, int] = {}
+        self._local_changes: Dict[str, int] = {}  # vouch id -> version of its last upsert / remove
+        self.version = 0
+        self.loaded_at: Optional[float] = None
+
+    # --- Maintenance ---
+    def load(self, vouches: Iterable[Dict[str, Any]], since: Optional[int] = None):
+        """
+        Replace the whole index (initial load / periodic refresh)
+
+        A reload is diffed against the current index: only vouches that were
+        added, changed or dropped are relinked, and only their users get a new
+        `user_version`, so caches derived from untouched users stay valid.
+        With `since` (the version when the rows were fetched), vouches
+        upserted or removed after that are kept as they are: the rows may
+        predate those writes.
+        """
+        kept = {vid for vid, version in self._local_changes.items() if since is not None and version > since}
+        fresh = {str(v["id"]): v for v in vouches if v.get("id") is not None and str(v["id"]) not in kept}
+        dropped = [old for vid, old in self._by_id.items() if vid not in kept and fresh.get(vid) != old]
+        added = [vouch for vid, vouch in fresh.items() if self._by_id.get(vid) != vouch]
+        for old in dropped:
+            self._unlink(old)
+        for vouch in added:
+            self._link(vouch)
+        if self.loaded_at is None:
+            self.version += 1  # Nothing can have been derived from an empty index
+        elif dropped or added:
+            self._touch(*dropped, *added)
+        self._local_changes = {vid: self._local_changes[vid] for vid in kept}
+        self.loaded_at = time.monotonic()
+
+    def upsert(self, vouch: Dict[str, Any]):
+        """Add a vouch or apply changes to an existing one (status, tx hash, ...)"""
+        if not vouch or vouch.get("id") is None:
+            return
+        old = self._by_id.get(str(vouch["id"]))
+        if old is not None:
+            self._unlink(old)
+            vouch = {**old, **vouch}
+        self._link(vouch)
+        self._touch(vouch, old)
+        self._local_changes[str(vouch["id"])] = self.version
+
+    def remove(self, vouch_id: str) -> Optional[Dict[str, Any]]:
+        old = self._by_id.get(str(vouch_id))
+        if old is None:
+            return None
+        self._unlink(old)
+        self._touch(old)
+        self._local_changes[str(vouch_id)] = self.version
+        return old
+
+    def _link(self, vouch: Dict[str, Any]):
+        vouch_id = str(vouch["id"])
+        self._by_id[vouch_id] = dict(vouch)
+        self._given.setdefault(str(vouch.get("voucher_id")), {})[vouch_id] = None
+        self._received.setdefault(str(vouch.get("vouchee_id")), {})[vouch_id] = None
+
+    def _unlink(self, vouch: Dict[str, Any]):
+        vouch_id = str(vouch["id"])
+        self._by_id.pop(vouch_id, None)
+        for adjacency, user in ((self._given, vouch.get("voucher_id")), (self._received, vouch.get("vouchee_id"))):
+            ids = adjacency.get(str(user))
+            if ids is not None:
+                ids.pop(vouch_id, None)
+                if not ids:
+                    del adjacency[str(user)]
+
+    def _touch(self, *vouches: Optional[Dict[str, Any]]):
+        self.version += 1
+        for vouch in vouches:
+            if vouch:
+                for user in (vouch.get("voucher_id"), vouch.get("vouchee_id")):
+                    self._user_versions[str(user)] = self.version
+
+    # --- Lookups ---
+    def get(self, vouch_id: str) -> Optional[Dict[str, Any]]:
+        vouch = self._by_id.get(str(vouch_id))
+        return copy.deepcopy(vouch) if vouch is not None else None
+
+    def given(self, user_id: str, status: Optional[str] = None) -> List[Dict[str, Any]]:
+        return self._rows(self._given.get(str(user_id), {}), status)
+
+    def received(self, user_id: str, status: Optional[str] = None) -> List[Dict[str, Any]]:
+        return self._rows(self._received.get(str(user_id), {}), status)
+
+    def _rows(self, ids: Dict[str, None], status: Optional[str]) -> List[Dict[str, Any]]:
+        rows = (self._by_id[vid] for vid in ids)
+        return [copy.deepcopy(v) for v in rows if status is None or v.get("status") == status]
+
+    def vouchees(self, user_id: str, status: Optional[str] = "active") -> Set[str]:
+        return {str(v.get("vouchee_id")) for v in self._iter(self._given, user_id, status)}
+
+    def vouchers(self, user_id: str, status: Optional[str] = "active") -> Set[str]:
+        return {str(v.get("voucher_id")) for v in self._iter(self._received, user_id, status)}
+
+    def reciprocal(self, user_id: str) -> Set[str]:
+        """Users with an active vouch in both directions with `user_id`"""
+        return self.vouchees(user_id) & self.vouchers(user_id)
+
+    def _iter(self, adjacency: Dict[str, Dict[str, None]], user_id: str, status: Optional[str]):
+        for vid in adjacency.get(str(user_id), {}):
+            vouch = self._by_id[vid]
+            if status is None or vouch.get("status") == status:
+                yield vouch
+
+    def count_by(self, field: str, status: Optional[str] = "active") -> Dict[str, int]:
+        """Number of vouches per value of `field` (e.g. circle_id), O(vouches)"""
+        counts: Dict[str, int] = {}
+        for vouch in self._by_id.values():
+            if vouch.get(field) is not None and (status is None or vouch.get("status") == status):
+                key = str(vouch[field])
+                counts[key] = counts.get(key, 0) + 1
+        return counts
+
+    def user_version(self, user_id: str) -> int:
+        """Graph version of the last change touching `user_id` (0 if none since the first load)"""
+        return self._user_versions.get(str(user_id), 0)
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "vouches": len(self._by_id),
+            "vouchers": len(self._given),
+            "vouchees": len(self._received),
+            "version": self.version,
+        }
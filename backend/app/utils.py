@@ -113,6 +113,14 @@ class CircuitBreaker:
         self.success_count = 0
         self.last_failure_time: Optional[datetime] = None
     
+    @property
+    def is_available(self) -> bool:
+        """True unless the circuit is OPEN and still inside its recovery timeout"""
+        if self.state != CircuitState.OPEN or not self.last_failure_time:
+            return True
+        elapsed = (datetime.utcnow() - self.last_failure_time).total_seconds()
+        return elapsed >= self.recovery_timeout
+    
     async def __aenter__(self):
         if self.state == CircuitState.OPEN:
             # Check if recovery timeout passed
@@ -2,12 +2,14 @@
 pragma solidity ^0.8.20;
 
 import "@openzeppelin/contracts/access/Ownable.sol";
+import "@openzeppelin/contracts/utils/Multicall.sol";
 
 /**
  * @title LoanRegistry
  * @dev Immutable on-chain record of all loans and repayments
+ * Multicall lets the owner batch several writes into one transaction
  */
-contract LoanRegistry is Ownable {
+contract LoanRegistry is Ownable, Multicall {
     
     struct Loan {
         string loanId;  // Off-chain UUID
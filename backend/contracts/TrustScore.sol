@@ -3,13 +3,14 @@ pragma solidity ^0.8.20;
 
 import "@openzeppelin/contracts/token/ERC721/ERC721.sol";
 import "@openzeppelin/contracts/access/Ownable.sol";
+import "@openzeppelin/contracts/utils/Multicall.sol";
 
 /**
  * @title TrustScore
  * @dev Soulbound Token (ERC-5192) for immutable trust score on Kredefy
  * Cannot be transferred - permanently bound to original address
  */
-contract TrustScore is ERC721, Ownable {
+contract TrustScore is ERC721, Ownable, Multicall {
     
     // Token ID counter
     uint256 private _tokenIdCounter;
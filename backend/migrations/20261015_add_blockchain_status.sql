@@ -0,0 +1,14 @@
+-- Migration: Add On-Chain Write Status
+-- The chain write queue reports queued / sent / confirmed / failed per record
+-- alongside the existing blockchain_tx_hash.
+
+ALTER TABLE loans
+ADD COLUMN IF NOT EXISTS blockchain_status VARCHAR(20);
+
+ALTER TABLE repayments
+ADD COLUMN IF NOT EXISTS blockchain_status VARCHAR(20);
+
+ALTER TABLE vouches
+ADD COLUMN IF NOT EXISTS blockchain_status VARCHAR(20);
+
+COMMENT ON COLUMN loans.blockchain_status IS 'Status of the queued on-chain write (queued, sent, confirmed, failed, unconfirmed, simulated)';
@@ -0,0 +1,60 @@
+"""
+BENCHMARK: Scalar vs vectorized haversine, and nearby radius queries
+Distances from one origin to N random points (N = 10k, 100k, 1M), plus a
+10km GeoGridIndex query over the same N users.
+
+Usage: python scripts/benchmark_haversine.py [sizes...]
+"""
+
+import sys
+import os
+import time
+
+import numpy as np
+
+# Add parent dir to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.geo_index import GeoGridIndex, haversine_distance, haversine_many
+
+ORIGIN = (9.93, 76.26)  # Kochi
+
+
+def best_of(fn, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    sizes = [int(s) for s in sys.argv[1:]] or [10_000, 100_000, 1_000_000]
+    rng = np.random.default_rng(42)
+
+    print("\n--- HAVERSINE BENCHMARK ---")
+    print(f"{'points':>10} {'scalar':>12} {'vectorized':>12} {'speedup':>8} {'10km query':>12}")
+    for n in sizes:
+        # Users spread over roughly the size of Kerala
+        lats = rng.uniform(8.0, 12.8, n)
+        lons = rng.uniform(74.8, 77.4, n)
+        lat_list, lon_list = lats.tolist(), lons.tolist()
+
+        scalar = best_of(lambda: [haversine_distance(*ORIGIN, la, lo) for la, lo in zip(lat_list, lon_list)], repeat=1)
+        vectorized = best_of(lambda: haversine_many(*ORIGIN, lats, lons))
+
+        index = GeoGridIndex(cell_deg=0.05, initial_capacity=n)
+        for i, (la, lo) in enumerate(zip(lat_list, lon_list)):
+            index.upsert(f"u{i}", la, lo, now=0)
+        query = best_of(lambda: index.within(*ORIGIN, 10.0, now=0), repeat=20)
+
+        print(
+            f"{n:>10,} {scalar * 1000:>10.1f}ms {vectorized * 1000:>10.2f}ms "
+            f"{scalar / vectorized:>7.0f}x {query * 1000:>10.3f}ms"
+        )
+    print()
+
+
+if __name__ == "__main__":
+    main()
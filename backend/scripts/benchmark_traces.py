@@ -0,0 +1,124 @@
+"""
+BENCHMARK: Reasoning trace overhead per agent run
+Compares the old pydantic ReasoningStep against the __slots__ step used now.
+
+One "run" = a RiskOracle-sized trace (10 steps + conclusion), rendered with
+to_display() and serialized, as process_message does for every agent.
+
+Usage: python scripts/benchmark_traces.py [runs]
+"""
+
+import sys
+import os
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+# Add parent dir to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.ai.engine import ReasoningTrace, ThoughtType, THOUGHT_ICONS
+
+
+# --- Previous implementation, kept here only as the baseline ---
+class LegacyStep(BaseModel):
+    step_number: int
+    thought_type: ThoughtType
+    content: str
+    confidence: float = Field(ge=0, le=1)
+    timestamp: datetime = Field(default_factory=datetime.utcnow)
+    metadata: Dict[str, Any] = {}
+
+
+class LegacyTrace(BaseModel):
+    trace_id: str
+    agent_name: str
+    task: str
+    user_id: Optional[str] = None
+    steps: List[LegacyStep] = []
+    final_decision: Optional[str] = None
+    total_confidence: float = 0.0
+    duration_ms: int = 0
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+    def add_thought(self, thought_type, content, confidence=0.8, metadata=None):
+        self.steps.append(LegacyStep(
+            step_number=len(self.steps) + 1,
+            thought_type=thought_type,
+            content=content,
+            confidence=confidence,
+            metadata=metadata or {},
+        ))
+        return self
+
+    def observe(self, content, confidence=0.9):
+        return self.add_thought(ThoughtType.OBSERVATION, content, confidence)
+
+    def analyze(self, content, confidence=0.8):
+        return self.add_thought(ThoughtType.ANALYSIS, content, confidence)
+
+    def conclude(self, decision, confidence=0.85):
+        self.add_thought(ThoughtType.CONCLUSION, decision, confidence)
+        self.final_decision = decision
+        self.total_confidence = sum(s.confidence for s in self.steps) / len(self.steps)
+        return self
+
+    def to_display(self, language="en"):
+        lines = [f"🧠 **{self.agent_name}** reasoning for: {self.task}\n"]
+        for step in self.steps:
+            icon = THOUGHT_ICONS.get(step.thought_type, "•")
+            lines.append(f"{icon} **Step {step.step_number}**: {step.content} ({step.confidence:.0%})")
+        if self.final_decision:
+            lines.append(f"\n🎯 **Decision**: {self.final_decision}")
+            lines.append(f"📊 **Confidence**: {self.total_confidence:.0%}")
+        return "\n".join(lines)
+
+    def to_dict(self):
+        return self.model_dump()
+
+
+def agent_run(trace_cls):
+    trace = trace_cls(trace_id="RiskOracle_0", agent_name="RiskOracle", task="Assess default risk", user_id="u-1")
+    for i in range(5):
+        trace.observe(f"Signal {i}: repayment history looks consistent")
+        trace.analyze(f"Factor {i} contributes {i * 3}% to risk", confidence=0.8)
+    trace.conclude("LOW risk - approve with standard terms")
+    # process_message renders and serializes every trace; /traces may do it again
+    trace.to_display("en")
+    trace.to_dict()
+    trace.to_display("en")
+    trace.to_dict()
+    return trace
+
+
+def measure(label: str, trace_cls, runs: int):
+    agent_run(trace_cls)  # warm up
+
+    start = time.perf_counter()
+    for _ in range(runs):
+        agent_run(trace_cls)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    kept = [agent_run(trace_cls) for _ in range(1000)]
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept
+
+    print(f"{label:<10} {elapsed / runs * 1e6:9.1f} µs/run   {peak / 1000:9.0f} B/run (peak, 1000 retained)")
+    return elapsed
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    print(f"\n--- REASONING TRACE BENCHMARK ({runs} runs) ---")
+    legacy = measure("pydantic", LegacyTrace, runs)
+    current = measure("slots", ReasoningTrace, runs)
+    print(f"Speedup: {legacy / current:.2f}x\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -54,6 +54,7 @@ CREATE TABLE vouches (
     vouch_level VARCHAR(20) NOT NULL,
     saathi_staked DECIMAL(18,8) NOT NULL,
     blockchain_tx_hash VARCHAR(66),
+    blockchain_status VARCHAR(20),
     status VARCHAR(20) DEFAULT 'active',
     created_at TIMESTAMPTZ DEFAULT NOW(),
     UNIQUE(voucher_id, vouchee_id, circle_id)
@@ -71,6 +72,7 @@ CREATE TABLE loans (
     emi_amount DECIMAL(18,2),
     status VARCHAR(20) DEFAULT 'pending',
     blockchain_tx_hash VARCHAR(66),
+    blockchain_status VARCHAR(20),
     dodo_payment_id VARCHAR(100),
     disbursed_at TIMESTAMPTZ,
     completed_at TIMESTAMPTZ,
@@ -96,6 +98,7 @@ CREATE TABLE repayments (
     amount DECIMAL(18,2) NOT NULL,
     dodo_payment_id VARCHAR(100),
     blockchain_tx_hash VARCHAR(66),
+    blockchain_status VARCHAR(20),
     status VARCHAR(20) DEFAULT 'pending',
     due_date DATE,
     paid_at TIMESTAMPTZ,
@@ -2,6 +2,7 @@
 Tests for AI Agents
 """
 
+import json
 import pytest
 from unittest.mock import AsyncMock, patch, MagicMock
 from app.ai.engine import AgentContext, ReasoningTrace
@@ -166,3 +167,121 @@ class TestNovaAgent:
             result = await agent.execute(context)
             
             assert result.success is True
+
+
+class TestIntentFastPath:
+    """Tests for Nova's local intent classifier"""
+    
+    def test_trivial_messages_classified_locally(self):
+        """Test greetings and balance checks skip the LLM"""
+        from app.ai.intent_classifier import KeywordIntentClassifier
+        
+        classifier = KeywordIntentClassifier()
+        
+        assert classifier.classify("Namaste!")["intent"] == "greeting"
+        assert classifier.classify("what is my balance?")["intent"] == "balance_check"
+        assert classifier.classify("मेरा भरोसा स्कोर")["intent"] == "trust_score"
+    
+    def test_ambiguous_messages_fall_through(self):
+        """Test anything beyond a known phrase goes to the LLM"""
+        from app.ai.intent_classifier import KeywordIntentClassifier
+        
+        classifier = KeywordIntentClassifier()
+        
+        assert classifier.classify("hi, I need a loan for my shop") is None
+        assert classifier.stats()["hit_rate"] == 0.0
+    
+    @pytest.mark.asyncio
+    async def test_repeated_prompt_served_from_cache(self):
+        """Test identical prompts hit the response cache"""
+        from app.services.groq import groq_service
+        
+        groq_service.response_cache.clear()
+        with patch.object(groq_service.llm, "chat_completion", AsyncMock(return_value="ok")) as mock_llm:
+            first = await groq_service.chat("Categorize: chai 20", cache=True)
+            second = await groq_service.chat("categorize:   CHAI 20", cache=True)
+        
+        assert first == second == "ok"
+        assert mock_llm.await_count == 1
+
+
+class TestTraceStore:
+    """Tests for bounded reasoning trace storage"""
+    
+    def _trace(self, n, user_id="u-1"):
+        return ReasoningTrace(trace_id=f"Test_{n}", agent_name="Test", task="t", user_id=user_id)
+    
+    def test_ring_buffer_is_bounded(self):
+        """Test old traces are evicted once capacity is reached"""
+        from app.ai.trace_store import TraceStore
+        
+        store = TraceStore(capacity=3)
+        for n in range(5):
+            store.append(self._trace(n))
+        
+        assert [t.trace_id for t in store] == ["Test_2", "Test_3", "Test_4"]
+        assert store.get("Test_0") is None
+        assert [t.trace_id for t in store.for_user("u-1")] == ["Test_4", "Test_3", "Test_2"]
+    
+    def test_evicted_traces_spill_to_disk(self, tmp_path):
+        """Test evicted traces stay retrievable from the JSONL spill file"""
+        from app.ai.trace_store import TraceStore
+        
+        store = TraceStore(capacity=2, spill_path=str(tmp_path / "test.traces.jsonl"))
+        for n in range(4):
+            store.append(self._trace(n, user_id="u-2" if n == 0 else "u-1"))
+        
+        assert store.get("Test_0")["user_id"] == "u-2"
+        assert [r["trace_id"] for r in store.spilled_for_user("u-1")] == ["Test_1"]
+        assert store.flush(timeout=1)
+        assert store.stats()["spilled"] == 2
+    
+    def test_spills_written_in_batches_off_thread(self, tmp_path):
+        """Test close() drains every queued eviction to the spill file in order"""
+        from app.ai.trace_store import TraceStore
+        
+        path = tmp_path / "test.traces.jsonl"
+        store = TraceStore(capacity=1, spill_path=str(path))
+        for n in range(51):
+            store.append(self._trace(n))
+        store.close()
+        
+        records = [json.loads(line) for line in path.read_text().splitlines()]
+        assert [r["trace_id"] for r in records] == [f"Test_{n}" for n in range(50)]
+        assert [t.trace_id for t in store] == ["Test_50"]
+        stats = store.stats()
+        assert stats["spilled"] == 50 and stats["spill_pending"] == 0
+        assert 1 <= stats["spill_batches"] <= 50
+
+
+class TestReasoningTrace:
+    """Tests for the lightweight reasoning step representation"""
+    
+    def _trace(self):
+        trace = ReasoningTrace(trace_id="Test_1", agent_name="Test", task="t", user_id="u-1")
+        return trace.observe("seen").analyze("thought")
+    
+    def test_display_memoized_until_trace_changes(self):
+        """Test to_display is cached and recomputed after new steps"""
+        trace = self._trace()
+        first = trace.to_display()
+        assert trace.to_display() is first
+        
+        trace.conclude("approve")
+        updated = trace.to_display()
+        assert updated is not first
+        assert "**Step 3**: approve" in updated
+        assert "🎯 **Decision**: approve" in updated
+    
+    def test_serialization_matches_model_dump(self):
+        """Test to_dict and JSON output keep the pydantic shape"""
+        trace = self._trace().conclude("approve")
+        
+        assert trace.to_dict() == trace.model_dump()
+        assert trace.to_dict()["steps"][0]["thought_type"] == "observation"
+        assert '"thought_type":"conclusion"' in trace.model_dump_json()
+    
+    def test_confidence_bounds_enforced(self):
+        """Test out-of-range confidence is still rejected"""
+        with pytest.raises(ValueError):
+            self._trace().analyze("overconfident", confidence=1.5)
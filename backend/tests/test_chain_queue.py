@@ -0,0 +1,269 @@
+"""
+Tests for the durable on-chain write queue
+"""
+
+import asyncio
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.services.advanced_blockchain import LOAN_REGISTRY_ABI, AdvancedBlockchainService
+from app.services.chain_queue import ChainWriteQueue
+from app.services.local_store import create_local_store
+from app.services.supabase import SupabaseService
+
+
+class FakeTracker:
+    """Confirmation futures resolved by the test"""
+
+    def __init__(self):
+        self.futures = {}
+
+    def watch(self, tx_hash, confirmations=2, timeout=120):
+        return self.futures.setdefault(tx_hash, asyncio.get_running_loop().create_future())
+
+    def resolve(self, tx_hash, status="success"):
+        self.futures[tx_hash].set_result({"confirmed": status == "success", "status": status, "block_number": 7})
+
+
+class FakeBlockchain:
+    """Records sent calls; a call is (kind, args) and a multicall ("multicall", contract, calls)"""
+
+    is_configured = True
+
+    def __init__(self, fail_kinds=(), latency=0.0, fail_once=()):
+        self.fail_kinds = set(fail_kinds)
+        self.fail_once = set(fail_once)
+        self.latency = latency
+        self.sent = []
+        self.confirmations = FakeTracker()
+
+    def build_call(self, kind, args):
+        return (kind, args)
+
+    def batch_call(self, contract_key, calls):
+        return ("multicall", contract_key, calls)
+
+    def touched_addresses(self, args):
+        return ()
+
+    async def send_transaction(self, func, touches=()):
+        await asyncio.sleep(self.latency)
+        if func[0] in self.fail_kinds:
+            raise RuntimeError("execution reverted")
+        if func[0] in self.fail_once:
+            self.fail_once.discard(func[0])
+            raise RuntimeError("nonce too low")
+        self.sent.append(func)
+        return "0x" + f"{len(self.sent):064x}"
+
+
+def make_queue(chain, table=None, **options):
+    statuses = []
+
+    async def on_status(reference, tx_hash, status):
+        statuses.append((reference["id"], status, tx_hash))
+
+    if table is None:
+        table = create_local_store("memory", "").table("chain_writes", indexes=("status",))
+    queue = ChainWriteQueue(chain, table, window=0.01, on_status=on_status, **options)
+    return queue, statuses
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0.02)
+
+
+class TestChainWriteQueue:
+    """Tests for ChainWriteQueue"""
+
+    @pytest.mark.asyncio
+    async def test_multicall_batches_per_contract(self):
+        """Test writes to a Multicall contract share one transaction and report status back"""
+        chain = FakeBlockchain()
+        queue, statuses = make_queue(chain, multicall=True)
+        for i in range(3):
+            await queue.enqueue("record_repayment", {"loan_id": f"l{i}", "amount": 100}, reference={"table": "repayments", "id": f"r{i}"})
+        await queue.enqueue("stake_for_vouch", {"voucher_address": "0xa", "vouchee_address": "0xb", "amount": 10})
+        await settle()
+
+        multicalls = [func for func in chain.sent if func[0] == "multicall"]
+        assert len(multicalls) == 1
+        assert multicalls[0][1] == "loan_registry"
+        assert [call[1]["loan_id"] for call in multicalls[0][2]] == ["l0", "l1", "l2"]
+        assert len(chain.sent) == 2  # SaathiToken has no multicall: sent on its own
+        assert [s[1] for s in statuses] == ["sent"] * 3
+
+        tx_hash = statuses[0][2]
+        chain.confirmations.resolve(tx_hash)
+        await settle()
+        assert [s[1] for s in statuses[3:]] == ["confirmed"] * 3
+        stats = queue.stats()
+        assert stats["ops_per_tx"] == 2.0
+        assert stats["depth"] == 0 and stats["in_flight"] == 1
+        await queue.aclose()
+
+    @pytest.mark.asyncio
+    async def test_same_order_key_sent_in_order(self):
+        """Test without multicall, writes for one loan go out one after another"""
+        chain = FakeBlockchain(latency=0.01)
+        queue, _ = make_queue(chain)
+        await queue.enqueue("record_repayment", {"loan_id": "l1", "amount": 100}, order_key="l1")
+        await queue.enqueue("record_repayment", {"loan_id": "l2", "amount": 50}, order_key="l2")
+        await queue.enqueue("mark_loan_completed", {"loan_id": "l1"}, order_key="l1")
+        await settle()
+
+        l1 = [func[0] for func in chain.sent if func[1]["loan_id"] == "l1"]
+        assert l1 == ["record_repayment", "mark_loan_completed"]
+        assert queue.stats()["transactions"] == 3
+        await queue.aclose()
+
+    @pytest.mark.asyncio
+    async def test_retried_write_keeps_key_order(self):
+        """Test a write that failed once still goes out before later writes for its loan"""
+        chain = FakeBlockchain(fail_once={"record_repayment"})
+        queue, _ = make_queue(chain, max_batch=1)  # The loan's writes land in separate batches
+        await queue.enqueue("record_repayment", {"loan_id": "l1", "amount": 100}, order_key="l1")
+        await queue.enqueue("mark_loan_completed", {"loan_id": "l1"}, order_key="l1")
+        await settle()
+        await queue.enqueue("mark_loan_defaulted", {"loan_id": "l1"}, order_key="l1")
+        await settle()
+
+        assert [func[0] for func in chain.sent] == ["record_repayment", "mark_loan_completed", "mark_loan_defaulted"]
+        await queue.aclose()
+
+    @pytest.mark.asyncio
+    async def test_reverted_multicall_is_split(self):
+        """Test the operations of a reverted batch are retried one per transaction"""
+        chain = FakeBlockchain()
+        queue, _ = make_queue(chain, multicall=True)
+        rows = [await queue.enqueue("record_repayment", {"loan_id": f"l{i}", "amount": 1}) for i in range(2)]
+        await settle()
+        chain.confirmations.resolve(queue.get(rows[0]["id"])["tx_hash"], status="failed")
+        await settle()
+
+        assert [func[0] for func in chain.sent] == ["multicall", "record_repayment", "record_repayment"]
+        assert queue.stats()["unbatched"] == 2
+        assert all(queue.get(row["id"])["solo"] for row in rows)
+        await queue.aclose()
+
+    @pytest.mark.asyncio
+    async def test_send_failures_exhaust_attempts(self):
+        """Test a write that cannot be sent is marked failed after max_attempts"""
+        chain = FakeBlockchain(fail_kinds={"mark_loan_defaulted"})
+        queue, statuses = make_queue(chain, max_attempts=2)
+        row = await queue.enqueue("mark_loan_defaulted", {"loan_id": "l1"}, reference={"table": "loans", "id": "l1"})
+        await settle()
+
+        stored = queue.get(row["id"])
+        assert stored["status"] == "failed" and stored["attempts"] == 2
+        assert statuses == [("l1", "failed", None)]
+        await queue.aclose()
+
+    @pytest.mark.asyncio
+    async def test_resumes_persisted_writes(self):
+        """Test queued and sent rows are picked up by a new queue on the same table"""
+        table = create_local_store("memory", "").table("chain_writes", indexes=("status",))
+        chain = FakeBlockchain()
+        queue, _ = make_queue(chain, table=table)
+        sent = await queue.enqueue("update_trust_score", {"user_address": "0xa", "new_score": 60, "reason": "r"})
+        await settle()
+        queue.window = 60  # Next write stays queued
+        queued = await queue.enqueue("update_trust_score", {"user_address": "0xb", "new_score": 40, "reason": "r"})
+        await asyncio.sleep(0.02)
+        await queue.aclose()
+
+        restarted_chain = FakeBlockchain()
+        restarted, _ = make_queue(restarted_chain, table=table)
+        restarted.start()
+        await settle()
+        assert len(restarted_chain.sent) == 1 and restarted_chain.sent[0][1]["user_address"] == "0xb"
+        assert table.get(sent["id"])["tx_hash"] in restarted_chain.confirmations.futures
+        assert table.get(queued["id"])["status"] == "sent"
+        await restarted.aclose()
+
+    @pytest.mark.asyncio
+    async def test_one_owner_sends_for_every_worker(self, tmp_path):
+        """Test only the lock holder sends, rows persisted by a standby included, until it hands over"""
+        table = create_local_store("memory", "").table("chain_writes", indexes=("status",))
+        lock = str(tmp_path / "chain_writes.owner")
+        owner_chain, standby_chain = FakeBlockchain(), FakeBlockchain()
+        owner, _ = make_queue(owner_chain, table=table, owner_lock=lock)
+        standby, _ = make_queue(standby_chain, table=table, owner_lock=lock)
+        owner.start()
+        await settle()
+        standby.start()
+
+        first = await standby.enqueue("update_trust_score", {"user_address": "0xa", "new_score": 60, "reason": "r"})
+        await settle()
+        assert [func[1]["user_address"] for func in owner_chain.sent] == ["0xa"]
+        assert standby_chain.sent == []
+        assert table.get(first["id"])["owner"] == owner.owner_id
+        assert owner.stats()["owner"] and not standby.stats()["owner"]
+
+        await owner.aclose()
+        await standby.enqueue("update_trust_score", {"user_address": "0xb", "new_score": 40, "reason": "r"})
+        await settle()
+        assert [func[1]["user_address"] for func in standby_chain.sent] == ["0xb"]
+        assert standby.stats()["owner"]
+        await standby.aclose()
+
+    @pytest.mark.asyncio
+    async def test_interrupted_send_not_resent(self):
+        """Test a row a dead owner left claimed is marked unconfirmed instead of sent twice"""
+        table = create_local_store("memory", "").table("chain_writes", indexes=("status",))
+        table.insert({
+            "id": "cw-1", "kind": "mark_loan_completed", "args": {"loan_id": "l1"}, "order_key": "l1",
+            "reference": {"table": "loans", "id": "l1"}, "status": "sending", "owner": "host:1",
+            "solo": False, "attempts": 0, "tx_hash": None, "error": None, "enqueued_at": 0.0,
+        })
+        chain = FakeBlockchain()
+        queue, statuses = make_queue(chain, table=table)
+        queue.start()
+        await settle()
+
+        assert chain.sent == []
+        assert table.get("cw-1")["status"] == "unconfirmed"
+        assert statuses == [("l1", "unconfirmed", None)]
+        await queue.aclose()
+
+    def test_batch_call_encodes_each_write(self):
+        """Test a multicall carries the same calldata as the individual writes"""
+        service = AdvancedBlockchainService()
+        service.contracts["loan_registry"] = service.w3.eth.contract(address="0x" + "22" * 20, abi=LOAN_REGISTRY_ABI)
+        calls = [
+            service.build_call("record_repayment", {"loan_id": "l1", "amount": 100}),
+            service.build_call("mark_loan_completed", {"loan_id": "l1"}),
+        ]
+        batch = service.batch_call("loan_registry", calls)
+
+        assert batch.fn_name == "multicall"
+        assert list(batch.args[0]) == [call._encode_transaction_data() for call in calls]
+        with pytest.raises(ValueError):
+            service.build_call("unknown", {})
+
+
+class TestChainStatus:
+    """Tests for SupabaseService.update_chain_status"""
+
+    @pytest.mark.asyncio
+    async def test_tx_hash_kept_without_status_column(self):
+        """Test the tx hash is written even where the blockchain_status column is missing"""
+        written = []
+
+        def update(fields):
+            if "blockchain_status" in fields:
+                raise RuntimeError("column repayments.blockchain_status does not exist")
+            written.append(fields)
+            query = MagicMock()
+            query.eq.return_value.execute.return_value.data = [{"id": "r1", **fields}]
+            return query
+
+        service = SupabaseService()
+        service._client = MagicMock()
+        service._client.table.return_value.update.side_effect = update
+
+        row = await service.update_chain_status("repayments", "r1", "0xabc", "sent")
+        assert written == [{"blockchain_tx_hash": "0xabc"}]
+        assert row == {"id": "r1", "blockchain_tx_hash": "0xabc"}
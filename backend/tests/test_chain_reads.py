@@ -0,0 +1,94 @@
+"""
+Tests for the block-aware on-chain read cache
+"""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.services.advanced_blockchain import AdvancedBlockchainService
+from app.services.chain_reads import BlockReadCache
+
+ALICE = "0x" + "aa" * 20
+BOB = "0x" + "bb" * 20
+
+
+class CountingCall:
+    """View call stand-in: returns the block it was asked for"""
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.blocks = []
+
+    async def __call__(self, block):
+        self.blocks.append(block)
+        await asyncio.sleep(self.latency)
+        return block
+
+
+class TestBlockReadCache:
+    """Tests for BlockReadCache"""
+
+    @pytest.mark.asyncio
+    async def test_one_call_per_key_per_block(self):
+        """Test repeated and concurrent reads at one block share a single call"""
+        fetch_head = AsyncMock(return_value=100)
+        cache = BlockReadCache(fetch_head, head_ttl=60)
+        call = CountingCall(latency=0.01)
+
+        results = await asyncio.gather(*(cache.read("saathi", "balanceOf", (ALICE,), call) for _ in range(10)))
+        assert results == [100] * 10
+        assert await cache.read("saathi", "balanceOf", (ALICE,), call) == 100
+        assert call.blocks == [100]
+        assert fetch_head.await_count == 1
+
+        await cache.read("saathi", "balanceOf", (BOB,), call)
+        assert call.blocks == [100, 100]
+        assert cache.stats()["hits"] == 10
+
+    @pytest.mark.asyncio
+    async def test_new_block_is_a_miss(self):
+        """Test a new head block drops the entries keyed by older blocks"""
+        fetch_head = AsyncMock(return_value=100)
+        cache = BlockReadCache(fetch_head, head_ttl=0)
+        call = CountingCall()
+
+        await cache.read("trust_score", "getScore", (ALICE,), call)
+        fetch_head.return_value = 101
+        assert await cache.read("trust_score", "getScore", (ALICE,), call) == 101
+        assert call.blocks == [100, 101]
+        assert cache.stats()["entries"] == 1
+
+    @pytest.mark.asyncio
+    async def test_own_writes_invalidate_and_bypass(self):
+        """Test reads of an address with an unconfirmed write go to the node"""
+        fetch_head = AsyncMock(return_value=100)
+        cache = BlockReadCache(fetch_head, head_ttl=60)
+        call = CountingCall()
+        await cache.read("saathi", "balanceOf", (ALICE,), call)
+        await cache.read("saathi", "balanceOf", (BOB,), call)
+
+        cache.begin_write(["0x" + "AA" * 20])  # Checksum casing of ALICE
+        await cache.read("saathi", "balanceOf", (ALICE,), call)
+        await cache.read("saathi", "balanceOf", (BOB,), call)
+        assert call.blocks == [100, 100, "latest"]  # Bob still cached
+
+        fetch_head.return_value = 103
+        cache.end_write([ALICE])
+        assert await cache.read("saathi", "balanceOf", (ALICE,), call) == 103  # Fresh head after confirmation
+        assert cache.stats()["bypassed"] == 1 and cache.stats()["writes_pending"] == 0
+
+    @pytest.mark.asyncio
+    async def test_service_reads_at_cached_block(self):
+        """Test get_trust_score calls the contract at the cached head block"""
+        service = AdvancedBlockchainService()
+        service._rpc = AsyncMock()
+        service.reads = BlockReadCache(AsyncMock(return_value=42), head_ttl=60)
+        score_call = AsyncMock(return_value=73)
+        service.contracts["trust_score"] = MagicMock()
+        service.contracts["trust_score"].functions.getScore.return_value.call = score_call
+
+        assert await service.get_trust_score(ALICE) == 73
+        assert await service.get_trust_score(ALICE) == 73
+        score_call.assert_awaited_once_with(block_identifier=42)
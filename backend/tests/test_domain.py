@@ -109,3 +109,31 @@ class TestLoanDomainService:
             
             assert result["success"] is False
             assert "reason" in result
+    
+    @pytest.mark.asyncio
+    async def test_default_scores_circle_and_slashes_vouches(self, service):
+        """Test defaulting a loan emits the leaderboard default event and slashes active vouches"""
+        loan = {"id": "l-1", "borrower_id": "u-1", "circle_id": "c-1", "status": "disbursed"}
+        store = MagicMock()
+        store.get_loan = AsyncMock(return_value=loan)
+        store.update_loan = AsyncMock(return_value={**loan, "status": "defaulted"})
+        store.get_vouches_received = AsyncMock(return_value=[
+            {"id": "v-1", "status": "active"},
+            {"id": "v-2", "status": "revoked"},
+        ])
+        blockchain = MagicMock(is_configured=False)
+        
+        with patch("app.domain.services.supabase_service", store), \
+             patch("app.domain.services.get_advanced_blockchain_service", return_value=blockchain), \
+             patch("app.domain.services.gamification_service") as gamification, \
+             patch("app.domain.services.vouching_service") as vouching:
+            vouching.slash_vouch = AsyncMock(return_value={"slashed_amount": 5.0})
+            result = await service.mark_defaulted("l-1")
+            
+            gamification.record_circle_event.assert_called_once_with("c-1", "default")
+            vouching.slash_vouch.assert_awaited_once_with("v-1", "l-1", 50)
+            assert result["loan"]["status"] == "defaulted"
+            
+            store.get_loan.return_value = {**loan, "status": "completed"}
+            with pytest.raises(ValueError, match="cannot be defaulted"):
+                await service.mark_defaulted("l-1")
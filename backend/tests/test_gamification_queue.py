@@ -0,0 +1,110 @@
+"""
+Tests for the coalescing gamification event pipeline
+"""
+
+import asyncio
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.services import gamification
+from app.services.event_queue import CoalescingQueue
+from app.services.gamification import GamificationService
+
+
+class TestCoalescingQueue:
+    """Tests for CoalescingQueue"""
+
+    @pytest.mark.asyncio
+    async def test_coalesces_per_key(self):
+        """Test events for one key within the window arrive as one batch"""
+        calls = []
+
+        async def handler(key, items):
+            calls.append((key, list(items)))
+
+        queue = CoalescingQueue(handler, workers=2, window=0.02)
+        queue.start()
+        for item in range(3):
+            await queue.submit("u1", item)
+        await queue.submit("u2", "x")
+        await asyncio.sleep(0.08)
+        await queue.aclose()
+
+        assert sorted(calls) == [("u1", [0, 1, 2]), ("u2", ["x"])]
+        stats = queue.stats()
+        assert stats["processed"] == 4
+        assert stats["batches"] == 2
+        assert stats["coalesced"] == 2
+        assert stats["pending_events"] == 0
+
+    @pytest.mark.asyncio
+    async def test_one_batch_in_flight_per_key(self):
+        """Test a key's next batch waits until its current batch is done"""
+        active, overlaps, seen = set(), [], []
+
+        async def handler(key, items):
+            if key in active:
+                overlaps.append(key)
+            active.add(key)
+            await asyncio.sleep(0.03)
+            seen.extend(items)
+            active.discard(key)
+
+        queue = CoalescingQueue(handler, workers=4, window=0.005)
+        queue.start()
+        await queue.submit("u1", 1)
+        await asyncio.sleep(0.015)  # First batch is now running
+        await queue.submit("u1", 2)
+        await asyncio.sleep(0.1)
+        await queue.aclose()
+
+        assert seen == [1, 2]
+        assert overlaps == []
+
+    @pytest.mark.asyncio
+    async def test_back_pressure_drops_after_timeout(self):
+        """Test a full queue makes submitters wait, then drop"""
+        queue = CoalescingQueue(AsyncMock(), workers=1, window=10, max_pending=2, submit_timeout=0.01)
+        queue.start()
+        assert await queue.submit("a", 1)
+        assert await queue.submit("b", 2)
+        assert not await queue.submit("c", 3)
+        assert queue.stats()["dropped"] == 1
+
+        await queue.aclose()  # Flushes open windows without waiting for them
+        assert queue.handler.await_count == 2
+
+
+class TestApplyEvents:
+    """Tests for GamificationService.apply_events"""
+
+    @pytest.mark.asyncio
+    async def test_single_read_and_write(self):
+        """Test a batch reads the profile once and writes streak, badges and XP together"""
+        store = MagicMock()
+        store.get_profile = AsyncMock(return_value={"id": "u1", "metadata": {"xp": 40}})
+        store.get_user_stats = AsyncMock(return_value={"successful_vouches": 5})
+        store.update_profile = AsyncMock(return_value={})
+
+        service = GamificationService()
+        with patch.object(gamification, "supabase_service", store):
+            result = await service.apply_events("u1", [("repayment", {}), ("vouch", {}), ("login", None)])
+
+        assert result["xp_gained"] == 160
+        assert result["new_badges"] == ["the_anchor"]
+        store.get_profile.assert_awaited_once()
+        store.update_profile.assert_awaited_once()
+        metadata = store.update_profile.await_args.args[1]["metadata"]
+        assert metadata["xp"] == 200
+        assert metadata["streak_days"] == 1
+        assert metadata["badges"] == ["the_anchor"]
+
+    @pytest.mark.asyncio
+    async def test_submit_without_workers_applies_inline(self):
+        """Test submit_event falls back to immediate processing when the queue is not running"""
+        service = GamificationService()
+        service.apply_events = AsyncMock(return_value={"events": 1})
+
+        assert await service.submit_event("u1", "login")
+        service.apply_events.assert_awaited_once_with("u1", [("login", None)])
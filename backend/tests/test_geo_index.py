@@ -0,0 +1,75 @@
+"""
+Tests for the nearby-users spatial index
+"""
+
+import random
+
+import numpy as np
+import pytest
+
+from app.services.geo_index import GeoGridIndex, haversine_distance, haversine_many
+
+
+def _brute_force(points, lat, lon, radius_km):
+    return sorted(
+        (uid, haversine_distance(lat, lon, p[0], p[1]))
+        for uid, p in points.items()
+        if haversine_distance(lat, lon, p[0], p[1]) <= radius_km
+    )
+
+
+class TestGeoGridIndex:
+    """Tests for GeoGridIndex"""
+
+    def test_radius_query_matches_linear_scan(self):
+        """Test the grid returns exactly what a full haversine scan would"""
+        rng = random.Random(7)
+        index = GeoGridIndex(cell_deg=0.05)
+        points = {}
+        for i in range(2000):
+            points[f"u{i}"] = (10.0 + rng.uniform(-0.5, 0.5), 76.3 + rng.uniform(-0.5, 0.5))
+            index.upsert(f"u{i}", *points[f"u{i}"], now=0)
+
+        for radius in (1, 5, 25):
+            expected = dict(_brute_force(points, 10.0, 76.3, radius))
+            found = index.within(10.0, 76.3, radius)
+            assert {uid for uid, _ in found} == set(expected)
+            assert [d for _, d in found] == sorted(d for _, d in found)
+            assert all(d == pytest.approx(expected[uid]) for uid, d in found)
+
+    def test_vectorized_distance_matches_scalar(self):
+        """Test the NumPy kernel agrees with the scalar haversine"""
+        rng = random.Random(3)
+        lats = np.array([rng.uniform(-80, 80) for _ in range(500)])
+        lons = np.array([rng.uniform(-180, 180) for _ in range(500)])
+
+        distances = haversine_many(12.97, 77.59, lats, lons)
+        expected = [haversine_distance(12.97, 77.59, la, lo) for la, lo in zip(lats, lons)]
+        assert distances == pytest.approx(expected, rel=1e-9, abs=1e-6)
+
+    def test_nearest_neighbours(self):
+        """Test k-nearest returns the closest users in order"""
+        index = GeoGridIndex(cell_deg=0.05)
+        for i, offset in enumerate([0.001, 0.3, 0.02, 2.0]):
+            index.upsert(f"u{i}", 9.93 + offset, 76.26, now=0)
+
+        assert [uid for uid, _ in index.nearest(9.93, 76.26, k=3)] == ["u0", "u2", "u1"]
+        assert [uid for uid, _ in index.nearest(9.93, 76.26, k=2, exclude="u0")] == ["u2", "u1"]
+
+    def test_stale_locations_evicted(self):
+        """Test locations expire after the TTL and moves update the cell"""
+        index = GeoGridIndex(cell_deg=0.05, ttl=60)
+        index.upsert("old", 12.97, 77.59, now=0)
+        index.upsert("moved", 12.97, 77.59, now=30)
+        index.upsert("moved", 28.61, 77.20, now=70)
+
+        assert index.within(12.97, 77.59, 5, now=70) == []
+        assert "old" not in index
+        assert index.get("moved")["latitude"] == 28.61
+
+    def test_query_across_antimeridian(self):
+        """Test cells wrap around at longitude +/-180"""
+        index = GeoGridIndex(cell_deg=0.05)
+        index.upsert("east", 0.0, 179.99, now=0)
+
+        assert [uid for uid, _ in index.within(0.0, -179.99, 5)] == ["east"]
@@ -0,0 +1,124 @@
+"""
+Tests for trust network layouts and the layout cache
+"""
+
+import numpy as np
+import pytest
+
+from app.services.graph_layout import LayoutCache, compute_layout, force_layout, radial_layout
+from app.services.trust_network import TrustNetwork
+from app.services.vouch_graph import VouchGraph
+
+
+def make_network(depth: int = 2, width: int = 6) -> TrustNetwork:
+    """Center -> `width` children -> `width` grandchildren each"""
+    network = TrustNetwork("c", depth)
+    network.nodes["c"] = {"id": "c", "depth": 0}
+    frontier = ["c"]
+    for level in range(1, depth + 1):
+        next_frontier = []
+        for parent in frontier:
+            for i in range(width if level == 1 else 2):
+                node = f"{parent}.{i}"
+                network.nodes[node] = {"id": node, "depth": level}
+                network.parents[node] = parent
+                network.add_edge(parent, node, 10)
+                next_frontier.append(node)
+        frontier = next_frontier
+    return network
+
+
+def min_distance(positions) -> float:
+    pts = np.array(list(positions.values()))
+    dist = np.sqrt(((pts[:, None] - pts[None]) ** 2).sum(axis=-1))
+    np.fill_diagonal(dist, np.inf)
+    return float(dist.min())
+
+
+class TestLayouts:
+    """Tests for radial_layout and force_layout"""
+
+    def test_radial_rings_grow_to_avoid_overlap(self):
+        """Test crowded rings are pushed out to keep nodes min_gap apart"""
+        network = make_network(depth=2, width=20)
+        positions = radial_layout(network, origin=(0, 0), ring_spacing=50, min_gap=30)
+
+        assert positions["c"] == (0, 0)
+        assert min_distance(positions) >= 29
+        assert len(positions) == len(network.nodes)
+
+    def test_radial_keeps_children_near_parent(self):
+        """Test grandchildren are placed in their parent's sector"""
+        network = make_network(depth=2, width=4)
+        positions = radial_layout(network, origin=(0, 0))
+
+        for node, parent in network.parents.items():
+            if network.nodes[node]["depth"] == 2:
+                angle = np.arctan2(positions[node][1], positions[node][0])
+                parent_angle = np.arctan2(positions[parent][1], positions[parent][0])
+                gap = abs((angle - parent_angle + np.pi) % (2 * np.pi) - np.pi)
+                assert gap <= np.pi / 4 + 1e-9
+
+    def test_force_layout_spreads_and_pins_center(self):
+        """Test the spring layout keeps the center fixed and separates nodes"""
+        network = make_network(depth=2, width=6)
+        positions = force_layout(network, origin=(200, 150), iterations=40)
+
+        assert positions["c"] == (200, 150)
+        assert min_distance(positions) > 10
+        assert positions == force_layout(network, origin=(200, 150), iterations=40)
+
+    def test_unknown_method(self):
+        """Test an unknown layout name is rejected"""
+        with pytest.raises(ValueError):
+            compute_layout(make_network(), "spiral")
+
+
+class TestLayoutCache:
+    """Tests for LayoutCache"""
+
+    def setup_method(self):
+        self.graph = VouchGraph()
+        self.graph.load([
+            {"id": "v1", "voucher_id": "a", "vouchee_id": "b", "status": "active"},
+            {"id": "v2", "voucher_id": "x", "vouchee_id": "y", "status": "active"},
+        ])
+        self.cache = LayoutCache(max_entries=2, ttl=60)
+        self.cache.put(("a", 1), self.graph.version, ["a", "b"], {"nodes": ["a", "b"]}, now=0)
+
+    def test_hit_until_network_changes(self):
+        """Test writes elsewhere keep the entry, writes touching its users drop it"""
+        self.graph.upsert({"id": "v3", "voucher_id": "x", "vouchee_id": "z", "status": "active"})
+        assert self.cache.get(("a", 1), self.graph, now=1) == {"nodes": ["a", "b"]}
+
+        self.graph.upsert({"id": "v4", "voucher_id": "z", "vouchee_id": "b", "status": "active"})
+        assert self.cache.get(("a", 1), self.graph, now=2) is None
+        assert self.cache.stats()["invalidations"] == 1
+
+    def test_survives_unchanged_reload(self):
+        """Test a periodic full reload only drops entries whose users changed"""
+        self.graph.load([
+            {"id": "v1", "voucher_id": "a", "vouchee_id": "b", "status": "active"},
+            {"id": "v2", "voucher_id": "x", "vouchee_id": "y", "status": "revoked"},
+        ])
+        assert self.cache.get(("a", 1), self.graph, now=1) == {"nodes": ["a", "b"]}
+
+        self.graph.load([{"id": "v2", "voucher_id": "x", "vouchee_id": "y", "status": "revoked"}])
+        assert self.cache.get(("a", 1), self.graph, now=2) is None
+
+    def test_stale_build_is_not_served(self):
+        """Test an entry built from an older version than a node's last change is dropped"""
+        version = self.graph.version
+        self.graph.upsert({"id": "v1", "status": "revoked"})
+        self.cache.put(("a", 2), version, ["a", "b"], {}, now=0)
+
+        assert self.cache.get(("a", 2), self.graph, now=1) is None
+
+    def test_ttl_and_lru(self):
+        """Test entries expire after ttl and the least recently used is evicted"""
+        assert self.cache.get(("a", 1), self.graph, now=61) is None
+
+        for depth in range(3):
+            self.cache.put(("a", depth), self.graph.version, ["a"], {}, now=0)
+        assert len(self.cache) == 2
+        assert self.cache.get(("a", 0), self.graph, now=1) is None
@@ -0,0 +1,113 @@
+"""
+Tests for the Circle Wars leaderboard
+"""
+
+import random
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.services import gamification
+from app.services.gamification import GamificationService
+from app.services.leaderboard import CircleLeaderboard, CircleStats, RankedSkipList
+from app.services.vouch_graph import VouchGraph
+
+
+class TestRankedSkipList:
+    """Tests for RankedSkipList"""
+
+    def test_matches_sorted_list(self):
+        """Test random inserts/removes keep order, ranks and slices exact"""
+        rng = random.Random(7)
+        skiplist = RankedSkipList(seed=1)
+        reference = set()
+        for _ in range(2000):
+            key = rng.randrange(300)
+            if key in reference and rng.random() < 0.5:
+                assert skiplist.remove(key)
+                reference.discard(key)
+            else:
+                skiplist.insert(key, str(key))
+                reference.add(key)
+
+        ordered = sorted(reference)
+        assert len(skiplist) == len(ordered)
+        assert [k for k, _ in skiplist] == ordered
+        for key in ordered[::7]:
+            assert skiplist.rank(key) == ordered.index(key)
+        for offset in (0, 1, 13, len(ordered) - 3):
+            assert [k for k, _ in skiplist.slice(offset, 5)] == ordered[offset:offset + 5]
+        assert skiplist.rank(-1) is None
+        assert not skiplist.remove(-1)
+        assert skiplist.slice(len(ordered), 5) == []
+
+
+class TestCircleLeaderboard:
+    """Tests for CircleLeaderboard"""
+
+    def setup_method(self):
+        self.board = CircleLeaderboard(seed=1)
+        self.board.load([
+            CircleStats("a", "Alpha", repaid_loans=4, active_vouches=3),
+            CircleStats("b", "Beta", repaid_loans=1, active_vouches=10),
+            CircleStats("c", "Gamma", repaid_loans=9, defaults=1, active_vouches=20),
+        ])
+
+    def test_ranking_follows_score(self):
+        """Test circles are ordered by Trust Velocity with defaults penalized"""
+        assert [e["circle_id"] for e in self.board.top(3)] == ["b", "a", "c"]
+        assert self.board.rank("c")["score"] == int(0.9 * 100 + 20 * 10 - 500)
+
+    def test_events_move_one_circle(self):
+        """Test an event updates the circle's components and rank"""
+        self.board.apply("a", "vouch", count=8)
+        assert self.board.rank("a")["rank"] == 1
+        assert self.board.rank("a")["active_vouches"] == 11
+
+        self.board.apply("a", "default")
+        assert self.board.rank("a")["rank"] == 3
+        assert self.board.rank("a")["repayment_rate"] == 0.8
+
+    def test_pages_and_new_circles(self):
+        """Test paginated reads and circles first seen through an event"""
+        self.board.apply("d", "vouch_released")
+        self.board.apply("d", "loan_repaid")
+
+        assert self.board.rank("d")["active_vouches"] == 0
+        assert [e["rank"] for e in self.board.page(1, 2)] == [2, 3]
+        assert len(self.board) == 4
+        with pytest.raises(ValueError):
+            self.board.apply("a", "login")
+
+
+class TestGamificationLeaderboard:
+    """Tests for the leaderboard in GamificationService"""
+
+    @pytest.mark.asyncio
+    async def test_build_once_then_incremental(self):
+        """Test the first read builds from aggregates and later events apply in place"""
+        graph = VouchGraph()
+        graph.load([
+            {"id": "v1", "voucher_id": "u1", "vouchee_id": "u2", "circle_id": "c1", "status": "active"},
+            {"id": "v2", "voucher_id": "u2", "vouchee_id": "u3", "circle_id": "c2", "status": "returned"},
+        ])
+        store = MagicMock()
+        store.get_all_circles = AsyncMock(return_value=[{"id": "c1", "name": "One"}, {"id": "c2", "name": "Two"}])
+        store.get_loan_outcomes_by_circle = AsyncMock(return_value={"c2": {"completed": 2, "defaulted": 0}})
+        store.get_vouch_graph = AsyncMock(return_value=graph)
+        store.get_circle = AsyncMock(return_value={"id": "c3", "name": "Three"})
+
+        service = GamificationService()
+        service.record_circle_event("c1", "vouch")  # Before the build: already in the aggregates
+        with patch.object(gamification, "supabase_service", store):
+            board = await service.calculate_circle_leaderboard()
+            assert [(e["circle_id"], e["score"]) for e in board] == [("c2", 100), ("c1", 10)]
+
+            service.record_circle_event("c1", "loan_repaid")
+            service.record_circle_event("c3", "vouch")
+            board = await service.calculate_circle_leaderboard(offset=0, limit=2)
+            rank = await service.get_circle_rank("c3")
+
+        assert [e["circle_id"] for e in board] == ["c1", "c2"]
+        assert rank == {**rank, "name": "Three", "rank": 3}
+        assert store.get_all_circles.await_count == 1
@@ -0,0 +1,144 @@
+"""
+Tests for the async LLM client against a local stub server
+"""
+
+import asyncio
+import json
+import pytest
+
+from app.services.llm_client import AsyncLLMClient, LLMQueueTimeout
+
+
+class StubLLMServer:
+    """Minimal OpenAI-compatible HTTP server on localhost"""
+
+    def __init__(self, delay: float = 0.0, tokens=("Namaste", " ji")):
+        self.delay = delay
+        self.tokens = tokens
+        self.active = 0
+        self.max_active = 0
+        self.requests = []
+        self._server = None
+
+    async def __aenter__(self):
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        return self
+
+    async def __aexit__(self, *exc):
+        self._server.close()
+        await self._server.wait_closed()
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.sockets[0].getsockname()[:2]
+        return f"http://{host}:{port}/v1"
+
+    async def _handle(self, reader, writer):
+        head = await reader.readuntil(b"\r\n\r\n")
+        length = 0
+        for line in head.decode().split("\r\n"):
+            if line.lower().startswith("content-length:"):
+                length = int(line.split(":", 1)[1])
+        payload = json.loads(await reader.readexactly(length))
+        self.requests.append(payload)
+
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        await asyncio.sleep(self.delay)
+        self.active -= 1
+
+        if payload.get("stream"):
+            chunks = [
+                "data: " + json.dumps({"choices": [{"delta": {"content": t}}]}) + "\n\n"
+                for t in self.tokens
+            ]
+            body = ("".join(chunks) + "data: [DONE]\n\n").encode()
+            content_type = "text/event-stream"
+        else:
+            body = json.dumps({"choices": [{"message": {"content": "".join(self.tokens)}}]}).encode()
+            content_type = "application/json"
+
+        writer.write(
+            b"HTTP/1.1 200 OK\r\n"
+            + f"Content-Type: {content_type}\r\nContent-Length: {len(body)}\r\n".encode()
+            + b"Connection: close\r\n\r\n"
+            + body
+        )
+        await writer.drain()
+        writer.close()
+
+
+class TestAsyncLLMClient:
+    """Tests for AsyncLLMClient"""
+
+    MESSAGES = [{"role": "user", "content": "hi"}]
+
+    @pytest.mark.asyncio
+    async def test_chat_completion(self):
+        """Test a plain completion round trip"""
+        async with StubLLMServer() as server:
+            client = AsyncLLMClient(server.base_url, "test-key")
+            text = await client.chat_completion(self.MESSAGES, model="stub")
+            await client.aclose()
+
+        assert text == "Namaste ji"
+        assert server.requests[0]["model"] == "stub"
+
+    @pytest.mark.asyncio
+    async def test_streaming_tokens(self):
+        """Test tokens are yielded from server-sent events"""
+        async with StubLLMServer(tokens=("a", "b", "c")) as server:
+            client = AsyncLLMClient(server.base_url, "test-key")
+            tokens = [t async for t in client.stream_chat_completion(self.MESSAGES, model="stub")]
+            await client.aclose()
+
+        assert tokens == ["a", "b", "c"]
+
+    @pytest.mark.asyncio
+    async def test_concurrency_limit(self):
+        """Test no more than max_concurrency requests reach the server at once"""
+        async with StubLLMServer(delay=0.05) as server:
+            client = AsyncLLMClient(server.base_url, "test-key", max_concurrency=2)
+            await asyncio.gather(*[
+                client.chat_completion(self.MESSAGES, model="stub") for _ in range(6)
+            ])
+            await client.aclose()
+
+        assert server.max_active == 2
+        assert client.stats()["completed"] == 6
+
+    @pytest.mark.asyncio
+    async def test_queue_deadline(self):
+        """Test queued requests fail fast once their deadline passes"""
+        async with StubLLMServer(delay=0.3) as server:
+            client = AsyncLLMClient(server.base_url, "test-key", max_concurrency=1, queue_timeout=0.05)
+            results = await asyncio.gather(
+                client.chat_completion(self.MESSAGES, model="stub"),
+                client.chat_completion(self.MESSAGES, model="stub"),
+                return_exceptions=True,
+            )
+            await client.aclose()
+
+        assert results[0] == "Namaste ji"
+        assert isinstance(results[1], LLMQueueTimeout)
+        assert client.stats()["rejected"] == 1
+
+    @pytest.mark.asyncio
+    async def test_nova_chat_stream_endpoint(self, monkeypatch):
+        """Test /nova/chat/stream relays tokens as server-sent events"""
+        from app.api.v1.nova import stream_chat_with_nova
+        from app.services.groq import groq_service
+
+        async with StubLLMServer(tokens=("Hello", " there")) as server:
+            client = AsyncLLMClient(server.base_url, "test-key")
+            monkeypatch.setattr(groq_service, "llm", client)
+            response = await stream_chat_with_nova(message="hi", language="en", user={"id": "u1"})
+            body = "".join([chunk async for chunk in response.body_iterator])
+            await client.aclose()
+
+        assert response.media_type == "text/event-stream"
+        events = [e[len("data: "):] for e in body.strip().split("\n\n")]
+        assert [json.loads(e)["token"] for e in events[:-1]] == ["Hello", " there"]
+        assert events[-1] == "[DONE]"
+        assert server.requests[0]["stream"] is True
+        assert server.requests[0]["messages"][0]["role"] == "system"
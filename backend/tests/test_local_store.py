@@ -0,0 +1,129 @@
+"""
+Tests for the local fallback store engine
+"""
+
+import pytest
+from decimal import Decimal
+
+from app.services.local_store import create_local_store
+
+
+class TestLocalTable:
+    """Tests for LocalTable indexes"""
+
+    @pytest.fixture
+    def table(self):
+        store = create_local_store("memory", "")
+        return store.table("vouches", indexes=("voucher_id", "vouchee_id"))
+
+    def test_secondary_index_lookup(self, table):
+        """Test rows are found through their indexed fields"""
+        table.insert({"id": "v-1", "voucher_id": "a", "vouchee_id": "b"})
+        table.insert({"id": "v-2", "voucher_id": "a", "vouchee_id": "c"})
+
+        assert [v["id"] for v in table.find("voucher_id", "a")] == ["v-1", "v-2"]
+        assert table.count("vouchee_id", "c") == 1
+        assert table.find("vouchee_id", "missing") == []
+
+    def test_update_moves_index_entry(self, table):
+        """Test updating an indexed field re-indexes the row"""
+        table.insert({"id": "v-1", "voucher_id": "a", "vouchee_id": "b"})
+        table.update("v-1", {"vouchee_id": "c"})
+
+        assert table.find("vouchee_id", "b") == []
+        assert table.find_one("vouchee_id", "c")["id"] == "v-1"
+
+    def test_reads_return_copies(self, table):
+        """Test callers cannot mutate stored rows"""
+        table.insert({"id": "v-1", "voucher_id": "a", "meta": {"x": 1}})
+        row = table.get("v-1")
+        row["meta"]["x"] = 2
+
+        assert table.get("v-1")["meta"]["x"] == 1
+
+    def test_rows_are_json_normalized(self, table):
+        """Test stored values match what a restart would load"""
+        stored = table.insert({"id": "v-1", "saathi_staked": Decimal("50.5")})
+
+        assert stored["saathi_staked"] == "50.5"
+
+
+class TestWALEngine:
+    """Tests for WAL persistence and compaction"""
+
+    def _open(self, directory, compact_every=1000):
+        store = create_local_store("wal", str(directory), compact_every=compact_every)
+        return store, store.table("loans", indexes=("borrower_id",))
+
+    def test_replay_after_restart(self, tmp_path):
+        """Test writes survive a restart through the log alone"""
+        store, loans = self._open(tmp_path)
+        loans.insert({"id": "l-1", "borrower_id": "u-1", "amount": 100})
+        loans.update("l-1", {"amount": 200})
+        loans.insert({"id": "l-2", "borrower_id": "u-1"})
+        loans.delete("l-2")
+        store.close()
+
+        _, reopened = self._open(tmp_path)
+        assert len(reopened) == 1
+        assert reopened.get("l-1")["amount"] == 200
+
+    def test_compaction_folds_log_into_snapshot(self, tmp_path):
+        """Test background compaction keeps every row and truncates the log"""
+        store, loans = self._open(tmp_path, compact_every=5)
+        for i in range(12):
+            loans.insert({"id": f"l-{i}", "borrower_id": f"u-{i % 3}"})
+        store.flush()
+        store.close()
+
+        assert not (tmp_path / "loans.wal").exists()
+        _, reopened = self._open(tmp_path)
+        assert len(reopened) == 12
+        assert reopened.count("borrower_id", "u-0") == 4
+
+    def test_seed_only_for_fresh_table(self, tmp_path):
+        """Test seed rows are applied once, not after rows were deleted"""
+        seed = lambda: [{"id": "l-seed", "borrower_id": "u-demo"}]
+        store = create_local_store("wal", str(tmp_path))
+        loans = store.table("loans", indexes=("borrower_id",), seed_rows=seed)
+        loans.delete("l-seed")
+        store.close()
+
+        store = create_local_store("wal", str(tmp_path))
+        loans = store.table("loans", indexes=("borrower_id",), seed_rows=seed)
+        assert len(loans) == 0
+
+    def test_workers_share_one_directory(self, tmp_path):
+        """Test two stores on one directory (two gunicorn workers) see and keep each other's rows"""
+        store_a, loans_a = self._open(tmp_path, compact_every=3)
+        store_b, loans_b = self._open(tmp_path, compact_every=1000)
+        loans_a.insert({"id": "a1", "borrower_id": "u-1"})
+        loans_b.insert({"id": "b1", "borrower_id": "u-1"})
+        loans_b.insert({"id": "b2", "borrower_id": "u-2"})
+        assert loans_a.count("borrower_id", "u-1") == 2
+
+        loans_a.insert({"id": "a2", "borrower_id": "u-2"})  # Compacts: snapshot must keep b1/b2
+        store_a.flush()
+        loans_b.update("b1", {"amount": 5})  # B follows the rotated log
+        loans_a.delete("a1")
+
+        assert sorted(r["id"] for r in loans_b.all()) == ["a2", "b1", "b2"]
+        assert loans_a.get("b1")["amount"] == 5
+        store_a.close()
+        store_b.close()
+
+        _, reopened = self._open(tmp_path)
+        assert sorted(r["id"] for r in reopened.all()) == ["a2", "b1", "b2"]
+
+    def test_update_if_claims_once_across_workers(self, tmp_path):
+        """Test a compare-and-set claim succeeds in one worker only"""
+        store_a, loans_a = self._open(tmp_path)
+        store_b, loans_b = self._open(tmp_path)
+        loans_a.insert({"id": "l1", "status": "queued"})
+
+        assert loans_b.update_if("l1", {"status": "queued"}, {"status": "sending", "owner": "b"})["owner"] == "b"
+        assert loans_a.update_if("l1", {"status": "queued"}, {"status": "sending", "owner": "a"}) is None
+        assert loans_a.get("l1")["owner"] == "b"
+        assert loans_a.update_if("missing", {}, {"status": "sending"}) is None
+        store_a.close()
+        store_b.close()
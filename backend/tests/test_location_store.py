@@ -0,0 +1,82 @@
+"""
+Tests for the shared, persistent location store
+"""
+
+import pytest
+
+from app.services.location_store import LocationStore, LocationStoreFullError
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "locations.bin")
+
+
+class TestLocationStore:
+    """Tests for LocationStore"""
+
+    def test_workers_see_each_others_updates(self, path):
+        """Test a location written by one process is queryable from another"""
+        worker_a = LocationStore(path, slots=1024)
+        worker_b = LocationStore(path, slots=1024)
+
+        worker_a.update("u-1", 9.931, 76.267, now=1000)
+        worker_a.update("u-2", 9.935, 76.270, now=1000)
+
+        assert [uid for uid, _ in worker_b.index.within(9.93, 76.26, 5, now=1000)] == []
+        worker_b.sync()
+        assert [uid for uid, _ in worker_b.index.within(9.93, 76.26, 5, now=1000)] == ["u-1", "u-2"]
+        worker_a.close()
+        worker_b.close()
+
+    def test_survives_restart(self, path):
+        """Test locations are reloaded from the file"""
+        store = LocationStore(path, slots=1024, ttl=10**12)
+        store.update("u-1", 12.971, 77.594)
+        store.close()
+
+        reopened = LocationStore(path, slots=1024, ttl=10**12)
+        assert reopened.get("u-1")["latitude"] == 12.971
+        reopened.close()
+
+    def test_updates_coalesced(self, path):
+        """Test rapid or unchanged pings are not rewritten"""
+        store = LocationStore(path, slots=1024, min_interval=30, refresh_interval=300)
+
+        assert store.update("u-1", 9.931, 76.267, now=1000)
+        assert not store.update("u-1", 9.940, 76.267, now=1010)  # too soon
+        assert not store.update("u-1", 9.931, 76.267, now=1100)  # unchanged
+        assert store.update("u-1", 9.940, 76.267, now=1100)  # moved
+        assert store.update("u-1", 9.940, 76.267, now=1400)  # refresh
+        assert store.stats()["coalesced"] == 2
+        store.close()
+
+    def test_expired_locations_removed(self, path):
+        """Test purged records disappear from every worker's index"""
+        worker_a = LocationStore(path, slots=1024, ttl=60)
+        worker_b = LocationStore(path, slots=1024, ttl=60)
+        worker_a.update("u-old", 9.931, 76.267, now=1000)
+        worker_a.update("u-new", 9.932, 76.267, now=1050)
+        worker_b.sync()
+
+        assert worker_a.purge_expired(now=1070) == 1
+        worker_b.sync()
+        assert "u-old" not in worker_b.index
+        assert "u-new" in worker_b.index
+        worker_a.close()
+        worker_b.close()
+
+    def test_full_probe_window_rejects_instead_of_evicting(self, path):
+        """Test a new user cannot overwrite a live location when its probe window is full"""
+        store = LocationStore(path, slots=LocationStore.PROBES, ttl=60)
+        users = [f"u-{n}" for n in range(LocationStore.PROBES)]
+        for user_id in users:
+            store.update(user_id, 9.931, 76.267, now=1000)
+
+        with pytest.raises(LocationStoreFullError):
+            store.update("u-new", 9.931, 76.267, now=1010)
+        assert store.stats()["rejected"] == 1
+        assert all(store.index.get(user_id) for user_id in users)
+
+        assert store.update("u-new", 9.931, 76.267, now=1070)  # Expired slots are reusable
+        store.close()
@@ -0,0 +1,69 @@
+"""
+Tests for the pooled Mastra client and its fast-fail health tracking
+"""
+
+import httpx
+import pytest
+
+from app.services.mastra import MastraService
+
+
+def _service(handler) -> MastraService:
+    service = MastraService()
+    service._client = httpx.AsyncClient(base_url="http://mastra.test", transport=httpx.MockTransport(handler))
+    return service
+
+
+class TestMastraService:
+    """Tests for MastraService"""
+
+    @pytest.mark.asyncio
+    async def test_calls_share_one_client(self):
+        """Test every call goes through the same pooled client"""
+        paths = []
+
+        def handler(request):
+            paths.append(request.url.path)
+            return httpx.Response(200, json={"success": True})
+
+        service = _service(handler)
+        client = service.client
+        await service.chat("u-1", "hi")
+        await service.assess_risk("u-1", 500, {})
+
+        assert service.client is client
+        assert paths == ["/agents/nova/chat", "/agents/risk-oracle/assess"]
+        await service.aclose()
+
+    @pytest.mark.asyncio
+    async def test_skips_calls_while_down(self):
+        """Test repeated connect errors open the circuit and later calls return without I/O"""
+        calls = []
+
+        def handler(request):
+            calls.append(request)
+            raise httpx.ConnectError("connection refused", request=request)
+
+        service = _service(handler)
+        for _ in range(service.circuit.failure_threshold):
+            result = await service.chat("u-1", "hi")
+            assert result["fallback"] is True
+
+        assert service.available is False
+        result = await service.run_loan_workflow("u-1", 500, "seeds", {})
+
+        assert result["fallback"] is True
+        assert len(calls) == service.circuit.failure_threshold
+        assert service.stats()["skipped"] == 1
+        await service.aclose()
+
+    @pytest.mark.asyncio
+    async def test_client_errors_do_not_trip_circuit(self):
+        """Test 4xx responses are reported but do not mark Mastra as down"""
+        service = _service(lambda request: httpx.Response(422, json={"error": "bad input"}))
+        for _ in range(service.circuit.failure_threshold + 1):
+            result = await service.check_fraud({})
+            assert result["success"] is False
+
+        assert service.available is True
+        await service.aclose()
@@ -0,0 +1,137 @@
+"""
+Tests for the nearby users endpoint
+"""
+
+import asyncio
+import time
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.api.v1 import nearby
+from app.services.geo_index import GeoGridIndex
+
+
+class TestGetNearbyUsers:
+    """Tests for get_nearby_users"""
+
+    @pytest.fixture
+    def index(self):
+        index = GeoGridIndex(cell_deg=0.05)
+        index.upsert("me", 9.930, 76.260)
+        for i, offset in enumerate([0.01, 0.02, 0.03, 0.04]):
+            index.upsert(f"u{i}", 9.930 + offset, 76.260)
+        return index
+
+    @pytest.fixture
+    def store(self):
+        store = MagicMock()
+        scores = {"u0": 90, "u1": 40, "u2": 70, "u3": 85}
+        store.get_profiles_by_ids = AsyncMock(side_effect=lambda ids: {
+            uid: {"id": uid, "full_name": uid.upper(), "trust_score": scores[uid], "metadata": {}}
+            for uid in ids
+        })
+        store.count_vouches_received_bulk = AsyncMock(side_effect=lambda ids: {uid: 2 for uid in ids})
+        store.get_completed_loan_counts_bulk = AsyncMock(side_effect=lambda ids: {uid: 5 for uid in ids})
+        store.get_circle_names_bulk = AsyncMock(side_effect=lambda ids, per_user=3: {uid: ["Kochi"] for uid in ids})
+        return store
+
+    @pytest.mark.asyncio
+    async def test_filters_and_limits_before_hydrating(self, index, store):
+        """Test only the top `limit` trusted users are hydrated, in bulk"""
+        with patch.object(nearby, "_location_store", index), patch.object(nearby, "supabase_service", store):
+            users = await nearby.get_nearby_users(
+                radius_km=10, min_trust_score=60, limit=2, current_user={"id": "me"}
+            )
+
+        assert [u.id for u in users] == ["u0", "u2"]
+        assert users[0].vouches_received == 2
+        assert "Reliable Borrower" in users[0].badges
+        store.count_vouches_received_bulk.assert_awaited_once_with(["u0", "u2"])
+        store.get_profile.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_hydration_queries_overlap(self, index, store):
+        """Test the three stat queries run concurrently"""
+        def slow(result):
+            async def query(ids, **kwargs):
+                await asyncio.sleep(0.1)  # Round trip offloaded by the service
+                return {uid: result for uid in ids}
+            return query
+
+        store.count_vouches_received_bulk = slow(2)
+        store.get_completed_loan_counts_bulk = slow(5)
+        store.get_circle_names_bulk = slow(["Kochi"])
+        with patch.object(nearby, "_location_store", index), patch.object(nearby, "supabase_service", store):
+            start = time.perf_counter()
+            users = await nearby.get_nearby_users(radius_km=10, min_trust_score=60, limit=2, current_user={"id": "me"})
+
+        assert time.perf_counter() - start < 0.25
+        assert users[0].loans_completed == 5 and users[0].circles == ["Kochi"]
+
+    @pytest.mark.asyncio
+    async def test_failed_stat_query_degrades(self, index, store):
+        """Test a failing stat query leaves its count empty instead of failing the request"""
+        store.count_vouches_received_bulk = AsyncMock(side_effect=RuntimeError("dictionary changed size during iteration"))
+        with patch.object(nearby, "_location_store", index), patch.object(nearby, "supabase_service", store):
+            users = await nearby.get_nearby_users(radius_km=10, min_trust_score=60, limit=2, current_user={"id": "me"})
+
+        assert [user.id for user in users] == ["u0", "u2"]
+        assert users[0].vouches_received == 0
+        assert users[0].loans_completed == 5
+
+
+class TestUpdateLocation:
+    """Tests for update_location"""
+
+    @pytest.mark.asyncio
+    async def test_location_merged_into_metadata(self):
+        """Test saving a location keeps the XP, badges and streak in the profile metadata"""
+        locations = MagicMock()
+        locations.get.return_value = None
+        locations.update.return_value = True
+        store = MagicMock()
+        store.get_profile = AsyncMock(return_value={"id": "me", "metadata": {"xp": 120, "badges": ["First Vouch"], "streak_days": 4}})
+        store.update_profile = AsyncMock()
+
+        with patch.object(nearby, "_location_store", locations), patch.object(nearby, "supabase_service", store):
+            await nearby.update_location(nearby.LocationUpdate(latitude=9.93012, longitude=76.26049), current_user={"id": "me"})
+
+        metadata = store.update_profile.await_args.args[1]["metadata"]
+        assert metadata["xp"] == 120 and metadata["badges"] == ["First Vouch"] and metadata["streak_days"] == 4
+        assert (metadata["location"]["lat"], metadata["location"]["lng"]) == (9.93, 76.26)
+
+    @pytest.mark.asyncio
+    async def test_full_location_store_still_saves_profile(self):
+        """Test a location the shared store rejects is still kept in the profile"""
+        locations = MagicMock()
+        locations.get.return_value = None
+        locations.update.side_effect = nearby.LocationStoreFullError("no free location slot for me")
+        store = MagicMock()
+        store.get_profile = AsyncMock(return_value={"id": "me", "metadata": {}})
+        store.update_profile = AsyncMock()
+
+        with patch.object(nearby, "_location_store", locations), patch.object(nearby, "supabase_service", store):
+            result = await nearby.update_location(nearby.LocationUpdate(latitude=9.93012, longitude=76.26049), current_user={"id": "me"})
+
+        assert result["success"]
+        assert store.update_profile.await_args.args[1]["metadata"]["location"]["lat"] == 9.93
+
+
+class TestLocationStoreLifecycle:
+    """Tests for the lazily opened location store"""
+
+    def test_opened_on_first_use(self, tmp_path, monkeypatch):
+        """Test importing the module creates no file; first use opens it at the configured path"""
+        path = tmp_path / "locations.bin"
+        monkeypatch.setattr(nearby.settings, "location_store_path", str(path))
+        monkeypatch.setattr(nearby.settings, "location_store_slots", 64)
+        monkeypatch.setattr(nearby, "_location_store", None)
+        assert not path.exists()
+
+        store = nearby.get_location_store()
+        assert nearby.get_location_store() is store
+        assert path.exists()
+
+        nearby.close_location_store()
+        assert nearby._location_store is None
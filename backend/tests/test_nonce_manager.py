@@ -0,0 +1,136 @@
+"""
+Tests for local nonce allocation and pipelined transaction submission
+"""
+
+import asyncio
+import time
+
+import pytest
+import rlp
+from eth_account import Account
+from unittest.mock import AsyncMock, MagicMock
+
+from app.services.advanced_blockchain import AdvancedBlockchainService
+from app.services.nonce_manager import NonceManager, is_nonce_error
+
+RPC_LATENCY = 0.01
+
+
+class DevChain:
+    """In-process stand-in for a dev node: every RPC costs RPC_LATENCY, nonces are enforced"""
+
+    def __init__(self, start_nonce: int = 0):
+        self.used = set(range(start_nonce))
+        self.count_calls = 0
+        self.fail_next_send = None
+
+    @property
+    def eth(self):
+        return self
+
+    @property
+    def gas_price(self):
+        async def price():
+            await asyncio.sleep(RPC_LATENCY)
+            return 30 * 10**9
+        return price()
+
+    async def get_transaction_count(self, address, block="latest"):
+        self.count_calls += 1
+        await asyncio.sleep(RPC_LATENCY)
+        return max(self.used, default=-1) + 1
+
+    async def estimate_gas(self, tx):
+        await asyncio.sleep(RPC_LATENCY)
+        return 50000
+
+    async def send_raw_transaction(self, raw):
+        await asyncio.sleep(RPC_LATENCY)
+        if self.fail_next_send:
+            error, self.fail_next_send = self.fail_next_send, None
+            raise error
+        nonce = int.from_bytes(rlp.decode(bytes(raw))[0], "big")
+        if nonce in self.used:
+            raise ValueError({"code": -32000, "message": "nonce too low"})
+        self.used.add(nonce)
+        return nonce.to_bytes(32, "big")
+
+
+class ContractCall:
+    async def build_transaction(self, params):
+        return {**params, "to": "0x" + "11" * 20, "value": 0, "data": "0x"}
+
+
+@pytest.fixture
+def service():
+    chain = DevChain()
+    service = AdvancedBlockchainService()
+    service.account = Account.create()
+    service._rpc = AsyncMock(return_value=chain)
+    service.confirmations = MagicMock(watch=lambda *args: asyncio.get_running_loop().create_future())
+    service.chain = chain
+    return service
+
+
+class TestNonceManager:
+    """Tests for NonceManager"""
+
+    @pytest.mark.asyncio
+    async def test_seeded_once_and_released_nonces_reused(self):
+        """Test one chain read, sequential nonces, and gap-free reuse of unsent ones"""
+        fetch = AsyncMock(return_value=7)
+        nonces = NonceManager(fetch)
+
+        assert await asyncio.gather(*(nonces.allocate() for _ in range(3))) == [7, 8, 9]
+        nonces.release(8)
+        assert await nonces.allocate() == 8
+        assert await nonces.allocate() == 10
+        fetch.assert_awaited_once()
+
+        fetch.return_value = 15
+        assert await nonces.resync() == 15
+        assert await nonces.allocate() == 15
+
+    def test_nonce_error_detection(self):
+        """Test node rejections are recognised from their messages"""
+        assert is_nonce_error(ValueError({"message": "Nonce too low"}))
+        assert is_nonce_error(Exception("already known"))
+        assert not is_nonce_error(Exception("insufficient funds"))
+
+
+class TestPipelinedSends:
+    """Tests for AdvancedBlockchainService.send_transaction against the stand-in chain"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_sends_are_pipelined(self, service):
+        """Test 20 concurrent writes get distinct nonces without serializing on the chain"""
+        start = time.perf_counter()
+        hashes = await asyncio.gather(*(service.send_transaction(ContractCall()) for _ in range(20)))
+        elapsed = time.perf_counter() - start
+
+        assert len(set(hashes)) == 20
+        assert service.chain.used == set(range(20))
+        assert service.chain.count_calls == 1
+        assert elapsed < 20 * 3 * RPC_LATENCY / 2  # Sequential would be ~3 round trips per tx
+
+    @pytest.mark.asyncio
+    async def test_resync_when_wallet_used_elsewhere(self, service):
+        """Test a nonce taken by another sender triggers a resync and an immediate retry"""
+        await service.send_transaction(ContractCall())
+        service.chain.used.update({1, 2})  # Another process sent two transactions
+
+        await service.send_transaction(ContractCall())
+
+        assert service.chain.used == {0, 1, 2, 3}
+        assert service.nonces.resyncs == 1
+
+    @pytest.mark.asyncio
+    async def test_failed_send_leaves_no_gap(self, service, monkeypatch):
+        """Test a nonce whose send failed is reused by the next transaction"""
+        monkeypatch.setattr(asyncio, "sleep", AsyncMock())  # Skip retry backoff
+        service.chain.fail_next_send = ConnectionError("connection reset")
+
+        await service.send_transaction(ContractCall())
+
+        assert service.chain.used == {0}
+        assert service.nonces.reused == 1
@@ -0,0 +1,211 @@
+"""
+Tests for Orchestrator Infrastructure
+"""
+
+import asyncio
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.ai.context_loader import ContextLoader, ContextSource
+from app.ai.context_cache import ContextCache
+from app.ai.engine import AgentContext, AgentResult, BaseAgent
+from app.ai.workflow import WorkflowExecutor, validate_workflow
+from app.services.supabase import SupabaseService
+
+
+class TestContextLoader:
+    """Tests for concurrent context assembly"""
+
+    @staticmethod
+    def _source(name, value, delay=0.0, **kwargs):
+        async def fetch(user_id):
+            await asyncio.sleep(delay)
+            if isinstance(value, Exception):
+                raise value
+            return value
+        return ContextSource(name, fetch, **kwargs)
+
+    @pytest.mark.asyncio
+    async def test_sources_load_concurrently(self):
+        """Test total latency is bounded by the slowest source, not the sum"""
+        loader = ContextLoader([
+            self._source("profile", {"id": "u-1"}, delay=0.05),
+            self._source("loans", [1], delay=0.05),
+            self._source("vouches", [2], delay=0.05),
+        ])
+
+        values, report = await loader.load("u-1")
+
+        assert values == {"profile": {"id": "u-1"}, "loans": [1], "vouches": [2]}
+        assert report.total_ms < 140
+        assert set(report.latency_ms) == {"profile", "loans", "vouches"}
+
+    @pytest.mark.asyncio
+    async def test_slow_source_returns_partial_result(self):
+        """Test a timed-out source falls back to its default"""
+        loader = ContextLoader([
+            self._source("profile", {"id": "u-1"}),
+            self._source("diary", [1, 2], delay=1.0, default=list, timeout=0.05),
+        ])
+
+        values, report = await loader.load("u-1")
+
+        assert values["profile"] == {"id": "u-1"}
+        assert values["diary"] == []
+        assert report.status["diary"] == "timeout"
+        assert report.missing == ["diary"]
+
+    @pytest.mark.asyncio
+    async def test_failing_source_returns_default(self):
+        """Test a raising source does not fail the whole load"""
+        loader = ContextLoader([
+            self._source("loans", RuntimeError("db down"), default=list),
+        ])
+
+        values, report = await loader.load("u-1")
+
+        assert values["loans"] == []
+        assert report.status["loans"] == "error"
+
+    @pytest.mark.asyncio
+    async def test_supabase_reads_overlap_and_time_out(self):
+        """Test service reads behind the sync supabase client still overlap and time out"""
+        def table(rows, delay):
+            query = MagicMock()
+            for step in ("select", "eq", "order", "limit"):
+                getattr(query, step).return_value = query
+
+            def execute():
+                time.sleep(delay)  # Blocking round trip, like supabase-py
+                return MagicMock(data=rows)
+            query.execute.side_effect = execute
+            return query
+
+        tables = {
+            "profiles": table([{"id": "u-1"}], 0.1),
+            "loans": table([{"id": "l-1"}], 0.1),
+            "diary_entries": table([{"id": "d-1"}], 0.3),
+        }
+        service = SupabaseService()
+        service._client = MagicMock()
+        service._client.table.side_effect = tables.__getitem__
+        loader = ContextLoader([
+            ContextSource("profile", service.get_profile),
+            ContextSource("loans", service.get_user_loans),
+            ContextSource("diary", service.get_diary_entries, default=list, timeout=0.05),
+        ])
+
+        values, report = await loader.load("u-1")
+
+        assert values["profile"]["id"] == "u-1"
+        assert values["loans"] == [{"id": "l-1"}]
+        assert values["diary"] == []
+        assert report.total_ms < 180
+        assert report.status["diary"] == "timeout"
+
+
+class TestContextCache:
+    """Tests for the per-user AgentContext cache"""
+
+    def test_hit_returns_fresh_copy(self):
+        """Test cached contexts are not polluted by per-request writes"""
+        cache = ContextCache(max_entries=10, ttl=60)
+        context = cache.put("u-1", AgentContext(user_id="u-1", trust_score=70))
+        context.agent_results["Nova"] = {"intent": "chat"}
+
+        cached = cache.get("u-1")
+
+        assert cached.trust_score == 70
+        assert cached.agent_results == {}
+        assert cache.stats()["hits"] == 1
+
+    def test_invalidate_on_write(self):
+        """Test a write listener call drops the user's entry"""
+        cache = ContextCache(max_entries=10, ttl=60)
+        cache.put("u-1", AgentContext(user_id="u-1"))
+
+        cache.invalidate("u-1", "create_vouch")
+
+        assert cache.get("u-1") is None
+        assert cache.stats()["invalidations"] == 1
+
+    def test_lru_eviction_and_ttl(self):
+        """Test the cache is bounded by size and age"""
+        cache = ContextCache(max_entries=2, ttl=60)
+        for uid in ("u-1", "u-2", "u-3"):
+            cache.put(uid, AgentContext(user_id=uid))
+
+        assert cache.get("u-1") is None
+        assert cache.stats()["evictions"] == 1
+
+        cache.ttl = -1
+        assert cache.get("u-3") is None
+
+
+class _SleepyAgent(BaseAgent):
+    """Test agent that sleeps, records its inputs and returns a fixed result"""
+
+    def __init__(self, name, delay=0.0, result=None):
+        super().__init__(name=name, description="test")
+        self.delay = delay
+        self.fixed_result = result or {}
+        self.seen_results = None
+
+    async def execute(self, context):
+        self.seen_results = dict(context.agent_results)
+        await asyncio.sleep(self.delay)
+        return AgentResult(
+            agent_name=self.name,
+            success=True,
+            result=self.fixed_result,
+            reasoning_trace=self.create_trace("test"),
+        )
+
+
+class TestWorkflowExecutor:
+    """Tests for DAG workflow execution"""
+
+    @pytest.mark.asyncio
+    async def test_independent_agents_run_concurrently(self):
+        """Test agents without dependencies overlap and dependents wait"""
+        agents = {
+            "FraudGuard": _SleepyAgent("FraudGuard", 0.05, {"verdict": "CLEAR"}),
+            "RiskOracle": _SleepyAgent("RiskOracle", 0.05, {"risk_score": 0.2}),
+            "ActionAgent": _SleepyAgent("ActionAgent"),
+        }
+        graph = {"FraudGuard": [], "RiskOracle": [], "ActionAgent": ["RiskOracle"]}
+        context = AgentContext(user_id="u-1")
+
+        start = asyncio.get_event_loop().time()
+        run = await WorkflowExecutor(agents).run(graph, context)
+        elapsed = asyncio.get_event_loop().time() - start
+
+        assert elapsed < 0.09
+        assert agents["ActionAgent"].seen_results["RiskOracle"] == {"risk_score": 0.2}
+        assert [r.agent_name for r in run.ordered(graph)] == list(graph)
+
+    @pytest.mark.asyncio
+    async def test_block_cancels_siblings(self):
+        """Test a stop condition cancels in-flight agents"""
+        agents = {
+            "FraudGuard": _SleepyAgent("FraudGuard", 0.0, {"verdict": "BLOCK"}),
+            "LoanAdvisor": _SleepyAgent("LoanAdvisor", 1.0),
+        }
+        graph = {"FraudGuard": [], "LoanAdvisor": []}
+
+        run = await WorkflowExecutor(agents).run(
+            graph,
+            AgentContext(user_id="u-1"),
+            stop_when=lambda name, result: result.result.get("verdict") == "BLOCK",
+        )
+
+        assert run.stopped_by == "FraudGuard"
+        assert run.cancelled == ["LoanAdvisor"]
+        assert "LoanAdvisor" not in run.results
+
+    def test_cycle_rejected(self):
+        """Test cyclic workflows are rejected"""
+        with pytest.raises(ValueError, match="cycle"):
+            validate_workflow({"A": ["B"], "B": ["A"]})
@@ -0,0 +1,91 @@
+"""
+Tests for token-bucket rate limiting
+"""
+
+import pytest
+
+from app.rate_limit import (
+    MemoryBackend,
+    SharedMemoryBackend,
+    TokenBucketLimiter,
+    client_key,
+    parse_route_costs,
+)
+
+
+class TestTokenBucketLimiter:
+    """Tests for TokenBucketLimiter with the in-process backend"""
+
+    def test_burst_then_refill(self):
+        """Test the bucket allows a full burst, rejects, then refills over time"""
+        limiter = TokenBucketLimiter(requests_per_minute=3)
+        assert [limiter.acquire("ip:1", now=100.0)[0] for _ in range(4)] == [True, True, True, False]
+
+        allowed, _, retry_after = limiter.acquire("ip:1", now=100.0)
+        assert not allowed and retry_after == pytest.approx(20.0)
+        assert limiter.acquire("ip:1", now=120.0)[0]
+
+    def test_route_costs(self):
+        """Test expensive routes drain the bucket faster"""
+        limiter = TokenBucketLimiter(
+            requests_per_minute=10,
+            route_costs=parse_route_costs("POST /api/v1/nova/chat=5, /api/v1/trust-score=1"),
+        )
+        assert limiter.cost("POST", "/api/v1/nova/chat") == 5
+        assert limiter.cost("GET", "/api/v1/nova/chat") == 1
+
+        chat = limiter.cost("POST", "/api/v1/nova/chat")
+        assert limiter.acquire("auth:a", chat, now=0.0)[0]
+        assert limiter.acquire("auth:a", chat, now=0.0)[0]
+        assert not limiter.acquire("auth:a", chat, now=0.0)[0]
+
+    def test_idle_keys_expire(self):
+        """Test buckets are dropped once idle long enough to refill"""
+        backend = MemoryBackend()
+        limiter = TokenBucketLimiter(requests_per_minute=60, backend=backend)
+        limiter.acquire("ip:1", now=0.0)
+        limiter.acquire("ip:2", now=30.0)
+        limiter.acquire("ip:3", now=61.0)
+
+        assert len(backend) == 2
+        assert backend.expired == 1
+
+    def test_distinct_tokens_do_not_collide(self):
+        """Test every credential gets its own key"""
+        keys = {client_key(f"Bearer token-{i}") for i in range(20000)}
+        assert len(keys) == 20000
+        assert client_key("", "10.0.0.1") == "ip:10.0.0.1"
+
+
+class TestSharedMemoryBackend:
+    """Tests for the cross-process backend"""
+
+    def test_workers_share_limits(self, tmp_path):
+        """Test two backends on the same file see each other's spending"""
+        path = str(tmp_path / "ratelimit")
+        worker_a = TokenBucketLimiter(2, backend=SharedMemoryBackend(path, slots=64))
+        worker_b = TokenBucketLimiter(2, backend=SharedMemoryBackend(path, slots=64))
+
+        assert worker_a.acquire("auth:x", now=10.0)[0]
+        assert worker_b.acquire("auth:x", now=10.0)[0]
+        assert not worker_a.acquire("auth:x", now=10.0)[0]
+        assert worker_b.acquire("auth:y", now=10.0)[0]
+
+        worker_a.backend.close()
+        worker_b.backend.close()
+
+    def test_full_probe_window_rejects_instead_of_evicting(self, tmp_path):
+        """Test a new key cannot reset a live bucket when its probe window is full"""
+        backend = SharedMemoryBackend(str(tmp_path / "ratelimit"), slots=SharedMemoryBackend.PROBES)
+        limiter = TokenBucketLimiter(60, backend=backend)
+        keys = [f"auth:{n}" for n in range(SharedMemoryBackend.PROBES)]
+        for key in keys:
+            assert limiter.acquire(key, now=10.0)[0]
+
+        allowed, _, retry_after = limiter.acquire("auth:new", now=10.0)
+        assert not allowed and retry_after == pytest.approx(1.0)  # A bucket is full again in 1s
+        assert backend.collisions == 1
+        assert limiter.acquire(keys[0], now=10.0)[1] == pytest.approx(58.0)  # Bucket kept
+
+        assert limiter.acquire("auth:new", now=11.5)[0]  # Refilled buckets are reusable
+        backend.close()
@@ -0,0 +1,97 @@
+"""
+Tests for the trust network builder
+"""
+
+import asyncio
+import time
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.services import trust_network
+from app.services.supabase import SupabaseService
+from app.services.trust_network import build_trust_network, radial_layout, to_graph_payload
+
+# a -> b, a -> c, b -> d, c -> d, d -> a (cycle), d -> e
+VOUCHES = [("a", "b"), ("a", "c"), ("b", "d"), ("c", "d"), ("d", "a"), ("d", "e")]
+
+
+@pytest.fixture
+def store():
+    vouches = [
+        {"id": f"v{i}", "voucher_id": s, "vouchee_id": t, "status": "active", "saathi_staked": 10}
+        for i, (s, t) in enumerate(VOUCHES)
+    ]
+    store = MagicMock()
+    store.get_profiles_by_ids = AsyncMock(side_effect=lambda ids: {
+        uid: {"id": uid, "full_name": uid.upper(), "trust_score": 60} for uid in ids
+    })
+    store.get_vouches_given_bulk = AsyncMock(side_effect=lambda ids: {
+        uid: [v for v in vouches if v["voucher_id"] == uid] for uid in ids
+    })
+    store.get_vouches_received_bulk = AsyncMock(side_effect=lambda ids: {
+        uid: [v for v in vouches if v["vouchee_id"] == uid] for uid in ids
+    })
+    with patch.object(trust_network, "supabase_service", store):
+        yield store
+
+
+class TestBuildTrustNetwork:
+    """Tests for build_trust_network"""
+
+    @pytest.mark.asyncio
+    async def test_one_batch_per_level(self, store):
+        """Test each depth level is fetched in a single batched round trip"""
+        network = await build_trust_network("a", depth=2)
+
+        assert network.round_trips == 3
+        assert store.get_profiles_by_ids.await_count == 3
+        assert network.levels() == [["a"], ["b", "c"], ["d"]]
+        assert ("d", "a") in {(e["from"], e["to"]) for e in network.edges}
+        assert len(network.edges) == len({(e["from"], e["to"]) for e in network.edges})
+
+    @pytest.mark.asyncio
+    async def test_profile_query_does_not_block_loop(self, store):
+        """Test the blocking supabase profile query runs off the event loop"""
+        def execute():
+            time.sleep(0.1)  # Synchronous client round trip
+            return MagicMock(data=[{"id": "a", "full_name": "A", "trust_score": 60}])
+
+        service = SupabaseService()
+        service._client = MagicMock()
+        service._client.table.return_value.select.return_value.in_.return_value.execute.side_effect = execute
+        store.get_profiles_by_ids = service.get_profiles_by_ids
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        network = await build_trust_network("a", depth=0)
+        task.cancel()
+
+        assert list(network.nodes) == ["a"]
+        assert ticks >= 5
+
+    @pytest.mark.asyncio
+    async def test_node_budget(self, store):
+        """Test expansion stops at max_nodes and reports truncation"""
+        network = await build_trust_network("a", depth=3, max_nodes=2)
+
+        assert list(network.nodes) == ["a", "b"]
+        assert network.truncated
+
+    @pytest.mark.asyncio
+    async def test_layout_is_separate(self, store):
+        """Test positions come from the layout step, one ring per level"""
+        network = await build_trust_network("a", depth=1)
+        positions = radial_layout(network, origin=(0, 0), ring_spacing=100)
+        payload = to_graph_payload(network, positions)
+
+        assert positions["a"] == (0, 0)
+        assert positions["b"] == (100, 0)
+        assert payload["nodes"][0]["isCenter"] is True
+        assert payload["total_connections"] == len(network.edges)
@@ -0,0 +1,111 @@
+"""
+Tests for the two-tier TTS audio cache
+"""
+
+import asyncio
+import os
+import time
+from unittest.mock import AsyncMock
+
+import pytest
+
+from app.services.elevenlabs import ElevenLabsService
+from app.services.tts_cache import DiskLRU, MemoryLRU, TTSCache
+
+
+class TestMemoryLRU:
+    """Tests for MemoryLRU"""
+
+    def test_evicts_least_recent_by_bytes(self):
+        """Test the byte budget evicts the least recently used clips"""
+        lru = MemoryLRU(max_bytes=10)
+        lru.put("a", b"aaaa")
+        lru.put("b", b"bbbb")
+        lru.get("a")
+        lru.put("c", b"cccc")
+
+        assert "a" in lru and "c" in lru and "b" not in lru
+        assert lru.bytes == 8
+        lru.put("huge", b"x" * 11)
+        assert "huge" not in lru
+
+
+class TestDiskLRU:
+    """Tests for DiskLRU"""
+
+    @pytest.mark.asyncio
+    async def test_size_cap_and_atomic_files(self, tmp_path):
+        """Test the total size stays under the cap and no temp files are left"""
+        disk = DiskLRU(str(tmp_path), max_bytes=10)
+        await disk.put("a", b"aaaa")
+        await disk.put("b", b"bbbb")
+        assert await disk.get("a") == b"aaaa"  # Now most recent
+        await disk.put("c", b"cccc")
+
+        assert sorted(p.name for p in tmp_path.iterdir()) == ["a.mp3", "c.mp3"]
+        assert disk.bytes == 8 and disk.evictions == 1
+        assert await disk.get("b") is None
+
+    @pytest.mark.asyncio
+    async def test_index_rebuilt_from_directory(self, tmp_path):
+        """Test existing clips are indexed on start and interrupted writes removed"""
+        (tmp_path / "old.mp3").write_bytes(b"12345")
+        (tmp_path / ".new.abcd.tmp").write_bytes(b"partial")
+        (tmp_path / ".live.abcd.tmp").write_bytes(b"another worker writing")
+        stale = time.time() - DiskLRU.TMP_MAX_AGE - 1
+        os.utime(tmp_path / ".new.abcd.tmp", (stale, stale))
+        disk = DiskLRU(str(tmp_path), max_bytes=100)
+
+        assert "old" in disk and disk.bytes == 5
+        assert not (tmp_path / ".new.abcd.tmp").exists()
+        assert (tmp_path / ".live.abcd.tmp").exists()
+        assert await disk.get("old") == b"12345"
+
+    @pytest.mark.asyncio
+    async def test_cap_shared_by_workers(self, tmp_path):
+        """Test two workers on one directory stay under one cap and survive each other's evictions"""
+        worker_a = TTSCache(str(tmp_path), memory_bytes=0, disk_bytes=10)
+        worker_b = DiskLRU(str(tmp_path), max_bytes=10)
+        await worker_a.put("a", b"aaaa")
+        await worker_b.put("b", b"bbbb")
+        await worker_a.put("c", b"cccc")  # Evicts "a", the least recently used clip of either worker
+
+        assert sorted(p.name for p in tmp_path.glob("*.mp3")) == ["b.mp3", "c.mp3"]
+        assert worker_a.disk.bytes == 8
+        assert worker_a.peek("a") == (None, None)  # Falls back to synthesis
+        assert worker_a.peek("b")[1] == tmp_path / "b.mp3"
+
+
+class TestTTSCache:
+    """Tests for TTSCache and its use by ElevenLabsService"""
+
+    @pytest.mark.asyncio
+    async def test_disk_hit_promoted_and_counted(self, tmp_path):
+        """Test a clip found on disk is promoted to memory and counted in the stats"""
+        await DiskLRU(str(tmp_path), max_bytes=100).put("k", b"audio")
+        cache = TTSCache(str(tmp_path), memory_bytes=100, disk_bytes=100)
+
+        assert await cache.get("k") == b"audio"
+        assert await cache.get("k") == b"audio"
+        assert await cache.get("missing") is None
+        stats = cache.stats()
+        assert (stats["disk_hits"], stats["memory_hits"], stats["misses"]) == (1, 1, 1)
+        assert stats["bytes_served"] == 10
+        assert stats["hit_ratio"] == 0.667
+
+    @pytest.mark.asyncio
+    async def test_repeated_phrase_synthesized_once(self, tmp_path):
+        """Test concurrent and later requests for one phrase share a single API call"""
+        service = ElevenLabsService()
+        service.cache = TTSCache(str(tmp_path), memory_bytes=1000, disk_bytes=1000)
+
+        async def synthesize(text, voice):
+            await asyncio.sleep(0.01)
+            return b"mp3:" + text.encode()
+
+        service._synthesize = AsyncMock(side_effect=synthesize)
+        phrase = "How can I help you today?"
+        clips = await asyncio.gather(*(service.text_to_speech(phrase) for _ in range(5)))
+        assert await service.text_to_speech(phrase) == clips[0] == b"mp3:" + phrase.encode()
+        assert service._synthesize.await_count == 1
+        assert service.cache.stats()["memory_hits"] == 1
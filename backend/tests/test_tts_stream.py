@@ -0,0 +1,132 @@
+"""
+Tests for streaming TTS responses
+"""
+
+import asyncio
+
+import httpx
+import pytest
+from fastapi import HTTPException
+from fastapi.responses import FileResponse, Response, StreamingResponse
+
+from app.api.v1.nova import _voice_response, get_voice_clip, sign_clip, verify_clip_token
+from app.services.elevenlabs import ElevenLabsService
+from app.services.tts_cache import TTSCache
+
+
+class Upstream:
+    """ElevenLabs stand-in: the second chunk is held back until `release` is set"""
+
+    def __init__(self):
+        self.release = asyncio.Event()
+        self.requests = []
+
+    async def handler(self, request):
+        self.requests.append(request.url.path)
+
+        async def body():
+            yield b"ID3-first"
+            await self.release.wait()
+            yield b"-rest"
+
+        return httpx.Response(200, content=body(), headers={"content-type": "audio/mpeg"})
+
+
+@pytest.fixture
+def service(tmp_path):
+    upstream = Upstream()
+    service = ElevenLabsService()
+    service.cache = TTSCache(str(tmp_path), memory_bytes=1000, disk_bytes=1000)
+    service._client = httpx.AsyncClient(base_url=service.base_url, transport=httpx.MockTransport(upstream.handler))
+    service.upstream = upstream
+    return service
+
+
+class TestStreamingTTS:
+    """Tests for ElevenLabsService.stream and the Nova voice responses"""
+
+    @pytest.mark.asyncio
+    async def test_first_chunk_before_synthesis_ends(self, service):
+        """Test chunks are proxied as they arrive and the whole clip is cached afterwards"""
+        clip_id = service.prepare_clip("How can I help you today?")
+        chunks = service.stream(clip_id)
+
+        assert await asyncio.wait_for(chunks.__anext__(), 1) == b"ID3-first"
+        service.upstream.release.set()
+        assert [chunk async for chunk in chunks] == [b"-rest"]
+        await asyncio.gather(*service._cache_writes)
+
+        assert service.upstream.requests[0].endswith("/stream")
+        assert service.cached_clip(clip_id)[0] == b"ID3-first-rest"
+        assert service.cache.disk.path(clip_id).read_bytes() == b"ID3-first-rest"
+        assert service.stream_stats()["streams"] == 1
+
+    @pytest.mark.asyncio
+    async def test_aborted_stream_not_cached(self, service):
+        """Test a client that disconnects mid-clip leaves nothing half-written behind"""
+        clip_id = service.prepare_clip("Namaste")
+        chunks = service.stream(clip_id)
+        await chunks.__anext__()
+        await chunks.aclose()
+
+        assert service.cached_clip(clip_id) == (None, None)
+        assert clip_id not in service._inflight
+        assert service.has_clip(clip_id)  # Can still be fetched again
+
+    @pytest.mark.asyncio
+    async def test_voice_response_by_tier(self, service, monkeypatch):
+        """Test memory hits return bytes, disk hits a file, misses a stream"""
+        monkeypatch.setattr("app.api.v1.nova.elevenlabs_service", service)
+        service.upstream.release.set()
+        clip_id = service.prepare_clip("Your loan is approved")
+
+        response = await _voice_response(clip_id)
+        assert isinstance(response, StreamingResponse)
+        body = b"".join([chunk async for chunk in response.body_iterator])
+        assert body == b"ID3-first-rest"
+        await asyncio.gather(*service._cache_writes)
+
+        response = await _voice_response(clip_id)
+        assert type(response) is Response and response.body == body
+
+        service.cache.memory.discard(clip_id)
+        response = await _voice_response(clip_id)
+        assert isinstance(response, FileResponse)
+        assert service.cache.stats()["bytes_served"] == 2 * len(body)
+
+    @pytest.mark.asyncio
+    async def test_voice_url_token(self, service, monkeypatch):
+        """Test clips are served for a valid signed token only, without a Bearer header"""
+        monkeypatch.setattr("app.api.v1.nova.elevenlabs_service", service)
+        voice = service.voice_for("en")
+        clip_id = service.prepare_clip("Namaste", voice_id=voice)
+        await service.cache.put(clip_id, b"mp3")
+        token = sign_clip(clip_id, "u-1", "Namaste", voice)
+
+        assert verify_clip_token(clip_id, token) == ("Namaste", voice)
+        assert not verify_clip_token(service.prepare_clip("Other"), token)  # Bound to the clip
+        forged = sign_clip(clip_id, "u-2", "Other", voice).split(".")[0] + "." + token.split(".")[1]
+        assert not verify_clip_token(clip_id, forged)  # and to its user and text
+        assert not verify_clip_token(clip_id, sign_clip(clip_id, "u-1", "Namaste", voice, ttl=-1))
+        assert not verify_clip_token(clip_id, "garbage")
+
+        response = await get_voice_clip(clip_id, token=token)
+        assert response.body == b"mp3"
+        with pytest.raises(HTTPException) as error:
+            await get_voice_clip(clip_id, token=sign_clip(clip_id, "u-1", "Namaste", voice, ttl=-1))
+        assert error.value.status_code == 403
+
+    @pytest.mark.asyncio
+    async def test_voice_url_served_by_another_worker(self, service, monkeypatch):
+        """Test a worker that never prepared the clip synthesizes it from the token"""
+        monkeypatch.setattr("app.api.v1.nova.elevenlabs_service", service)
+        service.upstream.release.set()
+        voice = service.voice_for("hi")
+        clip_id = service.prepare_clip("Aapka loan manzoor hua", voice_id=voice)
+        token = sign_clip(clip_id, "u-1", "Aapka loan manzoor hua", voice)
+        service._clips.clear()  # Another worker handled /chat
+
+        response = await get_voice_clip(clip_id, token=token)
+
+        assert b"".join([chunk async for chunk in response.body_iterator]) == b"ID3-first-rest"
+        assert service.upstream.requests == [f"/v1/text-to-speech/{voice}/stream"]
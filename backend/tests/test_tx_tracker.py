@@ -0,0 +1,91 @@
+"""
+Tests for the shared transaction confirmation tracker
+"""
+
+import asyncio
+
+import pytest
+
+from app.services.tx_tracker import ConfirmationTracker
+
+
+class FakeChain:
+    """Minimal async eth namespace: blocks hold lists of tx hashes"""
+
+    def __init__(self):
+        self.blocks = [[]]
+        self.calls = {"block_number": 0, "get_block": 0, "get_transaction_receipt": 0}
+
+    @property
+    def eth(self):
+        return self
+
+    @property
+    def block_number(self):
+        async def head():
+            self.calls["block_number"] += 1
+            return len(self.blocks) - 1
+        return head()
+
+    async def get_block(self, number):
+        self.calls["get_block"] += 1
+        return {"number": number, "transactions": [bytes.fromhex(h[2:]) for h in self.blocks[number]]}
+
+    async def get_transaction_receipt(self, tx_hash):
+        self.calls["get_transaction_receipt"] += 1
+        for number, hashes in enumerate(self.blocks):
+            if tx_hash in hashes:
+                return {"blockNumber": number, "gasUsed": 21000, "status": 1}
+        return None
+
+    def mine(self, *hashes):
+        self.blocks.append(list(hashes))
+
+
+def tx(i: int) -> str:
+    return "0x" + f"{i:064x}"
+
+
+class TestConfirmationTracker:
+    """Tests for ConfirmationTracker"""
+
+    @pytest.mark.asyncio
+    async def test_one_poll_loop_for_many_transactions(self):
+        """Test receipts are only fetched for txs seen in new blocks"""
+        chain = FakeChain()
+        tracker = ConfirmationTracker(chain, poll_interval=0.005)
+        waits = [asyncio.ensure_future(tracker.wait(tx(i), confirmations=1, timeout=5)) for i in range(100)]
+        await asyncio.sleep(0.02)
+        lookups_before = chain.calls["get_transaction_receipt"]
+
+        chain.mine(*[tx(i) for i in range(50)])
+        await asyncio.sleep(0.02)
+        chain.mine(*[tx(i) for i in range(50, 100)])
+        await asyncio.sleep(0.02)
+        chain.mine()
+        results = await asyncio.gather(*waits)
+
+        assert all(r["confirmed"] and r["status"] == "success" for r in results)
+        assert {r["block_number"] for r in results} == {1, 2}
+        assert lookups_before == 100  # One direct lookup per newly tracked tx
+        assert chain.calls["get_transaction_receipt"] == 200
+        assert chain.calls["get_block"] == 2  # Blocks after the last inclusion are not fetched
+        assert len(tracker) == 0
+        await tracker.aclose()
+
+    @pytest.mark.asyncio
+    async def test_already_mined_and_timeout(self):
+        """Test a tx mined before tracking is found, and an unmined one times out"""
+        chain = FakeChain()
+        chain.mine(tx(1))
+        chain.mine()
+        tracker = ConfirmationTracker(chain, poll_interval=0.005)
+
+        mined, missing = await asyncio.gather(
+            tracker.wait(tx(1).upper().replace("0X", "0x"), confirmations=1, timeout=1),
+            tracker.wait(tx(2), confirmations=1, timeout=0.03),
+        )
+
+        assert mined["confirmed"] and mined["block_number"] == 1
+        assert missing == {"confirmed": False, "status": "timeout"}
+        await tracker.aclose()
@@ -0,0 +1,151 @@
+"""
+Tests for the vouch graph adjacency index
+"""
+
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.services.supabase import SupabaseService
+from app.services.vouch_graph import VouchGraph
+
+
+def vouch(vid, voucher, vouchee, status="active"):
+    return {"id": vid, "voucher_id": voucher, "vouchee_id": vouchee, "status": status, "saathi_staked": 10}
+
+
+@pytest.fixture
+def graph():
+    graph = VouchGraph()
+    graph.load([
+        vouch("v1", "a", "b"),
+        vouch("v2", "b", "a"),
+        vouch("v3", "a", "c"),
+        vouch("v4", "c", "a", status="revoked"),
+    ])
+    return graph
+
+
+class TestVouchGraph:
+    """Tests for VouchGraph"""
+
+    def test_adjacency(self, graph):
+        """Test forward and reverse lookups, optionally filtered by status"""
+        assert [v["id"] for v in graph.given("a")] == ["v1", "v3"]
+        assert [v["id"] for v in graph.received("a")] == ["v2", "v4"]
+        assert [v["id"] for v in graph.received("a", status="active")] == ["v2"]
+        assert graph.given("nobody") == []
+        assert graph.vouchees("a") == {"b", "c"}
+        assert graph.vouchers("a") == {"b"}
+
+    def test_reciprocal_ignores_inactive(self, graph):
+        """Test mutual vouching only counts active vouches in both directions"""
+        assert graph.reciprocal("a") == {"b"}
+        graph.upsert({"id": "v4", "status": "active"})
+        assert graph.reciprocal("a") == {"b", "c"}
+
+    def test_upsert_merges_status(self, graph):
+        """Test partial updates keep the rest of the row and its adjacency"""
+        graph.upsert({"id": "v1", "status": "slashed", "blockchain_tx_hash": "0xabc"})
+
+        row = graph.get("v1")
+        assert row["status"] == "slashed"
+        assert row["voucher_id"] == "a"
+        assert row["blockchain_tx_hash"] == "0xabc"
+        assert [v["id"] for v in graph.given("a")] == ["v3", "v1"]
+        assert graph.vouchees("a") == {"c"}
+
+    def test_remove(self, graph):
+        """Test removing a vouch drops it from both directions"""
+        assert graph.remove("v1")["vouchee_id"] == "b"
+        assert graph.remove("v1") is None
+        assert graph.get("v1") is None
+        assert "v1" not in [v["id"] for v in graph.received("b")]
+        assert len(graph) == 3
+
+    def test_user_versions(self, graph):
+        """Test only users touched by a change see their version move"""
+        before = {u: graph.user_version(u) for u in "abc"}
+        graph.upsert(vouch("v5", "b", "c"))
+
+        assert graph.user_version("a") == before["a"]
+        assert graph.user_version("b") > before["b"]
+        assert graph.user_version("c") > before["c"]
+        assert graph.version == graph.user_version("b")
+
+    def test_reload_only_touches_changed_users(self, graph):
+        """Test a periodic reload bumps just the users whose vouches changed"""
+        before = {u: graph.user_version(u) for u in "abcd"}
+        graph.load([
+            vouch("v1", "a", "b"),
+            vouch("v2", "b", "a"),
+            vouch("v4", "c", "a", status="revoked"),
+            vouch("v5", "b", "d"),
+        ])
+
+        assert graph.user_version("a") > before["a"] and graph.user_version("c") > before["c"]  # v3 dropped
+        assert graph.user_version("b") > before["b"] and graph.user_version("d") > before["d"]  # v5 added
+        assert graph.given("a") == [vouch("v1", "a", "b")]
+
+        version = graph.version
+        graph.load([vouch("v1", "a", "b"), vouch("v2", "b", "a"), vouch("v4", "c", "a", status="revoked"), vouch("v5", "b", "d")])
+        assert graph.version == version  # Unchanged reload
+
+    def test_returns_copies(self, graph):
+        """Test callers cannot mutate the index through returned rows"""
+        graph.given("a")[0]["status"] = "revoked"
+        graph.get("v3")["vouchee_id"] = "z"
+
+        assert graph.given("a", status="active")[0]["id"] == "v1"
+        assert graph.vouchees("a") == {"b", "c"}
+
+
+class TestVouchGraphRefresh:
+    """Tests for SupabaseService.get_vouch_graph reloads"""
+
+    @pytest.mark.asyncio
+    async def test_reload_runs_in_background(self):
+        """Test a stale graph is served while the reload runs and local writes survive it"""
+        rows = [vouch("v1", "a", "b")]
+
+        def execute():
+            time.sleep(0.2)  # Blocking client round trip
+            return MagicMock(data=[dict(row) for row in rows])
+
+        service = SupabaseService()
+        service._client = MagicMock()
+        service._client.table.return_value.select.return_value.execute.side_effect = execute
+
+        graph = await service.get_vouch_graph()
+        assert [v["id"] for v in graph.given("a")] == ["v1"]
+
+        rows.append(vouch("v2", "a", "c"))
+        graph.loaded_at -= 3600
+        start = time.perf_counter()
+        assert await service.get_vouch_graph() is graph
+        assert time.perf_counter() - start < 0.1
+        graph.upsert({"id": "v1", "status": "slashed"})  # Written after the reload started
+
+        await service._vouch_graph_refresh
+        assert [v["id"] for v in graph.given("a")] == ["v1", "v2"]
+        assert graph.get("v1")["status"] == "slashed"
+
+    @pytest.mark.asyncio
+    async def test_empty_remote_table_is_not_replaced_by_local_rows(self):
+        """Test an empty Supabase vouches table loads an empty graph; only a failed call uses local rows"""
+        service = SupabaseService()
+        service._client = MagicMock()
+        service._client.table.return_value.select.return_value.execute.return_value = MagicMock(data=[])
+        service._table = MagicMock()
+        service._table.return_value.all.return_value = [vouch("demo", "a", "b")]
+
+        graph = await service.get_vouch_graph()
+        assert len(graph) == 0
+        service._table.assert_not_called()
+
+        service._client.table.return_value.select.return_value.execute.side_effect = RuntimeError("unreachable")
+        graph.loaded_at -= 3600
+        await service.get_vouch_graph()
+        await service._vouch_graph_refresh
+        assert graph.get("demo") is not None